@@ -25,14 +25,26 @@
 # =========================================================
 
 import os, re, time, shutil
+import threading
+from collections import Counter
 from datetime import datetime
+from dataclasses import asdict
 from decimal import Decimal, InvalidOperation
 from difflib import SequenceMatcher
-import win32com.client as win32
 import warnings
 
 # Importar novos módulos v7.0
 from xml_nfe_reader import indexar_xmls_por_nota, extrair_dados_nfe
+from normalizacao_nomes import normalizar_pagador, normalizar_nome_empresa
+from indice_notas_pdf import IndiceNotasPDF
+from validacao_notas import ValidadorNotas
+from transporte_email import (
+    TRANSPORTE_ARQUIVO, ErroTransporte, MensagemEmail, TransporteOutlook, criar_transporte, separar_emails,
+)
+from caixa_saida import CaixaSaida, Despachante
+from registro_envios import MODO_PREVIEW as REGISTRO_PREVIEW, MODO_PRODUCAO as REGISTRO_PRODUCAO
+from registro_envios import ImpressaoBoleto, RegistroEnvios, identificar_boleto
+from pipeline import CAPACIDADE_PADRAO, Etapa, Pipeline, capturar_saida, em_bloco, imprimir_estatisticas
 from auditoria import (
     AuditoriaExecucao,
     BoletoAuditoria,
@@ -43,7 +55,11 @@ from auditoria import (
 )
 
 # Importar módulo de extratores isolados (v2.0 - Integração com renaming)
-from extractors import ExtractorFactory
+from extractors import ExtractorFactory, ParsedBoleto, codigo_barras
+from extractors.padroes import (
+    CNPJ_DANFE, CNPJ_FORA_DE_VALOR, CNPJ_PAGADOR_NOVAX, CNPJ_SECAO_PAGADOR_TRAVESSAO, CPF_PAGADOR_NOVAX,
+    NOTA_NOME_RENOMEADO, SECAO_PAGADOR, VALOR_TOTAL_NOTA, VENCIMENTO_AMPLO, VENCIMENTO_ROTULADO
+)
 
 # Importar configuração centralizada (versão servidor com caminhos dinâmicos)
 from config_server import (
@@ -54,6 +70,7 @@ from config_server import (
     PASTA_ENVIADOS,
     ASSINATURA_IMG,
     MODO_PREVIEW,
+    EMAIL_CONTA_COBRANCA,
     FIDC_CONFIG,
     FIDC_PADRAO,
     USAR_IA,
@@ -62,18 +79,32 @@ from config_server import (
     MAX_EMAILS_POR_CLIENTE,
     IA_TIMEOUT,
     IA_MODEL,
-    IA_TEMPERATURE
+    IA_TEMPERATURE,
+    LEITURA_PARCIAL_PDF,
+    TRANSPORTE_EMAIL,
+    PASTA_EML,
+    ARQUIVO_CAIXA_SAIDA,
+    ENVIO_WORKERS,
+    ENVIO_LIMITE_POR_SEGUNDO,
+    ENVIO_MAX_TENTATIVAS,
+    ENVIO_ESPERA_BASE_SEGUNDOS,
+    WORKERS_ENVIO_EXTRACAO,
+    USAR_REGISTRO_ENVIOS,
+    ARQUIVO_REGISTRO_ENVIOS,
+    REGISTRO_PARCELA_REPETIDA
 )
 
-# PDF reading para extração de CNPJ
-try:
-    import pdfplumber
-    PDF_DISPONIVEL = True
-except ImportError:
-    PDF_DISPONIVEL = False
+# PDF reading para extração de CNPJ (via pdf_texto): o motor de referência
+# de pdf_backends é o fallback de qualquer outro motor configurado
+from pdf_backends import MOTOR_SEGURO, obter_motor
+PDF_DISPONIVEL = obter_motor(MOTOR_SEGURO).disponivel
+if not PDF_DISPONIVEL:
     print("[AVISO] pdfplumber não instalado. Extração de CNPJ desabilitada.")
     print("   Para instalar: pip install pdfplumber")
 
+# Extração de texto com cache persistente (compartilhado com a renomeação)
+import pdf_texto
+
 # IA para extração inteligente de dados (IA primeira, regex fallback)
 try:
     from langchain_core.prompts import PromptTemplate
@@ -92,7 +123,7 @@ os.makedirs(PASTA_ENVIADOS, exist_ok=True)
 
 # -------------------- HELPERS --------------------
 def normalize_pagador(s: str) -> str:
-    return re.sub(r"\s+", " ", str(s or "")).strip().upper()
+    return normalizar_pagador(s)
 
 def valor_to_cents(valor) -> int | None:
     if valor is None:
@@ -182,18 +213,26 @@ def extrair_texto_pdf(caminho_pdf: str) -> str | None:
         return None
 
     try:
-        with pdfplumber.open(caminho_pdf) as pdf:
-            texto = ""
-            for pag in pdf.pages:
-                t = pag.extract_text()
-                if t:
-                    texto += t + "\n"
-            return texto if texto.strip() else None
+        # Reaproveita o texto lido na renomeação (cache por SHA-256 do PDF)
+        texto = pdf_texto.extrair_texto_pdf(caminho_pdf)
+        return texto if texto.strip() else None
     except Exception as e:
         print(f"      [ERRO] Falha ao ler PDF: {e}")
         return None
 
-def extrair_cnpj_do_pdf(caminho_pdf: str) -> str | None:
+def obter_documento_boleto(documento) -> ParsedBoleto:
+    """
+    Garante um ParsedBoleto a partir de um caminho de PDF ou de um
+    ParsedBoleto já criado.
+
+    O executar() cria um ParsedBoleto por boleto e passa o mesmo objeto
+    para todos os helpers abaixo: o PDF é lido uma única vez.
+    """
+    if isinstance(documento, ParsedBoleto):
+        return documento
+    return ParsedBoleto.de_arquivo(documento)
+
+def extrair_cnpj_do_pdf(documento) -> str | None:
     """
     Extrai CPF ou CNPJ do pagador do boleto PDF
     Usa IA primeiro, fallback para regex se falhar
@@ -203,10 +242,11 @@ def extrair_cnpj_do_pdf(caminho_pdf: str) -> str | None:
     if not PDF_DISPONIVEL:
         return None
 
+    doc = obter_documento_boleto(documento)
     try:
-        # Extrair texto do PDF
-        texto = extrair_texto_pdf(caminho_pdf)
-        if not texto:
+        # Texto do boleto (lido uma vez só)
+        texto = doc.texto
+        if doc.vazio:
             return None
 
         # TENTATIVA 1: Usar IA (se disponível)
@@ -238,11 +278,7 @@ Resposta (apenas números):"""
 
         # TENTATIVA 2.1A: Padrão específico NOVAX - CNPJ
         # "Pagador: NOME CNPJ/ CPF : XX.XXX.XXX/XXXX-XX"
-        match_novax_cnpj = re.search(
-            r'Pagador:\s*([A-Z\s]+)\s+CNPJ[\/\s]*CPF\s*[:\s]*(\d{2}\.\d{3}\.\d{3}\/\d{4}\-\d{2})',
-            texto,
-            re.IGNORECASE
-        )
+        match_novax_cnpj = CNPJ_PAGADOR_NOVAX.search(texto)
 
         if match_novax_cnpj:
             cnpj_limpo = normalizar_cnpj(match_novax_cnpj.group(2))
@@ -251,11 +287,7 @@ Resposta (apenas números):"""
 
         # TENTATIVA 2.1B: Padrão específico NOVAX - CPF
         # "Pagador: NOME CNPJ/ CPF : XXX.XXX.XXX-XX"
-        match_novax_cpf = re.search(
-            r'Pagador:\s*([A-Z\s]+)\s+CNPJ[\/\s]*CPF\s*[:\s]*(\d{3}\.\d{3}\.\d{3}\-\d{2})',
-            texto,
-            re.IGNORECASE
-        )
+        match_novax_cpf = CPF_PAGADOR_NOVAX.search(texto)
 
         if match_novax_cpf:
             cpf_limpo = normalizar_cnpj(match_novax_cpf.group(2))
@@ -266,11 +298,7 @@ Resposta (apenas números):"""
         # DESTINATÁRIO REMETENTE
         # NOME/RAZÃO SOCIAL                    CNPJ/CPF
         # EMPRESA LTDA                         XX.XXX.XXX/XXXX-XX
-        match_danfe = re.search(
-            r'DESTINAT[AÁ]RIO.*?CNPJ[\/\s]*CPF.*?[\r\n]+.*?(\d{2,3}[\.\s]?\d{3}[\.\s]?\d{3}[\/\-\s]?\d{2,4}[\-\s]?\d{2})',
-            texto,
-            re.IGNORECASE | re.DOTALL
-        )
+        match_danfe = CNPJ_DANFE.search(texto)
 
         if match_danfe:
             doc_limpo = normalizar_cnpj(match_danfe.group(1))
@@ -282,43 +310,21 @@ Resposta (apenas números):"""
         meio = len(texto) // 2
         segunda_metade = texto[meio:]
 
-        match_secao = re.search(
-            r'Pagador[:\s]+(.*?)(?:Instruções|Autenticação|Demonstrativo|Sacador|Código de Baixa|Beneficiário Final|$)',
-            segunda_metade,
-            re.IGNORECASE | re.DOTALL
-        )
+        match_secao = SECAO_PAGADOR.search(segunda_metade)
 
         # Se não achar na segunda metade, buscar no documento inteiro
         if not match_secao:
-            match_secao = re.search(
-                r'Pagador[:\s]+(.*?)(?:Instruções|Autenticação|Demonstrativo|Sacador|Código de Baixa|Beneficiário Final|$)',
-                texto,
-                re.IGNORECASE | re.DOTALL
-            )
+            match_secao = SECAO_PAGADOR.search(texto)
 
         if match_secao:
             secao_pagador = match_secao.group(1)
 
             # Padrões em ordem de prioridade (mais específico primeiro)
             # Nota: Agora aceitamos CNPJ (14 dígitos) ou CPF (11 dígitos)
-            padroes = [
-                # Padrão 1: "- CNPJ:" ou "- CPF:" (SQUID)
-                r'[-–]\s*(?:CNPJ|CPF)[:\s]+(\d{2,3}[\.\s]?\d{3}[\.\s]?\d{3}[\/\-\s]?\d{2,4}[\-\s]?\d{2})',
-                # Padrão 2: ", CNPJ:" ou ", CPF:" (CAPITAL RS)
-                r',\s*(?:CNPJ|CPF)[:\s]+(\d{2,3}[\.\s]?\d{3}[\.\s]?\d{3}[\/\-\s]?\d{2,4}[\-\s]?\d{2})',
-                # Padrão 3: "- EPP -" (CREDVALE - sem palavra CNPJ/CPF)
-                r'[-–]\s*EPP\s*[-–]\s*(\d{2,3}[\.\s]?\d{3}[\.\s]?\d{3}[\/\-\s]?\d{2,4}[\-\s]?\d{2})',
-                # Padrão 4: "CNPJ/ CPF :" (NOVAX - fallback)
-                r'CNPJ[\/\s]*(?:CPF)?[:\s]+(\d{2,3}[\.\s]?\d{3}[\.\s]?\d{3}[\/\-\s]?\d{2,4}[\-\s]?\d{2})',
-                # Padrão 5: Primeiro CNPJ/CPF encontrado na seção (fallback final)
-                # Tenta CNPJ primeiro (14 dígitos)
-                r'(\d{2}[\.\s]?\d{3}[\.\s]?\d{3}[\/\s]?\d{4}[\-\s]?\d{2})',
-                # Depois tenta CPF (11 dígitos)
-                r'(\d{3}[\.\s]?\d{3}[\.\s]?\d{3}[\-\s]?\d{2})'
-            ]
-
-            for padrao in padroes:
-                match = re.search(padrao, secao_pagador, re.IGNORECASE)
+            # "- CNPJ:" (SQUID), ", CNPJ:" (CAPITAL RS), "- EPP -" (CREDVALE),
+            # "CNPJ/ CPF :" (NOVAX), primeiro CNPJ e depois primeiro CPF da seção
+            for padrao in CNPJ_SECAO_PAGADOR_TRAVESSAO:
+                match = padrao.search(secao_pagador)
                 if match:
                     doc_raw = match.group(1)
                     doc_limpo = normalizar_cnpj(doc_raw)
@@ -329,11 +335,7 @@ Resposta (apenas números):"""
         # TENTATIVA 3: Busca mais ampla para CNPJ (mas não CPF, para evitar falsos positivos)
         # Procura por CNPJs que NÃO estejam precedidos por R$ ou Valor
         # e que tenham o padrão /XXXX- (mais seguro que fallback total)
-        match_safe = re.search(
-            r'(?<!R\$\s)(\d{2}[\.\s]?\d{3}[\.\s]?\d{3}[\/]\d{4}[\-]\d{2})',
-            texto,
-            re.IGNORECASE
-        )
+        match_safe = CNPJ_FORA_DE_VALOR.search(texto)
         if match_safe:
             cnpj_limpo = normalizar_cnpj(match_safe.group(1))
             if len(cnpj_limpo) == 14:
@@ -342,10 +344,10 @@ Resposta (apenas números):"""
         return None
 
     except Exception as e:
-        print(f"[AVISO] Erro ao extrair CNPJ de {os.path.basename(caminho_pdf)}: {e}")
+        print(f"[AVISO] Erro ao extrair CNPJ de {doc.nome_arquivo}: {e}")
         return None
 
-def detectar_fidc_do_pdf(caminho_pdf: str) -> str:
+def detectar_fidc_do_pdf(documento) -> str:
     """
     Detecta qual FIDC (beneficiário) está no boleto PDF
     Usa IA primeiro, fallback para regex se falhar
@@ -355,10 +357,11 @@ def detectar_fidc_do_pdf(caminho_pdf: str) -> str:
     if not PDF_DISPONIVEL:
         return FIDC_PADRAO
 
+    doc = obter_documento_boleto(documento)
     try:
-        # Extrair texto do PDF
-        texto = extrair_texto_pdf(caminho_pdf)
-        if not texto:
+        # Texto do boleto (lido uma vez só)
+        texto = doc.texto
+        if doc.vazio:
             return FIDC_PADRAO
 
         # TENTATIVA 1: Usar IA (se disponível)
@@ -392,25 +395,19 @@ Resposta (uma palavra):"""
                 if resultado_upper in FIDC_CONFIG:
                     return resultado_upper
 
-        # TENTATIVA 2: Fallback Regex (método original)
-        # Normalizar texto para busca
-        texto_upper = texto.upper()
-
-        # Procurar por cada FIDC usando palavras-chave
-        for fidc_nome, config in FIDC_CONFIG.items():
-            for palavra_chave in config["palavras_chave"]:
-                if palavra_chave.upper() in texto_upper:
-                    return fidc_nome
+        # TENTATIVA 2: Fallback por palavras-chave (memoizado no documento)
+        if doc.fidc:
+            return doc.fidc
 
         # Não encontrou nenhum - usar padrão
-        print(f"[AVISO] FIDC nao detectado em {os.path.basename(caminho_pdf)}, usando padrao: {FIDC_PADRAO}")
+        print(f"[AVISO] FIDC nao detectado em {doc.nome_arquivo}, usando padrao: {FIDC_PADRAO}")
         return FIDC_PADRAO
 
     except Exception as e:
-        print(f"[AVISO] Erro ao detectar FIDC de {os.path.basename(caminho_pdf)}: {e}")
+        print(f"[AVISO] Erro ao detectar FIDC de {doc.nome_arquivo}: {e}")
         return FIDC_PADRAO
 
-def extrair_dados_com_extrator_v2(caminho_pdf: str, mapa_xmls: dict) -> dict:
+def extrair_dados_com_extrator_v2(documento, mapa_xmls: dict) -> dict:
     """
     Extrai dados do boleto usando extractors v2.0 (integrado com renaming)
 
@@ -424,6 +421,7 @@ def extrair_dados_com_extrator_v2(caminho_pdf: str, mapa_xmls: dict) -> dict:
             'valor_decimal': Decimal,
             'numero_nota': str,
             'fidc': str,
+            'fidc_palavra_chave': str | None (palavra-chave que detectou o FIDC),
             'emails': [str],
             'pagador': str,
             'origem_valor': str,
@@ -438,40 +436,35 @@ def extrair_dados_com_extrator_v2(caminho_pdf: str, mapa_xmls: dict) -> dict:
                 'erro_msg': 'pdfplumber não disponível'
             }
 
-        texto = extrair_texto_pdf(caminho_pdf)
-        if not texto:
+        doc = obter_documento_boleto(documento)
+        if doc.vazio:
+            if doc.erro:
+                print(f"      [ERRO] Falha ao ler PDF: {doc.erro}")
             return {
                 'status': 'erro',
                 'erro_msg': 'Não foi possível extrair texto do PDF'
             }
 
-        # Detectar FIDC
-        texto_upper = texto.upper()
-        fidc = None
-        for fidc_nome, config in FIDC_CONFIG.items():
-            for palavra_chave in config["palavras_chave"]:
-                if palavra_chave.upper() in texto_upper:
-                    fidc = fidc_nome
-                    break
-            if fidc:
-                break
-
-        if not fidc:
-            fidc = FIDC_PADRAO
+        # Detectar FIDC (memoizado no documento)
+        fidc = doc.fidc or FIDC_PADRAO
 
         # Usar Factory para pegar extrator
         extractor = ExtractorFactory.get_extractor(fidc)
 
-        # Processar com XML usando extrator v2.0
-        resultado = extractor.processar_boleto_com_xml(texto, mapa_xmls)
+        # Processar com XML usando extrator v2.0 (mesmo documento, sem reler o PDF)
+        resultado = extractor.processar_boleto_com_xml(doc, mapa_xmls)
 
         if resultado['status'] != 'ok':
             return resultado
 
         # Converter vencimento DD-MM para DD/MM/YYYY
-        # Assumir ano atual se não tiver ano
+        # Com linha digitável válida o ano vem do fator de vencimento;
+        # sem ela, assumir ano atual
         venc_curto = resultado['vencimento']  # DD-MM
-        if '-' in venc_curto and len(venc_curto.split('-')) == 2:
+        venc_barras = doc.linha_digitavel.vencimento() if doc.linha_digitavel else None
+        if venc_barras and venc_barras.strftime('%d-%m') == venc_curto:
+            data_venc_completa = venc_barras.strftime('%d/%m/%Y')
+        elif '-' in venc_curto and len(venc_curto.split('-')) == 2:
             dia, mes = venc_curto.split('-')
             ano = datetime.now().year
             # Se mês < mês atual, assumir próximo ano
@@ -492,6 +485,7 @@ def extrair_dados_com_extrator_v2(caminho_pdf: str, mapa_xmls: dict) -> dict:
 
         # Adicionar dados ao resultado
         resultado['fidc'] = fidc
+        resultado['fidc_palavra_chave'] = doc.deteccao_fidc.palavra_chave if doc.deteccao_fidc else None
         resultado['data_vencimento_completa'] = data_venc_completa
         resultado['valor_decimal'] = valor_decimal
 
@@ -503,30 +497,33 @@ def extrair_dados_com_extrator_v2(caminho_pdf: str, mapa_xmls: dict) -> dict:
             'erro_msg': f'Erro ao processar com extrator: {str(e)}'
         }
 
-def extrair_data_vencimento_do_pdf(caminho_pdf: str) -> str | None:
+def extrair_data_vencimento_do_pdf(documento) -> str | None:
     """
     Extrai data de vencimento do boleto PDF
-    Usa regex para encontrar data no formato brasileiro
+    Usa o fator de vencimento da linha digitável; sem ela, regex para
+    encontrar data no formato brasileiro
 
     Retorna: "DD/MM/YYYY" ou None se não encontrar
     """
     if not PDF_DISPONIVEL:
         return None
 
+    doc = obter_documento_boleto(documento)
     try:
-        # Extrair texto do PDF
-        texto = extrair_texto_pdf(caminho_pdf)
-        if not texto:
+        # Texto do boleto (lido uma vez só)
+        texto = doc.texto
+        if doc.vazio:
             return None
 
+        # LINHA DIGITÁVEL: fator de vencimento (dígitos verificadores conferidos)
+        venc_barras = doc.linha_digitavel.vencimento() if doc.linha_digitavel else None
+        if venc_barras:
+            return venc_barras.strftime('%d/%m/%Y')
+
         # REGEX: Procurar por "Vencimento" seguido de data
         # Formato esperado: DD/MM/YYYY ou DD/MM/YY
         # Aceita: "Vencimento:", "Vencimento ", "Vencimento\n", etc.
-        match = re.search(
-            r'Vencimento[:\s\n]*(\d{2}[\/\-]\d{2}[\/\-]\d{2,4})',
-            texto,
-            re.IGNORECASE | re.MULTILINE
-        )
+        match = VENCIMENTO_ROTULADO.search(texto)
 
         if match:
             data_raw = match.group(1)
@@ -551,11 +548,7 @@ def extrair_data_vencimento_do_pdf(caminho_pdf: str) -> str | None:
 
         # FALLBACK: Procurar qualquer data no formato DD/MM/YYYY
         # após palavras-chave relacionadas a vencimento
-        match_amplo = re.search(
-            r'(?:venc|data|pagamento)[:\s]*(\d{2}[\/\-]\d{2}[\/\-]\d{2,4})',
-            texto,
-            re.IGNORECASE
-        )
+        match_amplo = VENCIMENTO_AMPLO.search(texto)
 
         if match_amplo:
             data_raw = match_amplo.group(1)
@@ -576,7 +569,7 @@ def extrair_data_vencimento_do_pdf(caminho_pdf: str) -> str | None:
         return None
 
     except Exception as e:
-        print(f"[AVISO] Erro ao extrair data de vencimento de {os.path.basename(caminho_pdf)}: {e}")
+        print(f"[AVISO] Erro ao extrair data de vencimento de {doc.nome_arquivo}: {e}")
         return None
 
 def calcular_similaridade(str1: str, str2: str) -> float:
@@ -703,8 +696,10 @@ def carregar_dados_xmls():
         return {}
 
     # Estatísticas
-    total_xmls = len(mapa_xmls)
-    com_emails = sum(1 for dados in mapa_xmls.values() if dados.get('emails'))
+    # Cada nota uma vez (o mapa tem duas chaves por nota)
+    notas = mapa_xmls.notas()
+    total_xmls = len(notas)
+    com_emails = sum(1 for dados in notas if dados.emails)
     sem_emails = total_xmls - com_emails
 
     print()
@@ -732,9 +727,11 @@ def extrair_cnpj_da_nota(caminho_pdf_nota):
     if not PDF_DISPONIVEL:
         return None
 
+    return _cnpj_do_texto_nota(extrair_texto_pdf(caminho_pdf_nota))
+
+def _cnpj_do_texto_nota(texto):
+    """CNPJ do destinatário a partir do texto da nota (IA, depois regex)"""
     try:
-        # Extrair texto do PDF
-        texto = extrair_texto_pdf(caminho_pdf_nota)
         if not texto:
             return None
 
@@ -780,19 +777,43 @@ Resposta (apenas 14 números):"""
         print(f"      [AVISO] Erro ao extrair CNPJ da nota: {e}")
         return None
 
+# Padrões do valor total da nota, em ordem de prioridade
+def _valor_nota_padrao_principal(texto):
+    """
+    Condição de parada da leitura da nota: o padrão de maior prioridade
+    já casa com um valor válido. Como re.search pega a PRIMEIRA ocorrência,
+    o resultado é o mesmo que seria obtido com o PDF inteiro.
+    """
+    match = VALOR_TOTAL_NOTA[0].search(texto)
+    return bool(match and valor_to_cents(match.group(1)))
+
 def extrair_valor_da_nota(caminho_pdf_nota):
     """
     Extrai valor total da nota fiscal PDF
     Usa IA primeiro, fallback para regex se falhar
 
+    Sem IA, as páginas são lidas uma a uma e a leitura para assim que o
+    padrão principal ("Valor Total da Nota") aparece.
+
     Retorna: Valor em centavos (int) ou None
     """
     if not PDF_DISPONIVEL:
         return None
 
-    try:
-        # Extrair texto do PDF
+    # Extrair texto do PDF (a IA precisa do texto completo)
+    if IA_DISPONIVEL and USAR_IA:
         texto = extrair_texto_pdf(caminho_pdf_nota)
+    else:
+        try:
+            texto, _ = pdf_texto.extrair_texto_ate(caminho_pdf_nota, _valor_nota_padrao_principal)
+        except Exception as e:
+            print(f"      [AVISO] Erro ao extrair valor da nota: {e}")
+            return None
+    return _valor_do_texto_nota(texto)
+
+def _valor_do_texto_nota(texto):
+    """Valor total (centavos) a partir do texto da nota (IA, depois regex)"""
+    try:
         if not texto:
             return None
 
@@ -825,14 +846,8 @@ Resposta (apenas número com 2 decimais):"""
 
         # TENTATIVA 2: Fallback Regex (método original)
         # Procurar valor total da nota
-        patterns = [
-            r'Valor\s+Total\s+(?:da\s+)?(?:Nota|NF)[:\s]*R?\$?\s*([\d\.\,]+)',
-            r'Total\s+(?:da\s+)?(?:Nota|NF)[:\s]*R?\$?\s*([\d\.\,]+)',
-            r'Valor\s+NF[:\s]*R?\$?\s*([\d\.\,]+)',
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, texto, re.IGNORECASE)
+        for padrao in VALOR_TOTAL_NOTA:
+            match = padrao.search(texto)
             if match:
                 valor_str = match.group(1)
                 valor_cents = valor_to_cents(valor_str)
@@ -845,16 +860,26 @@ Resposta (apenas número com 2 decimais):"""
         print(f"      [AVISO] Erro ao extrair valor da nota: {e}")
         return None
 
+def ler_dados_nota_pdf(caminho_pdf_nota):
+    """
+    CNPJ e valor total da nota com UMA leitura do PDF (usado quando a nota
+    não tem XML no mapa - ver validacao_notas.py)
+
+    Retorna: (cnpj, valor_cents), cada um podendo ser None
+    """
+    if not PDF_DISPONIVEL:
+        return None, None
+
+    texto = extrair_texto_pdf(caminho_pdf_nota)
+    return _cnpj_do_texto_nota(texto), _valor_do_texto_nota(texto)
+
 # -------------------- NF MATCHING --------------------
 def indexar_notas_por_digitos():
-    itens = []
-    if not os.path.isdir(PASTA_NOTAS): return itens
-    for f in os.listdir(PASTA_NOTAS):
-        if f.lower().endswith(".pdf"):
-            itens.append((os.path.join(PASTA_NOTAS, f), digits_only(f)))
-    return itens
-
-def achar_notas_por_docs_set(docs_set, notas_index, cnpj_boleto=None, valor_boleto_cents=None):
+    # Pasta lida uma vez; busca por número de 6 dígitos em O(1) (ver indice_notas_pdf.py)
+    return IndiceNotasPDF(PASTA_NOTAS)
+
+def achar_notas_por_docs_set(docs_set, notas_index, cnpj_boleto=None, valor_boleto_cents=None,
+                             validador=None, auditorias=()):
     """
     Busca e valida notas fiscais por documentos
 
@@ -863,8 +888,15 @@ def achar_notas_por_docs_set(docs_set, notas_index, cnpj_boleto=None, valor_bole
     2. CNPJ (se fornecido)
     3. Valor (se fornecido, tolerância ±10 centavos)
 
+    CNPJ e valor vêm do XML da nota quando ele está no mapa; senão de uma
+    única leitura do PDF (ver validacao_notas.py). A origem usada fica em
+    detalhes_validacao e nas auditorias dos boletos do grupo.
+
     Retorna: (notas_validadas, bases6, detalhes_validacao, tem_erro_critico)
     """
+    if validador is None:
+        validador = ValidadorNotas(None, ler_dados_nota_pdf)
+
     bases, candidatos = set(), []
     tem_erro_critico = False
 
@@ -883,15 +915,15 @@ def achar_notas_por_docs_set(docs_set, notas_index, cnpj_boleto=None, valor_bole
     # Buscar notas para cada documento
     docs_sem_nota = []
     for base6 in sorted(bases):
-        encontrou = False
-        for nf_path, nf_digits in notas_index:
-            if base6 and base6 in nf_digits:
-                candidatos.append((nf_path, base6))
-                encontrou = True
-                break
-
-        if not encontrou:
+        nf_path = notas_index.buscar(base6)
+        if nf_path is None:
             docs_sem_nota.append(base6)
+            continue
+
+        if notas_index.ambiguo(base6):
+            alternativas = ', '.join(os.path.basename(c) for c in notas_index.candidatos(base6))
+            print(f"      [AVISO] Nota {base6} em mais de um arquivo ({alternativas}) - usando {os.path.basename(nf_path)}")
+        candidatos.append((nf_path, base6))
 
     # VALIDAÇÃO CRÍTICA: Se algum documento não tem nota, bloquear
     if docs_sem_nota:
@@ -911,12 +943,22 @@ def achar_notas_por_docs_set(docs_set, notas_index, cnpj_boleto=None, valor_bole
             'numero_ok': True,  # Já passou pela validação de número
             'cnpj_ok': None,
             'valor_ok': None,
+            'origem': None,
             'anexada': False
         }
 
+        # CNPJ e valor da nota: XML do mapa, senão PDF (lido uma vez)
+        if cnpj_boleto or valor_boleto_cents:
+            dados_nota = validador.dados_da_nota(base6, nf_path)
+            validacao['origem'] = dados_nota.origem
+            for boleto_aud in auditorias:
+                boleto_aud.dados_boleto.setdefault('origem_dados_notas', {})[nome_nota] = dados_nota.origem
+                boleto_aud.adicionar_detalhe("NOTAS - Origem", True,
+                                             f"{nome_nota}: CNPJ/valor lidos do {dados_nota.origem}")
+
         # Validar CNPJ se fornecido (VALIDAÇÃO CRÍTICA!)
         if cnpj_boleto:
-            cnpj_nota = extrair_cnpj_da_nota(nf_path)
+            cnpj_nota = dados_nota.cnpj
             if cnpj_nota:
                 validacao['cnpj_ok'] = (cnpj_nota == cnpj_boleto)
                 if not validacao['cnpj_ok']:
@@ -933,7 +975,7 @@ def achar_notas_por_docs_set(docs_set, notas_index, cnpj_boleto=None, valor_bole
 
         # Validar Valor se fornecido
         if valor_boleto_cents:
-            valor_nota_cents = extrair_valor_da_nota(nf_path)
+            valor_nota_cents = dados_nota.valor_cents
             if valor_nota_cents:
                 diferenca = abs(valor_nota_cents - valor_boleto_cents)
                 tolerancia = 10  # 10 centavos
@@ -953,7 +995,8 @@ def achar_notas_por_docs_set(docs_set, notas_index, cnpj_boleto=None, valor_bole
         validacao['anexada'] = True
         notas_validadas.append(nf_path)
         detalhes.append(validacao)
-        print(f"      [OK] {nome_nota}: Validada (CNPJ: {validacao['cnpj_ok']}, Valor: {validacao['valor_ok']})")
+        print(f"      [OK] {nome_nota}: Validada (CNPJ: {validacao['cnpj_ok']}, Valor: {validacao['valor_ok']}, "
+              f"Fonte: {validacao['origem'] or '-'})")
 
     # Remover duplicatas
     seen, notas_unique = set(), []
@@ -1064,7 +1107,10 @@ def validar_boleto_com_xml(numero_nota, pagador_norm, valor_cents, cnpj_boleto,
     nome_xml_norm = normalize_pagador(nome_xml)
 
     if nome_xml_norm and pagador_norm:
-        similaridade = SequenceMatcher(None, pagador_norm, nome_xml_norm).ratio()
+        # Mesma normalização do matching da renomeação (acentos, sufixos, abreviações)
+        similaridade = SequenceMatcher(
+            None, normalizar_nome_empresa(pagador_norm), normalizar_nome_empresa(nome_xml_norm)
+        ).ratio()
 
         if similaridade >= 0.85:  # 85% de similaridade minima
             print(f"   [OK] Nome match: {similaridade:.0%} de similaridade")
@@ -1187,66 +1233,235 @@ def montar_corpo_html(pagador, bases6_list, linhas_boleto, fidc_tipo):
 </html>
 """
 
-def abrir_email_outlook(email_to, assunto, corpo_html, anexos, fidc_tipo):
+def montar_mensagem_email(email_to, assunto, corpo_html, anexos, fidc_tipo):
     """
-    Cria e envia email via Outlook com CCs dinâmicos baseados no FIDC
+    Monta a mensagem com CCs dinâmicos baseados no FIDC
 
     Parâmetros:
-        email_to: Email do destinatário
+        email_to: Emails do destinatário ("a@x.com; b@y.com")
         assunto: Assunto do email
-        corpo_html: Corpo do email em HTML
+        corpo_html: Corpo do email em HTML (assinatura em cid:assinatura_jotajota)
         anexos: Lista de caminhos de arquivos para anexar
         fidc_tipo: Tipo do FIDC ("CAPITAL", "NOVAX", "CREDVALE", "SQUID")
+
+    Retorna:
+        MensagemEmail (pronta para a caixa de saída ou para um transporte)
     """
-    outlook = win32.Dispatch("Outlook.Application")
-
-    # Verificação de segurança — garante conta de cobrança
-    conta_cobranca = None
-    for acc in outlook.Session.Accounts:
-        if acc.SmtpAddress.lower() == "cobranca@jotajota.net.br":
-            conta_cobranca = acc
-            break
-
-    if not conta_cobranca:
-        print("[ERRO] ERRO: Conta cobrança@jotajota.net.br não encontrada — envio abortado.")
-        with open(os.path.join(PASTA_AUDITORIA, "log_falha_conta.txt"), "w", encoding="utf-8") as f:
-            f.write(f"[{datetime.now()}] Conta cobrança não localizada. Envio abortado.\n")
-        return
+    config = FIDC_CONFIG.get(fidc_tipo, FIDC_CONFIG[FIDC_PADRAO])
+    return MensagemEmail(
+        para=separar_emails(email_to),
+        cc=list(config["cc_emails"]),  # CC dinâmico por FIDC!
+        assunto=assunto,
+        corpo_html=corpo_html,
+        anexos=list(anexos),
+        imagem_inline=ASSINATURA_IMG,
+        fidc=fidc_tipo,
+    )
 
-    mail = outlook.CreateItem(0)
-    mail._oleobj_.Invoke(*(64209, 0, 8, 0, conta_cobranca))
+def enviar_email(transporte, email_to, assunto, corpo_html, anexos, fidc_tipo):
+    """
+    Envia o email pelo transporte informado (ver montar_mensagem_email)
 
-    # Obter CCs dinâmicos baseados no FIDC
-    config = FIDC_CONFIG.get(fidc_tipo, FIDC_CONFIG[FIDC_PADRAO])
-    cc_emails = "; ".join(config["cc_emails"])
+    Parâmetros:
+        transporte: TransporteEmail (ver transporte_email.py)
+        demais: como em montar_mensagem_email
+    """
+    transporte.enviar(montar_mensagem_email(email_to, assunto, corpo_html, anexos, fidc_tipo))
 
-    mail.To = email_to
-    mail.CC = cc_emails  # CC dinâmico por FIDC!
-    mail.Subject = assunto
+def filtrar_boletos_enviados(registro, arquivos, mapa_xmls, auditoria):
+    """
+    Separa os boletos já enviados consultando o registro (sem ler os PDFs)
 
-    # corpo + imagem inline
-    mail.HTMLBody = corpo_html
-    attach = mail.Attachments.Add(ASSINATURA_IMG)
-    attach.PropertyAccessor.SetProperty(
-        "http://schemas.microsoft.com/mapi/proptag/0x3712001F", "assinatura_jotajota"
-    )
+    Parâmetros:
+        registro: RegistroEnvios
+        arquivos: Nomes dos PDFs em PASTA_BOLETOS
+        mapa_xmls: Mapa de XMLs (para achar a parcela pelo vencimento)
+        auditoria: AuditoriaExecucao (recebe os avisos)
+
+    Retorna:
+        (arquivos a processar, {arquivo: ImpressaoBoleto})
+    """
+    restantes, impressoes = [], {}
+    for arquivo in arquivos:
+        seguir, impressao = conferir_registro(registro, arquivo, mapa_xmls, auditoria)
+        if seguir:
+            restantes.append(arquivo)
+            if impressao is not None:
+                impressoes[arquivo] = impressao
+    return restantes, impressoes
+
+def conferir_registro(registro, arquivo, mapa_xmls, auditoria):
+    """
+    Confere UM boleto no registro de envios (sem ler o PDF)
 
-    # outros anexos
-    for a in anexos:
+    - Mesmo PDF já enviado: ignorado (em produção, movido para enviados)
+    - Outro PDF para nota + parcela já enviadas: aviso; ignorado se
+      REGISTRO_PARCELA_REPETIDA = "pular"
+
+    Retorna:
+        (seguir, ImpressaoBoleto ou None se o arquivo não pôde ser lido)
+    """
+    # Preview também respeita o que já foi aberto em preview; produção só o enviado de fato
+    modos = (REGISTRO_PRODUCAO, REGISTRO_PREVIEW) if MODO_PREVIEW else (REGISTRO_PRODUCAO,)
+    caminho = os.path.join(PASTA_BOLETOS, arquivo)
+    try:
+        impressao = identificar_boleto(caminho, mapa_xmls)
+    except OSError as e:
+        print(f"[REGISTRO] AVISO: {arquivo} nao pode ser lido ({e})")
+        return True, None
+
+    mesmo_pdf, mesma_parcela = registro.verificar(impressao, modos)
+    if mesmo_pdf is not None:
+        print(f"[REGISTRO] {arquivo}: ja enviado ({mesmo_pdf.modo}) em "
+              f"{mesmo_pdf.enviado_em:%d/%m/%Y %H:%M} para {', '.join(mesmo_pdf.destinatarios)} - ignorado")
+        auditoria.adicionar_aviso(f"Boleto já enviado em {mesmo_pdf.enviado_em:%d/%m/%Y %H:%M} - ignorado", arquivo)
+        if not MODO_PREVIEW and not envio_simulado() and mesmo_pdf.modo == REGISTRO_PRODUCAO:
+            mover_para_enviados([caminho])  # o move da execução anterior não aconteceu
+        return False, impressao
+
+    if mesma_parcela is not None:
+        acao = "ignorado" if REGISTRO_PARCELA_REPETIDA == "pular" else "sera enviado"
+        msg = (f"NF {impressao.nota} parcela {impressao.duplicata} ja enviada em "
+               f"{mesma_parcela.enviado_em:%d/%m/%Y %H:%M} para {', '.join(mesma_parcela.destinatarios)} "
+               f"(arquivo {mesma_parcela.arquivo}) - {acao}")
+        print(f"[REGISTRO] AVISO: {arquivo}: {msg}")
+        auditoria.adicionar_aviso(msg, arquivo)
+        if REGISTRO_PARCELA_REPETIDA == "pular":
+            return False, impressao
+
+    return True, impressao
+
+def numero_nota_do_arquivo(arquivo):
+    """
+    Número da nota pelo nome do arquivo
+
+    Novo formato (v10): "NOME - NF 310284 - DATA - VALOR.pdf"
+    Formato antigo: "310227.pdf", "3-0310227.pdf", "0310227.pdf" (últimos 6 dígitos)
+
+    Retorna:
+        (numero_nota ou None se o nome não tiver 6 dígitos, True se veio do padrão "NF 123456")
+    """
+    nome_sem_ext = os.path.splitext(arquivo)[0]
+    match_nf = NOTA_NOME_RENOMEADO.search(nome_sem_ext)
+    if match_nf:
+        return match_nf.group(1), True
+    digitos = digits_only(nome_sem_ext)
+    return (digitos[-6:] if len(digitos) >= 6 else None), False
+
+def chave_grupo_prevista(numero_nota, mapa_xmls):
+    """
+    Grupo (email, pagador normalizado) do boleto pelo XML da nota do nome
+    do arquivo - o mesmo do agrupamento se ele for aprovado (a validação
+    exige esse XML). None se não houver XML.
+    """
+    dados_xml = mapa_xmls.get(numero_nota) if numero_nota else None
+    if not dados_xml:
+        return None
+    return ('; '.join(dados_xml.get('emails', [])),
+            normalize_pagador(dados_xml.get('nome', 'Cliente Desconhecido')))
+
+class AgrupadorEnvio:
+    """
+    Agrupa os boletos aprovados por (email, pagador) e solta cada grupo
+    assim que o último boleto previsto para ele (chave_grupo_prevista) foi
+    validado ou rejeitado - sem esperar os PDFs dos outros grupos.
+    """
+
+    def __init__(self):
+        self.previstos = Counter()
+        self.grupos = {}
+
+    def prever(self, chave):
+        if chave is not None:
+            self.previstos[chave] += 1
+
+    def grupo(self, chave, pagador_exib):
+        return self.grupos.setdefault(chave, {
+            'pagador_exib': pagador_exib,
+            'docs': set(),
+            'boletos': [],
+            'linhas': [],
+            'metodos': [],
+            'fidcs': [],  # Lista de FIDCs dos boletos (caso tenha múltiplos)
+            'cnpjs': [],  # CNPJs dos boletos (para validação)
+            'valores_cents': [],  # Valores dos boletos (para validação)
+            'auditorias': [],  # Objetos BoletoAuditoria (v7.0)
+            'impressoes': []  # Identidade dos boletos no registro de envios
+        })
+
+    def baixar(self, chave):
+        """Um boleto previsto de `chave` terminou: [(chave, grupo)] se era o último, senão []"""
+        if chave is None:
+            return []
+        self.previstos[chave] -= 1
+        if self.previstos[chave] > 0 or chave not in self.grupos:
+            return []
+        return [(chave, self.grupos.pop(chave))]
+
+    def restantes(self):
+        """Grupos ainda não soltos (fim da validação)"""
+        grupos, self.grupos = list(self.grupos.items()), {}
+        return grupos
+
+# Mapa de XMLs da etapa de extração (por processo, ver _inicializar_extracao_envio)
+_mapa_xmls_extracao = None
+
+def _inicializar_extracao_envio(mapa_xmls):
+    global _mapa_xmls_extracao
+    _mapa_xmls_extracao = mapa_xmls
+
+def _extrair_boleto_envio(boleto):
+    """
+    Etapa de extração: lê o PDF (uma vez) e roda o extrator v2.0; o log vai junto no boleto.
+
+    Com WORKERS_ENVIO_EXTRACAO > 1 roda num processo do pool: os contadores
+    de cache e de páginas desta leitura vão no boleto ('cache', 'paginas')
+    para o processo principal somar no resumo.
+    """
+    if boleto['erro'] or boleto['ignorado']:
+        return [boleto]
+
+    cache = pdf_texto.obter_cache()
+    antes = (cache.acertos, cache.falhas) if cache else (0, 0)
+    paginas_antes = pdf_texto.estatisticas_paginas()
+
+    with capturar_saida() as saida:
+        # Um ParsedBoleto por boleto: o PDF é lido uma única vez nesta execução
+        documento = ParsedBoleto.de_arquivo(boleto['caminho'], parcial=LEITURA_PARCIAL_PDF)
+        print(f"   [PDF] Extraindo dados do boleto com extrator v2.0...")
+        boleto['resultado'] = extrair_dados_com_extrator_v2(documento, _mapa_xmls_extracao)
+    # Origem de valor/vencimento: somada no processo principal (validar)
+    boleto['codigo_barras'] = dict(documento.origens)
+    if cache:
+        boleto['cache'] = (cache.acertos - antes[0], cache.falhas - antes[1])
+    paginas_depois = pdf_texto.estatisticas_paginas()
+    boleto['paginas'] = {k: paginas_depois[k] - paginas_antes[k] for k in paginas_depois}
+    boleto['log'] += saida.getvalue()
+    return [boleto]
+
+def envio_simulado():
+    """Transporte "arquivo": as mensagens viram .eml - boletos não são movidos nem registrados"""
+    return TRANSPORTE_EMAIL == TRANSPORTE_ARQUIVO
+
+def mover_para_enviados(boletos):
+    """Move os boletos de um e-mail enviado para a pasta de enviados"""
+    for b in boletos:
         try:
-            if not os.path.exists(a):
-                print(f"      [ERRO] Arquivo não encontrado: {a}")
-                raise FileNotFoundError(f"Arquivo não encontrado: {a}")
-            mail.Attachments.Add(a)
+            destino = os.path.join(PASTA_ENVIADOS, os.path.basename(b))
+            shutil.move(b, destino)
+            print(f"   [OK] Boleto movido para BoletosEnviados: {os.path.basename(b)}")
         except Exception as e:
-            print(f"      [ERRO] Falha ao anexar {os.path.basename(a)}: {e}")
-            raise
+            print(f"   [AVISO] Erro ao mover {os.path.basename(b)}: {e}")
 
-    # Enviar ou mostrar preview
-    if MODO_PREVIEW:
-        mail.Display()  # Abre no Outlook para revisão (não envia)
-    else:
-        mail.Send()  # Envia automaticamente
+def abrir_email_outlook(email_to, assunto, corpo_html, anexos, fidc_tipo):
+    """
+    Cria e envia UM email via Outlook (compatibilidade).
+
+    Abre o Outlook só para esta mensagem; para vários emails use
+    criar_transporte() uma vez e enviar_email() por mensagem.
+    """
+    with TransporteOutlook(EMAIL_CONTA_COBRANCA, preview=MODO_PREVIEW, pasta_log=PASTA_AUDITORIA) as transporte:
+        enviar_email(transporte, email_to, assunto, corpo_html, anexos, fidc_tipo)
 
 # -------------------- MAIN --------------------
 def executar():
@@ -1255,6 +1470,8 @@ def executar():
     print("=" * 80)
     modo_str = "PREVIEW" if MODO_PREVIEW else "PRODUCAO"
     print(f"  [MODO {modo_str}] {('Emails abrirao no Outlook sem enviar' if MODO_PREVIEW else 'Emails serao enviados automaticamente')}")
+    if envio_simulado():
+        print(f"  [SIMULACAO] Transporte \"arquivo\": nada sera enviado, movido ou registrado")
     print("=" * 80)
     print()
 
@@ -1263,9 +1480,8 @@ def executar():
     # ==== INICIALIZAR AUDITORIA ====
     auditoria = AuditoriaExecucao(modo="preview" if MODO_PREVIEW else "producao")
 
-    grupos = {}
-    enviados = 0
-    erros = 0
+    contagem = {'enviados': 0, 'erros': 0, 'ja_enviados': 0}
+    trava_contagem = threading.Lock()  # as etapas do pipeline contam em threads diferentes
 
     # ==== CARREGAR DADOS DOS XMLs (v7.0) ====
     mapa_xmls = carregar_dados_xmls()
@@ -1284,65 +1500,119 @@ def executar():
     # Indexar notas fiscais
     notas_idx = indexar_notas_por_digitos()
     print(f"[ARQUIVO] Notas fiscais indexadas: {len(notas_idx)}")
+    validador_notas = ValidadorNotas(mapa_xmls, ler_dados_nota_pdf)
     print()
 
-    # Listar boletos para processar
-    arquivos_boletos = [f for f in os.listdir(PASTA_BOLETOS) if f.lower().endswith(".pdf")]
+    # Listar boletos para processar (em ordem de nome: o log sai igual a cada execução)
+    arquivos_boletos = sorted(f for f in os.listdir(PASTA_BOLETOS) if f.lower().endswith(".pdf"))
+
+    # ==== CAIXA DE SAÍDA (retoma execução interrompida) ====
+    # Simulação: caixa própria na pasta dos .eml (nunca sai pelo transporte real)
+    # Preview e produção dividem o arquivo, mas cada modo só enxerga as suas mensagens
+    simulado = envio_simulado()
+    mover_boletos = not MODO_PREVIEW and not simulado
+    pasta_eml = os.path.join(PASTA_EML, auditoria.execucao_id) if simulado else None
+    caixa = CaixaSaida(os.path.join(pasta_eml, "caixa_saida.sqlite") if simulado else ARQUIVO_CAIXA_SAIDA,
+                       modo=REGISTRO_PREVIEW if MODO_PREVIEW else REGISTRO_PRODUCAO)
+    recuperadas = caixa.recuperar()
+    if recuperadas['pendentes'] or recuperadas['sem_conclusao']:
+        print(f"[CAIXA] Execucao anterior interrompida: {recuperadas['pendentes']} e-mail(s) a enviar, "
+              f"{recuperadas['sem_conclusao']} enviado(s) aguardando mover os boletos")
+    em_aberto = caixa.arquivos_em_aberto()
+    if em_aberto:
+        antes = len(arquivos_boletos)
+        arquivos_boletos = [f for f in arquivos_boletos if f not in em_aberto]
+        print(f"[CAIXA] {antes - len(arquivos_boletos)} boleto(s) já na caixa de saída (não serão reprocessados)")
+
+    registro = RegistroEnvios(ARQUIVO_REGISTRO_ENVIOS) if USAR_REGISTRO_ENVIOS else None
+
     print(f"[PACOTE] Boletos encontrados para processar: {len(arquivos_boletos)}")
     print()
 
-    if not arquivos_boletos:
+    if not arquivos_boletos and not em_aberto:
         print("[INFO] Nenhum boleto para processar.")
+        caixa.fechar()
         return
 
-    print("[PROC] Processando boletos...")
-    print("-" * 80)
-
-    # Processar cada boleto
-    for idx, arquivo in enumerate(arquivos_boletos, 1):
-        caminho = os.path.join(PASTA_BOLETOS, arquivo)
-
-        print(f"\n[{idx}/{len(arquivos_boletos)}] {arquivo}")
+    def contar(chave):
+        with trava_contagem:
+            contagem[chave] += 1
+
+    # ==== PIPELINE: ingestão -> extração -> validação -> montagem -> envio -> auditoria ====
+    # O grupo de cada boleto sai do nome do arquivo (nota -> XML) antes de ler
+    # qualquer PDF: quando o último boleto de um grupo é validado, o e-mail
+    # dele é montado e enviado enquanto os outros PDFs ainda estão sendo lidos
+    agrupador = AgrupadorEnvio()
+    origens_campos = {}  # {campo: {origem: quantidade}} da linha digitável x regex
+    cache_extracao = [0, 0]  # acertos/falhas do cache e páginas lidas na etapa de extração
+    paginas_extracao = dict.fromkeys(pdf_texto.estatisticas_paginas(), 0)
+    for arquivo in arquivos_boletos:
+        agrupador.prever(chave_grupo_prevista(numero_nota_do_arquivo(arquivo)[0], mapa_xmls))
+    total = len(arquivos_boletos)
+
+    def ingerir(entrada):
+        """Ingestão: registro de envios (hash, sem ler o PDF) e número da nota pelo nome"""
+        idx, arquivo = entrada
+        boleto = {'idx': idx, 'arquivo': arquivo, 'caminho': os.path.join(PASTA_BOLETOS, arquivo),
+                  'numero_nota': None, 'impressao': None, 'erro': None, 'ignorado': False}
+        # A nota vem antes do registro: um boleto já enviado ainda baixa a
+        # contagem do seu grupo (mesma chave do prever())
+        numero_nota, do_padrao = numero_nota_do_arquivo(arquivo)
+        boleto['numero_nota'] = numero_nota
+        with capturar_saida() as saida:
+            if registro is not None:
+                seguir, boleto['impressao'] = conferir_registro(registro, arquivo, mapa_xmls, auditoria)
+                if not seguir:
+                    boleto['ignorado'] = True
+                    contar('ja_enviados')
+
+            if not boleto['ignorado']:
+                if numero_nota is None:
+                    digitos = digits_only(os.path.splitext(arquivo)[0])
+                    boleto['erro'] = (f"Nome do arquivo deve conter numero da nota (minimo 6 digitos). "
+                                      f"Encontrado: {len(digitos)} digitos")
+                elif do_padrao:
+                    print(f"   [NOTA] Numero da nota extraido do nome: {numero_nota}")
+                else:
+                    print(f"   [NOTA] Numero da nota extraido (fallback): {numero_nota}")
+        boleto['log'] = saida.getvalue()
+        return [boleto]
+
+    def validar(boleto):
+        """Validação (na ordem dos arquivos): 5 camadas contra o XML; solta os grupos completos"""
+        arquivo = boleto['arquivo']
+        numero_nota = boleto['numero_nota']
+        chave = chave_grupo_prevista(numero_nota, mapa_xmls)
+
+        print(f"\n[{boleto['idx']}/{total}] {arquivo}")
+        print(boleto['log'], end="")
+        codigo_barras.contar_origens(boleto.get('codigo_barras', {}), origens_campos)
+        acertos, falhas = boleto.get('cache', (0, 0))
+        cache_extracao[0] += acertos
+        cache_extracao[1] += falhas
+        for contador, quantidade in boleto.get('paginas', {}).items():
+            paginas_extracao[contador] += quantidade
+        if boleto['ignorado']:
+            return agrupador.baixar(chave)
 
         # ==== CRIAR OBJETO DE AUDITORIA PARA ESTE BOLETO ====
         boleto_aud = BoletoAuditoria(arquivo)
 
-        # ==== EXTRAIR NUMERO DA NOTA DO NOME DO ARQUIVO ====
-        # Novo formato (v10): "NOME - NF 310284 - DATA - VALOR.pdf"
-        # Formato antigo: "310227.pdf", "3-0310227.pdf", "0310227.pdf"
-        nome_sem_ext = os.path.splitext(arquivo)[0]
-
-        # Tentar extrair padrão "NF 123456" primeiro (v10)
-        match_nf = re.search(r'NF\s+(\d{6})', nome_sem_ext, re.IGNORECASE)
-        if match_nf:
-            numero_nota = match_nf.group(1)
-            print(f"   [NOTA] Numero da nota extraido do nome: {numero_nota}")
-        else:
-            # Fallback: Extrair últimos 6 dígitos (formato antigo)
-            digitos = digits_only(nome_sem_ext)
-
-            if len(digitos) < 6:
-                msg = f"Nome do arquivo deve conter numero da nota (minimo 6 digitos). Encontrado: {len(digitos)} digitos"
-                print(f"   [X] ERRO: {msg}")
-                boleto_aud.rejeitar(msg)
-                auditoria.adicionar_boleto(boleto_aud)
-                auditoria.adicionar_erro_critico(msg, arquivo)
-                continue
-
-            numero_nota = digitos[-6:]
-            print(f"   [NOTA] Numero da nota extraido (fallback): {numero_nota}")
-
-        # ==== EXTRAIR DADOS COM EXTRATOR V2.0 (INTEGRAÇÃO RENAMING) ====
-        print(f"   [PDF] Extraindo dados do boleto com extrator v2.0...")
-        resultado_extrator = extrair_dados_com_extrator_v2(caminho, mapa_xmls)
+        if boleto['erro']:
+            print(f"   [X] ERRO: {boleto['erro']}")
+            boleto_aud.rejeitar(boleto['erro'])
+            auditoria.adicionar_boleto(boleto_aud)
+            auditoria.adicionar_erro_critico(boleto['erro'], arquivo)
+            return agrupador.baixar(chave)
 
+        resultado_extrator = boleto['resultado']
         if resultado_extrator['status'] != 'ok':
             msg = f"Erro no extrator v2.0: {resultado_extrator.get('erro_msg', 'Erro desconhecido')}"
             print(f"   [X] ERRO: {msg}")
             boleto_aud.rejeitar(msg)
             auditoria.adicionar_boleto(boleto_aud)
             auditoria.adicionar_erro_critico(msg, arquivo)
-            continue
+            return agrupador.baixar(chave)
 
         # Extrair dados do resultado
         cnpj = resultado_extrator.get('cnpj')
@@ -1366,7 +1636,9 @@ def executar():
         else:
             print(f"   [AVISO] CNPJ/CPF nao encontrado")
 
-        print(f"   [OK] FIDC detectado: {fidc_tipo} ({FIDC_CONFIG[fidc_tipo]['nome_completo']})")
+        palavra_chave = resultado_extrator.get('fidc_palavra_chave')
+        origem_fidc = f"palavra-chave '{palavra_chave}'" if palavra_chave else "padrao"
+        print(f"   [OK] FIDC detectado: {fidc_tipo} ({FIDC_CONFIG[fidc_tipo]['nome_completo']}) - {origem_fidc}")
         print(f"   [OK] Data de vencimento: {data_vencimento}")
         print(f"   [OK] Valor: {resultado_extrator.get('valor')} ({resultado_extrator.get('origem_valor')})")
         print(f"   [OK] Para email: R$ {valor_boleto} - Venc: {vencimento_email}")
@@ -1389,7 +1661,7 @@ def executar():
             boleto_aud.rejeitar(erro)
             auditoria.adicionar_boleto(boleto_aud)
             auditoria.adicionar_erro_critico(erro, arquivo)
-            continue
+            return agrupador.baixar(chave)
 
         # ==== BOLETO APROVADO! ====
         print(f"   [OK] BOLETO APROVADO!")
@@ -1401,7 +1673,6 @@ def executar():
 
         # Usar valor do extractor (já está correto - parcela ou total conforme o caso)
         valor_cents = int(valor_boleto * 100)  # Converter Decimal para centavos
-        nome_norm = normalize_pagador(nome_cliente)
         docs_set = {numero_nota}  # Usar numero da nota como documento
 
         print(f"   [EMAIL] Email destino: {email_to}")
@@ -1409,22 +1680,10 @@ def executar():
         print(f"   [VALOR] R$ {valor_boleto}")
         print(f"   [DOC] Documento (nota): {numero_nota}")
 
-        # Agrupar por (email, cliente normalizado)
-        grupo_key = (email_to, nome_norm)
-        g = grupos.setdefault(grupo_key, {
-            'pagador_exib': nome_cliente,
-            'docs': set(),
-            'boletos': [],
-            'linhas': [],
-            'metodos': [],
-            'fidcs': [],  # Lista de FIDCs dos boletos (caso tenha múltiplos)
-            'cnpjs': [],  # CNPJs dos boletos (para validação)
-            'valores_cents': [],  # Valores dos boletos (para validação)
-            'auditorias': []  # Objetos BoletoAuditoria (v7.0)
-        })
-
+        # Agrupar por (email, cliente normalizado) - a chave prevista pelo nome do arquivo
+        g = agrupador.grupo(chave, nome_cliente)
         g['docs'] |= docs_set
-        g['boletos'].append(caminho)
+        g['boletos'].append(boleto['caminho'])
         g['linhas'].append({'valor_brl': cents_to_brl(valor_cents), 'venc': vencimento_email})
         g['metodos'].append('XML')  # No novo sistema, todos são via XML
         g['fidcs'].append(fidc_tipo)  # Armazenar FIDC do boleto
@@ -1432,16 +1691,18 @@ def executar():
             g['cnpjs'].append(cnpj)  # Armazenar CNPJ para validação
         g['valores_cents'].append(valor_cents)  # Armazenar valor para validação
         g['auditorias'].append(boleto_aud)  # Armazenar auditoria
-
-    print()
-    print("=" * 80)
-    print("  PREPARANDO E ENVIANDO E-MAILS")
-    print("=" * 80)
-    print()
-
-    # Enviar e-mails agrupados
-    for (email_to, pag_key), g in grupos.items():
-        print(f"[EMAIL] Enviando para: {g['pagador_exib']} ({email_to})")
+        if boleto['impressao'] is not None:
+            g['impressoes'].append(boleto['impressao'])
+        return agrupador.baixar(chave)
+
+    # Cada grupo vira uma mensagem gravada na caixa de saída e enviada na
+    # etapa seguinte (workers, limite por segundo); novas tentativas no fim
+    pos_envio = {}  # id na caixa -> (grupo, notas anexas, config do FIDC)
+
+    def montar(grupo):
+        """Montagem: valida as notas do grupo, renderiza o e-mail e grava na caixa de saída"""
+        (email_to, pag_key), g = grupo
+        print(f"\n[EMAIL] Preparando para: {g['pagador_exib']} ({email_to})")
         print(f"   - Boletos: {len(g['boletos'])}")
         print(f"   - Documentos: {len(g['docs'])}")
 
@@ -1452,7 +1713,6 @@ def executar():
             print(f"   - FIDC: {fidc_grupo}")
         else:
             # Múltiplos FIDCs no mesmo grupo - pegar o mais comum
-            from collections import Counter
             fidc_grupo = Counter(g['fidcs']).most_common(1)[0][0]
             print(f"   - AVISO: Multiplos FIDCs detectados ({', '.join(fidcs_unicos)})")
             print(f"   - Usando FIDC mais comum: {fidc_grupo}")
@@ -1469,7 +1729,8 @@ def executar():
         print(f"   - Validando notas fiscais...")
         print(f"   - Documentos esperados: {', '.join(sorted(g['docs']))}")
         notas_anexos, bases6, detalhes_validacao, tem_erro_critico = achar_notas_por_docs_set(
-            g['docs'], notas_idx, cnpj_validacao, valor_validacao
+            g['docs'], notas_idx, cnpj_validacao, valor_validacao,
+            validador=validador_notas, auditorias=g['auditorias']
         )
         print(f"   - Notas validadas: {len(notas_anexos)}")
 
@@ -1487,59 +1748,151 @@ def executar():
                 if boleto_aud not in auditoria.boletos:
                     auditoria.adicionar_boleto(boleto_aud)
 
-            erros += 1
-            continue  # Pula para o próximo grupo
+            contar('erros')
+            return []  # Nada a enviar para este grupo
 
-        # Enviar email com FIDC dinâmico
-        try:
-            abrir_email_outlook(
-                email_to,
-                f"Boleto e Nota Fiscal ({', '.join(bases6)})",
-                montar_corpo_html(g['pagador_exib'], bases6, g['linhas'], fidc_grupo),
-                list(g['boletos']) + list(notas_anexos),
-                fidc_grupo  # Passa FIDC para CC dinâmico!
+        # Gravar na caixa de saída (FIDC dinâmico)
+        mensagem = montar_mensagem_email(
+            email_to,
+            f"Boleto e Nota Fiscal ({', '.join(bases6)})",
+            montar_corpo_html(g['pagador_exib'], bases6, g['linhas'], fidc_grupo),
+            list(g['boletos']) + list(notas_anexos),
+            fidc_grupo  # Passa FIDC para CC dinâmico!
+        )
+        item_id = caixa.enfileirar(mensagem, {
+            'boletos': list(g['boletos']),
+            'pagador': g['pagador_exib'],
+            'email_to': email_to,
+            'impressoes': [asdict(imp) for imp in g['impressoes']],
+        }, execucao=auditoria.execucao_id)
+        pos_envio[item_id] = (g, notas_anexos, config_fidc)
+        print(f"   [CAIXA] Mensagem #{item_id} na caixa de saida")
+        return [item_id]
+
+    def registrar_envio(item):
+        if registro is not None and not simulado:
+            registro.registrar(
+                [ImpressaoBoleto(**imp) for imp in item.contexto.get('impressoes', [])], item.mensagem,
+                modo=REGISTRO_PREVIEW if MODO_PREVIEW else REGISTRO_PRODUCAO, execucao=auditoria.execucao_id
             )
 
-            # Mover boletos para pasta de enviados (apenas em modo produção)
-            if not MODO_PREVIEW:
-                # Em modo produção, move após enviar automaticamente
-                for b in g['boletos']:
-                    try:
-                        destino = os.path.join(PASTA_ENVIADOS, os.path.basename(b))
-                        shutil.move(b, destino)
-                        print(f"   [OK] Boleto movido para BoletosEnviados: {os.path.basename(b)}")
-                    except Exception as e:
-                        print(f"   [AVISO] Erro ao mover {os.path.basename(b)}: {e}")
-            else:
-                # Em modo preview, avisar usuário
-                print(f"   [INFO] MODO PREVIEW: Boletos não foram movidos (mova manualmente após enviar)")
+    def ao_enviar(item):
+        print(f"[OK] Email #{item.id} enviado: {item.contexto.get('pagador', '')} "
+              f"({item.contexto.get('email_to', '')})")
+        registrar_envio(item)
+        # Mover boletos para pasta de enviados (apenas em modo produção)
+        if mover_boletos:
+            mover_para_enviados(item.contexto.get('boletos', []))
+        elif MODO_PREVIEW:
+            # Em modo preview, avisar usuário
+            print(f"   [INFO] MODO PREVIEW: Boletos não foram movidos (mova manualmente após enviar)")
+        contar('enviados')
+
+        if item.id not in pos_envio:
+            return  # mensagem de uma execução anterior
+        g, notas_anexos, config_fidc = pos_envio[item.id]
+        # Atualizar auditoria de cada boleto deste grupo
+        for boleto_aud in g['auditorias']:
+            boleto_aud.email_enviado = True
+            boleto_aud.email_destinatarios = item.contexto['email_to'].split(';')
+            boleto_aud.email_cc = config_fidc['cc_emails']
+            boleto_aud.anexos_count = len(g['boletos']) + len(notas_anexos)
+            boleto_aud.notas_fiscais = [os.path.basename(n) for n in notas_anexos]
+            # Adicionar à auditoria geral se ainda não foi adicionado
+            if boleto_aud not in auditoria.boletos:
+                auditoria.adicionar_boleto(boleto_aud)
 
-            enviados += 1
-            metodos_str = ", ".join(set(g['metodos']))
-            print(f"   [OK] Email enviado com sucesso!\n")
+    def ao_falhar(item, erro):
+        print(f"[ERRO] ERRO ao enviar email #{item.id} ({item.contexto.get('email_to', '')}): {erro}")
+        contar('erros')
+        # Registrar erro na auditoria
+        if item.id not in pos_envio:
+            auditoria.adicionar_erro_critico(f"Erro ao enviar email: {erro}", item.contexto.get('pagador', ''))
+            return
+        for boleto_aud in pos_envio[item.id][0]['auditorias']:
+            if boleto_aud not in auditoria.boletos:
+                auditoria.adicionar_boleto(boleto_aud)
+                auditoria.adicionar_erro_critico(f"Erro ao enviar email: {erro}", boleto_aud.arquivo)
+
+    despachante = Despachante(
+        caixa, (lambda: criar_transporte(TRANSPORTE_ARQUIVO, pasta=pasta_eml)) if simulado else criar_transporte,
+        workers=ENVIO_WORKERS,
+        por_segundo=ENVIO_LIMITE_POR_SEGUNDO.get(TRANSPORTE_EMAIL, 0),
+        max_tentativas=ENVIO_MAX_TENTATIVAS,
+        espera_base=ENVIO_ESPERA_BASE_SEGUNDOS,
+    )
 
-            # Atualizar auditoria de cada boleto deste grupo
-            for boleto_aud in g['auditorias']:
-                boleto_aud.email_enviado = True
-                boleto_aud.email_destinatarios = email_to.split(';')
-                boleto_aud.email_cc = config_fidc['cc_emails']
-                boleto_aud.anexos_count = len(g['boletos']) + len(notas_anexos)
-                boleto_aud.notas_fiscais = [os.path.basename(n) for n in notas_anexos]
-                # Adicionar à auditoria geral se ainda não foi adicionado
-                if boleto_aud not in auditoria.boletos:
-                    auditoria.adicionar_boleto(boleto_aud)
+    def enviar(item_id):
+        """Envio: uma tentativa assim que a mensagem entra na caixa (erro temporário fica para o fim)"""
+        resultado = despachante.enviar_item(item_id)
+        return [resultado] if resultado is not None else []
 
-        except Exception as e:
-            print(f"   [ERRO] ERRO ao enviar email: {e}\n")
-            # Registrar erro na auditoria
-            for boleto_aud in g['auditorias']:
-                if boleto_aud not in auditoria.boletos:
-                    auditoria.adicionar_boleto(boleto_aud)
-                    auditoria.adicionar_erro_critico(f"Erro ao enviar email: {e}", boleto_aud.arquivo)
-            erros += 1
+    def concluir(resultado):
+        """Auditoria: registro de envios, mover boletos e auditoria do grupo"""
+        despachante.concluir(resultado, ao_enviar, ao_falhar)
+        return []
+
+    workers_extracao = WORKERS_ENVIO_EXTRACAO if WORKERS_ENVIO_EXTRACAO > 0 else (os.cpu_count() or 1)
+    workers_extracao = max(1, min(workers_extracao, total))
+
+    estatisticas = []
+    try:
+        # Enviados numa execução interrompida: falta só registrar e mover os boletos
+        for item in caixa.enviadas_sem_conclusao():
+            print(f"[CAIXA] Mensagem #{item.id} ja enviada ({item.contexto.get('pagador', '')}): concluindo")
+            registrar_envio(item)
+            if mover_boletos:
+                mover_para_enviados(item.contexto.get('boletos', []))
+            caixa.marcar_concluida(item.id)
+
+        # Outlook (COM): um envio por vez, na thread principal
+        workers_envio = despachante.workers_efetivos()
+        etapas = [
+            Etapa("ingestao", ingerir),
+            Etapa("extracao", _extrair_boleto_envio, workers=workers_extracao, processos=workers_extracao > 1,
+                  inicializador=_inicializar_extracao_envio, argumentos_inicializador=(mapa_xmls,)),
+            Etapa("validacao", em_bloco(validar), ordenada=True, ao_terminar=agrupador.restantes),
+            Etapa("montagem", em_bloco(montar)),
+            Etapa("envio", enviar, workers=workers_envio, na_thread_principal=workers_envio == 1),
+            Etapa("auditoria", em_bloco(concluir)),
+        ]
+
+        print(f"[EMAIL] Transporte: {TRANSPORTE_EMAIL} | Workers: {workers_extracao} leitura, "
+              f"{workers_envio} envio")
+        print("[PROC] Processando boletos...")
+        print("-" * 80)
+
+        estatisticas = Pipeline(etapas, capacidade=max(CAPACIDADE_PADRAO, 2 * workers_extracao)).executar(
+            enumerate(arquivos_boletos, 1))
+
+        # Novas tentativas e mensagens pendentes de execuções anteriores
+        pendentes = caixa.contar().get('pendente', 0)
+        if pendentes:
+            print()
+            print(f"[CAIXA] {pendentes} mensagem(ns) pendente(s): enviando")
+            despachante.drenar(ao_enviar, ao_falhar)
+    except ErroTransporte as e:
+        # Conta/conexão indisponível: nada de novas tentativas; o que já está
+        # na caixa sai na próxima execução e os demais boletos ficam na pasta
+        print()
+        print(f"[ERRO] Envio interrompido: {e}")
+        print(f"[CAIXA] {caixa.contar().get('pendente', 0)} mensagem(ns) pendente(s) para a proxima execucao")
+        auditoria.adicionar_erro_critico(f"Envio interrompido: {e}")
+    finally:
+        despachante.fechar()
+        caixa.fechar()
+    resumo = despachante.resumo
+    print()
+    if contagem['ja_enviados']:
+        print(f"[REGISTRO] {contagem['ja_enviados']} boleto(s) ja enviado(s) ignorado(s)")
+    print(f"[CAIXA] {resumo['enviadas']} enviado(s), {resumo['reagendadas']} nova(s) tentativa(s), "
+          f"{resumo['falhas']} falha(s)")
+    if simulado:
+        print(f"[SIMULACAO] {resumo['enviadas']} arquivo(s) .eml (tempos em mensagens.csv): {pasta_eml}")
+    print()
 
     # ==== FINALIZAR AUDITORIA ====
-    auditoria.emails_enviados = enviados
+    auditoria.emails_enviados = contagem['enviados']
     auditoria.finalizar()
 
     # Atualizar estatísticas de validação na auditoria
@@ -1561,10 +1914,22 @@ def executar():
     print("  RESUMO DA EXECUCAO")
     print("=" * 80)
     print(f"[TEMPO] Tempo total: {auditoria.duracao_segundos:.2f}s")
+    imprimir_estatisticas(estatisticas)
     print(f"[OK] E-mails enviados: {auditoria.emails_enviados}")
     print(f"[OK] Boletos aprovados: {auditoria.aprovados}")
     print(f"[ERRO] Boletos rejeitados: {auditoria.rejeitados}")
     print(f"[TAXA] Taxa de sucesso: {auditoria.get_taxa_sucesso():.1%}")
+    # Leituras dos boletos feitas nos processos do pool: somar às deste processo
+    estatisticas_cache = pdf_texto.estatisticas_cache()
+    paginas = pdf_texto.estatisticas_paginas()
+    if workers_extracao > 1:
+        if estatisticas_cache:
+            estatisticas_cache['acertos'] += cache_extracao[0]
+            estatisticas_cache['falhas'] += cache_extracao[1]
+        paginas = {k: paginas[k] + paginas_extracao[k] for k in paginas}
+    pdf_texto.imprimir_estatisticas_cache(estatisticas_cache)
+    pdf_texto.imprimir_estatisticas_paginas(paginas)
+    codigo_barras.imprimir_estatisticas(origens_campos)
     print()
 
     if auditoria.erros_criticos:
@@ -8,6 +8,7 @@ import os
 import sys
 import io
 import threading
+import multiprocessing
 import re
 from pathlib import Path
 import pythoncom
@@ -822,6 +823,9 @@ class InterfaceBoletos:
 
 # ==================== EXECUÇÃO ====================
 if __name__ == "__main__":
+    # Necessário no .exe: os workers da renomeação paralela reexecutam o executável
+    multiprocessing.freeze_support()
+
     root = tk.Tk()
     app = InterfaceBoletos(root)
     root.mainloop()
@@ -15,8 +15,8 @@ import re
 import shutil
 import json
 import time
-import pdfplumber
-from unidecode import unidecode
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from typing import Tuple, Optional, Dict
 
 # Importar configuração centralizada (versão servidor com caminhos dinâmicos)
@@ -25,16 +25,40 @@ from config_server import (
     PASTA_DESTINO,
     PASTA_NOTAS,
     PASTA_AUDITORIA,
-    ARQUIVO_LOG_RENOMEACAO as ARQUIVO_LOG
+    ARQUIVO_LOG_RENOMEACAO as ARQUIVO_LOG,
+    WORKERS_RENOMEACAO,
+    LEITURA_PARCIAL_PDF,
+    CASAMENTO_EM_LOTE,
+    VIGIA_BACKEND,
+    VIGIA_INTERVALO_SEGUNDOS,
+    VIGIA_ESPERA_SEGUNDOS
 )
 
+# Extração de texto de PDFs com cache persistente (compartilhado com o envio)
+import pdf_texto
+
 # Importar leitor de XMLs NFe
-from xml_nfe_reader import indexar_xmls_por_nota
+from xml_nfe_reader import indexar_xmls_por_nota, adicionar_xml_ao_mapa
+from indice_nfe import obter_indice_nfe, atualizar_indice_nfe
+from registro_nfe import MapaNFe
+from vigia_pastas import VigiaPastas
+from pipeline import CAPACIDADE_PADRAO, Etapa, Pipeline, capturar_saida, imprimir_estatisticas
+from normalizacao_nomes import limpar_nome_pagador, normalizar_nome_empresa, remover_acentos
+from casamento_lote import PedidoBoleto, casar_lote
 from difflib import SequenceMatcher
 from decimal import Decimal
 
 # Importar módulo de extratores isolados (v2.0 - Arquitetura em camadas)
-from extractors import ExtractorFactory
+from extractors import ExtractorFactory, ParsedBoleto, codigo_barras
+from extractors.padroes import (
+    CNPJ_DANFE_DESTINATARIO, CNPJ_PAGADOR_NOVAX, CNPJ_SECAO_PAGADOR, CPF_PAGADOR_NOVAX,
+    DATA_COMPLETA, DATA_DIA_MES_SEPARADOR, ESPACOS, INICIO_LINHA_DIGITAVEL,
+    LINHA_DIGITAVEL_VALOR, NAO_DIGITO, NUMERO_DOCUMENTO_ABREVIADO,
+    NUMERO_DOCUMENTO_MESMA_LINHA, NUMERO_DOCUMENTO_PROXIMA_LINHA, NUMERO_NOTA_FALLBACK,
+    PAGADOR_PROXIMA_LINHA, PAGADOR_ROTULADO, SECAO_PAGADOR, VALOR_APOS_DATA,
+    VALOR_APOS_NUMERO_E_DATA, VALOR_APOS_RS, VALOR_BR, VALOR_DOCUMENTO_COM_CREDVALE,
+    VALOR_FATURA, VENCIMENTO_APOS_ROTULO, VENCIMENTO_DD_MM
+)
 
 # Tentar importar Ollama (pode não estar instalado)
 try:
@@ -52,30 +76,21 @@ TIMEOUT_IA = 30  # Timeout em segundos para resposta da IA
 
 # ======== UTILS ======== #
 def safe_filename(nome: str) -> str:
-    nome_limpo = unidecode(str(nome))
+    nome_limpo = remover_acentos(str(nome))
     nome_limpo = re.sub(r'[\\/*?:"<>|]', '-', nome_limpo)
     nome_limpo = re.sub(r'\s+', ' ', nome_limpo).strip()
     return nome_limpo
 
 def extrair_texto_pdf(caminho_pdf: str) -> str:
-    with pdfplumber.open(caminho_pdf) as pdf:
-        texto = ""
-        for pagina in pdf.pages:
-            t = pagina.extract_text()
-            if t:
-                texto += t + "\n"
-    return texto
-
-def detectar_fidc(texto: str) -> str:
-    u = texto.upper()
-    if "CAPITAL RS FIDC" in u or "CAPITAL RS" in u:
-        return "CAPITAL"
-    if "NOVAX" in u:
-        return "NOVAX"
-    if "CREDVALE" in u:
-        return "CREDVALE"
-    if "SQUID" in u:
-        return "SQUID"
+    # Leitura compartilhada com o envio (cache por SHA-256 do PDF)
+    return pdf_texto.extrair_texto_pdf(caminho_pdf)
+
+def detectar_fidc(texto) -> str:
+    # Mesmo detector do envio (palavras-chave do FIDC_CONFIG, memoizado no documento)
+    doc = ParsedBoleto.de(texto)
+    if doc.fidc:
+        return doc.fidc
+    u = doc.texto_upper
 
     # DANFE genérico (CAPITAL ou SQUID) - detectar pelo formato
     # Se tem DANFE + JOTA JOTA, provavelmente é SQUID ou CAPITAL
@@ -97,21 +112,6 @@ def normaliza_valor_str(v: str) -> str:
         v = "R$ " + v.strip()
     return v.strip()
 
-def corta_apos_cnpj_ou_virgula(nome: str) -> str:
-    """Remove CNPJ/CPF e tudo que vem depois do nome do pagador"""
-    # Remove tudo após vírgula, "CNPJ", "CPF", ou "Beneficiario"
-    nome = re.split(r',|CNPJ|CPF|Beneficiario', nome, maxsplit=1, flags=re.IGNORECASE)[0].strip()
-
-    # Remove " - " seguido de números (formato CNPJ: XX.XXX.XXX/XXXX-XX ou CPF: XXX.XXX.XXX-XX)
-    nome = re.sub(r'\s*-\s*\d{2,3}[\.\s]*\d{3}[\.\s]*\d{3}[/-]?\d{0,4}[-]?\d{0,2}.*$', '', nome)
-
-    # Remove CNPJ/CPF quando aparece DIRETO após nome (DANFE)
-    # Formato: "NOME 83.601.534/0001-09" ou "NOME 123.456.789-01"
-    # Captura: espaço + CNPJ (14 dig) ou CPF (11 dig) + tudo depois
-    nome = re.sub(r'\s+\d{2,3}[\.\s]?\d{3}[\.\s]?\d{3}[\/\-\s]?\d{2,4}[\-\s]?\d{2}.*$', '', nome)
-
-    return nome.strip()
-
 # ------- validadores ------- #
 def validar_dados_extraidos(pagador: str, vencimento: str, valor: str) -> bool:
     """Valida se os dados extraídos estão no formato esperado"""
@@ -120,7 +120,7 @@ def validar_dados_extraidos(pagador: str, vencimento: str, valor: str) -> bool:
         return False
 
     # Validar vencimento: deve estar no formato DD-MM
-    if not re.match(r'\d{2}-\d{2}', vencimento):
+    if not VENCIMENTO_DD_MM.match(vencimento):
         return False
 
     # Validar valor: deve conter R$ e números
@@ -132,7 +132,7 @@ def validar_dados_extraidos(pagador: str, vencimento: str, valor: str) -> bool:
 def formatar_vencimento(data_str: str) -> str:
     """Converte DD/MM/YYYY ou DD/MM para DD-MM"""
     # Extrai apenas DD/MM
-    match = re.search(r'(\d{2})[/-](\d{2})', data_str)
+    match = DATA_DIA_MES_SEPARADOR.search(data_str)
     if match:
         return f"{match.group(1)}-{match.group(2)}"
     return "SEM_VENCIMENTO"
@@ -154,7 +154,7 @@ def normalizar_cnpj(cnpj: str) -> str:
     """Remove pontuação do CNPJ, retorna só dígitos"""
     if not cnpj:
         return ""
-    return re.sub(r'\D', '', cnpj)
+    return NAO_DIGITO.sub('', cnpj)
 
 def valor_to_cents(valor) -> int:
     """Converte valor para centavos para comparação exata"""
@@ -182,49 +182,6 @@ def valor_to_cents(valor) -> int:
     except:
         return 0
 
-def normalizar_nome_empresa(nome: str) -> str:
-    """
-    Normaliza nome de empresa para matching mais flexível.
-    Remove sufixos comuns, pontuações, espaços extras.
-    """
-    if not nome:
-        return ""
-
-    # Converter para maiúsculas
-    nome_norm = nome.upper().strip()
-
-    # Remover pontuação
-    nome_norm = re.sub(r'[.,\-]', ' ', nome_norm)
-
-    # Remover sufixos comuns de empresas
-    sufixos = [
-        'LTDA', 'LTD', 'LIMITADA',
-        'EIRELI', 'EPP', 'ME', 'MEI',
-        'S/A', 'SA', 'S.A.',
-        'SOCIEDADE', 'EMPRESARIAL',
-        'CIA', 'COMPANHIA'
-    ]
-
-    for sufixo in sufixos:
-        # Remover sufixo se estiver no final ou isolado
-        nome_norm = re.sub(rf'\b{re.escape(sufixo)}\b', '', nome_norm)
-
-    # Expandir abreviações comuns
-    abreviacoes = {
-        r'\bENG\b': 'ENGENHARIA',
-        r'\bCONST\b': 'CONSTRUCAO',
-        r'\bEMPREENDIMENTOS?\b': 'EMPREENDIMENTOS',
-        r'\bSPE\b': 'SOCIEDADE PROPOSITO ESPECIFICO'
-    }
-
-    for abrev, completo in abreviacoes.items():
-        nome_norm = re.sub(abrev, completo, nome_norm)
-
-    # Remover espaços múltiplos
-    nome_norm = re.sub(r'\s+', ' ', nome_norm).strip()
-
-    return nome_norm
-
 def calcular_similaridade(str1: str, str2: str) -> float:
     """Calcula similaridade entre duas strings (0.0 a 1.0) com normalização"""
     if not str1 or not str2:
@@ -255,11 +212,7 @@ def extrair_cnpj_do_boleto(texto: str) -> str:
     # DESTINATÁRIO REMETENTE
     # NOME/RAZÃO SOCIAL    CNPJ/CPF    DATA
     # EMPRESA LTDA         83.601.534/0001-09    27/08/2025
-    match_danfe = re.search(
-        r'DESTINAT[AÁ]RIO.*?REMETENTE.*?CNPJ[\/\s]*CPF.*?[\r\n]+.*?(\d{2,3}[\.\s]?\d{3}[\.\s]?\d{3}[\/\-\s]?\d{2,4}[\-\s]?\d{2})',
-        texto,
-        re.IGNORECASE | re.DOTALL
-    )
+    match_danfe = CNPJ_DANFE_DESTINATARIO.search(texto)
     if match_danfe:
         doc_limpo = normalizar_cnpj(match_danfe.group(1))
         if len(doc_limpo) == 11 or len(doc_limpo) == 14:
@@ -267,11 +220,7 @@ def extrair_cnpj_do_boleto(texto: str) -> str:
 
     # TENTATIVA 1: Padrão específico NOVAX - CNPJ (mais confiável)
     # "Pagador: NOME CNPJ/ CPF : XX.XXX.XXX/XXXX-XX"
-    match_novax_cnpj = re.search(
-        r'Pagador:\s*([A-Z\s]+)\s+CNPJ[\/\s]*CPF\s*[:\s]*(\d{2}\.\d{3}\.\d{3}\/\d{4}\-\d{2})',
-        texto,
-        re.IGNORECASE
-    )
+    match_novax_cnpj = CNPJ_PAGADOR_NOVAX.search(texto)
 
     if match_novax_cnpj:
         cnpj_limpo = normalizar_cnpj(match_novax_cnpj.group(2))
@@ -280,11 +229,7 @@ def extrair_cnpj_do_boleto(texto: str) -> str:
 
     # TENTATIVA 1B: Padrão específico NOVAX - CPF
     # "Pagador: NOME CNPJ/ CPF : XXX.XXX.XXX-XX"
-    match_novax_cpf = re.search(
-        r'Pagador:\s*([A-Z\s]+)\s+CNPJ[\/\s]*CPF\s*[:\s]*(\d{3}\.\d{3}\.\d{3}\-\d{2})',
-        texto,
-        re.IGNORECASE
-    )
+    match_novax_cpf = CPF_PAGADOR_NOVAX.search(texto)
 
     if match_novax_cpf:
         cpf_limpo = normalizar_cnpj(match_novax_cpf.group(2))  # normalizar_cnpj funciona para CPF também
@@ -296,19 +241,11 @@ def extrair_cnpj_do_boleto(texto: str) -> str:
     meio = len(texto) // 2
     segunda_metade = texto[meio:]
 
-    match_secao = re.search(
-        r'Pagador[:\s]+(.*?)(?:Instruções|Autenticação|Demonstrativo|Sacador|Código de Baixa|Beneficiário Final|$)',
-        segunda_metade,
-        re.IGNORECASE | re.DOTALL
-    )
+    match_secao = SECAO_PAGADOR.search(segunda_metade)
 
     # Se não achar na segunda metade, buscar no documento inteiro
     if not match_secao:
-        match_secao = re.search(
-            r'Pagador[:\s]+(.*?)(?:Instruções|Autenticação|Demonstrativo|Sacador|Código de Baixa|Beneficiário Final|$)',
-            texto,
-            re.IGNORECASE | re.DOTALL
-        )
+        match_secao = SECAO_PAGADOR.search(texto)
 
     if not match_secao:
         return ""
@@ -317,24 +254,10 @@ def extrair_cnpj_do_boleto(texto: str) -> str:
 
     # Padrões em ordem de prioridade (mais específico primeiro)
     # Nota: Agora aceitamos CNPJ (14 dígitos) ou CPF (11 dígitos)
-    padroes = [
-        # Padrão 1: "- CNPJ:" ou "- CPF:" (SQUID)
-        r'[-]\s*(?:CNPJ|CPF)[:\s]+(\d{2,3}[\.\s]?\d{3}[\.\s]?\d{3}[\/\-\s]?\d{2,4}[\-\s]?\d{2})',
-        # Padrão 2: ", CNPJ:" ou ", CPF:" (CAPITAL RS)
-        r',\s*(?:CNPJ|CPF)[:\s]+(\d{2,3}[\.\s]?\d{3}[\.\s]?\d{3}[\/\-\s]?\d{2,4}[\-\s]?\d{2})',
-        # Padrão 3: "- EPP -" (CREDVALE - sem palavra CNPJ/CPF)
-        r'[-]\s*EPP\s*[-]\s*(\d{2,3}[\.\s]?\d{3}[\.\s]?\d{3}[\/\-\s]?\d{2,4}[\-\s]?\d{2})',
-        # Padrão 4: "CNPJ/ CPF :" (NOVAX - fallback)
-        r'CNPJ[\/\s]*(?:CPF)?[:\s]+(\d{2,3}[\.\s]?\d{3}[\.\s]?\d{3}[\/\-\s]?\d{2,4}[\-\s]?\d{2})',
-        # Padrão 5: Primeiro CNPJ/CPF encontrado na seção (fallback final)
-        # Tenta CNPJ primeiro (14 dígitos)
-        r'(\d{2}[\.\s]?\d{3}[\.\s]?\d{3}[\/\s]?\d{4}[\-\s]?\d{2})',
-        # Depois tenta CPF (11 dígitos)
-        r'(\d{3}[\.\s]?\d{3}[\.\s]?\d{3}[\-\s]?\d{2})'
-    ]
-
-    for padrao in padroes:
-        match = re.search(padrao, secao_pagador, re.IGNORECASE)
+    # "- CNPJ:" (SQUID), ", CNPJ:" (CAPITAL RS), "- EPP -" (CREDVALE),
+    # "CNPJ/ CPF :" (NOVAX), primeiro CNPJ e depois primeiro CPF da seção
+    for padrao in CNPJ_SECAO_PAGADOR:
+        match = padrao.search(secao_pagador)
         if match:
             doc_raw = match.group(1)
             doc_limpo = normalizar_cnpj(doc_raw)
@@ -357,8 +280,7 @@ def extrair_numero_nota_boleto(texto: str) -> str:
 
     # PADRÃO 1A: Número seguido do valor na PRÓXIMA LINHA (mais comum)
     # Aceita qualquer variação de "Número do Documento" (com ou sem acentos, � no lugar de ú)
-    pattern_multiline = r'N[u�úü]mero\s+do\s+Documento.*?\n\s*(\d{6}[/\d]*)'
-    match = re.search(pattern_multiline, texto, re.IGNORECASE | re.DOTALL)
+    match = NUMERO_DOCUMENTO_PROXIMA_LINHA.search(texto)
     if match:
         numero = match.group(1)
         # Se tiver barra, pegar apenas antes da barra
@@ -369,13 +291,9 @@ def extrair_numero_nota_boleto(texto: str) -> str:
             return numero
 
     # PADRÃO 1B: Número na mesma linha
-    patterns_sameline = [
-        r'N[u�úü]mero\s+(?:do\s+)?Documento[:\s]*(\d{6})',  # Apenas 6 dígitos
-        r'N[u�úü]mero\s+do\s+Documento[:\s]*(\d+)',  # Qualquer quantidade
-    ]
-
-    for pattern in patterns_sameline:
-        match = re.search(pattern, texto, re.IGNORECASE)
+    # Primeiro com exatamente 6 dígitos, depois qualquer quantidade
+    for pattern in NUMERO_DOCUMENTO_MESMA_LINHA:
+        match = pattern.search(texto)
         if match:
             numero = match.group(1)
             # Se tiver mais de 6 dígitos, pegar os primeiros 6 (antes da barra)
@@ -388,24 +306,16 @@ def extrair_numero_nota_boleto(texto: str) -> str:
                 return numero_6dig
 
     # PADRÃO 1C: Campo "n° do documento" ou "n do documento" (variações)
-    pattern_ndo_doc = r'n[º°]?\s+do\s+documento[:\s]*(\d{6})'
-    match = re.search(pattern_ndo_doc, texto, re.IGNORECASE)
+    match = NUMERO_DOCUMENTO_ABREVIADO.search(texto)
     if match:
         numero = match.group(1)
         print(f"    [NUMERO-DOC] Número do documento encontrado: {numero}")
         return numero
 
     # === PADRÃO 2: Outros padrões (fallback) ===
-    patterns_fallback = [
-        r'Nosso\s+N(?:úmero|umero)[:\s]*(?:\d+-)?(\d{6,})',
-        r'Seu\s+N(?:úmero|umero)[:\s]*(\d{6,})',
-        r'N[ºo°]\.?\s*Doc(?:umento)?[:\s]*(\d{6,})',
-        r'Nota\s+Fiscal[:\s]*(\d{6,})',
-        r'NF[:\s]*(\d{6,})',
-    ]
-
-    for pattern in patterns_fallback:
-        match = re.search(pattern, texto, re.IGNORECASE)
+    # Nosso Número, Seu Número, Nº Doc, Nota Fiscal, NF
+    for pattern in NUMERO_NOTA_FALLBACK:
+        match = pattern.search(texto)
         if match:
             numero = match.group(1)
             # Pegar primeiros 6 dígitos
@@ -425,7 +335,7 @@ def converter_vencimento_para_data_xml(vencimento_str: str) -> str:
         return ""
 
     # Formato: DD-MM
-    match = re.match(r'(\d{2})-(\d{2})', vencimento_str)
+    match = VENCIMENTO_DD_MM.match(vencimento_str)
     if not match:
         return ""
 
@@ -480,10 +390,23 @@ def extrair_numero_nota_xml(cnpj_boleto: str, valor_boleto_cents: int, nome_bole
     nome_boleto_norm = nome_boleto.upper().strip()
     vencimento_xml_format = converter_vencimento_para_data_xml(vencimento_boleto)
 
-    # Tentar match com cada XML
+    # Índices do mapa (montados uma vez por execução)
+    indice = obter_indice_nfe(mapa_xmls)
+    duplicatas_exatas = {}
+    if cnpj_boleto and vencimento_xml_format:
+        duplicatas_exatas = indice.duplicatas_com(cnpj_boleto, vencimento_xml_format, valor_boleto_cents)
+
+    # Nomes das notas normalizados uma vez; o do boleto, uma vez por boleto
+    indice.motor_nomes(normalizar_nome_empresa)
+    nome_boleto_busca = normalizar_nome_empresa(nome_boleto_norm)
+
+    # Só XMLs com o mesmo CNPJ ou o mesmo valor total podem chegar ao score
+    # mínimo (nome sozinho vale no máximo 30 pontos); os nomes mais parecidos
+    # entram só para o diagnóstico [XML-BAIXO-SCORE]
     melhores_matches = []
+    posicoes_nome = indice.posicoes_por_nome(nome_boleto_busca) if nome_boleto_norm else ()
 
-    for numero_nota, dados_xml in mapa_xmls.items():
+    for posicao, numero_nota, dados_xml in indice.candidatos(cnpj_boleto, valor_boleto_cents, posicoes_nome):
         if not dados_xml.get('xml_valido'):
             continue
 
@@ -500,21 +423,15 @@ def extrair_numero_nota_xml(cnpj_boleto: str, valor_boleto_cents: int, nome_bole
         match_duplicata = False
 
         if duplicatas and vencimento_xml_format:
-            for dup in duplicatas:
-                valor_dup_cents = int(dup['valor'] * 100) if dup['valor'] else 0
-                venc_dup = dup['vencimento']
-
-                # Match perfeito: CPF/CNPJ + Vencimento + Valor da duplicata
-                if cnpj_boleto and cnpj_xml and cnpj_boleto == cnpj_xml:
-                    if venc_dup == vencimento_xml_format:
-                        if valor_dup_cents == valor_boleto_cents:
-                            # Match PERFEITO por duplicata
-                            score = 100  # Score máximo!
-                            razoes = ["DUPLICATA_PERFEITA", f"Venc_{venc_dup}", f"Valor_R${dup['valor']}"]
-                            tipo_match = "DUPLICATA"
-                            match_duplicata = True
-                            duplicata_matched = dup  # Guardar duplicata
-                            break
+            # Match perfeito: CPF/CNPJ + Vencimento + Valor da duplicata
+            dup = duplicatas_exatas.get(posicao)
+            if dup is not None and cnpj_boleto and cnpj_xml and cnpj_boleto == cnpj_xml:
+                # Match PERFEITO por duplicata
+                score = 100  # Score máximo!
+                razoes = ["DUPLICATA_PERFEITA", f"Venc_{dup['vencimento']}", f"Valor_R${dup['valor']}"]
+                tipo_match = "DUPLICATA"
+                match_duplicata = True
+                duplicata_matched = dup  # Guardar duplicata
 
         # === PRIORIDADE 2: MATCH POR VALOR TOTAL (fallback) ===
         if not match_duplicata:
@@ -535,7 +452,7 @@ def extrair_numero_nota_xml(cnpj_boleto: str, valor_boleto_cents: int, nome_bole
 
             # Critério 3: Nome similar (+30 pontos)
             if nome_xml and nome_boleto_norm:
-                similaridade = calcular_similaridade(nome_boleto_norm, nome_xml)
+                similaridade = indice.similaridade_nome(posicao, nome_boleto_busca, minimo=0.70)
                 if similaridade >= 0.85:
                     score += 30
                     razoes.append(f"NOME_MATCH_{similaridade:.0%}")
@@ -787,7 +704,7 @@ def extrair_valor_robusto(texto: str) -> str:
     1. Campo "Valor Documento" ou "(=) Valor Documento"
     2. Linha que contém número do documento + vencimento + valor
     3. Primeiro valor em formato R$ X.XXX,XX encontrado
-    4. Valor do código de barras (posições 37-47)
+    4. Valor do código de barras (últimos 10 dígitos da linha digitável)
     """
     # PADRÃO 0: FATURA (DANFE - CAPITAL/SQUID) - PRIORIDADE MÁXIMA!
     # Formato DANFE:
@@ -795,64 +712,54 @@ def extrair_valor_robusto(texto: str) -> str:
     # NÚMERO VENCIMENTO VALOR ...
     # 001 25/09/2025 3.280,82
     # IMPORTANTE: Capturar APENAS o valor imediatamente após a data, sem espaços extras
-    match_fatura = re.search(
-        r'FATURA.*?[\r\n]+.*?[\r\n]+\s*\d{3}\s+\d{2}/\d{2}/\d{4}\s+(\d{1,3}(?:\.\d{3})*,\d{2})(?:\s|$)',
-        texto,
-        re.IGNORECASE | re.DOTALL
-    )
+    match_fatura = VALOR_FATURA.search(texto)
     if match_fatura:
         valor_str = match_fatura.group(1)
         print(f"    [VALOR-FATURA-DANFE] Valor encontrado na seção FATURA: R$ {valor_str}")
         return f"R$ {valor_str}"
 
     # PADRÃO 1: (=) Valor Documento ou Valor Documento (boletos tradicionais)
-    padroes_valor_doc = [
-        r'\(=\)\s*Valor\s+(?:do\s+)?Documento\s*[:\s]*(?:R\$\s*)?([\d\.\,]+)',
-        r'Valor\s+(?:do\s+)?Documento\s*[:\s]*(?:R\$\s*)?([\d\.\,]+)',
-        r'\(=\)\s*Valor\s+do\s+Documento\s+[\d/\s\w]+?\s+([\d\.\,]+)',  # CREDVALE
-    ]
-
-    for padrao in padroes_valor_doc:
-        match = re.search(padrao, texto, re.IGNORECASE | re.MULTILINE)
+    for padrao in VALOR_DOCUMENTO_COM_CREDVALE:
+        match = padrao.search(texto)
         if match:
             valor_str = match.group(1)
             # Validar formato
-            if re.match(r'\d{1,3}(?:\.\d{3})*,\d{2}', valor_str):
+            if VALOR_BR.match(valor_str):
                 return f"R$ {valor_str}"
 
     # PADRÃO 2: Linha com estrutura "número_doc data valor"
     # Formato: "310926/004 17/02/2026 2.221,20"
-    match_linha = re.search(r'\d{6}[/\d]*\s+\d{2}/\d{2}/\d{4}\s+([\d\.\,]+)', texto)
+    match_linha = VALOR_APOS_NUMERO_E_DATA.search(texto)
     if match_linha:
         valor_str = match_linha.group(1)
-        if re.match(r'\d{1,3}(?:\.\d{3})*,\d{2}', valor_str):
+        if VALOR_BR.match(valor_str):
             print(f"    [VALOR-LINHA-DOC] Valor encontrado: R$ {valor_str}")
             return f"R$ {valor_str}"
 
     # PADRÃO 3: Vencimento seguido de valor
     # Formato: "17/02/2026 2.221,20"
-    match_venc_valor = re.search(r'\d{2}/\d{2}/\d{4}\s+([\d\.\,]+)', texto)
+    match_venc_valor = VALOR_APOS_DATA.search(texto)
     if match_venc_valor:
         valor_str = match_venc_valor.group(1)
-        if re.match(r'\d{1,3}(?:\.\d{3})*,\d{2}', valor_str):
+        if VALOR_BR.match(valor_str):
             print(f"    [VALOR-APOS-VENC] Valor encontrado: R$ {valor_str}")
             return f"R$ {valor_str}"
 
     # PADRÃO 4: Qualquer R$ seguido de valor válido
-    match_rs = re.search(r'R\$\s*([\d\.\,]+)', texto)
+    match_rs = VALOR_APOS_RS.search(texto)
     if match_rs:
         valor_str = match_rs.group(1)
-        if re.match(r'\d{1,3}(?:\.\d{3})*,\d{2}', valor_str):
+        if VALOR_BR.match(valor_str):
             return f"R$ {valor_str}"
 
-    # PADRÃO 5: Código de barras (posições 37-47 contêm valor sem vírgula)
+    # PADRÃO 5: Código de barras (últimos 10 dígitos = valor sem vírgula)
     # Formato: "23790.36706 40000.911947 49000.840501 3 13600000222120"
     #                                                       ^^^^^^^^^^^
-    match_barras = re.search(r'\d{5}\.\d{5}\s+\d{5}\.\d{6}\s+\d{5}\.\d{6}\s+\d\s+(\d{14})', texto)
+    match_barras = LINHA_DIGITAVEL_VALOR.search(texto)
     if match_barras:
         codigo_completo = match_barras.group(1)
-        # Extrair valor (posições 3-13, últimos 10 dígitos do valor)
-        valor_cents_str = codigo_completo[3:13]  # Exemplo: "0000222120" = R$ 2.221,20
+        # Campo 5 = fator de vencimento (4 dígitos) + valor (10 dígitos)
+        valor_cents_str = codigo_completo[4:14]  # Exemplo: "0000222120" = R$ 2.221,20
         try:
             valor_cents = int(valor_cents_str)
             if valor_cents > 0:
@@ -888,7 +795,7 @@ def extrair_dados_capital(texto: str):
                 linha_nome = linhas[i + 2].strip()
                 # Validar que não é cabeçalho (não contém "CNPJ/CPF")
                 if "CNPJ" not in linha_nome and "CPF" not in linha_nome:
-                    pagador = corta_apos_cnpj_ou_virgula(linha_nome)
+                    pagador = limpar_nome_pagador(linha_nome)
                     if pagador and pagador != "SEM_PAGADOR":
                         break
 
@@ -898,17 +805,17 @@ def extrair_dados_capital(texto: str):
             if "PAGADOR" in linha.upper():
                 if i + 1 < len(linhas):
                     pagador = linhas[i + 1].strip()
-                    pagador = corta_apos_cnpj_ou_virgula(pagador)
+                    pagador = limpar_nome_pagador(pagador)
                     break
 
     # Vencimento: CASE-INSENSITIVE agora!
     for i, linha in enumerate(linhas):
         if "VENCIMENTO" in linha.upper():
             # Tentar na mesma linha
-            m = re.search(r'(\d{2}/\d{2}/\d{4})', linha)
+            m = DATA_COMPLETA.search(linha)
             if not m and i + 1 < len(linhas):
                 # Tentar na próxima linha
-                m = re.search(r'(\d{2}/\d{2}/\d{4})', linhas[i + 1])
+                m = DATA_COMPLETA.search(linhas[i + 1])
             if m:
                 vencimento = m.group(1)
                 break
@@ -923,7 +830,7 @@ def extrair_dados_capital(texto: str):
 
 def extrair_dados_novax(texto: str):
     # texto compacto facilita pegar "mesma linha"
-    compacto = re.sub(r'\s+', ' ', texto).strip()
+    compacto = ESPACOS.sub(' ', texto).strip()
 
     pagador = "SEM_PAGADOR"
     vencimento = "SEM_VENCIMENTO"
@@ -931,12 +838,12 @@ def extrair_dados_novax(texto: str):
 
     # Pagador: busca especificamente "Pagador:" seguido do nome até CNPJ/CPF
     # Aceita variações: CNPJ, CPF, CNPJ/, CNPJ/ CPF
-    mp = re.search(r'Pagador:\s*([A-Z0-9][A-Z0-9\s\.\-&]+?)(?:\s+CNPJ[/\s]|\s+CPF)', compacto, re.IGNORECASE)
+    mp = PAGADOR_ROTULADO.search(compacto)
     if mp:
         pagador = mp.group(1).strip()
 
     # Vencimento: busca na área do cabeçalho
-    md = re.search(r'Vencimento\s+(\d{2}/\d{2}/\d{4})', compacto, re.IGNORECASE)
+    md = VENCIMENTO_APOS_ROTULO.search(compacto)
     if md:
         vencimento = md.group(1)
         vencimento = vencimento[:5].replace("/", "-")
@@ -961,15 +868,15 @@ def extrair_dados_squid(texto: str):
                 # Próxima linha tem o nome do pagador
                 linha_pagador = linhas[i + 1].strip()
                 # Valida que não é o código de barras (não começa com números seguidos)
-                if not re.match(r'^\d{5}\.\d{5}\s+\d{5}', linha_pagador):
+                if not INICIO_LINHA_DIGITAVEL.match(linha_pagador):
                     # Remove tudo após "CNPJ:" ou "CPF:" para pegar só o nome
-                    pagador = corta_apos_cnpj_ou_virgula(linha_pagador)
+                    pagador = limpar_nome_pagador(linha_pagador)
                     break
 
     # Se não encontrou acima, tenta padrão alternativo com regex mais robusto
     if pagador == "SEM_PAGADOR":
         # Busca por "Pagador" em linha isolada, seguido do nome na próxima
-        m = re.search(r'Pagador\s*\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s\.\-&]+?)\s*-\s*(?:CNPJ|CPF)', texto, re.IGNORECASE | re.MULTILINE)
+        m = PAGADOR_PROXIMA_LINHA.search(texto)
         if m:
             pagador = m.group(1).strip()
 
@@ -977,10 +884,10 @@ def extrair_dados_squid(texto: str):
     for i, linha in enumerate(linhas):
         if "Vencimento" in linha:
             # Tentar na mesma linha
-            m = re.search(r'(\d{2}/\d{2}/\d{4})', linha)
+            m = DATA_COMPLETA.search(linha)
             if not m and i + 1 < len(linhas):
                 # Tentar na próxima linha
-                m = re.search(r'(\d{2}/\d{2}/\d{4})', linhas[i + 1])
+                m = DATA_COMPLETA.search(linhas[i + 1])
             if m:
                 vencimento = m.group(1)
                 vencimento = vencimento[:5].replace("/", "-")
@@ -1004,22 +911,22 @@ def extrair_dados_credvale(texto: str):
             if i + 1 < len(linhas):
                 linha_pagador = linhas[i + 1].strip()
                 # Valida que não é o código de barras
-                if not re.match(r'^\d{5}\.\d{5}\s+\d{5}', linha_pagador):
-                    pagador = corta_apos_cnpj_ou_virgula(linha_pagador)
+                if not INICIO_LINHA_DIGITAVEL.match(linha_pagador):
+                    pagador = limpar_nome_pagador(linha_pagador)
                     break
 
     # Padrão alternativo com regex mais robusto
     if pagador == "SEM_PAGADOR":
-        m = re.search(r'Pagador\s*\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s\.\-&]+?)\s*-\s*(?:CNPJ|CPF)', texto, re.IGNORECASE | re.MULTILINE)
+        m = PAGADOR_PROXIMA_LINHA.search(texto)
         if m:
             pagador = m.group(1).strip()
 
     # Vencimento: procura "Vencimento"
     for i, linha in enumerate(linhas):
         if "Vencimento" in linha:
-            m = re.search(r'(\d{2}/\d{2}/\d{4})', linha)
+            m = DATA_COMPLETA.search(linha)
             if not m and i + 1 < len(linhas):
-                m = re.search(r'(\d{2}/\d{2}/\d{4})', linhas[i + 1])
+                m = DATA_COMPLETA.search(linhas[i + 1])
             if m:
                 vencimento = m.group(1)
                 vencimento = vencimento[:5].replace("/", "-")
@@ -1080,7 +987,7 @@ def extrair_dados(texto: str) -> Tuple[str, str, str, str]:
     return pagador, vencimento, valor, fidc
 
 
-def processar_boleto_v2(texto: str, mapa_xmls: Dict[str, dict]) -> dict:
+def processar_boleto_v2(texto, mapa_xmls: Dict[str, dict]) -> dict:
     """
     Função v2.0 que usa processar_boleto_com_xml() dos extractors
 
@@ -1097,14 +1004,17 @@ def processar_boleto_v2(texto: str, mapa_xmls: Dict[str, dict]) -> dict:
             'erro_msg': str
         }
     """
+    # Texto do boleto memoizado (maiúsculas/linhas calculadas uma vez só)
+    doc = ParsedBoleto.de(texto)
+
     # Detectar FIDC
-    fidc = detectar_fidc(texto)
+    fidc = detectar_fidc(doc)
 
     # Usar Factory para pegar extrator
     extractor = ExtractorFactory.get_extractor(fidc)
 
     # Processar com XML
-    resultado = extractor.processar_boleto_com_xml(texto, mapa_xmls)
+    resultado = extractor.processar_boleto_com_xml(doc, mapa_xmls)
 
     # Adicionar FIDC ao resultado
     resultado['fidc'] = fidc
@@ -1191,8 +1101,340 @@ def gerar_relatorio_emails(dados_processados: list, pasta_auditoria: str):
         return False
 
 # ======== MAIN ======== #
-def processar_boletos():
-    """Processa todos os boletos da pasta de entrada"""
+# ======== PROCESSAMENTO PARALELO ======== #
+# A parte pesada de cada boleto (layout do PDF + extratores + busca no XML)
+# roda em processos separados. Mover arquivos, logar e montar o relatório
+# continuam no processo principal, na ordem original dos arquivos.
+
+# Mapa de XMLs usado por _analisar_boleto (um por processo)
+_mapa_xmls_worker = {}
+_montar_pedidos_worker = False
+
+def _inicializar_worker(mapa_xmls: dict, usar_cache: bool = True, montar_pedidos: bool = False):
+    """Inicializador de cada processo do pool (recebe o mapa de XMLs uma vez só)"""
+    global _mapa_xmls_worker, _montar_pedidos_worker
+    _mapa_xmls_worker = mapa_xmls
+    _montar_pedidos_worker = montar_pedidos
+    if not usar_cache:
+        pdf_texto.habilitar_cache(False)
+
+def montar_pedido(documento, fidc: str, chave: str) -> PedidoBoleto:
+    """Dados do boleto para o casamento em lote (CNPJ, vencimento, valor, nome, nº da nota)"""
+    extractor = ExtractorFactory.get_extractor(fidc)
+    vencimento = extractor.extrair_vencimento(documento)
+    valor = extractor.extrair_valor(documento)
+    pagador = extractor.extrair_pagador(documento)
+    return PedidoBoleto(
+        chave=chave,
+        cnpj=extractor.extrair_cnpj_cpf_boleto(documento) or '',
+        vencimento='' if vencimento == "SEM_VENCIMENTO" else vencimento,
+        valor_cents=0 if valor == "SEM_VALOR" else valor_to_cents(valor),
+        nome='' if pagador == "SEM_PAGADOR" else pagador,
+        numero_nota=extractor.extrair_numero_nota(documento) or '',
+    )
+
+def _analisar_boleto(caminho_pdf: str) -> dict:
+    """
+    Lê o PDF e roda o extrator v2.0 de UM boleto (sem mover nada).
+
+    Tudo que for impresso durante a análise é capturado e devolvido em
+    'log', para o processo principal imprimir na ordem dos arquivos.
+
+    Returns:
+        {'resultado': dict | None, 'excecao': str | None, 'log': str,
+         'cache': (acertos, falhas), 'paginas': {'lidas', 'do_cache', 'puladas'},
+         'codigo_barras': {campo: origem} (somado no processo principal),
+         'pedido': PedidoBoleto (só com o casamento em lote)}
+    """
+    analise = {'resultado': None, 'excecao': None, 'log': '', 'cache': (0, 0), 'codigo_barras': {}}
+
+    cache = pdf_texto.obter_cache()
+    antes = (cache.acertos, cache.falhas) if cache else (0, 0)
+    paginas_antes = pdf_texto.estatisticas_paginas()
+
+    with capturar_saida() as saida:
+        try:
+            documento = ParsedBoleto.de_arquivo(caminho_pdf, parcial=LEITURA_PARCIAL_PDF)
+            if documento.vazio and documento.erro:
+                raise RuntimeError(documento.erro)
+            analise['resultado'] = processar_boleto_v2(documento, _mapa_xmls_worker)
+            analise['codigo_barras'] = dict(documento.origens)
+            if _montar_pedidos_worker and analise['resultado']['status'] == 'ok':
+                analise['pedido'] = montar_pedido(documento, analise['resultado']['fidc'], caminho_pdf)
+        except Exception as e:
+            analise['excecao'] = str(e)
+
+    if cache:
+        analise['cache'] = (cache.acertos - antes[0], cache.falhas - antes[1])
+    paginas_depois = pdf_texto.estatisticas_paginas()
+    analise['paginas'] = {k: paginas_depois[k] - paginas_antes[k] for k in paginas_depois}
+    analise['log'] = saida.getvalue()
+    return analise
+
+def resolver_workers(workers: Optional[int], total_arquivos: int) -> int:
+    """
+    Define quantos processos usar.
+
+    None = valor do config (WORKERS_RENOMEACAO); 0 ou negativo = todos os
+    núcleos. Nunca usa mais processos que arquivos.
+    """
+    if workers is None:
+        workers = WORKERS_RENOMEACAO
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, total_arquivos))
+
+def analisar_boletos(caminhos: list, mapa_xmls: dict, workers: int = 1, usar_cache: bool = True,
+                     montar_pedidos: bool = False):
+    """
+    Analisa os boletos e devolve as análises NA MESMA ORDEM de `caminhos`.
+
+    workers <= 1 roda no próprio processo (comportamento original);
+    workers > 1 usa ProcessPoolExecutor. montar_pedidos inclui o
+    PedidoBoleto de cada boleto lido com sucesso (casamento em lote).
+
+    Yields:
+        dict de _analisar_boleto() para cada caminho
+    """
+    if workers <= 1:
+        cache_anterior = pdf_texto.habilitar_cache(pdf_texto.USAR_CACHE_TEXTO_PDF and usar_cache)
+        _inicializar_worker(mapa_xmls, montar_pedidos=montar_pedidos)
+        try:
+            for caminho in caminhos:
+                yield _analisar_boleto(caminho)
+        finally:
+            pdf_texto.habilitar_cache(cache_anterior)
+        return
+
+    # Lotes pequenos mantêm todos os núcleos ocupados até o fim
+    chunksize = max(1, len(caminhos) // (workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_inicializar_worker,
+        initargs=(mapa_xmls, usar_cache, montar_pedidos)
+    ) as executor:
+        yield from executor.map(_analisar_boleto, caminhos, chunksize=chunksize)
+
+def aplicar_casamento_em_lote(analises: list, mapa_xmls: dict) -> None:
+    """
+    Casa os boletos do lote com as duplicatas (1 para 1) e corrige o
+    resultado dos boletos cuja nota mudou ou ficou com outro boleto.
+
+    O aviso de cada boleto vai para o 'log' da sua análise (sai na ordem
+    dos arquivos); o resumo do lote é impresso na hora.
+    """
+    pedidos = [analise['pedido'] for analise in analises if analise.get('pedido')]
+    if not pedidos:
+        return
+
+    lote = casar_lote(pedidos, mapa_xmls)
+    print(f"[LOTE] Casamento em lote: {len(lote.atribuicoes)} boletos casados, "
+          f"{len(lote.conflitos)} duplicatas disputadas, {len(lote.sem_match)} sem nota")
+    for conflito in lote.conflitos:
+        disputantes = ', '.join(os.path.basename(chave) for chave in conflito.pedidos)
+        vencedor = os.path.basename(conflito.vencedor) if conflito.vencedor else "nenhum"
+        print(f"[LOTE-CONFLITO] NF {conflito.numero_nota} disputada por: {disputantes} -> {vencedor}")
+    print()
+
+    motivos = dict(lote.sem_match)
+    for analise in analises:
+        pedido = analise.get('pedido')
+        if not pedido:
+            continue
+        resultado = analise['resultado']
+        aresta = lote.atribuicoes.get(pedido.chave)
+
+        if aresta is None:
+            resultado['status'] = 'erro'
+            resultado['erro_msg'] = f"Casamento em lote: {motivos[pedido.chave]} (NF {resultado['numero_nota']})"
+            continue
+        if aresta.numero_nota == resultado['numero_nota']:
+            continue
+
+        extractor = ExtractorFactory.get_extractor(resultado['fidc'])
+        valor, origem_valor = extractor.escolher_valor_correto(aresta.dados, resultado['vencimento'])
+        analise['log'] += (f"  [LOTE] NF {resultado['numero_nota']} -> NF {aresta.numero_nota} "
+                           f"({', '.join(aresta.razoes)})\n")
+        resultado['numero_nota'] = aresta.numero_nota
+        resultado['pagador'] = aresta.dados.get('nome', 'SEM_PAGADOR')
+        resultado['valor'] = valor
+        resultado['origem_valor'] = origem_valor
+        resultado['emails'] = extractor.extrair_emails_validos(aresta.dados.get('emails', []), max_emails=2)
+
+def novos_totais() -> dict:
+    """Contadores da renomeação (ver renomear_analise)"""
+    return {
+        'sucesso': 0,
+        'erros': 0,
+        'metodos_usados': {"IA": 0, "REGEX": 0},
+        'notas_encontradas_xml': 0,
+        'notas_fallback_boleto': 0,
+        # Lista para coletar dados processados (para relatório de emails)
+        'dados_processados': [],
+        'cache': [0, 0],
+        'paginas': {'lidas': 0, 'do_cache': 0, 'puladas': 0},
+        'codigo_barras': {},
+        'renomeados': {},
+        'falhas': [],
+    }
+
+def renomear_analise(origem: str, analise: dict, idx: int, total: int, totais: dict) -> None:
+    """
+    Renomeia (move para PASTA_DESTINO) UM boleto já analisado, imprimindo
+    o seu log e somando o resultado em `totais` (novos_totais()).
+    """
+    arquivo = os.path.basename(origem)
+    print(f"[{idx}/{total}] Processando: {arquivo}")
+
+    # Log gerado durante a análise (pode ter rodado em outro processo)
+    if analise['log']:
+        print(analise['log'], end="")
+    totais['cache'][0] += analise['cache'][0]
+    totais['cache'][1] += analise['cache'][1]
+    for chave, quantidade in analise['paginas'].items():
+        totais['paginas'][chave] += quantidade
+    codigo_barras.contar_origens(analise['codigo_barras'], totais['codigo_barras'])
+
+    try:
+        if analise['excecao'] is not None:
+            raise RuntimeError(analise['excecao'])
+
+        # Resultado dos EXTRATORES V2.0 COM XML
+        resultado = analise['resultado']
+
+        # Verificar se processou com sucesso
+        if resultado['status'] != 'ok':
+            print(f"  [ERRO] {resultado['erro_msg']}")
+            registrar_erro(arquivo, resultado['erro_msg'])
+            totais['erros'] += 1
+            totais['falhas'].append(origem)
+            print()
+            return
+
+        # Extrair dados do resultado
+        pagador = resultado['pagador']
+        venc = resultado['vencimento']
+        valor = resultado['valor']
+        numero_nf = resultado['numero_nota']
+        fidc = resultado['fidc']
+
+        # Contar método usado
+        totais['metodos_usados']["REGEX"] += 1
+        totais['notas_encontradas_xml'] += 1
+
+        # Log dos dados extraídos
+        print(f"  [FIDC] {fidc}")
+        print(f"  [PAGADOR] {pagador[:50]}...")
+        print(f"  [VENCIMENTO] {venc}")
+        print(f"  [VALOR] {valor} ({resultado['origem_valor']})")
+        print(f"  [NOTA FISCAL] NF {numero_nf}")
+
+        # Limpar e formatar pagador para filename
+        pagador_limpo = remover_acentos(pagador)
+        pagador_limpo = re.sub(r'[\\/*?:"<>|]', '-', pagador_limpo)
+        pagador_limpo = re.sub(r'\s+', ' ', pagador_limpo).strip()
+        if len(pagador_limpo) > 60:
+            pagador_limpo = pagador_limpo[:60]
+
+        # Gerar nome do arquivo com número da nota (formato v2.0)
+        novo = f"{safe_filename(pagador_limpo)} - NF {safe_filename(numero_nf)} - {safe_filename(venc)} - {safe_filename(valor)}.pdf"
+        destino = os.path.join(PASTA_DESTINO, novo)
+
+        # Mover arquivo
+        shutil.move(origem, destino)
+
+        # Log de sucesso
+        print(f"  [OK] Extrator v2.0 -> {novo}")
+        totais['sucesso'] += 1
+        totais['renomeados'][origem] = destino
+
+        # Coletar dados para relatório de emails
+        totais['dados_processados'].append({
+            'pagador': pagador,
+            'numero_nota': numero_nf,
+            'emails': resultado.get('emails', []),
+            'fidc': fidc
+        })
+
+    except Exception as e:
+        # Log de erro
+        registrar_erro(arquivo, str(e))
+        print(f"  [ERRO] Falha ao processar: {str(e)[:100]}")
+        totais['erros'] += 1
+        totais['falhas'].append(origem)
+
+    print()  # Linha em branco entre arquivos
+
+def renomear_analises(caminhos: list, analises, total: Optional[int] = None) -> dict:
+    """
+    Renomeia (move para PASTA_DESTINO) os boletos já analisados, na ordem
+    de `caminhos`, imprimindo o log de cada um.
+
+    Usado pelo modo vigia (vigiar_pastas), que renomeia cada PDF assim que
+    ele chega; a execução completa usa o mesmo renomear_analise() como
+    etapa do pipeline (montar_pipeline_renomeacao).
+
+    Args:
+        caminhos: PDFs na pasta de entrada
+        analises: Análises de analisar_boletos (mesma ordem)
+        total: Total exibido em "[i/total]" (padrão: len(caminhos))
+
+    Returns:
+        {'sucesso', 'erros', 'metodos_usados', 'notas_encontradas_xml',
+         'notas_fallback_boleto', 'dados_processados', 'cache': [acertos, falhas],
+         'paginas', 'codigo_barras', 'renomeados': {origem: destino}, 'falhas': [origem]}
+    """
+    if total is None:
+        total = len(caminhos)
+    totais = novos_totais()
+    for idx, (origem, analise) in enumerate(zip(caminhos, analises), 1):
+        renomear_analise(origem, analise, idx, total, totais)
+    return totais
+
+def _extrair_para_pipeline(caminho_pdf: str) -> list:
+    """Etapa de extração: [(caminho, análise)] (função de módulo: roda no pool de processos)"""
+    return [(caminho_pdf, _analisar_boleto(caminho_pdf))]
+
+def montar_pipeline_renomeacao(mapa_xmls: dict, workers: int, em_lote: bool, totais: dict,
+                               total: int) -> Pipeline:
+    """
+    Etapas da renomeação: extracao -> [casamento] -> renomeacao
+
+    - extracao: lê o PDF e roda o extrator (processos se workers > 1)
+    - casamento: só com em_lote; barreira que casa o lote inteiro
+    - renomeacao: move os arquivos na ordem de entrada, somando em `totais`
+    """
+    etapas = [Etapa("extracao", _extrair_para_pipeline, workers=workers, processos=True,
+                    inicializador=_inicializar_worker, argumentos_inicializador=(mapa_xmls, True, em_lote))]
+
+    if em_lote:
+        lote = []
+
+        def casar_lote_inteiro():
+            aplicar_casamento_em_lote([analise for _, analise in lote], mapa_xmls)
+            return lote
+
+        etapas.append(Etapa("casamento", lambda par: lote.append(par), ordenada=True,
+                            ao_terminar=casar_lote_inteiro))
+
+    contador = iter(range(1, total + 1))
+    etapas.append(Etapa("renomeacao", lambda par: renomear_analise(par[0], par[1], next(contador), total, totais),
+                        ordenada=True))
+    return Pipeline(etapas, capacidade=max(CAPACIDADE_PADRAO, 2 * workers))
+
+def processar_boletos(workers: Optional[int] = None, em_lote: Optional[bool] = None):
+    """
+    Processa todos os boletos da pasta de entrada
+
+    Args:
+        workers: Processos para leitura/extração (None = WORKERS_RENOMEACAO,
+                 0 = todos os núcleos, 1 = sequencial)
+        em_lote: Casar boletos x duplicatas 1 para 1 antes de renomear
+                 (None = CASAMENTO_EM_LOTE do config)
+    """
+    if em_lote is None:
+        em_lote = CASAMENTO_EM_LOTE
+
     print("=" * 70)
     print("  AUTOMACAO DE RENOMEACAO DE BOLETOS - v10 (XML-Based)")
     print("=" * 70)
@@ -1210,7 +1452,7 @@ def processar_boletos():
     mapa_xmls = {}
     if os.path.exists(PASTA_NOTAS):
         mapa_xmls = indexar_xmls_por_nota(PASTA_NOTAS, max_emails=2)
-        print(f"[XML] Total de XMLs carregados: {len(mapa_xmls)}")
+        print(f"[XML] Total de XMLs carregados: {len(mapa_xmls.notas())}")
     else:
         print(f"[AVISO] Pasta de notas nao encontrada: {PASTA_NOTAS}")
         print(f"[AVISO] Numero da nota sera extraido apenas do boleto")
@@ -1219,6 +1461,10 @@ def processar_boletos():
     arquivos = [f for f in os.listdir(PASTA_ENTRADA) if f.lower().endswith(".pdf")]
     print(f"\n[INFO] Encontrados {len(arquivos)} boletos para processar.")
 
+    workers = resolver_workers(workers, len(arquivos))
+    if workers > 1:
+        print(f"[INFO] Processamento paralelo: {workers} processos")
+
     # Status de configuração
     if USAR_IA and OLLAMA_DISPONIVEL:
         print(f"[INFO] Modo: IA (Ollama {MODELO_OLLAMA}) + Fallback Regex")
@@ -1227,91 +1473,25 @@ def processar_boletos():
 
     print("\n" + "-" * 70 + "\n")
 
-    # Estatísticas
-    total = len(arquivos)
-    sucesso = 0
-    erros = 0
-    metodos_usados = {"IA": 0, "REGEX": 0}
-    notas_encontradas_xml = 0
-    notas_fallback_boleto = 0
-
-    # Lista para coletar dados processados (para relatório de emails)
-    dados_processados = []
-
     # Processar cada arquivo
     inicio_total = time.time()
+    total = len(arquivos)
 
-    for idx, arquivo in enumerate(arquivos, 1):
-        print(f"[{idx}/{total}] Processando: {arquivo}")
-        origem = os.path.join(PASTA_ENTRADA, arquivo)
-
-        try:
-            # Extrair texto do PDF
-            texto = extrair_texto_pdf(origem)
-
-            # USAR EXTRATORES V2.0 COM XML
-            resultado = processar_boleto_v2(texto, mapa_xmls)
-
-            # Verificar se processou com sucesso
-            if resultado['status'] != 'ok':
-                print(f"  [ERRO] {resultado['erro_msg']}")
-                registrar_erro(arquivo, resultado['erro_msg'])
-                erros += 1
-                print()
-                continue
-
-            # Extrair dados do resultado
-            pagador = resultado['pagador']
-            venc = resultado['vencimento']
-            valor = resultado['valor']
-            numero_nf = resultado['numero_nota']
-            fidc = resultado['fidc']
-
-            # Contar método usado
-            metodos_usados["REGEX"] += 1
-            notas_encontradas_xml += 1
-
-            # Log dos dados extraídos
-            print(f"  [FIDC] {fidc}")
-            print(f"  [PAGADOR] {pagador[:50]}...")
-            print(f"  [VENCIMENTO] {venc}")
-            print(f"  [VALOR] {valor} ({resultado['origem_valor']})")
-            print(f"  [NOTA FISCAL] NF {numero_nf}")
-
-            # Limpar e formatar pagador para filename
-            from unidecode import unidecode
-            pagador_limpo = unidecode(pagador)
-            pagador_limpo = re.sub(r'[\\/*?:"<>|]', '-', pagador_limpo)
-            pagador_limpo = re.sub(r'\s+', ' ', pagador_limpo).strip()
-            if len(pagador_limpo) > 60:
-                pagador_limpo = pagador_limpo[:60]
-
-            # Gerar nome do arquivo com número da nota (formato v2.0)
-            novo = f"{safe_filename(pagador_limpo)} - NF {safe_filename(numero_nf)} - {safe_filename(venc)} - {safe_filename(valor)}.pdf"
-            destino = os.path.join(PASTA_DESTINO, novo)
-
-            # Mover arquivo
-            shutil.move(origem, destino)
-
-            # Log de sucesso
-            print(f"  [OK] Extrator v2.0 -> {novo}")
-            sucesso += 1
-
-            # Coletar dados para relatório de emails
-            dados_processados.append({
-                'pagador': pagador,
-                'numero_nota': numero_nf,
-                'emails': resultado.get('emails', []),
-                'fidc': fidc
-            })
-
-        except Exception as e:
-            # Log de erro
-            registrar_erro(arquivo, str(e))
-            print(f"  [ERRO] Falha ao processar: {str(e)[:100]}")
-            erros += 1
-
-        print()  # Linha em branco entre arquivos
+    caminhos = [os.path.join(PASTA_ENTRADA, arquivo) for arquivo in arquivos]
+    totais = novos_totais()
+    # Renomeia cada boleto assim que ele (e os anteriores) foi lido; com
+    # casamento em lote, todos são lidos antes de renomear o primeiro
+    pipeline = montar_pipeline_renomeacao(mapa_xmls, workers, em_lote, totais, total)
+    estatisticas = pipeline.executar(caminhos)
+
+    sucesso = totais['sucesso']
+    erros = totais['erros']
+    metodos_usados = totais['metodos_usados']
+    notas_encontradas_xml = totais['notas_encontradas_xml']
+    notas_fallback_boleto = totais['notas_fallback_boleto']
+    dados_processados = totais['dados_processados']
+    cache_acertos, cache_falhas = totais['cache']
+    paginas = totais['paginas']
 
     # Estatísticas finais
     tempo_total = time.time() - inicio_total
@@ -1329,6 +1509,10 @@ def processar_boletos():
     print(f"  - Fallback boleto: {notas_fallback_boleto}")
     print(f"\nTempo total:        {tempo_total:.1f}s")
     print(f"Tempo medio/boleto: {tempo_total/total:.1f}s" if total > 0 else "")
+    imprimir_estatisticas(estatisticas, prefixo="Tempo")
+    pdf_texto.imprimir_estatisticas_cache({'acertos': cache_acertos, 'falhas': cache_falhas})
+    pdf_texto.imprimir_estatisticas_paginas(paginas)
+    codigo_barras.imprimir_estatisticas(totais['codigo_barras'])
 
     # Gerar relatório de emails
     if dados_processados:
@@ -1336,7 +1520,116 @@ def processar_boletos():
 
     print("\n" + "=" * 70)
 
+def vigiar_pastas(intervalo: Optional[float] = None, espera: Optional[float] = None,
+                  backend: Optional[str] = None, ciclos: Optional[int] = None):
+    """
+    Modo vigia: fica no ar renomeando cada boleto que chega na pasta de
+    entrada, com o mapa/índice de NFe sempre em memória.
+
+    - XMLs já existentes são indexados uma vez (com o índice persistente)
+    - XML novo/alterado em PASTA_NOTAS entra no mapa e no índice na hora
+      (só as chaves novas são indexadas; o índice é refeito apenas quando
+      uma chave passa a apontar para outra nota)
+    - PDF novo em PASTA_ENTRADA é renomeado assim que a cópia termina
+      (debounce do vigia_pastas.Estabilizador)
+    - Boleto que ficou sem nota é tentado de novo quando chega um XML
+
+    Sem casamento em lote (cada boleto é renomeado quando chega).
+
+    Args:
+        intervalo: Espera máxima por eventos (None = VIGIA_INTERVALO_SEGUNDOS)
+        espera: Debounce em segundos (None = VIGIA_ESPERA_SEGUNDOS)
+        backend: "auto", "inotify" ou "polling" (None = VIGIA_BACKEND)
+        ciclos: Para depois de N ciclos (None = até Ctrl+C)
+    """
+    intervalo = VIGIA_INTERVALO_SEGUNDOS if intervalo is None else intervalo
+    espera = VIGIA_ESPERA_SEGUNDOS if espera is None else espera
+
+    print("=" * 70)
+    print("  AUTOMACAO DE RENOMEACAO DE BOLETOS - MODO VIGIA")
+    print("=" * 70)
+
+    os.makedirs(PASTA_ENTRADA, exist_ok=True)
+    os.makedirs(PASTA_DESTINO, exist_ok=True)
+
+    # Mapa e índice montados uma vez e mantidos quentes
+    print(f"\n[XML] Carregando XMLs da pasta: {PASTA_NOTAS}")
+    if os.path.exists(PASTA_NOTAS):
+        mapa_xmls = indexar_xmls_por_nota(PASTA_NOTAS, max_emails=2)
+    else:
+        print(f"[AVISO] Pasta de notas nao encontrada: {PASTA_NOTAS}")
+        mapa_xmls = MapaNFe()
+    obter_indice_nfe(mapa_xmls)
+    print(f"[XML] Total de XMLs carregados: {len(mapa_xmls.notas())}")
+
+    pasta_entrada = os.path.normpath(PASTA_ENTRADA)
+    sem_nota = set()  # boletos que ficaram na entrada (tentar de novo com XML novo)
+    renomeados = 0
+    ciclo = 0
+
+    with VigiaPastas([PASTA_ENTRADA, PASTA_NOTAS], espera=espera, intervalo=intervalo,
+                     backend=backend or VIGIA_BACKEND) as vigia:
+        print(f"[VIGIA] Vigiando {PASTA_ENTRADA} e {PASTA_NOTAS} "
+              f"({vigia.fonte.nome}, espera {espera:g}s). Ctrl+C para parar.")
+        print("\n" + "-" * 70 + "\n")
+        vigia.iniciar()
+
+        try:
+            while ciclos is None or ciclo < ciclos:
+                ciclo += 1
+                prontos = vigia.ciclo()
+                xmls = [c for c in prontos if c.lower().endswith('.xml')]
+                pdfs = [c for c in prontos if c.lower().endswith('.pdf')
+                        and os.path.normpath(os.path.dirname(c)) == pasta_entrada]
+
+                notas_novas = 0
+                for caminho in xmls:
+                    chaves, substituidas = adicionar_xml_ao_mapa(mapa_xmls, caminho, max_emails=2)
+                    if chaves:
+                        atualizar_indice_nfe(mapa_xmls, substituidas)
+                        notas_novas += 1
+                        print(f"[VIGIA-XML] {os.path.basename(caminho)} -> NF {chaves[-1]}")
+                if notas_novas and sem_nota:
+                    # Boletos que esperavam nota voltam para a fila
+                    vigia.reenfileirar(sem_nota - set(pdfs))
+                    sem_nota.clear()
+
+                if not pdfs:
+                    continue
+                analises = analisar_boletos(pdfs, mapa_xmls, workers=1)
+                totais = renomear_analises(pdfs, analises)
+                renomeados += totais['sucesso']
+                sem_nota.update(c for c in totais['falhas'] if os.path.exists(c))
+                if totais['dados_processados']:
+                    gerar_relatorio_emails(totais['dados_processados'], PASTA_AUDITORIA)
+        except KeyboardInterrupt:
+            print("\n[VIGIA] Interrompido pelo usuario")
+
+    print(f"[VIGIA] Encerrado: {renomeados} boletos renomeados, "
+          f"{len(sem_nota)} aguardando nota, {len(mapa_xmls.notas())} notas em memoria")
+    print("\n" + "=" * 70)
+
 if __name__ == "__main__":
-    processar_boletos()
+    parser = argparse.ArgumentParser(description="Renomeação de boletos PDF")
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Processos para leitura/extração (0 = todos os núcleos, 1 = sequencial). "
+             "Padrão: WORKERS_RENOMEACAO do config_server.py"
+    )
+    parser.add_argument(
+        "--lote", action=argparse.BooleanOptionalAction, default=None,
+        help="Casar boletos x duplicatas 1 para 1 antes de renomear. "
+             "Padrão: CASAMENTO_EM_LOTE do config_server.py"
+    )
+    parser.add_argument(
+        "--vigiar", action="store_true",
+        help="Modo vigia (daemon): fica no ar e renomeia cada PDF que chega na entrada, "
+             "com o índice de NFe em memória. Ver VIGIA_* no config_server.py"
+    )
+    args = parser.parse_args()
+    if args.vigiar:
+        vigiar_pastas()
+    else:
+        processar_boletos(workers=args.workers, em_lote=args.lote)
 
     
@@ -0,0 +1,156 @@
+"""
+Benchmark - Linha Digitável x Regex (valor e vencimento)
+
+Mede o custo de extrair valor + vencimento por boleto em dois modos:
+- regex: só a cadeia de padrões de cada extrator (como era)
+- linha digitável: decodificação da linha digitável primeiro (dígitos
+  verificadores conferidos), regex só quando ela não existe
+
+Os boletos sintéticos misturam boletos com linha digitável válida,
+boletos com DV errado (caem no regex) e DANFEs sem linha digitável, em
+dois layouts: rótulo e valor na mesma linha ("linha", o melhor caso do
+regex) e rótulos numa linha com os valores na seguinte ("tabela").
+Ao final mostra os contadores de origem (quantos campos saíram direto
+da linha digitável).
+
+Uso:
+    python benchmarks/bench_codigo_barras.py
+    python benchmarks/bench_codigo_barras.py --boletos 2000 --repeticoes 5
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+from extractors import ParsedBoleto, codigo_barras
+from extractors import SQUIDExtractor, CAPITALExtractor, NOVAXExtractor, CREDVALEExtractor
+from extractors.codigo_barras import modulo10, modulo11_boleto
+
+BOLETO = """Beneficiário
+{fidc} FUNDO DE INVESTIMENTO EM DIREITOS CREDITORIOS
+Local de Pagamento
+PAGÁVEL EM QUALQUER BANCO ATÉ O VENCIMENTO
+Data do Documento Número do Documento Espécie Doc
+01/10/2025 {nota}/001 DM
+Vencimento
+{venc}
+(=) Valor do Documento R$ {valor}
+Pagador
+EMPRESA TESTE LTDA - CNPJ: 12.345.678/0001-90
+Recibo do Pagador Autenticação Mecânica
+{linha}
+"""
+
+BOLETO_TABELA = """Beneficiário
+{fidc} FUNDO DE INVESTIMENTO EM DIREITOS CREDITORIOS
+Local de Pagamento Data de Vencimento
+PAGÁVEL EM QUALQUER BANCO ATÉ O VENCIMENTO {venc}
+Data do Documento Número do Documento Espécie Doc Aceite (=) Valor do Documento
+01/10/2025 {nota}/001 DM N {valor}
+Pagador
+EMPRESA TESTE LTDA - CNPJ: 12.345.678/0001-90
+Recibo do Pagador Autenticação Mecânica
+{linha}
+"""
+
+DANFE = """DANFE
+DOCUMENTO AUXILIAR DA NOTA FISCAL ELETRONICA
+DESTINATÁRIO / REMETENTE
+NOME / RAZÃO SOCIAL CNPJ / CPF
+EMPRESA TESTE LTDA 12.345.678/0001-90
+FATURA
+NÚMERO VENCIMENTO VALOR
+001 {venc} {valor}
+"""
+
+
+def montar_linha(fator: int, valor_cents: int, livre: str, dv_certo: bool = True) -> str:
+    """Linha digitável de 47 dígitos (banco 237, moeda 9) com DVs calculados"""
+    campo5 = f"{fator:04d}{valor_cents:010d}"
+    dv = modulo11_boleto("2379" + campo5 + livre)
+    if not dv_certo:
+        dv = dv % 9 + 1
+    campos = ["2379" + livre[:5], livre[5:15], livre[15:25]]
+    c1, c2, c3 = (campo + str(modulo10(campo)) for campo in campos)
+    return f"{c1[:5]}.{c1[5:]} {c2[:5]}.{c2[5:]} {c3[:5]}.{c3[5:]} {dv} {campo5}"
+
+
+def gerar_boletos(quantidade: int, rng: random.Random, modelo: str = BOLETO) -> list:
+    textos = []
+    for i in range(quantidade):
+        valor_cents = rng.randint(10000, 999999)
+        valor = f"{valor_cents / 100:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+        campos = {
+            'fidc': rng.choice(["NOVAX", "CREDVALE", "SQUID", "CAPITAL RS"]),
+            'nota': f"3{rng.randint(0, 99999):05d}",
+            'venc': f"{rng.randint(10, 28)}/{rng.randint(10, 12)}/2025",
+            'valor': valor,
+            'linha': montar_linha(rng.randint(1200, 1500), valor_cents,
+                                  ''.join(rng.choice('0123456789') for _ in range(25)),
+                                  dv_certo=(i % 10 != 0)),
+        }
+        textos.append((DANFE if i % 5 == 4 else modelo).format(**campos))
+    return textos
+
+
+def medir(funcao, extratores, textos, repeticoes) -> float:
+    """Microssegundos por boleto (melhor de N)"""
+    melhor = None
+    for _ in range(repeticoes):
+        docs = [ParsedBoleto(texto) for texto in textos]
+        inicio = time.perf_counter()
+        for doc in docs:
+            for extrator in extratores:
+                funcao(extrator, doc)
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor / len(textos) * 1e6
+
+
+def so_regex(extrator, doc):
+    extrator._valor_por_regex(doc)
+    extrator._vencimento_por_regex(doc)
+
+
+def linha_primeiro(extrator, doc):
+    extrator.extrair_valor(doc)
+    extrator.extrair_vencimento(doc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da linha digitável (valor e vencimento)")
+    parser.add_argument("--boletos", type=int, default=1000, help="Boletos sintéticos (padrão: 1000)")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Repetições (padrão: 3)")
+    args = parser.parse_args()
+
+    extratores = [SQUIDExtractor(), CAPITALExtractor(), NOVAXExtractor(), CREDVALEExtractor()]
+
+    print()
+    print("=" * 64)
+    print(f"  VALOR + VENCIMENTO ({args.boletos} boletos x 4 extratores)")
+    print("=" * 64)
+    for layout, modelo in [("linha", BOLETO), ("tabela", BOLETO_TABELA)]:
+        textos = gerar_boletos(args.boletos, random.Random(42), modelo)
+        regex = medir(so_regex, extratores, textos, args.repeticoes)
+        direto = medir(linha_primeiro, extratores, textos, args.repeticoes)
+        print(f"  layout {layout}")
+        print(f"    {'só regex (antes)':<32} {regex:9.1f} us/boleto")
+        print(f"    {'linha digitável primeiro':<32} {direto:9.1f} us/boleto ({regex / direto:.2f}x)")
+    print("=" * 64)
+
+    # Origem dos campos numa única passada (layout tabela)
+    codigo_barras.zerar_contadores()
+    for texto in textos:
+        doc = ParsedBoleto(texto)
+        linha_primeiro(extratores[0], doc)
+        codigo_barras.contar_origens(doc.origens)
+    codigo_barras.imprimir_estatisticas()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark - Envio a Seco em Arquivos .eml (caminho de envio inteiro)
+
+Roda o EnvioBoleto.executar() de verdade (ingestão, extração, validação,
+montagem, "envio" e auditoria) com o transporte "arquivo": cada grupo
+vira um .eml (assinatura inline + boletos + notas) e uma linha com
+tamanho e tempos em mensagens.csv. Funciona no Linux, sem Outlook.
+
+Os grupos alternam 1, 2 e 3 boletos (mesmo cliente, notas diferentes)
+para comparar o tamanho das mensagens pelo número de anexos.
+
+Uso:
+    python benchmarks/bench_envio_eml.py
+    python benchmarks/bench_envio_eml.py --grupos 2000 --boletos-por-grupo 1 4 --workers-envio 8
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+from collections import defaultdict
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+sys.path.insert(0, os.path.join(BASE, "tests"))
+
+import pdf_texto
+from cache_pdf import CacheTextoPDF
+from transporte_email import ler_tempos_eml
+from xml_nfe_reader import indexar_xmls_por_nota
+from envio_sintetico import gerar_arquivos_envio
+
+
+def preparar_lote(pasta: str, grupos: int, boletos_por_grupo: list) -> int:
+    """Gera os boletos, XMLs e notas de `grupos` clientes; retorna o total de boletos"""
+    for nome in ("Boletos", "Notas", "Auditoria", "Erros", "Enviados"):
+        os.makedirs(os.path.join(pasta, nome))
+
+    clientes, nota = [], 300000
+    for i in range(grupos):
+        for _ in range(boletos_por_grupo[i % len(boletos_por_grupo)]):
+            clientes.append((str(nota), f"CLIENTE {i} LTDA", f"cliente{i}@empresa.com.br"))
+            nota += 1
+    gerar_arquivos_envio(os.path.join(pasta, "Boletos"), os.path.join(pasta, "Notas"), clientes)
+
+    # Assinatura do tamanho de uma imagem real (~20 KB)
+    with open(os.path.join(pasta, "assinatura.jpg"), "wb") as arquivo:
+        arquivo.write(b"\xff\xd8\xff\xe0" + os.urandom(20 * 1024) + b"\xff\xd9")
+    return len(clientes)
+
+
+def configurar(EnvioBoleto, pasta: str, workers_leitura: int, workers_envio: int) -> None:
+    """Aponta o EnvioBoleto para o lote, com o transporte "arquivo", sem registro de envios e com o cache no lote"""
+    for nome in ("Boletos", "Notas", "Auditoria", "Erros", "Enviados"):
+        setattr(EnvioBoleto, f"PASTA_{nome.upper()}", os.path.join(pasta, nome))
+    EnvioBoleto.PASTA_EML = os.path.join(pasta, "EML")
+    EnvioBoleto.ASSINATURA_IMG = os.path.join(pasta, "assinatura.jpg")
+    EnvioBoleto.TRANSPORTE_EMAIL = "arquivo"
+    EnvioBoleto.MODO_PREVIEW = False
+    EnvioBoleto.USAR_REGISTRO_ENVIOS = False
+    EnvioBoleto.WORKERS_ENVIO_EXTRACAO = workers_leitura
+    EnvioBoleto.ENVIO_WORKERS = workers_envio
+    EnvioBoleto.carregar_dados_xmls = lambda: indexar_xmls_por_nota(os.path.join(pasta, "Notas"),
+                                                                    usar_cache=False)
+    pdf_texto.definir_cache(CacheTextoPDF(os.path.join(pasta, "Cache", "texto_pdf")))
+
+
+def percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))] if ordenados else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do envio a seco (.eml)")
+    parser.add_argument("--grupos", type=int, default=1000, help="Quantidade de grupos (e-mails)")
+    parser.add_argument("--boletos-por-grupo", type=int, nargs="+", default=[1, 2, 3],
+                        help="Boletos por grupo, em rodízio (padrão: 1 2 3)")
+    parser.add_argument("--workers-leitura", type=int, default=1, help="Workers de extração (0 = todos os núcleos)")
+    parser.add_argument("--workers-envio", type=int, default=4, help="Workers gravando .eml")
+    args = parser.parse_args()
+
+    import EnvioBoleto
+
+    with tempfile.TemporaryDirectory() as pasta:
+        print(f"Gerando {args.grupos} grupos sintéticos...")
+        boletos = preparar_lote(pasta, args.grupos, args.boletos_por_grupo)
+        configurar(EnvioBoleto, pasta, args.workers_leitura, args.workers_envio)
+
+        # O log completo vai para um arquivo; aqui ficam só os tempos das etapas
+        log = os.path.join(pasta, "envio.log")
+        inicio = time.perf_counter()
+        with open(log, "w", encoding="utf-8") as saida, contextlib.redirect_stdout(saida):
+            EnvioBoleto.executar()
+        segundos = time.perf_counter() - inicio
+
+        execucao, = os.listdir(EnvioBoleto.PASTA_EML)
+        tempos = ler_tempos_eml(os.path.join(EnvioBoleto.PASTA_EML, execucao))
+
+        print()
+        print("=" * 78)
+        print(f"  ENVIO A SECO - {args.grupos} grupos, {boletos} boletos, {len(tempos)} .eml")
+        print("=" * 78)
+        print(f"Tempo total: {segundos:.2f}s ({len(tempos) / segundos:.1f} mensagens/s)")
+        with open(log, encoding="utf-8") as arquivo:
+            for linha in arquivo:
+                if linha.startswith("[TEMPO] ["):
+                    print(linha.rstrip())
+
+        print()
+        print(f"{'anexos':>6} {'msgs':>6} {'KB medio':>9} {'KB max':>8} "
+              f"{'render ms':>10} {'p95':>7} {'escrita ms':>11} {'p95':>7}")
+        por_anexos = defaultdict(list)
+        for tempo in tempos:
+            por_anexos[tempo.anexos].append(tempo)
+        for anexos in sorted(por_anexos) + ["todos"]:
+            grupo = tempos if anexos == "todos" else por_anexos[anexos]
+            tamanhos = [t.tamanho / 1024 for t in grupo]
+            render = [t.renderizacao * 1000 for t in grupo]
+            escrita = [t.escrita * 1000 for t in grupo]
+            print(f"{anexos:>6} {len(grupo):>6} {sum(tamanhos) / len(grupo):>9.1f} {max(tamanhos):>8.1f} "
+                  f"{sum(render) / len(grupo):>10.2f} {percentil(render, 0.95):>7.2f} "
+                  f"{sum(escrita) / len(grupo):>11.2f} {percentil(escrita, 0.95):>7.2f}")
+        print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
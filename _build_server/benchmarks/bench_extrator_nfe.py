@@ -0,0 +1,88 @@
+"""
+Benchmark - Extrator de NFe (árvore completa x iterparse)
+
+Compara os dois modos de extrair_dados_nfe(): árvore completa
+(ET.parse + buscas './/', streaming=False) e uma passada com iterparse
+liberando cada elemento ao terminar (streaming=True). Mede o tempo por
+XML e o pico de memória (tracemalloc) em notas com poucos e com muitos
+itens <det>. Serve para ajustar TAMANHO_MIN_STREAMING_XML.
+
+Uso:
+    python benchmarks/bench_extrator_nfe.py
+    python benchmarks/bench_extrator_nfe.py --itens 1 50 2000 --repeticoes 300
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+sys.path.insert(0, os.path.join(BASE, "tests"))
+
+from functools import partial
+from xml_nfe_reader import extrair_dados_nfe
+from nfe_sintetica import gerar_xml_nfe
+
+EXTRATORES = {
+    "arvore": partial(extrair_dados_nfe, streaming=False),
+    "iterparse": partial(extrair_dados_nfe, streaming=True),
+}
+
+
+def medir_tempo(extrator, caminho: str, repeticoes: int) -> float:
+    """Retorna o tempo médio (ms) por XML"""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        extrator(caminho)
+    return (time.perf_counter() - inicio) * 1000 / repeticoes
+
+
+def medir_memoria(extrator, caminho: str) -> float:
+    """Retorna o pico de memória (KB) de uma extração"""
+    tracemalloc.start()
+    extrator(caminho)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pico / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do extrator de NFe")
+    parser.add_argument("--itens", type=int, nargs="+", default=[1, 50, 2000],
+                        help="Itens <det> por nota (padrão: 1, 50 e 2000)")
+    parser.add_argument("--repeticoes", type=int, default=200,
+                        help="Extrações por medição (padrão: 200)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print()
+        print("=" * 68)
+        print("  EXTRATOR DE NFe (arvore x iterparse)")
+        print("=" * 68)
+        print(f"{'itens':>6} {'KB xml':>8} {'extrator':>10} {'ms/xml':>8} {'pico KB':>9} {'speedup':>8}")
+
+        for itens in args.itens:
+            caminho = gerar_xml_nfe(
+                os.path.join(tmp, f"nota_{itens}.xml"), "310001", "CLIENTE BENCHMARK LTDA",
+                cnpj="12345678000190", valor_total="1500.00", email="fin@empresa.com.br",
+                duplicatas=[(f"00{p}", "2025-11-10", "500.00") for p in range(1, 4)], itens=itens
+            )
+            assert EXTRATORES["arvore"](caminho) == EXTRATORES["iterparse"](caminho)
+            tamanho_kb = os.path.getsize(caminho) / 1024
+            repeticoes = max(1, args.repeticoes // max(1, itens // 50))
+
+            base = None
+            for nome, extrator in EXTRATORES.items():
+                ms = medir_tempo(extrator, caminho, repeticoes)
+                pico = medir_memoria(extrator, caminho)
+                base = base or ms
+                print(f"{itens:>6} {tamanho_kb:>8.1f} {nome:>10} {ms:>8.3f} {pico:>9.1f} {base / ms:>7.2f}x")
+        print("=" * 68)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark - Indexação de XMLs de NFe (sequencial x paralela)
+
+Gera 1.000 e 10.000 XMLs NFe sintéticos e mede indexar_xmls_por_nota()
+com 1 processo, 4 processos e todos os núcleos. O índice persistente
+(cache_nfe) fica DESLIGADO para medir o parsing a frio.
+
+Uso:
+    python benchmarks/bench_indexacao_xml.py
+    python benchmarks/bench_indexacao_xml.py --xmls 1000 50000 --workers 1 8
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+sys.path.insert(0, os.path.join(BASE, "tests"))
+
+from xml_nfe_reader import indexar_xmls_com_resumo, resolver_workers_xml
+from nfe_sintetica import gerar_xml_nfe
+
+
+def preparar_pasta(pasta: str, quantidade: int) -> None:
+    """Gera `quantidade` XMLs com 3 duplicatas e 2 emails cada"""
+    os.makedirs(pasta)
+    for i in range(quantidade):
+        numero = f"{100000 + i}"
+        gerar_xml_nfe(
+            os.path.join(pasta, f"3-0{numero}.xml"), numero, f"CLIENTE {i} LTDA",
+            cnpj=f"{12345678000000 + i:014d}", valor_total="1500.00",
+            duplicatas=[(f"00{p}", "2025-11-10", "500.00") for p in range(1, 4)],
+            email=f"fin{i}@empresa.com.br;compras{i}@empresa.com.br"
+        )
+
+
+def medir(pasta: str, workers: int) -> tuple:
+    """Indexa a pasta e retorna (segundos, notas no mapa)"""
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        mapa, _ = indexar_xmls_com_resumo(pasta, usar_cache=False, workers=workers)
+    return time.perf_counter() - inicio, len(mapa)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da indexação de XMLs")
+    parser.add_argument("--xmls", type=int, nargs="+", default=[1000, 10000],
+                        help="Tamanhos de pasta (padrão: 1000 e 10000)")
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="Configurações de workers (padrão: 1, 4 e todos os núcleos)")
+    args = parser.parse_args()
+
+    nucleos = os.cpu_count() or 1
+    configuracoes = args.workers or sorted({1, 4, nucleos})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print()
+        print("=" * 60)
+        print(f"  INDEXACAO DE XMLs ({nucleos} nucleos)")
+        print("=" * 60)
+        print(f"{'xmls':>7} {'workers':>8} {'tempo (s)':>10} {'xmls/s':>9} {'speedup':>8}")
+
+        for quantidade in args.xmls:
+            pasta = os.path.join(tmp, f"notas_{quantidade}")
+            preparar_pasta(pasta, quantidade)
+
+            base = None
+            for pedido in configuracoes:
+                workers = resolver_workers_xml(pedido, quantidade)
+                segundos, _ = medir(pasta, workers)
+                base = base or segundos
+                print(f"{quantidade:>7} {workers:>8} {segundos:>10.2f} {quantidade / segundos:>9.0f} "
+                      f"{base / segundos:>7.2f}x")
+        print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark - Normalização de Nomes (re.sub por sufixo x alternância + cache)
+
+Mede o custo por chamada de normalizar_nome_empresa:
+- antigo: um re.sub por sufixo/abreviação (padrão montado a cada chamada)
+- novo sem cache: alternância pré-compilada (cache LRU limpo antes)
+- novo com cache: mesma sequência de chamadas do matching, em que cada
+  nome de nota é normalizado de novo a cada boleto comparado
+
+Uso:
+    python benchmarks/bench_normalizacao_nomes.py
+    python benchmarks/bench_normalizacao_nomes.py --nomes 20000 --chamadas 200000
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+from normalizacao_nomes import normalizar_nome_empresa
+
+PALAVRAS = [
+    "ACME", "BETA", "GAMA", "DELTA", "SÃO", "JOSÉ", "ITAJAÍ", "NOVA", "ALIANÇA", "COMÉRCIO",
+    "INDÚSTRIA", "MATERIAIS", "CONSTRUÇÃO", "ENG.", "CONST.", "EMPREENDIMENTOS", "SPE",
+    "TRANSPORTES", "LOGÍSTICA", "SERVIÇOS", "ALIMENTOS", "MADEIRAS", "FERRAGENS", "PEÇAS",
+]
+SUFIXOS = ["LTDA", "LTDA.", "EIRELI", "S.A.", "S/A", "ME", "- EPP", "CIA", ""]
+
+
+def normalizar_antigo(nome: str) -> str:
+    """Versão antiga (referência): um re.sub por sufixo/abreviação"""
+    if not nome:
+        return ""
+    nome_norm = nome.upper().strip()
+    nome_norm = re.sub(r'[.,\-]', ' ', nome_norm)
+    for sufixo in ['LTDA', 'LTD', 'LIMITADA', 'EIRELI', 'EPP', 'ME', 'MEI', 'S/A', 'SA', 'S.A.',
+                   'SOCIEDADE', 'EMPRESARIAL', 'CIA', 'COMPANHIA']:
+        nome_norm = re.sub(rf'\b{re.escape(sufixo)}\b', '', nome_norm)
+    for abrev, completo in {r'\bENG\b': 'ENGENHARIA', r'\bCONST\b': 'CONSTRUCAO',
+                            r'\bEMPREENDIMENTOS?\b': 'EMPREENDIMENTOS',
+                            r'\bSPE\b': 'SOCIEDADE PROPOSITO ESPECIFICO'}.items():
+        nome_norm = re.sub(abrev, completo, nome_norm)
+    return re.sub(r'\s+', ' ', nome_norm).strip()
+
+
+def medir(funcao, chamadas: list, limpar=None) -> float:
+    """Microssegundos por chamada (melhor de 3)"""
+    melhor = None
+    for _ in range(3):
+        if limpar:
+            limpar()
+        inicio = time.perf_counter()
+        for nome in chamadas:
+            funcao(nome)
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor / len(chamadas) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da normalização de nomes")
+    parser.add_argument("--nomes", type=int, default=20000, help="Nomes distintos (padrão: 20000)")
+    parser.add_argument("--chamadas", type=int, default=200000,
+                        help="Chamadas com repetição, como no matching (padrão: 200000)")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    nomes = [
+        f"{' '.join(rng.sample(PALAVRAS, rng.randint(2, 4)))} {rng.choice(SUFIXOS)}".strip()
+        for _ in range(args.nomes)
+    ]
+    chamadas = [rng.choice(nomes) for _ in range(args.chamadas)]
+
+    antigo = medir(normalizar_antigo, nomes)
+    sem_cache = medir(normalizar_nome_empresa, nomes, limpar=normalizar_nome_empresa.cache_clear)
+    normalizar_nome_empresa.cache_clear()
+    com_cache = medir(normalizar_nome_empresa, chamadas)
+
+    print()
+    print("=" * 64)
+    print(f"  NORMALIZAÇÃO DE NOMES ({args.nomes} nomes, {args.chamadas} chamadas)")
+    print("=" * 64)
+    print(f"  {'antigo (re.sub por sufixo)':<34} {antigo:8.2f} us/chamada")
+    print(f"  {'novo, nomes distintos (sem cache)':<34} {sem_cache:8.2f} us/chamada "
+          f"({antigo / sem_cache:.1f}x)")
+    print(f"  {'novo, chamadas repetidas (cache)':<34} {com_cache:8.2f} us/chamada "
+          f"({antigo / com_cache:.1f}x)")
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    main()
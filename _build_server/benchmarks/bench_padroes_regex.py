@@ -0,0 +1,149 @@
+"""
+Benchmark - Padrões Regex (re.search com string x registro compilado)
+
+Mede o custo de extração por boleto (pagador, vencimento, valor, número
+da nota e CPF/CNPJ, em todos os extratores) em dois modos:
+- antes: cada chamada passa o padrão em string para re.search/re.match/
+  re.sub (busca no cache interno do módulo re a cada chamada, como era)
+- registro: métodos do regex compilado na importação (extractors/padroes.py)
+
+O modo "antes" é simulado trocando os métodos de cada Padrao por uma
+função que chama re.<método>(padrão, texto, flags); a função extra
+acrescenta uma chamada Python por busca, então o ganho medido é um
+pouco maior que o real. Ao final mostra os padrões mais caros
+(contadores do registro).
+
+Uso:
+    python benchmarks/bench_padroes_regex.py
+    python benchmarks/bench_padroes_regex.py --boletos 2000 --repeticoes 5
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+from extractors import padroes, ParsedBoleto
+from extractors import SQUIDExtractor, CAPITALExtractor, NOVAXExtractor, CREDVALEExtractor
+
+NOMES = ["ACME COMERCIO LTDA", "BETA MATERIAIS DE CONSTRUCAO", "GAMA ENGENHARIA EIRELI", "DELTA TRANSPORTES"]
+
+DANFE = """DOCUMENTO AUXILIAR DA NOTA FISCAL ELETRONICA
+DANFE
+NÚMERO DA NOTA
+{nota7}
+DESTINATÁRIO / REMETENTE
+NOME / RAZÃO SOCIAL CNPJ / CPF DATA DA EMISSÃO
+{nome} {cnpj} 01/10/2025
+ENDEREÇO BAIRRO / DISTRITO CEP
+RUA DAS FLORES, 100 CENTRO 88300-000
+FATURA
+NÚMERO VENCIMENTO VALOR
+001 {venc} {valor}
+CÁLCULO DO IMPOSTO
+BASE DE CÁLCULO DO ICMS VALOR DO ICMS VALOR TOTAL DOS PRODUTOS
+0,00 0,00 {valor}
+"""
+
+BOLETO = """Beneficiário
+{fidc} FUNDO DE INVESTIMENTO EM DIREITOS CREDITORIOS
+Local de Pagamento
+PAGÁVEL EM QUALQUER BANCO
+Vencimento
+{venc}
+Número do Documento
+{nota}/001
+(=) Valor do Documento R$ {valor}
+Pagador
+{nome} - CNPJ: {cnpj}
+Pagador: {nome} CNPJ/ CPF : {cnpj}
+23790.36706 40000.911947 49000.840501 3 13600000222120
+Autenticação Mecânica
+"""
+
+
+def gerar_boletos(quantidade: int, rng: random.Random) -> list:
+    textos = []
+    for i in range(quantidade):
+        nota = f"3{rng.randint(0, 99999):05d}"
+        campos = {
+            'nota': nota, 'nota7': f"0{nota}", 'nome': rng.choice(NOMES),
+            'cnpj': f"{rng.randint(10, 99)}.{rng.randint(100, 999)}.{rng.randint(100, 999)}/0001-{rng.randint(10, 99)}",
+            'venc': f"{rng.randint(10, 28)}/{rng.randint(10, 12)}/2025",
+            'valor': f"{rng.randint(1, 9)}.{rng.randint(100, 999)},{rng.randint(10, 99)}",
+            'fidc': rng.choice(["NOVAX", "CREDVALE", "SQUID"]),
+        }
+        textos.append((DANFE if i % 2 else BOLETO).format(**campos))
+    return textos
+
+
+def extrair_tudo(extratores, textos):
+    for texto in textos:
+        # Um ParsedBoleto por boleto, como na renomeação
+        doc = ParsedBoleto(texto)
+        for extrator in extratores:
+            extrator.extrair_pagador(doc)
+            extrator.extrair_vencimento(doc)
+            extrator.extrair_valor(doc)
+            extrator.extrair_numero_nota(doc)
+            extrator.extrair_cnpj_cpf_boleto(doc)
+
+
+def modo_antes():
+    """Cada Padrao passa a chamar re.<método>(string do padrão, ..., flags)"""
+    for padrao in padroes.PADROES.values():
+        fonte, flags = padrao.pattern, padrao.flags
+        padrao.search = lambda texto, _p=fonte, _f=flags: re.search(_p, texto, _f)
+        padrao.match = lambda texto, _p=fonte, _f=flags: re.match(_p, texto, _f)
+        padrao.sub = lambda repl, texto, _p=fonte, _f=flags: re.sub(_p, repl, texto, flags=_f)
+
+
+def medir(extratores, textos, repeticoes) -> float:
+    """Microssegundos por boleto (melhor de N)"""
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        extrair_tudo(extratores, textos)
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor / len(textos) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do registro de padrões regex")
+    parser.add_argument("--boletos", type=int, default=1000, help="Boletos sintéticos (padrão: 1000)")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Repetições (padrão: 3)")
+    args = parser.parse_args()
+
+    textos = gerar_boletos(args.boletos, random.Random(42))
+    extratores = [SQUIDExtractor(), CAPITALExtractor(), NOVAXExtractor(), CREDVALEExtractor()]
+
+    padroes.habilitar_medicao(False)
+    registro = medir(extratores, textos, args.repeticoes)
+
+    padroes.habilitar_medicao(True)
+    padroes.zerar_contadores()
+    extrair_tudo(extratores, textos)
+    padroes.habilitar_medicao(False)
+
+    modo_antes()
+    antes = medir(extratores, textos, args.repeticoes)
+    padroes.habilitar_medicao(False)    # religa os métodos compilados
+
+    print()
+    print("=" * 64)
+    print(f"  EXTRAÇÃO POR BOLETO ({args.boletos} boletos x 4 extratores x 5 campos)")
+    print("=" * 64)
+    print(f"  {'antes (re.search com string)':<34} {antes:9.1f} us/boleto")
+    print(f"  {'registro compilado':<34} {registro:9.1f} us/boleto ({antes / registro:.2f}x)")
+    print("=" * 64)
+    padroes.imprimir_estatisticas(limite=10)
+
+
+if __name__ == "__main__":
+    main()
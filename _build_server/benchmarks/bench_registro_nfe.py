@@ -0,0 +1,131 @@
+"""
+Benchmark - Mapa de NFe (dicionários x NFeRecord/MapaNFe)
+
+Monta um mapa de 50.000 notas (chave de 6 dígitos + chave completa) nos
+dois formatos e mede:
+- memória retida pelo mapa (tracemalloc)
+- tempo para contar as notas com email (values() do dicionário, que
+  visita cada nota duas vezes, x mapa.notas())
+- tempo para montar o IndiceNFe
+
+As notas são geradas direto em memória, no formato de extrair_dados_nfe()
+(o parsing dos XMLs não entra na medição).
+
+Uso:
+    python benchmarks/bench_registro_nfe.py
+    python benchmarks/bench_registro_nfe.py --notas 10000 50000 200000
+"""
+
+import gc
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+from decimal import Decimal
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+from registro_nfe import MapaNFe, NFeRecord
+from indice_nfe import IndiceNFe
+
+
+def gerar_dados(i: int) -> dict:
+    """Dicionário de uma nota com 3 duplicatas e 2 emails"""
+    numero = f"{1300000 + i}"
+    return {
+        'xml_valido': True,
+        'xml_path': f"C:\\Notas\\3-0{numero}.xml",
+        'emails': [f"fin{i}@empresa.com.br", f"compras{i}@empresa.com.br"],
+        'emails_invalidos': [],
+        'cnpj': f"{12345678000000 + i:014d}",
+        'cpf': '',
+        'cpf_cnpj': f"{12345678000000 + i:014d}",
+        'nome': f"CLIENTE {i} COMERCIO LTDA",
+        'numero_nota': numero,
+        'valor_total': Decimal("1500.00"),
+        'duplicatas': [
+            {'numero': f"00{p}", 'vencimento': f"2025-{p + 9:02d}-10", 'valor': Decimal("500.00")}
+            for p in range(1, 4)
+        ],
+        'erro': None,
+    }
+
+
+def montar_dict(quantidade: int) -> dict:
+    """Formato antigo: o mesmo dicionário nas duas chaves"""
+    mapa = {}
+    for i in range(quantidade):
+        dados = gerar_dados(i)
+        mapa[dados['numero_nota'][-6:]] = dados
+        mapa[dados['numero_nota']] = dados
+    return mapa
+
+
+def montar_registros(quantidade: int) -> MapaNFe:
+    """Formato novo: um NFeRecord por nota + apelidos"""
+    mapa = MapaNFe()
+    for i in range(quantidade):
+        dados = gerar_dados(i)
+        mapa.adicionar(NFeRecord.de_dados(dados), [dados['numero_nota'][-6:], dados['numero_nota']])
+    return mapa
+
+
+def medir_memoria(montar, quantidade: int) -> tuple:
+    """Retorna (mapa, MB retidos, segundos para montar)"""
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    mapa = montar(quantidade)
+    segundos = time.perf_counter() - inicio
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return mapa, atual / (1024 * 1024), segundos
+
+
+def medir(funcao, repeticoes: int = 3) -> float:
+    """Melhor tempo (ms) de `repeticoes` execuções"""
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        decorrido = (time.perf_counter() - inicio) * 1000
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do mapa de NFe")
+    parser.add_argument("--notas", type=int, nargs="+", default=[50000],
+                        help="Quantidades de notas (padrão: 50000)")
+    args = parser.parse_args()
+
+    print()
+    print("=" * 78)
+    print("  MAPA DE NFe (dict x MapaNFe)")
+    print("=" * 78)
+    print(f"{'notas':>7} {'formato':>9} {'MB':>7} {'montar s':>9} {'percorrer ms':>13} "
+          f"{'visitas':>8} {'IndiceNFe ms':>13}")
+
+    for quantidade in args.notas:
+        for nome, montar in (("dict", montar_dict), ("MapaNFe", montar_registros)):
+            mapa, mb, segundos = medir_memoria(montar, quantidade)
+
+            # Mesma contagem do resumo do envio (notas com email)
+            if isinstance(mapa, MapaNFe):
+                visitas = len(mapa.notas())
+                percorrer = medir(lambda mapa=mapa: sum(1 for dados in mapa.notas() if dados.emails))
+            else:
+                visitas = len(mapa)
+                percorrer = medir(lambda mapa=mapa: sum(1 for dados in mapa.values() if dados.get('emails')))
+            indice = medir(lambda mapa=mapa: IndiceNFe(mapa), repeticoes=1)
+
+            print(f"{quantidade:>7} {nome:>9} {mb:>7.1f} {segundos:>9.2f} {percorrer:>13.1f} "
+                  f"{visitas:>8} {indice:>13.0f}")
+            del mapa  # libera antes de medir a memória do próximo formato
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark - Renomeação Paralela (ProcessPoolExecutor)
+
+Mede o tempo da etapa pesada da renomeação (leitura do PDF + extratores +
+busca no XML) com 1 processo, 4 processos e todos os núcleos, usando
+boletos e XMLs sintéticos. O cache de texto fica DESLIGADO para medir a
+leitura real dos PDFs.
+
+Uso:
+    python benchmarks/bench_renomeacao_paralela.py
+    python benchmarks/bench_renomeacao_paralela.py --boletos 500 --workers 1 4 16
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+sys.path.insert(0, os.path.join(BASE, "tests"))
+
+from RenomeaçãoBoletos import analisar_boletos, resolver_workers
+from xml_nfe_reader import indexar_xmls_por_nota
+from pdf_sintetico import gerar_pdf
+from nfe_sintetica import gerar_xml_nfe
+from test_renomeacao_paralela import texto_boleto_capital
+
+
+def preparar_lote(pasta: str, quantidade: int) -> list:
+    """Gera `quantidade` boletos CAPITAL de 2 páginas e os XMLs correspondentes"""
+    pasta_pdf = os.path.join(pasta, "Entrada")
+    pasta_xml = os.path.join(pasta, "Notas")
+    os.makedirs(pasta_pdf)
+    os.makedirs(pasta_xml)
+
+    # Página extra com texto "de layout" para o pdfplumber ter trabalho real
+    pagina_extra = "\n".join(
+        f"ITEM {j:03d}  PRODUTO DE TESTE {j}  UN  1,000  10,00  10,00" for j in range(60)
+    )
+
+    caminhos = []
+    for i in range(quantidade):
+        numero = f"{300000 + i}"
+        cnpj = f"{12345678000000 + i:014d}"
+        cnpj_fmt = f"{cnpj[:2]}.{cnpj[2:5]}.{cnpj[5:8]}/{cnpj[8:12]}-{cnpj[12:]}"
+        nome = f"CLIENTE {i} LTDA"
+        caminho = os.path.join(pasta_pdf, f"boleto_{i:05d}.pdf")
+        gerar_pdf(caminho, [texto_boleto_capital(numero, cnpj_fmt, nome), pagina_extra])
+        gerar_xml_nfe(
+            os.path.join(pasta_xml, f"{numero}.xml"), numero, nome, cnpj=cnpj,
+            valor_total="1234.56", duplicatas=[("001", "2025-11-10", "1234.56")],
+            email=f"cliente{i}@empresa.com.br"
+        )
+        caminhos.append(caminho)
+
+    return caminhos, pasta_xml
+
+
+def medir(caminhos: list, mapa_xmls: dict, workers: int) -> tuple:
+    """Roda analisar_boletos e retorna (segundos, boletos ok)"""
+    inicio = time.perf_counter()
+    ok = 0
+    for analise in analisar_boletos(caminhos, mapa_xmls, workers, usar_cache=False):
+        if analise['resultado'] and analise['resultado']['status'] == 'ok':
+            ok += 1
+    return time.perf_counter() - inicio, ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da renomeação paralela")
+    parser.add_argument("--boletos", type=int, default=200, help="Quantidade de boletos sintéticos")
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="Configurações de workers (padrão: 1, 4 e todos os núcleos)")
+    args = parser.parse_args()
+
+    nucleos = os.cpu_count() or 1
+    configuracoes = args.workers or sorted({1, 4, nucleos})
+
+    with tempfile.TemporaryDirectory() as pasta:
+        print(f"Gerando {args.boletos} boletos sintéticos...")
+        caminhos, pasta_xml = preparar_lote(pasta, args.boletos)
+        mapa_xmls = indexar_xmls_por_nota(pasta_xml, usar_cache=False)
+
+        print()
+        print("=" * 60)
+        print(f"  RENOMEACAO PARALELA - {args.boletos} boletos ({nucleos} nucleos)")
+        print("=" * 60)
+        print(f"{'workers':>8} {'tempo (s)':>10} {'boletos/s':>10} {'speedup':>8} {'ok':>6}")
+
+        base = None
+        for pedido in configuracoes:
+            workers = resolver_workers(pedido, len(caminhos))
+            segundos, ok = medir(caminhos, mapa_xmls, workers)
+            base = base or segundos
+            print(f"{workers:>8} {segundos:>10.2f} {len(caminhos) / segundos:>10.1f} "
+                  f"{base / segundos:>7.2f}x {ok:>6}")
+        print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
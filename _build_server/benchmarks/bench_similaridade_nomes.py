@@ -0,0 +1,133 @@
+"""
+Benchmark - Matching Aproximado de Nomes (varredura completa x MotorNomes)
+
+Gera N nomes de clientes (combinações de palavras comuns em razões
+sociais) e M nomes de pagador derivados deles (sem sufixo, abreviados,
+com erro de digitação) e mede:
+- varredura completa: calcular_similaridade() do boleto contra cada nota
+  (amostra de boletos, extrapolada para M)
+- MotorNomes: índice de trigramas + SequenceMatcher só nos top-k
+- recall: dos pares com similaridade >= 0.70 da varredura completa, quantos
+  o MotorNomes também devolve (e se o melhor nome é o mesmo)
+
+Uso:
+    python benchmarks/bench_similaridade_nomes.py
+    python benchmarks/bench_similaridade_nomes.py --notas 20000 --boletos 1000 --k 20
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+
+from RenomeaçãoBoletos import normalizar_nome_empresa, calcular_similaridade
+from similaridade_nomes import MotorNomes, LIMIAR_NOME_SIMILAR
+
+PALAVRAS = [
+    "ACME", "BETA", "GAMA", "DELTA", "SUL", "NORTE", "BRASIL", "SANTA", "CATARINA", "VALE",
+    "ITAJAI", "JOINVILLE", "BLUMENAU", "PORTO", "NOVA", "ALIANCA", "UNIAO", "PRIME", "TOP",
+    "COMERCIO", "INDUSTRIA", "DISTRIBUIDORA", "MATERIAIS", "CONSTRUCAO", "ENGENHARIA",
+    "EMPREENDIMENTOS", "IMOBILIARIOS", "TRANSPORTES", "LOGISTICA", "SERVICOS", "ALIMENTOS",
+    "METALURGICA", "PLASTICOS", "MADEIRAS", "FERRAGENS", "AUTO", "PECAS", "TINTAS",
+]
+SUFIXOS = ["LTDA", "EIRELI", "S.A.", "ME", "EPP", "S/A", ""]
+
+
+def gerar_nomes(quantidade: int, rng: random.Random) -> list:
+    """Razões sociais distintas de 2 a 4 palavras + sufixo"""
+    nomes = set()
+    while len(nomes) < quantidade:
+        palavras = rng.sample(PALAVRAS, rng.randint(2, 4))
+        nomes.add(f"{' '.join(palavras)} {rng.choice(SUFIXOS)}".strip())
+    return sorted(nomes)
+
+
+def variar(nome: str, rng: random.Random) -> str:
+    """Nome do pagador como aparece no boleto"""
+    partes = [p for p in nome.split() if p not in SUFIXOS]
+    escolha = rng.random()
+    if escolha < 0.3:
+        return " ".join(partes)                                   # sem sufixo
+    if escolha < 0.5:
+        return " ".join(p[:5] + "." if len(p) > 6 else p for p in partes)  # abreviado
+    if escolha < 0.8:
+        texto = list(nome)
+        posicao = rng.randrange(len(texto))
+        texto[posicao] = rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ")  # erro de digitação
+        return "".join(texto)
+    return nome
+
+
+def varredura_completa(boleto: str, nomes: list) -> list:
+    """[(posição, similaridade)] >= 0.70, como o laço sobre o mapa inteiro"""
+    achados = []
+    for posicao, nome in enumerate(nomes):
+        similaridade = calcular_similaridade(boleto, nome)
+        if similaridade >= LIMIAR_NOME_SIMILAR:
+            achados.append((posicao, similaridade))
+    return achados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do matching de nomes")
+    parser.add_argument("--notas", type=int, default=20000, help="Nomes de notas (padrão: 20000)")
+    parser.add_argument("--boletos", type=int, default=1000, help="Nomes de boletos (padrão: 1000)")
+    parser.add_argument("--amostra", type=int, default=20,
+                        help="Boletos medidos na varredura completa (padrão: 20)")
+    parser.add_argument("--k", type=int, default=20, help="Candidatos por trigramas (padrão: 20)")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    nomes = gerar_nomes(args.notas, rng)
+    boletos = [variar(rng.choice(nomes), rng) for _ in range(args.boletos)]
+
+    # Índice (uma vez por execução)
+    inicio = time.perf_counter()
+    motor = MotorNomes(normalizar_nome_empresa)
+    for posicao, nome in enumerate(nomes):
+        motor.indexar(posicao, nome)
+    tempo_indice = time.perf_counter() - inicio
+
+    # MotorNomes: todos os boletos
+    inicio = time.perf_counter()
+    resultados = [motor.similares(boleto, k=args.k) for boleto in boletos]
+    tempo_motor = time.perf_counter() - inicio
+
+    # Varredura completa: amostra + recall
+    amostra = boletos[:args.amostra]
+    inicio = time.perf_counter()
+    completos = [varredura_completa(boleto, nomes) for boleto in amostra]
+    tempo_amostra = time.perf_counter() - inicio
+    tempo_completo = tempo_amostra / len(amostra) * len(boletos)
+
+    pares = encontrados = melhor_igual = 0
+    for completo, blocado in zip(completos, resultados):
+        chaves_blocado = {chave for chave, _ in blocado}
+        pares += len(completo)
+        encontrados += sum(1 for posicao, _ in completo if posicao in chaves_blocado)
+        if completo:
+            maior = max(similaridade for _, similaridade in completo)
+            melhor_igual += bool(blocado) and blocado[0][1] == maior
+    com_match = sum(1 for completo in completos if completo)
+
+    print()
+    print("=" * 70)
+    print(f"  MATCHING DE NOMES ({args.boletos} boletos x {args.notas} notas, k={args.k})")
+    print("=" * 70)
+    print(f"  Índice de trigramas:      {tempo_indice:8.2f} s (uma vez)")
+    print(f"  Varredura completa:       {tempo_completo:8.2f} s "
+          f"(estimado de {len(amostra)} boletos)  {args.boletos / tempo_completo:8.1f} boletos/s")
+    print(f"  MotorNomes (top-k):       {tempo_motor:8.2f} s"
+          f"{'':27}{args.boletos / tempo_motor:8.1f} boletos/s")
+    print(f"  Ganho:                    {tempo_completo / tempo_motor:8.1f}x")
+    print(f"  Recall pares >= 0.70:     {encontrados}/{pares}")
+    print(f"  Melhor nome igual:        {melhor_igual}/{com_match}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Paridade - Motores de Extração de PDF (pdfplumber x pdfium)
+
+Lê cada PDF com todos os motores disponíveis, roda os 4 extratores
+(CAPITAL, NOVAX, CREDVALE, SQUID) sobre o texto de cada motor e aponta
+os campos que mudam de um motor para outro, junto com o tempo por página.
+
+Rodar com boletos reais de um FIDC antes de trocar o motor dele em
+MOTOR_PDF_POR_FIDC (config_server.py). Sem pasta, usa boletos sintéticos.
+
+Uso:
+    python benchmarks/paridade_motores_pdf.py
+    python benchmarks/paridade_motores_pdf.py "C:/Boletos/Renomeados"
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+sys.path.insert(0, os.path.join(BASE, "tests"))
+
+from pdf_backends import obter_motor, listar_motores, MOTOR_SEGURO
+from pdf_texto import juntar_paginas
+from extractors import ExtractorFactory, ParsedBoleto
+
+# Campos comparados em cada extrator
+CAMPOS = {
+    'pagador': 'extrair_pagador',
+    'vencimento': 'extrair_vencimento',
+    'valor': 'extrair_valor',
+    'numero_nota': 'extrair_numero_nota',
+    'cnpj': 'extrair_cnpj_cpf_boleto',
+}
+
+
+def ler_com_motor(caminho: str, nome_motor: str) -> tuple:
+    """
+    Lê todas as páginas com um motor (sem cache).
+
+    Returns:
+        (lista de textos por página, lista de segundos por página)
+    """
+    motor = obter_motor(nome_motor)
+    paginas, tempos = [], []
+    with motor.abrir(caminho) as pdf:
+        for indice in range(pdf.total_paginas):
+            inicio = time.perf_counter()
+            paginas.append(pdf.texto_pagina(indice))
+            tempos.append(time.perf_counter() - inicio)
+    return paginas, tempos
+
+
+def extrair_campos(texto: str) -> dict:
+    """Roda os 4 extratores sobre o texto: {fidc: {campo: valor}}"""
+    doc = ParsedBoleto.de_texto(texto)
+    resultado = {'fidc_detectado': doc.fidc}
+    for fidc in ExtractorFactory.get_available_fidcs():
+        extractor = ExtractorFactory.get_extractor(fidc)
+        campos = {}
+        for campo, metodo in CAMPOS.items():
+            funcao = getattr(extractor, metodo, None)
+            if funcao is None:
+                continue
+            try:
+                campos[campo] = funcao(doc)
+            except Exception as e:
+                campos[campo] = f"<erro: {e}>"
+        resultado[fidc] = campos
+    return resultado
+
+
+def comparar_pdf(caminho: str, motores: list = None) -> dict:
+    """
+    Compara os motores em um PDF.
+
+    Returns:
+        {
+            'arquivo': str,
+            'tempos': {motor: [segundos por página]},
+            'diferencas': [(fidc, campo, {motor: valor})],
+            'erros': {motor: str}
+        }
+    """
+    motores = motores or listar_motores()
+    relatorio = {'arquivo': caminho, 'tempos': {}, 'diferencas': [], 'erros': {}}
+
+    resultados = {}
+    for nome in motores:
+        try:
+            paginas, tempos = ler_com_motor(caminho, nome)
+        except Exception as e:
+            relatorio['erros'][nome] = str(e)
+            continue
+        relatorio['tempos'][nome] = tempos
+        resultados[nome] = extrair_campos(juntar_paginas(paginas))
+
+    if len(resultados) < 2:
+        return relatorio
+
+    referencia = resultados.get(MOTOR_SEGURO) or next(iter(resultados.values()))
+
+    if len({r['fidc_detectado'] for r in resultados.values()}) > 1:
+        relatorio['diferencas'].append(
+            ('*', 'fidc_detectado', {m: r['fidc_detectado'] for m, r in resultados.items()})
+        )
+
+    for fidc in ExtractorFactory.get_available_fidcs():
+        for campo in referencia[fidc]:
+            valores = {m: r[fidc].get(campo) for m, r in resultados.items()}
+            if len(set(map(repr, valores.values()))) > 1:
+                relatorio['diferencas'].append((fidc, campo, valores))
+
+    return relatorio
+
+
+def imprimir_relatorio(relatorios: list) -> None:
+    """Imprime diferenças por arquivo e o tempo médio por página de cada motor"""
+    print("=" * 70)
+    print("  PARIDADE DOS MOTORES DE PDF")
+    print("=" * 70)
+
+    total_dif = 0
+    tempos_motor = {}
+    for rel in relatorios:
+        nome = os.path.basename(rel['arquivo'])
+        for motor, tempos in rel['tempos'].items():
+            tempos_motor.setdefault(motor, []).extend(tempos)
+        for motor, erro in rel['erros'].items():
+            print(f"[ERRO] {nome} ({motor}): {erro}")
+        for fidc, campo, valores in rel['diferencas']:
+            total_dif += 1
+            print(f"[DIF] {nome} | {fidc}.{campo}")
+            for motor, valor in valores.items():
+                print(f"        {motor:<12} {valor!r}")
+
+    print("-" * 70)
+    print(f"Arquivos: {len(relatorios)} | Diferencas: {total_dif}")
+    print(f"{'motor':<12} {'paginas':>8} {'ms/pagina':>10} {'total (s)':>10}")
+    for motor, tempos in tempos_motor.items():
+        media = (sum(tempos) / len(tempos) * 1000) if tempos else 0.0
+        print(f"{motor:<12} {len(tempos):>8} {media:>10.2f} {sum(tempos):>10.2f}")
+    print("=" * 70)
+
+
+def gerar_amostras(pasta: str) -> list:
+    """Gera um boleto sintético de cada FIDC (quando nenhuma pasta é informada)"""
+    from pdf_sintetico import gerar_pdf
+    from test_paridade_motores_pdf import TEXTOS_FIDC
+
+    caminhos = []
+    for fidc, texto in TEXTOS_FIDC.items():
+        caminhos.append(gerar_pdf(os.path.join(pasta, f"{fidc.lower()}.pdf"), [texto]))
+    return caminhos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paridade pdfplumber x pdfium nos extratores")
+    parser.add_argument("pasta", nargs="?", help="Pasta com PDFs de boletos (padrão: sintéticos)")
+    args = parser.parse_args()
+
+    if len(listar_motores()) < 2:
+        print(f"[AVISO] Apenas {listar_motores()} disponível - instale pypdfium2")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.pasta:
+            caminhos = sorted(
+                os.path.join(args.pasta, f) for f in os.listdir(args.pasta) if f.lower().endswith(".pdf")
+            )
+        else:
+            caminhos = gerar_amostras(tmp)
+        imprimir_relatorio([comparar_pdf(c) for c in caminhos])
+
+
+if __name__ == "__main__":
+    main()
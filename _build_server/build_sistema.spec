@@ -20,12 +20,29 @@ a = Analysis(
         ('RenomeaçãoBoletos.py', '.'),
         ('auditoria.py', '.'),
         ('xml_nfe_reader.py', '.'),
+        ('cache_pdf.py', '.'),
+        ('pdf_texto.py', '.'),
+        ('pdf_backends.py', '.'),
+        ('cache_nfe.py', '.'),
+        ('indice_nfe.py', '.'),
+        ('registro_nfe.py', '.'),
+        ('similaridade_nomes.py', '.'),
+        ('normalizacao_nomes.py', '.'),
+        ('casamento_lote.py', '.'),
+        ('indice_notas_pdf.py', '.'),
+        ('validacao_notas.py', '.'),
+        ('vigia_pastas.py', '.'),
+        ('transporte_email.py', '.'),
+        ('caixa_saida.py', '.'),
+        ('registro_envios.py', '.'),
+        ('pipeline.py', '.'),
         ('COMO_USAR.txt', '.'),
         ('extractors/*.py', 'extractors'),
     ] + unidecode_datas,
     hiddenimports=[
         'win32com.client',
         'pdfplumber',
+        'pypdfium2',
         'openpyxl',
         'PIL',
         'PIL.Image',
@@ -0,0 +1,241 @@
+"""
+================================================================================
+cache_nfe.py - Índice Persistente dos XMLs de NFe (SQLite)
+================================================================================
+
+Guarda em disco o resultado de extrair_dados_nfe() de cada XML da pasta
+Notas, para que a renomeação e o envio não façam o parsing de milhares
+de XMLs a cada execução.
+
+Funcionalidades:
+- Uma linha por XML, identificada por pasta + nome do arquivo
+- Validade por mtime + tamanho; se mudaram, confere o SHA-256 do conteúdo
+  (arquivo só "tocado"/copiado não é relido)
+- Só XMLs novos ou alterados passam pelo ElementTree
+- XMLs apagados da pasta saem do índice
+- Carga em lote (um SELECT por pasta, gravações em uma transação)
+- Versão do formato (PRAGMA user_version) invalida o índice antigo
+
+Os emails são gravados sem limite e cortados em max_emails na leitura,
+então o mesmo índice atende a renomeação e o envio.
+
+Estrutura em disco:
+    PASTA_CACHE/indice_nfe.sqlite
+
+Autor: Sistema de Boletos v7.1
+Data: 2026-10-17
+================================================================================
+"""
+
+import os
+import json
+import sqlite3
+from decimal import Decimal
+
+from cache_pdf import calcular_sha256
+from xml_nfe_reader import extrair_dados_nfe
+from config_server import PASTA_CACHE, USAR_CACHE_NFE
+
+# ==================== CONFIGURAÇÕES ====================
+# Versão do formato dos dados gravados. Incrementar sempre que
+# extrair_dados_nfe() passar a devolver campos diferentes.
+VERSAO_INDICE = 1
+
+# Limite de emails usado na gravação (o corte real é feito na leitura)
+SEM_LIMITE_EMAILS = 1_000_000
+
+# Espera máxima (s) pelo lock do SQLite (renomeação e envio ao mesmo tempo)
+TIMEOUT_SQLITE = 30
+
+
+# ==================== SERIALIZAÇÃO ====================
+
+def _para_json(dados: dict) -> str:
+    """Serializa o dicionário da NFe (Decimal vira string)."""
+    return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+def _de_json(conteudo: str) -> dict:
+    """Reconstrói o dicionário da NFe com os valores em Decimal."""
+    dados = json.loads(conteudo)
+    dados['valor_total'] = Decimal(dados['valor_total'])
+    for dup in dados['duplicatas']:
+        dup['valor'] = Decimal(dup['valor'])
+    return dados
+
+
+# ==================== CACHE ====================
+
+class CacheNFe:
+    """
+    Índice SQLite com os dados extraídos de cada XML de NFe.
+
+    Uso:
+        cache = CacheNFe(os.path.join(PASTA_CACHE, "indice_nfe.sqlite"))
+        lista_dados = cache.sincronizar(pasta_notas, arquivos_xml, max_emails=2)
+    """
+
+    def __init__(self, caminho_db: str):
+        self.caminho_db = caminho_db
+
+        # Contadores da última sincronização
+        self.reaproveitados = 0
+        self.lidos = 0
+        self.removidos = 0
+
+        pasta = os.path.dirname(caminho_db)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._criar_tabela()
+
+    # -------------------- banco --------------------
+    def _conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.caminho_db, timeout=TIMEOUT_SQLITE)
+
+    def _criar_tabela(self) -> None:
+        with self._conectar() as conn:
+            versao = conn.execute("PRAGMA user_version").fetchone()[0]
+            if versao != VERSAO_INDICE:
+                conn.execute("DROP TABLE IF EXISTS nfe")
+                conn.execute(f"PRAGMA user_version = {VERSAO_INDICE}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS nfe ("
+                " pasta TEXT NOT NULL,"
+                " arquivo TEXT NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " tamanho INTEGER NOT NULL,"
+                " sha256 TEXT NOT NULL,"
+                " dados TEXT NOT NULL,"
+                " PRIMARY KEY (pasta, arquivo))"
+            )
+        conn.close()
+
+    # -------------------- sincronização --------------------
+    def sincronizar(self, pasta_notas: str, arquivos_xml: list, max_emails: int = 2,
+                    extrair_lote=None) -> list:
+        """
+        Atualiza o índice da pasta e devolve os dados de cada XML.
+
+        Args:
+            pasta_notas: Pasta dos XMLs
+            arquivos_xml: Nomes dos arquivos (na ordem desejada)
+            max_emails: Emails válidos por nota no resultado
+            extrair_lote: Função (caminhos, max_emails) -> lista de dados usada
+                          nos XMLs novos/alterados (ex: parsing paralelo).
+                          None = extrair_dados_nfe() um a um
+
+        Returns:
+            Lista com o dicionário de extrair_dados_nfe() de cada arquivo,
+            na mesma ordem de `arquivos_xml`
+        """
+        self.reaproveitados = self.lidos = self.removidos = 0
+        pasta = os.path.abspath(pasta_notas)
+
+        conn = self._conectar()
+        try:
+            indice = {
+                arquivo: (mtime_ns, tamanho, sha256, dados)
+                for arquivo, mtime_ns, tamanho, sha256, dados in conn.execute(
+                    "SELECT arquivo, mtime_ns, tamanho, sha256, dados FROM nfe WHERE pasta = ?", (pasta,)
+                )
+            }
+
+            resultados = []
+            gravar = []
+            pendentes = []  # (posição, arquivo, caminho, stat) a reler
+            for arquivo in arquivos_xml:
+                caminho = os.path.join(pasta_notas, arquivo)
+                st = os.stat(caminho)
+                linha = indice.pop(arquivo, None)
+
+                dados = None
+                if linha is not None:
+                    mtime_ns, tamanho, sha256, conteudo = linha
+                    if (mtime_ns, tamanho) == (st.st_mtime_ns, st.st_size):
+                        dados = _de_json(conteudo)
+                    else:
+                        # Mudou data/tamanho: só relê se o conteúdo mudou
+                        sha_atual = calcular_sha256(caminho)
+                        if sha_atual == sha256:
+                            dados = _de_json(conteudo)
+                            gravar.append((pasta, arquivo, st.st_mtime_ns, st.st_size, sha256, conteudo))
+
+                if dados is None:
+                    pendentes.append((len(resultados), arquivo, caminho, st))
+                    resultados.append(None)
+                else:
+                    self.reaproveitados += 1
+                    resultados.append(self._ajustar(dados, caminho, max_emails))
+
+            # XMLs novos/alterados: parsing em lote
+            if pendentes:
+                caminhos = [caminho for _, _, caminho, _ in pendentes]
+                if extrair_lote is None:
+                    lote = [extrair_dados_nfe(caminho, SEM_LIMITE_EMAILS) for caminho in caminhos]
+                else:
+                    lote = extrair_lote(caminhos, SEM_LIMITE_EMAILS)
+
+                for (posicao, arquivo, caminho, st), dados in zip(pendentes, lote):
+                    gravar.append((pasta, arquivo, st.st_mtime_ns, st.st_size,
+                                   calcular_sha256(caminho), _para_json(dados)))
+                    resultados[posicao] = self._ajustar(dados, caminho, max_emails)
+                self.lidos = len(pendentes)
+
+            # O que sobrou no índice não existe mais na pasta
+            with conn:
+                if gravar:
+                    conn.executemany("INSERT OR REPLACE INTO nfe VALUES (?, ?, ?, ?, ?, ?)", gravar)
+                if indice:
+                    conn.executemany(
+                        "DELETE FROM nfe WHERE pasta = ? AND arquivo = ?",
+                        [(pasta, arquivo) for arquivo in indice]
+                    )
+            self.removidos = len(indice)
+        finally:
+            conn.close()
+
+        return resultados
+
+    @staticmethod
+    def _ajustar(dados: dict, caminho: str, max_emails: int) -> dict:
+        """Aplica o limite de emails e o caminho atual do XML."""
+        dados['xml_path'] = caminho
+        dados['emails'] = dados['emails'][:max_emails]
+        return dados
+
+    # -------------------- estatísticas --------------------
+    def estatisticas(self) -> dict:
+        """Retorna os contadores da última sincronização."""
+        return {
+            'reaproveitados': self.reaproveitados,
+            'lidos': self.lidos,
+            'removidos': self.removidos,
+        }
+
+    def __repr__(self):
+        return f"<CacheNFe db='{self.caminho_db}' reaproveitados={self.reaproveitados} lidos={self.lidos}>"
+
+
+# ==================== CACHE GLOBAL ====================
+_cache = None
+
+
+def obter_cache_nfe() -> CacheNFe | None:
+    """
+    Retorna a instância única do índice (criada na primeira chamada).
+
+    Returns:
+        CacheNFe ou None se o índice estiver desabilitado na configuração
+    """
+    global _cache
+    if not USAR_CACHE_NFE:
+        return None
+    if _cache is None:
+        _cache = CacheNFe(os.path.join(PASTA_CACHE, "indice_nfe.sqlite"))
+    return _cache
+
+
+def definir_cache_nfe(cache: CacheNFe | None) -> None:
+    """Substitui a instância global do índice (usado em testes)."""
+    global _cache
+    _cache = cache
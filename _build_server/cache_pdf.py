@@ -0,0 +1,255 @@
+"""
+================================================================================
+cache_pdf.py - Cache Persistente de Texto Extraído de PDFs
+================================================================================
+
+Guarda em disco o texto que o pdfplumber extrai de cada PDF, para que o
+mesmo arquivo não seja lido duas vezes (a renomeação lê o boleto em
+Boletos/Entrada e o envio lê o mesmo arquivo em Boletos/Renomeados).
+
+Funcionalidades:
+- Chave pelo SHA-256 do CONTEÚDO do PDF (nome/pasta do arquivo não importam)
+- Entradas versionadas (mudar VERSAO_CACHE invalida o cache antigo)
+- Entradas parciais (só as primeiras páginas, quando a leitura parou cedo)
+- Limite de tamanho com remoção LRU (menos usados recentemente saem primeiro)
+- Contadores de acertos/falhas para o resumo da execução
+- Escrita atômica (arquivo temporário + os.replace)
+
+Estrutura em disco:
+    PASTA_CACHE/texto_pdf/ab/abcdef...sha256.json
+
+Autor: Sistema de Boletos v7.1
+Data: 2026-10-17
+================================================================================
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import time
+
+# ==================== CONFIGURAÇÕES ====================
+# Versão do formato das entradas. Incrementar sempre que a forma de extrair
+# o texto mudar (ex: outra biblioteca, outro tratamento de páginas).
+# v2: entradas com 'completo' e 'total_paginas' (leitura parcial)
+VERSAO_CACHE = 2
+
+# Tamanho do bloco usado para calcular o hash (1 MB)
+TAMANHO_BLOCO_HASH = 1024 * 1024
+
+# Ao estourar o limite, remove entradas até ficar abaixo desta fração
+FRACAO_APOS_LIMPEZA = 0.9
+
+
+# ==================== HASH ====================
+
+def calcular_sha256(caminho_arquivo: str) -> str:
+    """
+    Calcula o SHA-256 do conteúdo de um arquivo.
+
+    Args:
+        caminho_arquivo: Caminho do arquivo
+
+    Returns:
+        Hash hexadecimal (64 caracteres)
+    """
+    h = hashlib.sha256()
+    with open(caminho_arquivo, 'rb') as f:
+        for bloco in iter(lambda: f.read(TAMANHO_BLOCO_HASH), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+# ==================== CACHE ====================
+
+class CacheTextoPDF:
+    """
+    Cache em disco do texto das páginas de PDFs, endereçado pelo conteúdo.
+
+    Cada entrada é um JSON com a versão do formato e a lista de textos
+    por página. Uma entrada de versão diferente é tratada como falha e
+    sobrescrita na próxima gravação.
+    """
+
+    def __init__(self, pasta: str, tamanho_maximo_mb: float = 200, versao: int = VERSAO_CACHE):
+        self.pasta = pasta
+        self.tamanho_maximo_bytes = int(tamanho_maximo_mb * 1024 * 1024)
+        self.versao = versao
+
+        # Contadores da execução
+        self.acertos = 0
+        self.falhas = 0
+        self.gravacoes = 0
+        self.removidos = 0
+
+        # Tamanho total em disco (calculado sob demanda na primeira gravação)
+        self._tamanho_total = None
+
+        os.makedirs(self.pasta, exist_ok=True)
+
+    # -------------------- caminhos --------------------
+    def _caminho_entrada(self, chave: str) -> str:
+        return os.path.join(self.pasta, chave[:2], f"{chave}.json")
+
+    def _listar_entradas(self) -> list:
+        """Retorna lista de (mtime, tamanho, caminho) de todas as entradas."""
+        entradas = []
+        for sub in os.scandir(self.pasta):
+            if not sub.is_dir():
+                continue
+            for arq in os.scandir(sub.path):
+                if not arq.name.endswith('.json'):
+                    continue
+                try:
+                    st = arq.stat()
+                except OSError:
+                    continue
+                entradas.append((st.st_mtime, st.st_size, arq.path))
+        return entradas
+
+    # -------------------- leitura --------------------
+    def obter(self, chave: str) -> list | None:
+        """
+        Busca o texto de TODAS as páginas pelo hash do PDF.
+
+        Returns:
+            Lista de strings (uma por página) ou None se não estiver no cache
+            (entradas parciais também contam como falha)
+        """
+        entrada = self._ler_entrada(chave)
+        if entrada is None or not entrada['completo']:
+            self.falhas += 1
+            return None
+        self.acertos += 1
+        return entrada['paginas']
+
+    def obter_entrada(self, chave: str) -> dict | None:
+        """
+        Busca a entrada do cache (completa ou parcial).
+
+        Returns:
+            {'paginas': list, 'completo': bool, 'total_paginas': int | None}
+            ou None se não estiver no cache
+        """
+        entrada = self._ler_entrada(chave)
+        if entrada is None:
+            self.falhas += 1
+            return None
+        self.acertos += 1
+        return entrada
+
+    def _ler_entrada(self, chave: str) -> dict | None:
+        caminho = self._caminho_entrada(chave)
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                entrada = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entrada.get('versao') != self.versao or not isinstance(entrada.get('paginas'), list):
+            return None
+
+        # Marcar como usado recentemente (base da remoção LRU)
+        try:
+            os.utime(caminho, None)
+        except OSError:
+            pass
+
+        return {
+            'paginas': entrada['paginas'],
+            'completo': entrada.get('completo', True),
+            'total_paginas': entrada.get('total_paginas'),
+        }
+
+    # -------------------- gravação --------------------
+    def salvar(self, chave: str, paginas: list, completo: bool = True,
+               total_paginas: int | None = None) -> None:
+        """
+        Grava o texto das páginas no cache (escrita atômica).
+
+        Args:
+            chave: SHA-256 do PDF
+            paginas: Lista de strings (uma por página, a partir da primeira)
+            completo: False se a leitura parou antes da última página
+            total_paginas: Quantidade de páginas do PDF (se conhecida)
+        """
+        caminho = self._caminho_entrada(chave)
+        pasta = os.path.dirname(caminho)
+        os.makedirs(pasta, exist_ok=True)
+
+        entrada = {
+            'versao': self.versao,
+            'sha256': chave,
+            'criado_em': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'completo': completo,
+            'total_paginas': total_paginas if total_paginas is not None else (len(paginas) if completo else None),
+            'paginas': paginas,
+        }
+        conteudo = json.dumps(entrada, ensure_ascii=False).encode('utf-8')
+
+        fd, tmp = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(conteudo)
+            tamanho_anterior = os.path.getsize(caminho) if os.path.exists(caminho) else 0
+            os.replace(tmp, caminho)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+
+        self.gravacoes += 1
+
+        if self._tamanho_total is None:
+            self._tamanho_total = sum(t for _, t, _ in self._listar_entradas())
+        else:
+            self._tamanho_total += len(conteudo) - tamanho_anterior
+
+        if self._tamanho_total > self.tamanho_maximo_bytes:
+            self.limpar()
+
+    # -------------------- remoção LRU --------------------
+    def limpar(self) -> int:
+        """
+        Remove as entradas usadas há mais tempo até o cache ficar abaixo
+        do limite configurado.
+
+        Returns:
+            Quantidade de entradas removidas
+        """
+        entradas = sorted(self._listar_entradas())
+        total = sum(t for _, t, _ in entradas)
+        alvo = int(self.tamanho_maximo_bytes * FRACAO_APOS_LIMPEZA)
+
+        removidas = 0
+        for _, tamanho, caminho in entradas:
+            if total <= alvo:
+                break
+            try:
+                os.remove(caminho)
+            except OSError:
+                continue
+            total -= tamanho
+            removidas += 1
+
+        self._tamanho_total = total
+        self.removidos += removidas
+        return removidas
+
+    # -------------------- estatísticas --------------------
+    def estatisticas(self) -> dict:
+        """Retorna os contadores da execução atual."""
+        consultas = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'gravacoes': self.gravacoes,
+            'removidos': self.removidos,
+            'taxa_acerto': (self.acertos / consultas) if consultas else 0.0,
+        }
+
+    def __repr__(self):
+        return f"<CacheTextoPDF pasta='{self.pasta}' acertos={self.acertos} falhas={self.falhas}>"
@@ -0,0 +1,514 @@
+"""
+================================================================================
+caixa_saida.py - Caixa de Saída do Envio (Diário SQLite + Despachante)
+================================================================================
+
+O envio mandava os grupos um depois do outro, direto para o Outlook, e
+uma queda no meio de um lote de 400 e-mails obrigava a reprocessar (ler,
+extrair e validar) tudo de novo, sem saber o que já tinha saído.
+
+Agora cada e-mail renderizado (destinatários, assunto, HTML, anexos,
+FIDC) é gravado primeiro na CAIXA DE SAÍDA, um diário SQLite em disco,
+e só então enviado:
+
+    pendente -> enviando -> enviada -> concluida      (pós-envio feito:
+       ^           |                                   boletos movidos)
+       +-----------+-> falhou (esgotou as tentativas ou erro permanente)
+
+- Cada transição é um UPDATE atômico; "enviada" é gravada logo depois
+  que o transporte aceita a mensagem
+- Ao reabrir (recuperar()), o que ficou "enviando" numa queda volta a
+  "pendente" (só essa mensagem pode sair duas vezes: o transporte aceitou
+  e o processo caiu antes do UPDATE)
+- O que já está "enviada" só refaz o pós-envio (mover os boletos), sem
+  reenviar; boletos de mensagens em aberto não são lidos nem validados
+  de novo (arquivos_em_aberto())
+- "falhou" é final: os boletos continuam na pasta e a próxima execução
+  monta a mensagem de novo (com e-mail/nota já corrigidos)
+- Cada mensagem guarda o modo (produção/preview) da execução que a
+  montou; a caixa só enxerga as do seu modo. Uma pendente do preview
+  nunca sai de verdade numa execução de produção, e o preview não exibe
+  (nem conclui) o que a produção deixou pendente
+
+O Despachante esvazia a caixa com N workers (threads, cada um com seu
+transporte/conexão), limite de mensagens por segundo compartilhado entre
+eles e novas tentativas com espera exponencial (2s, 4s, 8s...). No
+pipeline do envio, enviar_item() + concluir() mandam cada mensagem assim
+que ela entra na caixa; drenar() no fim cuida das novas tentativas.
+ErroTransporte (conta do Outlook ausente, login SMTP recusado) não é
+problema da mensagem: o Despachante para, a mensagem volta a pendente sem
+contar tentativa e o erro sobe para quem chamou (a caixa fica para a
+próxima execução).
+
+Estrutura em disco:
+    Auditoria/caixa_saida.sqlite
+
+Uso:
+    caixa = CaixaSaida(ARQUIVO_CAIXA_SAIDA, modo=MODO_PRODUCAO)
+    caixa.recuperar()
+    caixa.enfileirar(mensagem, {'boletos': [...]})
+    Despachante(caixa, criar_transporte, workers=4, por_segundo=5).drenar(ao_enviar=...)
+
+Autor: Sistema de Boletos v7.1
+Data: 2026-10-17
+================================================================================
+"""
+
+import os
+import json
+import time
+import sqlite3
+import smtplib
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from transporte_email import ErroTransporte, MensagemEmail
+from registro_envios import MODO_PREVIEW, MODO_PRODUCAO
+
+# ==================== CONFIGURAÇÕES ====================
+ESTADO_PENDENTE = "pendente"
+ESTADO_ENVIANDO = "enviando"
+ESTADO_ENVIADA = "enviada"
+ESTADO_CONCLUIDA = "concluida"
+ESTADO_FALHOU = "falhou"
+
+# Espera máxima (s) pelo lock do SQLite
+TIMEOUT_SQLITE = 30
+
+# Erros que não adianta tentar de novo (anexo sumiu, mensagem inválida,
+# servidor recusou todos os destinatários). ErroTransporte não está aqui:
+# ele para o Despachante inteiro, sem marcar a mensagem como falha
+ERROS_PERMANENTES = (FileNotFoundError, ValueError, smtplib.SMTPRecipientsRefused)
+
+
+@dataclass(slots=True)
+class ItemCaixa:
+    """Uma mensagem da caixa de saída."""
+
+    id: int
+    mensagem: MensagemEmail
+    contexto: dict = field(default_factory=dict)  # dados do pós-envio (boletos a mover...)
+    tentativas: int = 0
+    estado: str = ESTADO_PENDENTE
+    erro: Optional[str] = None
+
+
+# ==================== DIÁRIO ====================
+
+class CaixaSaida:
+    """
+    Diário SQLite das mensagens a enviar.
+
+    Seguro entre threads (uma conexão por thread) e entre processos (as
+    escritas usam transação IMMEDIATE).
+
+    Args:
+        caminho_db: Arquivo SQLite (a pasta é criada se preciso)
+        modo: MODO_PRODUCAO ou MODO_PREVIEW - grava e só enxerga as
+              mensagens deste modo
+    """
+
+    def __init__(self, caminho_db: str, modo: str = MODO_PRODUCAO):
+        if modo not in (MODO_PRODUCAO, MODO_PREVIEW):
+            raise ValueError(f"Modo da caixa de saída inválido: {modo}")
+        self.caminho_db = caminho_db
+        self.modo = modo
+        self._local = threading.local()
+        self._conexoes = []
+        self._trava = threading.Lock()
+
+        pasta = os.path.dirname(caminho_db)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._criar_tabela()
+
+    # -------------------- banco --------------------
+    def _conexao(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None: transações explícitas (BEGIN IMMEDIATE)
+            conn = sqlite3.connect(self.caminho_db, timeout=TIMEOUT_SQLITE,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = FULL")  # cada mudança de estado chega ao disco
+            self._local.conn = conn
+            with self._trava:
+                self._conexoes.append(conn)
+        return conn
+
+    def _criar_tabela(self) -> None:
+        conn = self._conexao()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS mensagens ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " execucao TEXT NOT NULL,"
+            f" modo TEXT NOT NULL DEFAULT '{MODO_PRODUCAO}',"
+            " estado TEXT NOT NULL,"
+            " mensagem TEXT NOT NULL,"
+            " contexto TEXT NOT NULL,"
+            " tentativas INTEGER NOT NULL DEFAULT 0,"
+            " proxima_tentativa REAL NOT NULL DEFAULT 0,"
+            " erro TEXT,"
+            " criada_em REAL NOT NULL,"
+            " enviada_em REAL)"
+        )
+        # Caixas anteriores ao modo: tudo o que estava lá era da produção
+        colunas = {linha[1] for linha in conn.execute("PRAGMA table_info(mensagens)")}
+        if 'modo' not in colunas:
+            conn.execute(f"ALTER TABLE mensagens ADD COLUMN modo TEXT NOT NULL DEFAULT '{MODO_PRODUCAO}'")
+        conn.execute("CREATE INDEX IF NOT EXISTS mensagens_modo_estado "
+                     "ON mensagens (modo, estado, proxima_tentativa)")
+
+    def _atualizar(self, sql: str, parametros: tuple) -> int:
+        return self._conexao().execute(sql, parametros).rowcount
+
+    @staticmethod
+    def _item(linha) -> ItemCaixa:
+        id_, mensagem, contexto, tentativas, estado, erro = linha
+        return ItemCaixa(id_, MensagemEmail(**json.loads(mensagem)), json.loads(contexto),
+                         tentativas, estado, erro)
+
+    def _listar(self, onde: str, parametros: tuple = ()) -> List[ItemCaixa]:
+        return [self._item(linha) for linha in self._conexao().execute(
+            "SELECT id, mensagem, contexto, tentativas, estado, erro FROM mensagens "
+            f"WHERE modo = ? AND {onde} ORDER BY id", (self.modo, *parametros))]
+
+    # -------------------- entrada --------------------
+    def enfileirar(self, mensagem: MensagemEmail, contexto: Optional[dict] = None,
+                   execucao: str = "") -> int:
+        """
+        Grava a mensagem renderizada como pendente.
+
+        Returns:
+            id da mensagem na caixa
+        """
+        cursor = self._conexao().execute(
+            "INSERT INTO mensagens (execucao, modo, estado, mensagem, contexto, criada_em) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (execucao, self.modo, ESTADO_PENDENTE, json.dumps(asdict(mensagem), ensure_ascii=False),
+             json.dumps(contexto or {}, ensure_ascii=False), time.time())
+        )
+        return cursor.lastrowid
+
+    def recuperar(self) -> Dict[str, int]:
+        """
+        Prepara a caixa depois de uma execução interrompida.
+
+        Returns:
+            {'interrompidas': "enviando" que voltaram a pendente,
+             'pendentes': total pendente (interrompidas incluídas),
+             'sem_conclusao': "enviada" aguardando o pós-envio}
+        """
+        interrompidas = self._atualizar(
+            "UPDATE mensagens SET estado = ? WHERE modo = ? AND estado = ?",
+            (ESTADO_PENDENTE, self.modo, ESTADO_ENVIANDO))
+        contagem = self.contar()
+        return {'interrompidas': interrompidas, 'pendentes': contagem.get(ESTADO_PENDENTE, 0),
+                'sem_conclusao': contagem.get(ESTADO_ENVIADA, 0)}
+
+    # -------------------- envio --------------------
+    def pegar_proxima(self, agora: Optional[float] = None) -> Optional[ItemCaixa]:
+        """Reserva (pendente -> enviando) a mensagem mais antiga já liberada para envio."""
+        agora = time.time() if agora is None else agora
+        return self._reservar("estado = ? AND proxima_tentativa <= ? ORDER BY id LIMIT 1",
+                              (ESTADO_PENDENTE, agora))
+
+    def pegar(self, item_id: int) -> Optional[ItemCaixa]:
+        """Reserva (pendente -> enviando) uma mensagem específica; None se ela não estiver pendente."""
+        return self._reservar("id = ? AND estado = ?", (item_id, ESTADO_PENDENTE))
+
+    def _reservar(self, onde: str, parametros: tuple) -> Optional[ItemCaixa]:
+        conn = self._conexao()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            linha = conn.execute(
+                "SELECT id, mensagem, contexto, tentativas, estado, erro FROM mensagens "
+                f"WHERE modo = ? AND {onde}", (self.modo, *parametros)
+            ).fetchone()
+            if linha is not None:
+                conn.execute("UPDATE mensagens SET estado = ? WHERE id = ?", (ESTADO_ENVIANDO, linha[0]))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if linha is None:
+            return None
+        item = self._item(linha)
+        item.estado = ESTADO_ENVIANDO
+        return item
+
+    def proxima_espera(self, agora: Optional[float] = None) -> Optional[float]:
+        """Segundos até a próxima pendente ficar liberada (None = nenhuma pendente)."""
+        agora = time.time() if agora is None else agora
+        proxima = self._conexao().execute(
+            "SELECT MIN(proxima_tentativa) FROM mensagens WHERE modo = ? AND estado = ?",
+            (self.modo, ESTADO_PENDENTE)
+        ).fetchone()[0]
+        return None if proxima is None else max(0.0, proxima - agora)
+
+    def marcar_enviada(self, item_id: int) -> None:
+        self._atualizar(
+            "UPDATE mensagens SET estado = ?, enviada_em = ?, erro = NULL WHERE id = ?",
+            (ESTADO_ENVIADA, time.time(), item_id))
+
+    def marcar_concluida(self, item_id: int) -> None:
+        self._atualizar("UPDATE mensagens SET estado = ? WHERE id = ? AND estado = ?",
+                        (ESTADO_CONCLUIDA, item_id, ESTADO_ENVIADA))
+
+    def reagendar(self, item_id: int, erro: str, espera: float) -> None:
+        """Volta para pendente, com mais uma tentativa contada, liberada daqui a `espera` s."""
+        self._atualizar(
+            "UPDATE mensagens SET estado = ?, tentativas = tentativas + 1, proxima_tentativa = ?, erro = ? "
+            "WHERE id = ?", (ESTADO_PENDENTE, time.time() + espera, erro, item_id))
+
+    def devolver(self, item_id: int) -> None:
+        """Volta para pendente sem contar tentativa (o envio nem começou: transporte indisponível)."""
+        self._atualizar("UPDATE mensagens SET estado = ? WHERE id = ? AND estado = ?",
+                        (ESTADO_PENDENTE, item_id, ESTADO_ENVIANDO))
+
+    def marcar_falha(self, item_id: int, erro: str) -> None:
+        self._atualizar(
+            "UPDATE mensagens SET estado = ?, tentativas = tentativas + 1, erro = ? WHERE id = ?",
+            (ESTADO_FALHOU, erro, item_id))
+
+    # -------------------- consultas --------------------
+    def enviadas_sem_conclusao(self) -> List[ItemCaixa]:
+        """Enviadas cujo pós-envio (mover boletos) não terminou."""
+        return self._listar("estado = ?", (ESTADO_ENVIADA,))
+
+    def arquivos_em_aberto(self) -> set:
+        """Nomes dos boletos de mensagens pendentes/enviando/enviadas (não reprocessar)."""
+        nomes = set()
+        for item in self._listar("estado NOT IN (?, ?)", (ESTADO_CONCLUIDA, ESTADO_FALHOU)):
+            nomes.update(os.path.basename(b) for b in item.contexto.get('boletos', ()))
+        return nomes
+
+    def contar(self) -> Dict[str, int]:
+        """{estado: quantidade} das mensagens deste modo"""
+        return dict(self._conexao().execute(
+            "SELECT estado, COUNT(*) FROM mensagens WHERE modo = ? GROUP BY estado", (self.modo,)))
+
+    def fechar(self) -> None:
+        with self._trava:
+            for conn in self._conexoes:
+                conn.close()
+            self._conexoes.clear()
+        self._local = threading.local()
+
+    def __repr__(self):
+        return f"<CaixaSaida {os.path.basename(self.caminho_db)} {self.modo} {self.contar()}>"
+
+
+# ==================== DESPACHANTE ====================
+
+class LimiteTaxa:
+    """
+    No máximo `por_segundo` liberações por segundo, somando todas as threads.
+
+    Args:
+        por_segundo: Taxa máxima (0 = sem limite)
+    """
+
+    def __init__(self, por_segundo: float):
+        self.intervalo = 1.0 / por_segundo if por_segundo > 0 else 0.0
+        self._proxima = 0.0
+        self._trava = threading.Lock()
+
+    def aguardar(self) -> None:
+        if not self.intervalo:
+            return
+        with self._trava:
+            agora = time.monotonic()
+            horario = max(agora, self._proxima)
+            self._proxima = horario + self.intervalo
+        if horario > agora:
+            time.sleep(horario - agora)
+
+
+class Despachante:
+    """
+    Esvazia a caixa de saída.
+
+    Args:
+        caixa: CaixaSaida
+        criar_transporte: Fábrica de TransporteEmail (um por worker)
+        workers: Envios simultâneos (1 se o transporte não aceitar conexões
+                 simultâneas, ex: Outlook)
+        por_segundo: Limite de mensagens por segundo (0 = sem limite)
+        max_tentativas: Tentativas por mensagem antes de "falhou"
+        espera_base: Espera da 1ª nova tentativa (dobra a cada tentativa)
+        espera_maxima: Teto da espera entre tentativas
+    """
+
+    def __init__(self, caixa: CaixaSaida, criar_transporte: Callable, workers: int = 1,
+                 por_segundo: float = 0, max_tentativas: int = 5, espera_base: float = 2.0,
+                 espera_maxima: float = 300.0):
+        self.caixa = caixa
+        self.criar_transporte = criar_transporte
+        self.workers = max(1, workers)
+        self.limite = LimiteTaxa(por_segundo)
+        self.max_tentativas = max_tentativas
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.resumo = {'enviadas': 0, 'reagendadas': 0, 'falhas': 0}
+        self.erro_fatal: Optional[ErroTransporte] = None  # transporte indisponível: parou
+        self._trava = threading.Lock()  # callbacks e resumo, um de cada vez
+        self._local = threading.local()
+        self._transportes = []
+
+    def espera_para(self, tentativas: int) -> float:
+        """Espera antes da tentativa seguinte: base, 2x base, 4x base... (com teto)"""
+        return min(self.espera_maxima, self.espera_base * 2 ** tentativas)
+
+    def workers_efetivos(self) -> int:
+        """Workers que o transporte aceita (cria o transporte desta thread)."""
+        transporte = self._transporte_da_thread()
+        return self.workers if getattr(transporte, 'conexoes_simultaneas', True) else 1
+
+    def drenar(self, ao_enviar: Optional[Callable] = None, ao_falhar: Optional[Callable] = None) -> dict:
+        """
+        Envia até não sobrar pendente (reagendadas incluídas).
+
+        Args:
+            ao_enviar: ao_enviar(item) depois de marcada "enviada" (pós-envio:
+                       mover boletos, auditoria). Sem exceção -> "concluida"
+            ao_falhar: ao_falhar(item, erro) quando a mensagem vai para "falhou"
+
+        Returns:
+            {'enviadas', 'reagendadas', 'falhas'}
+
+        Raises:
+            ErroTransporte: transporte indisponível (todos os workers param;
+                            o que não saiu continua pendente)
+        """
+        # O transporte desta thread é reaproveitado (mesma sessão do Outlook do enviar_item)
+        workers = self.workers_efetivos()
+        extras = [self.criar_transporte() for _ in range(workers - 1)]
+        with self._trava:
+            self._transportes.extend(extras)
+        transportes = [self._transporte_da_thread()] + extras
+
+        try:
+            if workers == 1:
+                # Sem threads: o Outlook (COM) fica na thread de quem chamou
+                self._trabalhar(transportes[0], ao_enviar, ao_falhar)
+            else:
+                threads = [threading.Thread(target=self._trabalhar, args=(t, ao_enviar, ao_falhar), daemon=True)
+                           for t in transportes]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+        finally:
+            # Cada transporte fecha uma vez só, aqui (fechar() depois não fecha de novo)
+            self.fechar()
+        if self.erro_fatal is not None:
+            raise self.erro_fatal
+        return dict(self.resumo)
+
+    def enviar_item(self, item_id: int) -> Optional[tuple]:
+        """
+        Uma tentativa de envio de uma mensagem específica, com o transporte
+        desta thread (pipeline do envio: cada grupo sai assim que fica pronto).
+
+        Erro temporário só reagenda; drenar() faz as novas tentativas.
+
+        Returns:
+            (estado, item, erro) para concluir(), com estado "enviada",
+            "pendente" (reagendada) ou "falhou"; None se não estava pendente
+
+        Raises:
+            ErroTransporte: transporte indisponível (a mensagem continua pendente)
+        """
+        if self.erro_fatal is not None:
+            raise self.erro_fatal
+        item = self.caixa.pegar(item_id)
+        if item is None:
+            return None
+        return self._enviar(self._transporte_da_thread(), item)
+
+    def concluir(self, resultado: Optional[tuple], ao_enviar: Optional[Callable] = None,
+                 ao_falhar: Optional[Callable] = None) -> None:
+        """Pós-envio de um resultado de enviar_item() (callbacks um de cada vez, como no drenar())."""
+        if resultado is None:
+            return
+        estado, item, erro = resultado
+        with self._trava:
+            if estado == ESTADO_ENVIADA:
+                try:
+                    if ao_enviar:
+                        ao_enviar(item)
+                    self.caixa.marcar_concluida(item.id)
+                except Exception as e:
+                    # Fica "enviada": o pós-envio é refeito na próxima execução
+                    print(f"   [CAIXA] Pós-envio da mensagem #{item.id} falhou: {e}")
+            elif estado == ESTADO_FALHOU and ao_falhar:
+                ao_falhar(item, erro)
+
+    def fechar(self) -> None:
+        """Fecha (uma vez) os transportes criados por enviar_item()/drenar()."""
+        with self._trava:
+            transportes, self._transportes = self._transportes, []
+            self._local = threading.local()
+        for transporte in transportes:
+            transporte.fechar()
+
+    def _transporte_da_thread(self):
+        transporte = getattr(self._local, 'transporte', None)
+        if transporte is None:
+            transporte = self._local.transporte = self.criar_transporte()
+            with self._trava:
+                self._transportes.append(transporte)
+        return transporte
+
+    def _trabalhar(self, transporte, ao_enviar, ao_falhar) -> None:
+        try:
+            while self.erro_fatal is None:
+                item = self.caixa.pegar_proxima()
+                if item is None:
+                    espera = self.caixa.proxima_espera()
+                    if espera is None:
+                        return  # nada pendente (as que estão com outros workers não contam)
+                    time.sleep(min(espera, 1.0) or 0.01)
+                    continue
+                self.concluir(self._enviar(transporte, item), ao_enviar, ao_falhar)
+        except ErroTransporte:
+            return  # drenar() relança depois de parar os outros workers
+
+    def _enviar(self, transporte, item: ItemCaixa) -> tuple:
+        self.limite.aguardar()
+        try:
+            transporte.enviar(item.mensagem)
+        except ErroTransporte as e:
+            self.caixa.devolver(item.id)
+            with self._trava:
+                if self.erro_fatal is None:
+                    self.erro_fatal = e
+            raise
+        except Exception as e:
+            return self._tratar_erro(item, e), item, e
+
+        self.caixa.marcar_enviada(item.id)
+        item.estado = ESTADO_ENVIADA
+        with self._trava:
+            self.resumo['enviadas'] += 1
+        return ESTADO_ENVIADA, item, None
+
+    def _tratar_erro(self, item: ItemCaixa, erro: Exception) -> str:
+        descricao = f"{type(erro).__name__}: {erro}"
+        tentativas = item.tentativas + 1
+        if isinstance(erro, ERROS_PERMANENTES) or tentativas >= self.max_tentativas:
+            self.caixa.marcar_falha(item.id, descricao)
+            item.tentativas, item.estado, item.erro = tentativas, ESTADO_FALHOU, descricao
+            with self._trava:
+                self.resumo['falhas'] += 1
+            return ESTADO_FALHOU
+
+        espera = self.espera_para(item.tentativas)
+        self.caixa.reagendar(item.id, descricao, espera)
+        with self._trava:
+            self.resumo['reagendadas'] += 1
+        print(f"   [CAIXA] Mensagem #{item.id}: {descricao} - nova tentativa "
+              f"({tentativas + 1}/{self.max_tentativas}) em {espera:.0f}s")
+        return ESTADO_PENDENTE
@@ -0,0 +1,376 @@
+"""
+================================================================================
+casamento_lote.py - Casamento em Lote Boletos x Duplicatas (1 para 1)
+================================================================================
+
+Cada boleto escolhia sua nota sozinho (a primeira que servia), então dois
+boletos podiam ficar com a MESMA duplicata. Aqui o lote inteiro é casado
+de uma vez:
+
+1. Arestas candidatas por boleto, tiradas do IndiceNFe (sem varrer o mapa):
+   - número da nota impresso no boleto ............ 200
+   - CPF/CNPJ + vencimento (dia/mês) da duplicata . 100
+   - CPF/CNPJ + nota de parcela única .............  60
+   - + valor do boleto igual ao da duplicata ......  40
+   - + nome do pagador >= 85% / >= 70% ............  30 / 15
+2. Atribuição 1 para 1 (cada duplicata vai para no máximo um boleto) que
+   maximiza a soma dos scores - método húngaro, resolvido só nos grupos
+   de boletos que disputam as mesmas duplicatas
+3. Empates vão para a nota que vem antes no mapa e para o boleto que vem
+   antes no lote: o resultado não depende da ordem dos processos
+
+Uso:
+    pedidos = [PedidoBoleto("a.pdf", cnpj="12345678000190", vencimento="10-11")]
+    resultado = casar_lote(pedidos, mapa_xmls)
+    resultado.atribuicoes["a.pdf"].numero_nota
+    resultado.conflitos, resultado.sem_match
+
+Autor: Sistema de Boletos v7.1
+Data: 2026-10-17
+================================================================================
+"""
+
+from dataclasses import dataclass, field
+
+from indice_nfe import obter_indice_nfe
+from similaridade_nomes import LIMIAR_NOME_MATCH, LIMIAR_NOME_SIMILAR
+
+# ==================== SCORES ====================
+SCORE_NUMERO_NOTA = 200
+SCORE_VENCIMENTO = 100
+SCORE_PARCELA_UNICA = 60
+SCORE_VALOR = 40
+SCORE_NOME_MATCH = 30
+SCORE_NOME_SIMILAR = 15
+
+# Grupos maiores que isso (ex: o mesmo PDF copiado centenas de vezes) são
+# resolvidos pelo guloso por score, em vez do método húngaro (O(n³))
+LIMITE_HUNGARO = 300
+
+
+@dataclass(slots=True)
+class PedidoBoleto:
+    """Dados do boleto usados no casamento (extraídos do PDF)."""
+    chave: str                      # Identificador no lote (ex: nome do arquivo)
+    cnpj: str = ''                  # CPF/CNPJ do pagador (só dígitos)
+    vencimento: str = ''            # 'DD-MM'
+    valor_cents: int = 0            # 0 = desconhecido
+    nome: str = ''
+    numero_nota: str = ''           # Número impresso no boleto ('' se não tem)
+
+
+@dataclass(slots=True)
+class Aresta:
+    """Boleto -> (nota, duplicata) possível, com o score e os motivos."""
+    pedido: int                     # Posição do pedido no lote
+    vaga: tuple                     # (id da nota, índice da duplicata | None)
+    numero_nota: str                # Chave do mapa devolvida ao boleto
+    posicao: int                    # Posição da nota no mapa (desempate)
+    dados: object                   # Dados do XML da nota
+    duplicata: object               # Duplicata casada (None = nota sem duplicatas)
+    score: int
+    razoes: list = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Conflito:
+    """Vaga que era a melhor opção de mais de um boleto."""
+    numero_nota: str
+    duplicata: object
+    pedidos: list                   # Chaves dos boletos que disputaram
+    vencedor: str | None            # Chave do boleto que ficou com a vaga
+
+
+@dataclass(slots=True)
+class ResultadoLote:
+    atribuicoes: dict = field(default_factory=dict)   # chave -> Aresta
+    conflitos: list = field(default_factory=list)     # [Conflito]
+    sem_match: list = field(default_factory=list)     # [(chave, motivo)]
+
+
+# ==================== ARESTAS ====================
+
+def _dia_mes(duplicata) -> tuple | None:
+    """('DD', 'MM') do vencimento 'YYYY-MM-DD' da duplicata"""
+    partes = (duplicata.get('vencimento') or '').split('-')
+    return (partes[2], partes[1]) if len(partes) == 3 else None
+
+
+def _centavos(valor) -> int:
+    return int(valor * 100) if valor else 0
+
+
+def _duplicata_do_vencimento(duplicatas: list, dia_mes: tuple | None) -> int | None:
+    """Índice da duplicata que o extrator usaria: a do vencimento, senão a primeira"""
+    if not duplicatas:
+        return None
+    for i, dup in enumerate(duplicatas):
+        if _dia_mes(dup) == dia_mes:
+            return i
+    return 0
+
+
+def gerar_arestas(indice_pedido: int, pedido: PedidoBoleto, indice, posicoes: dict) -> list:
+    """
+    Arestas candidatas de um boleto (uma por vaga, a de maior score).
+
+    Args:
+        indice_pedido: Posição do pedido no lote
+        pedido: Dados do boleto
+        indice: IndiceNFe do mapa de XMLs
+        posicoes: {chave do mapa: posição} (montado uma vez por lote)
+
+    Returns:
+        [Aresta] na ordem em que foram encontradas
+    """
+    partes = pedido.vencimento.split('-') if pedido.vencimento else []
+    dia_mes = tuple(partes) if len(partes) == 2 else None
+    consulta_nome = indice.motor_nomes().normalizar(pedido.nome) if pedido.nome else None
+    arestas = {}
+
+    def adicionar(numero_nota, posicao, dados, i_dup, score, razoes):
+        duplicatas = dados.get('duplicatas', [])
+        dup = duplicatas[i_dup] if i_dup is not None else None
+        valor = dup['valor'] if dup is not None else dados.get('valor_total')
+        if pedido.valor_cents > 0 and _centavos(valor) == pedido.valor_cents:
+            score += SCORE_VALOR
+            razoes.append("VALOR")
+        if consulta_nome is not None:
+            similaridade = indice.similaridade_nome(posicao, consulta_nome, LIMIAR_NOME_SIMILAR)
+            if similaridade >= LIMIAR_NOME_MATCH:
+                score += SCORE_NOME_MATCH
+                razoes.append(f"NOME_MATCH_{similaridade:.0%}")
+            elif similaridade > 0:
+                score += SCORE_NOME_SIMILAR
+                razoes.append(f"NOME_SIMILAR_{similaridade:.0%}")
+
+        vaga = (id(dados), i_dup)
+        atual = arestas.get(vaga)
+        if atual is None or score > atual.score:
+            arestas[vaga] = Aresta(indice_pedido, vaga, numero_nota, posicao, dados, dup, score, razoes)
+
+    # 1. Número da nota impresso no boleto
+    if pedido.numero_nota and pedido.numero_nota in posicoes:
+        posicao = posicoes[pedido.numero_nota]
+        dados = indice.entradas[posicao][1]
+        i_dup = _duplicata_do_vencimento(dados.get('duplicatas', []), dia_mes)
+        adicionar(pedido.numero_nota, posicao, dados, i_dup, SCORE_NUMERO_NOTA, ["NUMERO_NOTA"])
+
+    # 2. Notas do mesmo CPF/CNPJ (cada nota uma vez, pela 1ª chave no mapa)
+    vistas = set()
+    for posicao in indice.por_cnpj.get(pedido.cnpj, ()) if pedido.cnpj else ():
+        numero_nota, dados = indice.entradas[posicao]
+        if id(dados) in vistas:
+            continue
+        vistas.add(id(dados))
+
+        duplicatas = dados.get('duplicatas', [])
+        casou_vencimento = False
+        for i_dup, dup in enumerate(duplicatas):
+            if dia_mes is not None and _dia_mes(dup) == dia_mes:
+                casou_vencimento = True
+                adicionar(numero_nota, posicao, dados, i_dup, SCORE_VENCIMENTO,
+                          [f"VENCIMENTO_{dup['vencimento']}"])
+        if not casou_vencimento and len(duplicatas) <= 1:
+            adicionar(numero_nota, posicao, dados, 0 if duplicatas else None,
+                      SCORE_PARCELA_UNICA, ["PARCELA_UNICA"])
+
+    return list(arestas.values())
+
+
+# ==================== ATRIBUIÇÃO ====================
+
+def hungaro(custos: list) -> list:
+    """
+    Atribuição de custo mínimo (método húngaro com potenciais, O(n²·m)).
+
+    Args:
+        custos: Matriz n x m (n <= m) de custos inteiros
+
+    Returns:
+        [coluna atribuída a cada linha]
+    """
+    n = len(custos)
+    m = len(custos[0]) if n else 0
+    infinito = float('inf')
+    u = [0] * (n + 1)
+    v = [0] * (m + 1)
+    dono = [0] * (m + 1)        # coluna -> linha (1-indexado, 0 = livre)
+    anterior = [0] * (m + 1)
+
+    for i in range(1, n + 1):
+        dono[0] = i
+        j0 = 0
+        minimo = [infinito] * (m + 1)
+        usada = [False] * (m + 1)
+        while True:
+            usada[j0] = True
+            i0 = dono[j0]
+            linha = custos[i0 - 1]
+            delta = infinito
+            j1 = 0
+            for j in range(1, m + 1):
+                if not usada[j]:
+                    atual = linha[j - 1] - u[i0] - v[j]
+                    if atual < minimo[j]:
+                        minimo[j] = atual
+                        anterior[j] = j0
+                    if minimo[j] < delta:
+                        delta = minimo[j]
+                        j1 = j
+            for j in range(m + 1):
+                if usada[j]:
+                    u[dono[j]] += delta
+                    v[j] -= delta
+                else:
+                    minimo[j] -= delta
+            j0 = j1
+            if dono[j0] == 0:
+                break
+        while j0:
+            j1 = anterior[j0]
+            dono[j0] = dono[j1]
+            j0 = j1
+
+    colunas = [-1] * n
+    for j in range(1, m + 1):
+        if dono[j]:
+            colunas[dono[j] - 1] = j - 1
+    return colunas
+
+
+def _resolver_grupo(arestas: list, peso) -> dict:
+    """
+    Atribuição 1 para 1 de um grupo de boletos que disputam vagas.
+
+    Returns:
+        {pedido: Aresta}
+    """
+    pedidos = sorted({aresta.pedido for aresta in arestas})
+    # Vagas na ordem do mapa (a vaga carrega id() da nota: não serve para ordenar)
+    primeira = {}
+    for aresta in arestas:
+        primeira[aresta.vaga] = min(primeira.get(aresta.vaga, aresta.posicao), aresta.posicao)
+    vagas = sorted(primeira, key=lambda vaga: (primeira[vaga], -1 if vaga[1] is None else vaga[1]))
+
+    if len(pedidos) > LIMITE_HUNGARO:
+        # Guloso por peso: vaga vai para o boleto de maior score
+        escolhidas = {}
+        ocupadas = set()
+        for aresta in sorted(arestas, key=peso, reverse=True):
+            if aresta.pedido not in escolhidas and aresta.vaga not in ocupadas:
+                escolhidas[aresta.pedido] = aresta
+                ocupadas.add(aresta.vaga)
+        return escolhidas
+
+    linha_de = {pedido: i for i, pedido in enumerate(pedidos)}
+    coluna_de = {vaga: j for j, vaga in enumerate(vagas)}
+    maior = max(peso(aresta) for aresta in arestas) + 1
+
+    # Colunas extras = "sem vaga" para cada boleto (custo de não atribuir)
+    custos = [[maior] * (len(vagas) + len(pedidos)) for _ in pedidos]
+    por_celula = {}
+    for aresta in arestas:
+        i, j = linha_de[aresta.pedido], coluna_de[aresta.vaga]
+        custos[i][j] = maior - peso(aresta)
+        por_celula[(i, j)] = aresta
+
+    escolhidas = {}
+    for i, j in enumerate(hungaro(custos)):
+        aresta = por_celula.get((i, j))
+        if aresta is not None:
+            escolhidas[aresta.pedido] = aresta
+    return escolhidas
+
+
+def casar_lote(pedidos: list, mapa_xmls) -> ResultadoLote:
+    """
+    Casa todos os boletos do lote com as duplicatas dos XMLs (1 para 1).
+
+    Args:
+        pedidos: [PedidoBoleto] na ordem do lote (chaves únicas)
+        mapa_xmls: Mapa de indexar_xmls_por_nota (MapaNFe ou dict)
+
+    Returns:
+        ResultadoLote com atribuições, conflitos e boletos sem match
+    """
+    resultado = ResultadoLote()
+    if not pedidos:
+        return resultado
+
+    indice = obter_indice_nfe(mapa_xmls)
+    posicoes = {}
+    for posicao, (numero_nota, _) in enumerate(indice.entradas):
+        posicoes.setdefault(numero_nota, posicao)
+
+    # Peso inteiro: score primeiro; empate -> nota antes no mapa -> boleto antes no lote
+    fator_pedido = len(pedidos) + 1
+    fator_posicao = (len(indice.entradas) + 1) * fator_pedido
+
+    def peso(aresta):
+        return (aresta.score * fator_posicao
+                - aresta.posicao * fator_pedido
+                - aresta.pedido)
+
+    arestas_por_pedido = [gerar_arestas(i, pedido, indice, posicoes) for i, pedido in enumerate(pedidos)]
+
+    # Melhor vaga de cada boleto; quem não disputa vaga com ninguém já está resolvido
+    melhor = {}
+    disputas = {}
+    for i, arestas in enumerate(arestas_por_pedido):
+        if arestas:
+            melhor[i] = max(arestas, key=peso)
+            disputas.setdefault(melhor[i].vaga, []).append(i)
+
+    # Grupos (componentes conexos) de boletos ligados por vagas em comum
+    grupo = list(range(len(pedidos)))
+
+    def raiz(i):
+        while grupo[i] != i:
+            grupo[i] = grupo[grupo[i]]
+            i = grupo[i]
+        return i
+
+    dono_da_vaga = {}
+    for i, arestas in enumerate(arestas_por_pedido):
+        for aresta in arestas:
+            outro = dono_da_vaga.setdefault(aresta.vaga, i)
+            grupo[raiz(i)] = raiz(outro)
+
+    membros = {}
+    for i in range(len(pedidos)):
+        membros.setdefault(raiz(i), []).append(i)
+
+    escolhidas = {}
+    for integrantes in membros.values():
+        arestas = [aresta for i in integrantes for aresta in arestas_por_pedido[i]]
+        if not arestas:
+            continue
+        vagas_melhores = [melhor[i].vaga for i in integrantes if i in melhor]
+        if len(vagas_melhores) == len(set(vagas_melhores)):
+            # Sem disputa: cada boleto fica com a sua melhor vaga (já é o ótimo)
+            escolhidas.update({i: melhor[i] for i in integrantes if i in melhor})
+        else:
+            escolhidas.update(_resolver_grupo(arestas, peso))
+
+    # Resultado na ordem do lote
+    for i, pedido in enumerate(pedidos):
+        if i in escolhidas:
+            resultado.atribuicoes[pedido.chave] = escolhidas[i]
+        elif arestas_por_pedido[i]:
+            resultado.sem_match.append((pedido.chave, "duplicatas ficaram com outros boletos"))
+        else:
+            resultado.sem_match.append((pedido.chave, "nenhuma nota candidata (número/CNPJ/vencimento)"))
+
+    vencedor_da_vaga = {aresta.vaga: pedidos[i].chave for i, aresta in escolhidas.items()}
+    for vaga, disputantes in disputas.items():
+        if len(disputantes) > 1:
+            aresta = melhor[disputantes[0]]
+            resultado.conflitos.append(Conflito(
+                numero_nota=aresta.numero_nota,
+                duplicata=aresta.duplicata,
+                pedidos=[pedidos[i].chave for i in disputantes],
+                vencedor=vencedor_da_vaga.get(vaga),
+            ))
+
+    return resultado
@@ -47,6 +47,9 @@ PASTA_AUDITORIA = os.path.join(BASE_DIR, "Auditoria")
 PASTA_LOGS = PASTA_AUDITORIA  # Alias para compatibilidade
 PASTA_ERROS = os.path.join(BASE_DIR, "Erros")
 
+# Cache interno (texto de PDFs já lidos, índices)
+PASTA_CACHE = os.path.join(BASE_DIR, "Cache")
+
 # ==================== ARQUIVOS ====================
 # Assinatura de email (fica junto com o .exe)
 ASSINATURA_IMG = os.path.join(BASE_DIR, "assinatura.jpg")
@@ -69,6 +72,33 @@ PASTA_OUTROS = BASE_DIR
 EMAIL_CC_FIXO = "joaolucasfurtadofiel17@gmail.com"
 EMAIL_CONTA_COBRANCA = "cobranca@jotajota.net.br"
 
+# Transporte do envio (ver transporte_email.py): "outlook" (Windows, conta de
+# cobrança no Outlook), "smtp" (qualquer sistema, uma conexão por execução) ou
+# "arquivo" (envio a seco: grava .eml em PASTA_EML, nada é movido nem registrado)
+TRANSPORTE_EMAIL = "outlook"
+SMTP_HOST = "smtp.jotajota.net.br"
+SMTP_PORTA = 587
+SMTP_SEGURANCA = "starttls"  # "starttls", "ssl" ou "nenhuma"
+SMTP_USUARIO = EMAIL_CONTA_COBRANCA  # "" = servidor sem autenticação
+SMTP_SENHA = ""  # Preferir a variável de ambiente SMTP_SENHA (não versionar senha)
+SMTP_TIMEOUT_SEGUNDOS = 30
+SMTP_MENSAGENS_POR_CONEXAO = 0  # Renova a conexão a cada N mensagens (0 = nunca)
+PASTA_EML = os.path.join(PASTA_AUDITORIA, "EML")  # Transporte "arquivo": uma subpasta por execução
+
+# Caixa de saída do envio (ver caixa_saida.py): cada e-mail é gravado em disco
+# antes de sair; uma execução interrompida continua de onde parou
+ARQUIVO_CAIXA_SAIDA = os.path.join(PASTA_AUDITORIA, "caixa_saida.sqlite")
+ENVIO_WORKERS = 4  # Envios simultâneos (Outlook: sempre 1)
+ENVIO_LIMITE_POR_SEGUNDO = {"outlook": 1.0, "smtp": 5.0, "arquivo": 0}  # Mensagens/s por transporte (0 = sem limite)
+ENVIO_MAX_TENTATIVAS = 5  # Tentativas por mensagem antes de desistir
+ENVIO_ESPERA_BASE_SEGUNDOS = 2.0  # Espera entre tentativas: 2s, 4s, 8s, 16s...
+
+# Registro de envios (ver registro_envios.py): boletos já enviados (mesmo PDF)
+# são ignorados antes de qualquer leitura do PDF
+USAR_REGISTRO_ENVIOS = True
+ARQUIVO_REGISTRO_ENVIOS = os.path.join(PASTA_AUDITORIA, "registro_envios.sqlite")
+REGISTRO_PARCELA_REPETIDA = "pular"  # Outro PDF p/ nota+parcela já enviada: "pular" ou "avisar"
+
 # ==================== CONFIGURAÇÃO DE FIDCs ====================
 FIDC_CONFIG = {
     "CAPITAL": {
@@ -121,6 +151,45 @@ VALIDACAO_CNPJ_OBRIGATORIA = True  # Exige CNPJ para validação cruzada
 TOLERANCIA_VALOR_CENTAVOS = 0  # Tolerância ZERO - valor deve ser EXATO
 MAX_EMAILS_POR_CLIENTE = 2  # Máximo de emails válidos por cliente
 
+# Cache de texto de PDFs (renomeação e envio compartilham o mesmo cache)
+USAR_CACHE_TEXTO_PDF = True  # False = sempre lê o PDF com pdfplumber
+CACHE_TEXTO_PDF_MAX_MB = 200  # Limite em disco; entradas menos usadas são removidas
+
+# Índice persistente dos XMLs de NFe (só XMLs novos/alterados são relidos)
+USAR_CACHE_NFE = True  # False = sempre faz o parsing de todos os XMLs
+
+# Motor de extração de texto dos PDFs: "pdfplumber" (original) ou "pdfium"
+# (pypdfium2, bem mais rápido). Se o texto do pdfium não passar na conferência
+# do extrator, o boleto é relido com pdfplumber automaticamente.
+# Antes de trocar um FIDC para "pdfium", rodar benchmarks/paridade_motores_pdf.py
+# com boletos reais desse FIDC.
+MOTOR_PDF_PADRAO = "pdfplumber"  # Motor da primeira leitura (FIDC ainda desconhecido)
+MOTOR_PDF_POR_FIDC = {
+    "CAPITAL": "pdfplumber",
+    "NOVAX": "pdfplumber",
+    "CREDVALE": "pdfplumber",
+    "SQUID": "pdfplumber",
+}
+
+# Paralelismo da renomeação (leitura do PDF + extratores em processos separados)
+WORKERS_RENOMEACAO = 1  # 1 = sequencial; 0 = todos os núcleos; N = N processos
+WORKERS_INDEXACAO_XML = 1  # Parsing dos XMLs de NFe (mesma convenção; só vale com 100+ XMLs a ler)
+WORKERS_ENVIO_EXTRACAO = 1  # Leitura dos boletos no envio (mesma convenção; o envio começa antes do último PDF)
+
+# Leitura parcial de boletos: para de ler páginas quando pagador, CNPJ,
+# vencimento, valor e número da nota já foram encontrados
+LEITURA_PARCIAL_PDF = True  # False = sempre lê o PDF inteiro
+
+# Casamento em lote: depois de ler todos os boletos, distribui as duplicatas
+# 1 para 1 (dois boletos não ficam com a mesma duplicata) - ver casamento_lote.py
+CASAMENTO_EM_LOTE = False  # False = cada boleto fica com a nota que o extrator escolheu
+
+# Modo vigia (RenomeaçãoBoletos.py --vigiar): processo fica no ar, mantém o
+# índice de NFe em memória e renomeia cada PDF que chega em Entrada - ver vigia_pastas.py
+VIGIA_BACKEND = "auto"  # "auto" (inotify no Linux, senão polling), "inotify" ou "polling"
+VIGIA_INTERVALO_SEGUNDOS = 1.0  # Espera máxima por eventos em cada ciclo (período do polling)
+VIGIA_ESPERA_SEGUNDOS = 2.0  # Arquivo sem mudar por esse tempo = cópia concluída (debounce)
+
 # Configurações de IA (para extração de dados)
 IA_TIMEOUT = 10  # Timeout em segundos para chamadas IA
 IA_MODEL = "deepseek-r1:1.5b"  # Modelo Ollama
@@ -139,6 +208,7 @@ def criar_pastas_necessarias():
         PASTA_NOTAS,
         PASTA_AUDITORIA,
         PASTA_ERROS,
+        PASTA_CACHE,
     ]
 
     for pasta in pastas:
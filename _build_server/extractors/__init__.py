@@ -7,6 +7,10 @@
 #
 # Arquitetura:
 # - base.py: Interface comum (BaseExtractor)
+# - documento.py: Texto do boleto lido uma vez (ParsedBoleto)
+# - padroes.py: Padrões regex compilados na importação (com contadores)
+# - detector_fidc.py: Detecção do FIDC pelas palavras-chave do FIDC_CONFIG
+# - codigo_barras.py: Linha digitável (DVs, valor e fator de vencimento)
 # - squid.py: Extrator SQUID isolado
 # - capital.py: Extrator CAPITAL isolado
 # - novax.py: Extrator NOVAX isolado
@@ -28,6 +32,7 @@
 # ===============================================
 
 from .base import BaseExtractor
+from .documento import ParsedBoleto
 from .factory import ExtractorFactory, get_extractor_for_fidc
 
 # Exportar extratores individuais (opcional, para testes)
@@ -44,6 +49,7 @@ __all__ = [
 
     # Base (para type hints e herança)
     'BaseExtractor',
+    'ParsedBoleto',
 
     # Extratores individuais (para testes)
     'SQUIDExtractor',
@@ -8,7 +8,14 @@
 # ===============================================
 
 from abc import ABC, abstractmethod
-from typing import Tuple
+from typing import Callable, Tuple
+
+# O módulo, não a função: normalizacao_nomes importa extractors.padroes
+# (e com isso este pacote) antes de definir limpar_nome_pagador
+import normalizacao_nomes
+
+from .codigo_barras import ORIGEM_CODIGO_BARRAS, ORIGEM_NENHUMA, ORIGEM_REGEX, formatar_valor_cents
+from .documento import ParsedBoleto, TextoBoleto
 
 class BaseExtractor(ABC):
     """
@@ -21,8 +28,23 @@ class BaseExtractor(ABC):
     - Isolamento: Editar um extrator NÃO afeta os outros
     - Consistência: Todos os extratores têm a mesma interface
     - Testabilidade: Cada extrator pode ser testado independentemente
+
+    Todos os métodos aceitam o texto (str) ou um ParsedBoleto; com
+    ParsedBoleto o texto, as linhas e as maiúsculas são calculados uma
+    única vez para o boleto inteiro. Os métodos de campo procuram seus
+    rótulos (PAGADOR, VENCIMENTO...) em doc.ancoras, montado numa única
+    varredura das linhas e compartilhado entre eles.
+
+    Valor e vencimento saem primeiro da linha digitável (doc.linha_digitavel,
+    dígitos verificadores conferidos); os regex de cada FIDC são o fallback
+    (_valor_ou_fallback / _vencimento_ou_fallback). A origem de cada um
+    fica em doc.origens (contada uma vez por boleto por quem chama).
     """
 
+    # Campos que precisam aparecer no texto para a leitura parcial do PDF
+    # parar antes da última página (ver ParsedBoleto.de_arquivo(parcial=True))
+    CAMPOS_OBRIGATORIOS = ('pagador', 'cnpj', 'vencimento', 'valor', 'numero_nota')
+
     @property
     @abstractmethod
     def nome_fidc(self) -> str:
@@ -35,12 +57,12 @@ class BaseExtractor(ABC):
         pass
 
     @abstractmethod
-    def extrair_pagador(self, texto: str) -> str:
+    def extrair_pagador(self, texto: TextoBoleto) -> str:
         """
         Extrai o nome do pagador do texto do PDF
 
         Args:
-            texto: Texto completo extraído do PDF do boleto
+            texto: Texto do boleto (str ou ParsedBoleto)
 
         Returns:
             str: Nome do pagador ou "SEM_PAGADOR"
@@ -48,12 +70,12 @@ class BaseExtractor(ABC):
         pass
 
     @abstractmethod
-    def extrair_vencimento(self, texto: str) -> str:
+    def extrair_vencimento(self, texto: TextoBoleto) -> str:
         """
         Extrai a data de vencimento do texto do PDF
 
         Args:
-            texto: Texto completo extraído do PDF do boleto
+            texto: Texto do boleto (str ou ParsedBoleto)
 
         Returns:
             str: Vencimento no formato "DD-MM" ou "SEM_VENCIMENTO"
@@ -61,19 +83,19 @@ class BaseExtractor(ABC):
         pass
 
     @abstractmethod
-    def extrair_valor(self, texto: str) -> str:
+    def extrair_valor(self, texto: TextoBoleto) -> str:
         """
         Extrai o valor do boleto do texto do PDF
 
         Args:
-            texto: Texto completo extraído do PDF do boleto
+            texto: Texto do boleto (str ou ParsedBoleto)
 
         Returns:
             str: Valor no formato "R$ X.XXX,XX" ou "SEM_VALOR"
         """
         pass
 
-    def extrair_dados(self, texto: str) -> Tuple[str, str, str]:
+    def extrair_dados(self, texto: TextoBoleto) -> Tuple[str, str, str]:
         """
         Método público que extrai todos os dados do boleto
 
@@ -81,17 +103,91 @@ class BaseExtractor(ABC):
         extrair_vencimento, extrair_valor) na ordem correta.
 
         Args:
-            texto: Texto completo extraído do PDF do boleto
+            texto: Texto do boleto (str ou ParsedBoleto)
 
         Returns:
             Tuple[str, str, str]: (pagador, vencimento, valor)
         """
-        pagador = self.extrair_pagador(texto)
-        vencimento = self.extrair_vencimento(texto)
-        valor = self.extrair_valor(texto)
+        doc = self._documento(texto)
+        pagador = self.extrair_pagador(doc)
+        vencimento = self.extrair_vencimento(doc)
+        valor = self.extrair_valor(doc)
 
         return pagador, vencimento, valor
 
+    def campos_satisfeitos(self, texto: TextoBoleto) -> bool:
+        """
+        Verifica se todos os CAMPOS_OBRIGATORIOS já podem ser extraídos
+
+        Usado como condição de parada da leitura página a página: quando
+        retorna True, as páginas restantes do PDF não são lidas.
+
+        Args:
+            texto: Texto do boleto (str ou ParsedBoleto) lido até agora
+
+        Returns:
+            bool: True se nenhum campo obrigatório está faltando
+        """
+        doc = self._documento(texto)
+
+        # campo -> (método do extrator, valor que indica "não encontrado")
+        metodos = {
+            'pagador': ('extrair_pagador', "SEM_PAGADOR"),
+            'cnpj': ('extrair_cnpj_cpf_boleto', None),
+            'vencimento': ('extrair_vencimento', "SEM_VENCIMENTO"),
+            'valor': ('extrair_valor', "SEM_VALOR"),
+            'numero_nota': ('extrair_numero_nota', None),
+        }
+
+        for campo in self.CAMPOS_OBRIGATORIOS:
+            nome_metodo, ausente = metodos[campo]
+            metodo = getattr(self, nome_metodo, None)
+            # Extrator sem o método do campo: campo não bloqueia a parada
+            if metodo is None:
+                continue
+            valor = metodo(doc)
+            if not valor or valor == ausente:
+                return False
+        return True
+
+    # ==================== LINHA DIGITÁVEL PRIMEIRO ====================
+
+    def _valor_ou_fallback(self, doc: ParsedBoleto, fallback: Callable[[ParsedBoleto], str]) -> str:
+        """Valor da linha digitável válida; sem ela, fallback(doc) (regex)"""
+        linha = doc.linha_digitavel
+        if linha is not None and linha.valor_cents:
+            doc.origens['valor'] = ORIGEM_CODIGO_BARRAS
+            return formatar_valor_cents(linha.valor_cents)
+        return self._anotar_fallback(doc, 'valor', fallback(doc), "SEM_VALOR")
+
+    def _vencimento_ou_fallback(self, doc: ParsedBoleto, fallback: Callable[[ParsedBoleto], str]) -> str:
+        """DD-MM do fator de vencimento; sem linha digitável válida, fallback(doc)"""
+        linha = doc.linha_digitavel
+        vencimento = linha.vencimento() if linha is not None else None
+        if vencimento is not None:
+            doc.origens['vencimento'] = ORIGEM_CODIGO_BARRAS
+            return f"{vencimento.day:02d}-{vencimento.month:02d}"
+        return self._anotar_fallback(doc, 'vencimento', fallback(doc), "SEM_VENCIMENTO")
+
+    @staticmethod
+    def _anotar_fallback(doc: ParsedBoleto, campo: str, resultado: str, ausente: str) -> str:
+        doc.origens[campo] = ORIGEM_NENHUMA if resultado == ausente else ORIGEM_REGEX
+        return resultado
+
+    @staticmethod
+    def _limpar_nome(nome: str) -> str:
+        """Remove CNPJ/CPF e caracteres indesejados do nome do pagador (memoizado)"""
+        return normalizacao_nomes.limpar_nome_pagador(nome)
+
+    @staticmethod
+    def _documento(texto: TextoBoleto) -> ParsedBoleto:
+        """
+        Converte o argumento recebido em ParsedBoleto
+
+        Se já for ParsedBoleto, devolve o mesmo objeto (sem recalcular nada).
+        """
+        return ParsedBoleto.de(texto)
+
     def __repr__(self) -> str:
         """Representação string do extrator"""
         return f"<{self.__class__.__name__} fidc='{self.nome_fidc}'>"
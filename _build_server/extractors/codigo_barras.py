@@ -0,0 +1,252 @@
+# ===============================================
+# Código de Barras - Linha Digitável do Boleto (Todos os FIDCs)
+# ===============================================
+#
+# Os extratores só olhavam a linha digitável no último fallback do valor
+# (depois de até seis regex), liam o valor na posição errada do campo 5
+# ([3:13] em vez de [4:14]) e ignoravam o fator de vencimento. Aqui a
+# linha digitável é achada numa varredura, os dígitos verificadores são
+# conferidos e valor + vencimento saem direto dos dígitos.
+#
+# A varredura olha só as linhas com 47+ caracteres (a linha digitável
+# não atravessa quebra de linha); no ParsedBoleto ela é feita uma vez e
+# todos os extratores reaproveitam o resultado.
+#
+# Formatos:
+# - Boleto bancário (47 dígitos): AAABC.CCCCX DDDDD.DDDDDY EEEEE.EEEEEZ K UUUUVVVVVVVVVV
+#   X/Y/Z = módulo 10 de cada campo, K = módulo 11 do código de barras,
+#   UUUU = fator de vencimento, V = valor em centavos
+# - Arrecadação/convênio (48 dígitos, começa com 8): 4 blocos de 11 + DV;
+#   valor em reais só quando o 3º dígito é 6 ou 8 (sem vencimento)
+#
+# Fator de vencimento: dias desde 07/10/1997. Chegou a 9999 em 21/02/2025
+# e recomeçou em 1000 no dia 22/02/2025; o mesmo fator vale para os dois
+# ciclos e fica a data mais próxima da data de referência (hoje).
+#
+# Contadores de origem (linha digitável x regex) por campo mostram quanto
+# o caminho direto resolve. Cada ParsedBoleto guarda a origem de cada
+# campo em doc.origens (a última extração vale: leituras parciais e a
+# releitura com outro motor não contam em dobro); quem roda a extração
+# final soma doc.origens uma vez por boleto com contar_origens(), no
+# processo principal: estatisticas() / imprimir_estatisticas().
+#
+# Uso:
+#   linha = encontrar_linha_digitavel(texto)     # ou doc.linha_digitavel
+#   if linha:
+#       linha.valor_cents, linha.vencimento()
+#
+# ===============================================
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import lru_cache
+from operator import mul
+from typing import Dict, Iterable, Optional
+
+from .padroes import LINHA_DIGITAVEL, NAO_DIGITO
+
+# Fator 0 = dia 07/10/1997; ciclo novo: fator 1000 = 22/02/2025
+DATA_BASE_FATOR = date(1997, 10, 7)
+INICIO_SEGUNDO_CICLO = date(2025, 2, 22)
+
+ORIGEM_CODIGO_BARRAS = "codigo_barras"
+ORIGEM_REGEX = "regex"
+ORIGEM_NENHUMA = "nenhuma"
+
+
+# Menor linha digitável (47 dígitos, sem pontos nem espaços)
+TAMANHO_MINIMO = 47
+
+
+# ==================== DÍGITOS VERIFICADORES ====================
+
+# Caractere do dígito -> valor, e -> soma dos dígitos do dobro (módulo 10);
+# a conta fica em bytes para não chamar int() dígito a dígito
+_VALOR = bytes.maketrans(b'0123456789', bytes(range(10)))
+_DOBRO = bytes.maketrans(b'0123456789', bytes((0, 2, 4, 6, 8, 1, 3, 5, 7, 9)))
+
+# Módulo 11: pesos 2..9 da direita para a esquerda (cobre 48 dígitos)
+_PESOS_11 = (2, 3, 4, 5, 6, 7, 8, 9) * 6
+
+
+def modulo10(numero: str) -> int:
+    """DV módulo 10 (pesos 2, 1, 2... da direita; soma os dígitos dos produtos)"""
+    invertido = numero.encode()[::-1]
+    soma = sum(invertido[0::2].translate(_DOBRO)) + sum(invertido[1::2].translate(_VALOR))
+    return -soma % 10
+
+
+def _soma_modulo11(numero: str) -> int:
+    digitos = numero.encode().translate(_VALOR)
+    return sum(map(mul, reversed(digitos), _PESOS_11)) % 11
+
+
+def modulo11_boleto(numero: str) -> int:
+    """DV geral do código de barras bancário (resto 0, 1 ou 10 -> 1)"""
+    dv = 11 - _soma_modulo11(numero)
+    return 1 if dv in (0, 10, 11) else dv
+
+
+def modulo11_arrecadacao(numero: str) -> int:
+    """DV módulo 11 da arrecadação (resto 0 ou 1 -> 0)"""
+    dv = 11 - _soma_modulo11(numero)
+    return 0 if dv in (10, 11) else dv
+
+
+def fator_para_data(fator: int, referencia: Optional[date] = None) -> Optional[date]:
+    """
+    Data do fator de vencimento.
+
+    Args:
+        fator: Fator de 4 dígitos (0 = boleto sem vencimento)
+        referencia: Data usada para escolher o ciclo (padrão: hoje)
+
+    Returns:
+        Data de vencimento ou None (fator 0 ou abaixo de 1000)
+    """
+    if fator < 1000:
+        return None
+    return _data_do_fator(fator, referencia or date.today())
+
+
+@lru_cache(maxsize=4096)
+def _data_do_fator(fator: int, referencia: date) -> date:
+    candidatas = (DATA_BASE_FATOR + timedelta(days=fator),
+                  INICIO_SEGUNDO_CICLO + timedelta(days=fator - 1000))
+    return min(candidatas, key=lambda data: abs((data - referencia).days))
+
+
+# ==================== LINHA DIGITÁVEL ====================
+
+@dataclass(slots=True, frozen=True)
+class LinhaDigitavel:
+    """Linha digitável decodificada (só dígitos) e o código de barras de 44 posições."""
+
+    digitos: str
+    codigo_barras: str
+    valor_cents: Optional[int]
+    fator_vencimento: Optional[int]
+    valida: bool
+
+    @property
+    def arrecadacao(self) -> bool:
+        return len(self.digitos) == 48
+
+    def vencimento(self, referencia: Optional[date] = None) -> Optional[date]:
+        """Data do fator de vencimento (None em arrecadação ou fator 0)"""
+        if self.fator_vencimento is None:
+            return None
+        return fator_para_data(self.fator_vencimento, referencia)
+
+
+def _decodificar_bancario(d: str) -> LinhaDigitavel:
+    campo1, campo2, campo3 = d[0:9], d[10:20], d[21:31]
+    dv_geral, campo5 = d[32], d[33:47]
+    codigo = d[0:4] + dv_geral + campo5 + d[4:9] + campo2 + campo3
+
+    valida = (modulo10(campo1) == int(d[9])
+              and modulo10(campo2) == int(d[20])
+              and modulo10(campo3) == int(d[31])
+              and modulo11_boleto(codigo[:4] + codigo[5:]) == int(dv_geral))
+    return LinhaDigitavel(d, codigo, int(campo5[4:]), int(campo5[:4]), valida)
+
+
+def _decodificar_arrecadacao(d: str) -> LinhaDigitavel:
+    blocos = [d[i:i + 11] for i in range(0, 48, 12)]
+    dvs = [d[i + 11] for i in range(0, 48, 12)]
+    codigo = ''.join(blocos)
+
+    # 3º dígito: 6/7 -> módulo 10, 8/9 -> módulo 11; 6/8 -> valor efetivo em reais
+    identificador = codigo[2]
+    calcular = modulo10 if identificador in '67' else modulo11_arrecadacao
+    valida = (identificador in '6789'
+              and all(calcular(bloco) == int(dv) for bloco, dv in zip(blocos, dvs))
+              and calcular(codigo[:3] + codigo[4:]) == int(codigo[3]))
+    valor_cents = int(codigo[4:15]) if identificador in '68' else None
+    return LinhaDigitavel(d, codigo, valor_cents, None, valida)
+
+
+def decodificar_linha_digitavel(texto: str) -> Optional[LinhaDigitavel]:
+    """
+    Decodifica uma linha digitável (pontos, espaços e traços são ignorados).
+
+    Returns:
+        LinhaDigitavel (veja .valida) ou None se não tiver 47/48 dígitos
+    """
+    digitos = NAO_DIGITO.sub('', texto)
+    if len(digitos) == 47:
+        return _decodificar_bancario(digitos)
+    if len(digitos) == 48 and digitos[0] == '8':
+        return _decodificar_arrecadacao(digitos)
+    return None
+
+
+def encontrar_linha_digitavel(texto: str) -> Optional[LinhaDigitavel]:
+    """
+    Primeira linha digitável do texto com os dígitos verificadores corretos.
+
+    Returns:
+        LinhaDigitavel válida ou None (sem linha digitável ou DV errado)
+    """
+    return linha_digitavel_das_linhas(texto.splitlines())
+
+
+def linha_digitavel_das_linhas(linhas: Iterable[str]) -> Optional[LinhaDigitavel]:
+    """encontrar_linha_digitavel para o texto já quebrado em linhas"""
+    for texto_linha in linhas:
+        if len(texto_linha) < TAMANHO_MINIMO:
+            continue
+        for match in LINHA_DIGITAVEL.finditer(texto_linha):
+            linha = decodificar_linha_digitavel(match.group(0))
+            if linha is not None and linha.valida:
+                return linha
+    return None
+
+
+def formatar_valor_cents(valor_cents: int) -> str:
+    """12345 -> 'R$ 123,45' (mesmo formato dos extratores)"""
+    valor = f"{valor_cents / 100:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+    return f"R$ {valor}"
+
+
+# ==================== CONTADORES DE ORIGEM ====================
+
+# campo -> origem -> quantidade
+_contadores: Dict[str, Dict[str, int]] = {}
+
+
+def contar(campo: str, origem: str, contadores: Optional[Dict[str, Dict[str, int]]] = None) -> None:
+    """Registra de onde veio um campo (linha digitável, regex ou nenhuma)"""
+    por_origem = (_contadores if contadores is None else contadores).setdefault(campo, {})
+    por_origem[origem] = por_origem.get(origem, 0) + 1
+
+
+def contar_origens(origens: Dict[str, str], contadores: Optional[Dict[str, Dict[str, int]]] = None) -> None:
+    """
+    Soma as origens de UM boleto (doc.origens da extração final).
+
+    Args:
+        origens: {campo: origem}
+        contadores: Onde somar (None = contadores deste módulo)
+    """
+    for campo, origem in origens.items():
+        contar(campo, origem, contadores)
+
+
+def zerar_contadores() -> None:
+    _contadores.clear()
+
+
+def estatisticas() -> Dict[str, Dict[str, int]]:
+    """Cópia dos contadores: {campo: {origem: quantidade}}"""
+    return {campo: dict(origens) for campo, origens in _contadores.items()}
+
+
+def imprimir_estatisticas(contadores: Optional[Dict[str, Dict[str, int]]] = None) -> None:
+    """Mostra, por campo, quantos vieram da linha digitável e quantos do regex"""
+    for campo, origens in sorted((_contadores if contadores is None else contadores).items()):
+        total = sum(origens.values())
+        barras = origens.get(ORIGEM_CODIGO_BARRAS, 0)
+        print(f"[CODIGO-BARRAS] {campo:<12} total={total:<6} linha_digitavel={barras:<6} "
+              f"regex={origens.get(ORIGEM_REGEX, 0):<6} sem={origens.get(ORIGEM_NENHUMA, 0):<6} "
+              f"({barras / total * 100 if total else 0:.1f}% direto)")
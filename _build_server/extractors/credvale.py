@@ -15,10 +15,16 @@
 #
 # ===============================================
 
-import re
 from typing import Dict, List, Tuple, Optional
 from decimal import Decimal
 from .base import BaseExtractor
+from .documento import ParsedBoleto, TextoBoleto
+from .padroes import (
+    CNPJ_FORMATADO, CNPJ_ROTULADO, CPF_FORMATADO, CPF_ROTULADO, DATA_DIA_MES,
+    INICIO_LINHA_DIGITAVEL, LINHA_DIGITAVEL_VALOR, NOTA_DOCUMENTO_PARCELA,
+    PAGADOR_PROXIMA_LINHA, PAGADOR_ROTULADO, PONTUACAO_CNPJ, PONTUACAO_CPF, VALOR_APOS_DATA,
+    VALOR_APOS_RS, VALOR_BR, VALOR_DOCUMENTO
+)
 
 
 class CREDVALEExtractor(BaseExtractor):
@@ -39,146 +45,140 @@ class CREDVALEExtractor(BaseExtractor):
     # MÉTODOS ORIGINAIS (compatibilidade com BaseExtractor)
     # ========================================================================
 
-    def extrair_pagador(self, texto: str) -> str:
+    def extrair_pagador(self, texto: TextoBoleto) -> str:
         """
         Extrai pagador do boleto CREDVALE
 
         Busca linha "Pagador" exata e pega próxima linha
         """
-        linhas = texto.splitlines()
+        doc = self._documento(texto)
+        linhas, ancoras = doc.linhas, doc.ancoras
 
         # Tentativa 1: Linha "Pagador" exata
-        for i, linha in enumerate(linhas):
-            if linha.strip() == "Pagador":
+        for i in ancoras['PAGADOR']:
+            if linhas[i].strip() == "Pagador":
                 if i + 1 < len(linhas):
                     linha_pagador = linhas[i + 1].strip()
                     # Valida que não é código de barras
-                    if not re.match(r'^\d{5}\.\d{5}\s+\d{5}', linha_pagador):
+                    if not INICIO_LINHA_DIGITAVEL.match(linha_pagador):
                         pagador = self._limpar_nome(linha_pagador)
                         if pagador:
                             return pagador
 
         # Tentativa 2: Regex alternativo
-        match = re.search(
-            r'Pagador\s*\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s\.\-&]+?)\s*-\s*(?:CNPJ|CPF)',
-            texto,
-            re.IGNORECASE | re.MULTILINE
-        )
+        match = PAGADOR_PROXIMA_LINHA.search(doc.texto)
         if match:
             return match.group(1).strip()
 
         # Tentativa 3: Buscar "Pagador:" seguido do nome
-        compacto = re.sub(r'\s+', ' ', texto).strip()
-        match = re.search(
-            r'Pagador:\s*([A-Z0-9][A-Z0-9\s\.\-&]+?)(?:\s+CNPJ[/\s]|\s+CPF)',
-            compacto,
-            re.IGNORECASE
-        )
+        compacto = doc.compacto
+        match = PAGADOR_ROTULADO.search(compacto)
         if match:
             return match.group(1).strip()
 
         # Tentativa 4: Buscar após "PAGADOR"
-        for i, linha in enumerate(linhas):
-            if "PAGADOR" in linha.upper():
-                if i + 1 < len(linhas):
-                    pagador = linhas[i + 1].strip()
-                    pagador = self._limpar_nome(pagador)
-                    if pagador:
-                        return pagador
+        for i in ancoras['PAGADOR']:
+            if i + 1 < len(linhas):
+                pagador = linhas[i + 1].strip()
+                pagador = self._limpar_nome(pagador)
+                if pagador:
+                    return pagador
 
         return "SEM_PAGADOR"
 
-    def extrair_numero_nota(self, texto: str) -> Optional[str]:
+    def extrair_numero_nota(self, texto: TextoBoleto) -> Optional[str]:
         """
         Extrai número da nota fiscal do boleto CREDVALE
 
         Padrão: "Número do Documento ... 310922/003"
         Retorna apenas o número da nota (sem a parte "/XXX")
         """
-        linhas = texto.splitlines()
+        doc = self._documento(texto)
+        linhas, ancoras = doc.linhas, doc.ancoras
 
         # Procurar "Número do Documento" ou "Numero do Documento"
-        for i, linha in enumerate(linhas):
-            if 'MERO DO DOCUMENTO' in linha.upper():
-                # Verificar próximas 3 linhas
-                for j in range(i, min(i + 4, len(linhas))):
-                    linha_check = linhas[j]
-                    # Padrão: 310922/003 ou 0310922/003
-                    match = re.search(r'0?(\d{6})/\d{3}', linha_check)
-                    if match:
-                        return match.group(1)
+        for i in ancoras['MERO DO DOCUMENTO']:
+            # Verificar próximas 3 linhas
+            for j in range(i, min(i + 4, len(linhas))):
+                linha_check = linhas[j]
+                # Padrão: 310922/003 ou 0310922/003
+                match = NOTA_DOCUMENTO_PARCELA.search(linha_check)
+                if match:
+                    return match.group(1)
 
         return None
 
-    def extrair_vencimento(self, texto: str) -> str:
+    def extrair_vencimento(self, texto: TextoBoleto) -> str:
         """
         Extrai vencimento do boleto CREDVALE
 
-        Busca padrão DD/MM/YYYY e retorna DD-MM
+        Fator de vencimento da linha digitável; sem ela, busca padrão
+        DD/MM/YYYY perto de "Vencimento". Retorna DD-MM
         """
-        linhas = texto.splitlines()
+        return self._vencimento_ou_fallback(self._documento(texto), self._vencimento_por_regex)
 
-        for i, linha in enumerate(linhas):
-            if "VENCIMENTO" in linha.upper():
-                # Tentar na mesma linha
-                match = re.search(r'(\d{2})/(\d{2})/\d{4}', linha)
-                if not match and i + 1 < len(linhas):
-                    # Tentar na próxima linha
-                    match = re.search(r'(\d{2})/(\d{2})/\d{4}', linhas[i + 1])
+    def _vencimento_por_regex(self, doc: ParsedBoleto) -> str:
+        """Data DD/MM perto de "Vencimento" (fallback da linha digitável)"""
+        linhas, ancoras = doc.linhas, doc.ancoras
 
-                if match:
-                    dia = match.group(1)
-                    mes = match.group(2)
-                    return f"{dia}-{mes}"
+        for i in ancoras['VENCIMENTO']:
+            linha = linhas[i]
+            # Tentar na mesma linha
+            match = DATA_DIA_MES.search(linha)
+            if not match and i + 1 < len(linhas):
+                # Tentar na próxima linha
+                match = DATA_DIA_MES.search(linhas[i + 1])
+
+            if match:
+                dia = match.group(1)
+                mes = match.group(2)
+                return f"{dia}-{mes}"
 
         return "SEM_VENCIMENTO"
 
-    def extrair_valor(self, texto: str) -> str:
+    def extrair_valor(self, texto: TextoBoleto) -> str:
         """
         Extrai valor do boleto CREDVALE
 
         Ordem de prioridade:
+        0. Linha digitável (dígitos verificadores conferidos)
         1. Campo "Valor Documento"
         2. Linha com data + valor
         3. Qualquer R$ seguido de valor válido
-        4. Código de barras
+        4. Código de barras (sem conferir os dígitos verificadores)
         """
+        return self._valor_ou_fallback(self._documento(texto), self._valor_por_regex)
 
-        # PADRÃO 1: Valor Documento
-        padroes_valor_doc = [
-            r'\(=\)\s*Valor\s+(?:do\s+)?Documento\s*[:\s]*(?:R\$\s*)?([\d\.\,]+)',
-            r'Valor\s+(?:do\s+)?Documento\s*[:\s]*(?:R\$\s*)?([\d\.\,]+)',
-        ]
+    def _valor_por_regex(self, doc: ParsedBoleto) -> str:
+        """Padrões de texto do valor (fallback da linha digitável)"""
 
-        for padrao in padroes_valor_doc:
-            match = re.search(padrao, texto, re.IGNORECASE | re.MULTILINE)
+        # PADRÃO 1: Valor Documento
+        for padrao in VALOR_DOCUMENTO:
+            match = padrao.search(doc.texto)
             if match:
                 valor_str = match.group(1)
-                if re.match(r'\d{1,3}(?:\.\d{3})*,\d{2}', valor_str):
+                if VALOR_BR.match(valor_str):
                     return f"R$ {valor_str}"
 
         # PADRÃO 2: Linha com estrutura "data valor"
-        match_linha = re.search(r'\d{2}/\d{2}/\d{4}\s+([\d\.\,]+)', texto)
+        match_linha = VALOR_APOS_DATA.search(doc.texto)
         if match_linha:
             valor_str = match_linha.group(1)
-            if re.match(r'\d{1,3}(?:\.\d{3})*,\d{2}', valor_str):
+            if VALOR_BR.match(valor_str):
                 return f"R$ {valor_str}"
 
         # PADRÃO 3: Qualquer R$ seguido de valor válido
-        match_rs = re.search(r'R\$\s*([\d\.\,]+)', texto)
+        match_rs = VALOR_APOS_RS.search(doc.texto)
         if match_rs:
             valor_str = match_rs.group(1)
-            if re.match(r'\d{1,3}(?:\.\d{3})*,\d{2}', valor_str):
+            if VALOR_BR.match(valor_str):
                 return f"R$ {valor_str}"
 
         # PADRÃO 4: Código de barras
-        match_barras = re.search(
-            r'\d{5}\.\d{5}\s+\d{5}\.\d{6}\s+\d{5}\.\d{6}\s+\d\s+(\d{14})',
-            texto
-        )
+        match_barras = LINHA_DIGITAVEL_VALOR.search(doc.texto)
         if match_barras:
             codigo_completo = match_barras.group(1)
-            valor_cents_str = codigo_completo[3:13]
+            valor_cents_str = codigo_completo[4:14]
             try:
                 valor_cents = int(valor_cents_str)
                 if valor_cents > 0:
@@ -194,44 +194,44 @@ class CREDVALEExtractor(BaseExtractor):
     # NOVOS MÉTODOS v2.0 - LÓGICA AVANÇADA COM XML
     # ========================================================================
 
-    def extrair_cnpj_cpf_boleto(self, texto: str) -> Optional[str]:
+    def extrair_cnpj_cpf_boleto(self, texto: TextoBoleto) -> Optional[str]:
         """
         Extrai CNPJ/CPF do boleto CREDVALE
 
         Busca após "Pagador" ou em linha com CNPJ/CPF
         Retorna apenas dígitos (14 para CNPJ, 11 para CPF)
         """
-        linhas = texto.splitlines()
+        doc = self._documento(texto)
+        linhas, ancoras = doc.linhas, doc.ancoras
 
         # Buscar após PAGADOR
-        for i, linha in enumerate(linhas):
-            if "PAGADOR" in linha.upper() or linha.strip() == "Pagador":
-                # Próximas 3-4 linhas podem conter o CNPJ/CPF
-                for j in range(i, min(i + 5, len(linhas))):
-                    linha_busca = linhas[j]
-
-                    # Padrão CPF: XXX.XXX.XXX-XX
-                    match_cpf = re.search(r'(\d{3}\.\d{3}\.\d{3}-\d{2})', linha_busca)
-                    if match_cpf:
-                        cpf = match_cpf.group(1)
-                        return re.sub(r'[.-]', '', cpf)
-
-                    # Padrão CNPJ: XX.XXX.XXX/XXXX-XX
-                    match_cnpj = re.search(r'(\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2})', linha_busca)
-                    if match_cnpj:
-                        cnpj = match_cnpj.group(1)
-                        return re.sub(r'[./-]', '', cnpj)
+        for i in ancoras['PAGADOR']:
+            # Próximas 3-4 linhas podem conter o CNPJ/CPF
+            for j in range(i, min(i + 5, len(linhas))):
+                linha_busca = linhas[j]
+
+                # Padrão CPF: XXX.XXX.XXX-XX
+                match_cpf = CPF_FORMATADO.search(linha_busca)
+                if match_cpf:
+                    cpf = match_cpf.group(1)
+                    return PONTUACAO_CPF.sub('', cpf)
+
+                # Padrão CNPJ: XX.XXX.XXX/XXXX-XX
+                match_cnpj = CNPJ_FORMATADO.search(linha_busca)
+                if match_cnpj:
+                    cnpj = match_cnpj.group(1)
+                    return PONTUACAO_CNPJ.sub('', cnpj)
 
         # Fallback: buscar em qualquer lugar do texto
         # CPF
-        match_cpf = re.search(r'CPF[:\s]*(\d{3}\.\d{3}\.\d{3}-\d{2})', texto, re.IGNORECASE)
+        match_cpf = CPF_ROTULADO.search(doc.texto)
         if match_cpf:
-            return re.sub(r'[.-]', '', match_cpf.group(1))
+            return PONTUACAO_CPF.sub('', match_cpf.group(1))
 
         # CNPJ
-        match_cnpj = re.search(r'CNPJ[:\s]*(\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2})', texto, re.IGNORECASE)
+        match_cnpj = CNPJ_ROTULADO.search(doc.texto)
         if match_cnpj:
-            return re.sub(r'[./-]', '', match_cnpj.group(1))
+            return PONTUACAO_CNPJ.sub('', match_cnpj.group(1))
 
         return None
 
@@ -359,39 +359,10 @@ class CREDVALEExtractor(BaseExtractor):
         # Converter vencimento "DD-MM" para comparar
         dia, mes = vencimento_boleto.split('-')
 
-        # Buscar em todos os XMLs
-        for numero_nota, dados_xml in mapa_xmls.items():
-            # Usar 'cpf_cnpj' que funciona tanto para CPF quanto CNPJ
-            cpf_cnpj_xml = dados_xml.get('cpf_cnpj', '') or dados_xml.get('cnpj', '')
-
-            # Match por CNPJ/CPF
-            if cnpj_boleto == cpf_cnpj_xml:
-                # Tem match de CNPJ - agora buscar duplicata por vencimento
-                duplicatas = dados_xml.get('duplicatas', [])
-
-                if duplicatas:
-                    for dup in duplicatas:
-                        venc_xml = dup.get('vencimento', '')  # "2025-11-17"
-                        if venc_xml:
-                            partes = venc_xml.split('-')  # ["2025", "11", "17"]
-                            if len(partes) == 3:
-                                dia_xml = partes[2]
-                                mes_xml = partes[1]
-
-                                if dia == dia_xml and mes == mes_xml:
-                                    # Match perfeito!
-                                    return (numero_nota, dados_xml, dup)
-
-                    # Se não achou duplicata por vencimento, mas CNPJ bateu
-                    # Retornar primeiro (pode ter apenas 1 duplicata)
-                    if len(duplicatas) == 1:
-                        return (numero_nota, dados_xml, duplicatas[0])
-
-                else:
-                    # Não tem duplicatas - nota de parcela única
-                    return (numero_nota, dados_xml, None)
-
-        return (None, None, None)
+        # Primeira nota do CNPJ/CPF com duplicata nesse dia/mês, ou com
+        # parcela única (índice montado uma vez por mapa)
+        from indice_nfe import obter_indice_nfe
+        return obter_indice_nfe(mapa_xmls).buscar_por_cnpj_e_vencimento(cnpj_boleto, dia, mes)
 
     # ========================================================================
     # MÉTODO DE PROCESSAMENTO COMPLETO
@@ -399,7 +370,7 @@ class CREDVALEExtractor(BaseExtractor):
 
     def processar_boleto_com_xml(
         self,
-        texto_pdf: str,
+        texto_pdf: TextoBoleto,
         mapa_xmls: Dict[str, dict]
     ) -> dict:
         """
@@ -431,10 +402,11 @@ class CREDVALEExtractor(BaseExtractor):
         }
 
         try:
-            # 1. Extrair dados do boleto
-            cnpj_boleto = self.extrair_cnpj_cpf_boleto(texto_pdf)
-            vencimento_boleto = self.extrair_vencimento(texto_pdf)
-            numero_nota_boleto = self.extrair_numero_nota(texto_pdf)
+            # 1. Extrair dados do boleto (texto/linhas calculados uma vez só)
+            doc = self._documento(texto_pdf)
+            cnpj_boleto = self.extrair_cnpj_cpf_boleto(doc)
+            vencimento_boleto = self.extrair_vencimento(doc)
+            numero_nota_boleto = self.extrair_numero_nota(doc)
 
             if not cnpj_boleto:
                 resultado['erro_msg'] = "Não foi possível extrair CNPJ/CPF do boleto"
@@ -486,14 +458,3 @@ class CREDVALEExtractor(BaseExtractor):
         except Exception as e:
             resultado['erro_msg'] = f"Exceção: {type(e).__name__}: {str(e)}"
             return resultado
-
-    # ========================================================================
-    # MÉTODO AUXILIAR
-    # ========================================================================
-
-    def _limpar_nome(self, nome: str) -> str:
-        """Remove CNPJ/CPF e caracteres indesejados do nome do pagador"""
-        nome = re.split(r',|CNPJ|CPF|Beneficiario', nome, maxsplit=1, flags=re.IGNORECASE)[0].strip()
-        nome = re.sub(r'\s*-\s*\d{2,3}[\.\s]*\d{3}[\.\s]*\d{3}[/-]?\d{0,4}[-]?\d{0,2}.*$', '', nome)
-        nome = re.sub(r'\s+\d{2,3}[\.\s]?\d{3}[\.\s]?\d{3}[\/\-\s]?\d{2,4}[\-\s]?\d{2}.*$', '', nome)
-        return nome.strip()
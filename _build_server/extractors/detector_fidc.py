@@ -0,0 +1,135 @@
+# ===============================================
+# Detector de FIDC - Único para Renomeação e Envio
+# ===============================================
+#
+# A detecção do FIDC estava repetida (RenomeaçãoBoletos.detectar_fidc com
+# uma lista própria de palavras, ParsedBoleto.fidc com o FIDC_CONFIG) e
+# testava, para cada FIDC, cada palavra-chave com "in" no texto em
+# maiúsculas. Aqui o FIDC_CONFIG é compilado UMA vez numa tabela:
+# - por FIDC (na ordem do config), só as palavras-chave mínimas: a que
+#   contém outra do mesmo FIDC ("NOVAX FIDC" contém "NOVAX") nunca muda
+#   o resultado e não é buscada (12 buscas no texto viram 4, no máximo)
+# - as completas ficam para informar qual palavra-chave foi encontrada
+#
+# Cada busca é um str.find (busca rápida em C). Um regex com todas as
+# palavras-chave numa só varredura foi medido e ficou ~1,5x mais lento
+# que os "in" antigos: o módulo re não tem autômato de múltiplos padrões.
+#
+# Regra de decisão (igual à anterior):
+# - vence o primeiro FIDC, na ordem do FIDC_CONFIG, com alguma
+#   palavra-chave no texto (não o que aparece primeiro no texto)
+# - posição = primeira ocorrência desse FIDC; palavra-chave = a mais
+#   longa dele que começa nessa posição
+#
+# O detector é compilado uma vez por objeto de config (comparado por
+# identidade, sem percorrer o config a cada boleto); palavras-chave
+# alteradas no próprio FIDC_CONFIG já carregado valem depois de
+# recompilar_detector().
+#
+# Uso:
+#   deteccao = detectar_fidc(texto_upper)
+#   if deteccao:
+#       deteccao.fidc, deteccao.palavra_chave, deteccao.posicao
+#
+# ===============================================
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+Assinatura = Tuple[Tuple[str, Tuple[str, ...]], ...]
+
+
+@dataclass(slots=True, frozen=True)
+class DeteccaoFIDC:
+    """FIDC detectado, palavra-chave encontrada e posição no texto em maiúsculas."""
+
+    fidc: str
+    palavra_chave: str
+    posicao: int
+
+
+def assinatura_config(config: Dict[str, dict]) -> Assinatura:
+    """Palavras-chave (em maiúsculas) de cada FIDC, na ordem do config"""
+    return tuple(
+        (fidc, tuple(palavra.upper() for palavra in dados.get("palavras_chave", ()) if palavra))
+        for fidc, dados in config.items()
+    )
+
+
+class DetectorFIDC:
+    """
+    Tabela de palavras-chave do FIDC_CONFIG pronta para a detecção.
+
+    Args:
+        assinatura: Palavras-chave por FIDC (ver assinatura_config)
+    """
+
+    __slots__ = ('assinatura', 'tabela')
+
+    def __init__(self, assinatura: Assinatura):
+        self.assinatura = assinatura
+        # (FIDC, palavras-chave mínimas, todas da maior para a menor)
+        self.tabela = []
+        for fidc, palavras in assinatura:
+            completas = tuple(sorted(set(palavras), key=len, reverse=True))
+            minimas = tuple(p for p in completas if not any(o != p and o in p for o in completas))
+            if minimas:
+                self.tabela.append((fidc, minimas, completas))
+
+    def detectar(self, texto_upper: str) -> Optional[DeteccaoFIDC]:
+        """
+        FIDC de maior prioridade com palavra-chave no texto.
+
+        Args:
+            texto_upper: Texto do boleto já em maiúsculas
+
+        Returns:
+            DeteccaoFIDC ou None se nenhuma palavra-chave aparecer
+        """
+        for fidc, minimas, completas in self.tabela:
+            posicoes = [p for p in map(texto_upper.find, minimas) if p >= 0]
+            if posicoes:
+                posicao = min(posicoes)
+                palavra = next(p for p in completas if texto_upper.startswith(p, posicao))
+                return DeteccaoFIDC(fidc, palavra, posicao)
+        return None
+
+    @property
+    def fidcs(self) -> List[str]:
+        """FIDCs com palavra-chave, na ordem de prioridade"""
+        return [fidc for fidc, _, _ in self.tabela]
+
+    def __repr__(self) -> str:
+        return f"<DetectorFIDC fidcs={self.fidcs}>"
+
+
+_detector: Optional[DetectorFIDC] = None
+_config_do_detector: Optional[Dict[str, dict]] = None  # config de onde _detector saiu
+
+
+def obter_detector(config: Optional[Dict[str, dict]] = None) -> DetectorFIDC:
+    """
+    Detector do config (FIDC_CONFIG por padrão), compilado na primeira
+    chamada com esse objeto de config e reaproveitado nas seguintes.
+    """
+    global _detector, _config_do_detector
+
+    if config is None:
+        from config_server import FIDC_CONFIG
+        config = FIDC_CONFIG
+
+    if _detector is None or _config_do_detector is not config:
+        _detector = DetectorFIDC(assinatura_config(config))
+        _config_do_detector = config
+    return _detector
+
+
+def recompilar_detector() -> None:
+    """Descarta o detector compilado (palavras-chave alteradas no config já carregado)."""
+    global _detector, _config_do_detector
+    _detector = _config_do_detector = None
+
+
+def detectar_fidc(texto_upper: str, config: Optional[Dict[str, dict]] = None) -> Optional[DeteccaoFIDC]:
+    """Atalho: obter_detector(config).detectar(texto_upper)"""
+    return obter_detector(config).detectar(texto_upper)
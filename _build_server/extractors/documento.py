@@ -0,0 +1,338 @@
+# ===============================================
+# Documento do Boleto - Texto Lido UMA Vez por Execução
+# ===============================================
+#
+# ParsedBoleto guarda o texto de um boleto e as formas derivadas que os
+# extratores usam o tempo todo (texto em maiúsculas, linhas, linhas em
+# maiúsculas, texto compacto, FIDC detectado, mapa de âncoras, linha
+# digitável decodificada).
+#
+# Mapa de âncoras: cada método de campo percorria todas as linhas atrás
+# do seu rótulo (DESTINAT/REMETENTE, PAGADOR, VENCIMENTO...). Agora as
+# linhas são varridas UMA vez por documento e doc.ancoras["VENCIMENTO"]
+# devolve os índices das linhas com o rótulo, em ordem.
+#
+# Antes cada helper do envio chamava extrair_texto_pdf() por conta
+# própria (até 4 leituras do mesmo PDF). Agora o boleto é lido uma vez
+# e o mesmo objeto é passado para todos os helpers e extratores.
+#
+# Uso:
+#   doc = ParsedBoleto.de_arquivo(caminho_pdf)   # leitura preguiçosa
+#   doc = ParsedBoleto.de_arquivo(caminho_pdf, parcial=True)
+#                                                # para de ler páginas quando
+#                                                # os campos obrigatórios do
+#                                                # FIDC já foram encontrados
+#   doc = ParsedBoleto.de_texto(texto)           # texto já extraído
+#   extractor.processar_boleto_com_xml(doc, mapa_xmls)
+#
+# Os extratores continuam aceitando str (testes e código antigo).
+#
+# ===============================================
+
+import os
+from functools import cached_property
+from typing import Callable, List, Optional, Union
+
+from .codigo_barras import LinhaDigitavel, linha_digitavel_das_linhas
+from .detector_fidc import DeteccaoFIDC, detectar_fidc
+from .padroes import ESPACOS
+
+
+class ParsedBoleto:
+    """
+    Texto de um boleto com as derivações memoizadas.
+
+    O PDF só é lido no primeiro acesso a `texto` (ou a qualquer derivação).
+    Falhas de leitura não levantam exceção: `texto` fica vazio e a mensagem
+    fica em `erro`.
+
+    Com `parar_quando`, as páginas são lidas uma a uma e a leitura para
+    assim que parar_quando(doc) for verdadeiro; `completo` indica se o
+    texto cobre o PDF inteiro (carregar_completo() lê o restante).
+
+    O motor de extração segue MOTOR_PDF_POR_FIDC (config_server.py): o
+    texto da primeira leitura (MOTOR_PDF_PADRAO) que já passa em
+    campos_obrigatorios_encontrados() é aproveitado; o PDF só é relido com o
+    motor do FIDC se não passar (ou se o FIDC exige o pdfplumber). Se o
+    texto de um motor rápido não passar, o PDF é relido com pdfplumber e
+    `motor_fallback` fica True.
+    """
+
+    # Derivações memoizadas (recalculadas a cada página na leitura parcial)
+    _DERIVACOES = ('texto_upper', 'linhas', 'linhas_upper', 'compacto', 'deteccao_fidc', 'fidc', 'ancoras',
+                   'linha_digitavel')
+
+    # Quantidade de PDFs efetivamente lidos por objetos ParsedBoleto
+    # (usado em testes e no diagnóstico de desempenho)
+    leituras_pdf = 0
+
+    def __init__(self, texto: Optional[str] = None, caminho: Optional[str] = None,
+                 parar_quando: Optional[Callable[["ParsedBoleto"], bool]] = None,
+                 motor: Optional[str] = None):
+        self.caminho = caminho
+        self.erro = None
+        self.parar_quando = parar_quando
+        # Motor de extração usado (None = escolhido pelo FIDC na leitura)
+        self.motor = motor
+        self.motor_fallback = False
+        self._motor_fixo = motor is not None
+        self.paginas_lidas = 0
+        self.completo = texto is not None
+        self._texto = texto
+        # Origem de valor/vencimento na última extração (codigo_barras.contar_origens)
+        self.origens = {}
+
+    # ==================== CONSTRUTORES ====================
+
+    @classmethod
+    def de_arquivo(cls, caminho: str, parcial: bool = False, motor: Optional[str] = None) -> "ParsedBoleto":
+        """
+        Cria documento a partir de um PDF (lido no primeiro acesso)
+
+        Args:
+            caminho: Caminho do PDF
+            parcial: True = para de ler páginas quando os campos obrigatórios
+                     do FIDC detectado já aparecem no texto
+            motor: Força um motor de extração ("pdfplumber"/"pdfium"), sem
+                   troca por FIDC nem fallback. None = MOTOR_PDF_POR_FIDC
+        """
+        return cls(caminho=caminho, parar_quando=campos_obrigatorios_encontrados if parcial else None,
+                   motor=motor)
+
+    @classmethod
+    def de_texto(cls, texto: str, caminho: Optional[str] = None) -> "ParsedBoleto":
+        """Cria documento a partir de texto já extraído"""
+        return cls(texto=texto or "", caminho=caminho)
+
+    @classmethod
+    def de(cls, origem: Union[str, "ParsedBoleto"]) -> "ParsedBoleto":
+        """
+        Converte texto em ParsedBoleto (ou devolve o próprio objeto).
+
+        Usado pelos extratores para aceitar tanto str quanto ParsedBoleto.
+        """
+        if isinstance(origem, cls):
+            return origem
+        return cls.de_texto(origem)
+
+    # ==================== TEXTO ====================
+
+    @property
+    def texto(self) -> str:
+        """Texto do boleto (lê o PDF na primeira chamada)"""
+        if self._texto is None:
+            self._ler_pdf()
+        return self._texto
+
+    def _ler_pdf(self) -> None:
+        self._texto = ""
+        if not self.caminho:
+            self.completo = True
+            return
+
+        # Import tardio: extratores não dependem de pdfplumber/config
+        import pdf_texto
+
+        ParsedBoleto.leituras_pdf += 1
+        motor_inicial = self.motor or pdf_texto.motor_para_fidc(None)
+        self._ler_paginas(motor_inicial)
+        if self._motor_fixo:
+            return
+
+        # FIDC detectado tem outro motor configurado: só relê se o texto da
+        # primeira leitura não serve ou se o FIDC exige o motor de referência
+        texto_confere = not self.erro and campos_obrigatorios_encontrados(self)
+        motor_fidc = pdf_texto.motor_para_fidc(self.fidc)
+        if motor_fidc != self.motor and (not texto_confere or motor_fidc == pdf_texto.MOTOR_SEGURO):
+            self._ler_paginas(motor_fidc)
+            texto_confere = not self.erro and campos_obrigatorios_encontrados(self)
+
+        # Texto do motor rápido não passou na conferência do extrator:
+        # reler com o motor de referência
+        if self.motor != pdf_texto.MOTOR_SEGURO and not texto_confere:
+            self.motor_fallback = True
+            self._ler_paginas(pdf_texto.MOTOR_SEGURO)
+
+    def _ler_paginas(self, motor: str) -> None:
+        """Lê as páginas com o motor indicado (respeitando parar_quando)"""
+        import pdf_texto
+
+        self.motor = motor
+        self.erro = None
+        self.completo = False
+        paginas = []
+        iterador = pdf_texto.iterar_paginas_pdf(self.caminho, motor=motor)
+        try:
+            for pagina in iterador:
+                paginas.append(pagina)
+                self.paginas_lidas = len(paginas)
+                if self.parar_quando is None:
+                    continue
+
+                # Leitura parcial: reavaliar os campos com o texto até aqui
+                self._texto = pdf_texto.juntar_paginas(paginas)
+                self._limpar_derivacoes()
+                if self.parar_quando(self):
+                    return
+            self.completo = True
+        except Exception as e:
+            self.erro = str(e)
+        finally:
+            iterador.close()
+            self._texto = pdf_texto.juntar_paginas(paginas)
+            self._limpar_derivacoes()
+
+    def carregar_completo(self) -> "ParsedBoleto":
+        """Garante que o texto cobre todas as páginas do PDF"""
+        if self.completo or not self.caminho:
+            return self
+
+        parar_quando, self.parar_quando = self.parar_quando, None
+        try:
+            if self._texto is None:
+                self._ler_pdf()
+            else:
+                # Continuação da mesma leitura, com o mesmo motor
+                self._ler_paginas(self.motor)
+        finally:
+            self.parar_quando = parar_quando
+        return self
+
+    def _limpar_derivacoes(self) -> None:
+        for nome in self._DERIVACOES:
+            self.__dict__.pop(nome, None)
+        self.origens = {}
+
+    @property
+    def nome_arquivo(self) -> str:
+        """Nome do arquivo de origem (para mensagens de log)"""
+        return os.path.basename(self.caminho) if self.caminho else "<texto>"
+
+    @property
+    def vazio(self) -> bool:
+        """True se o boleto não tem texto utilizável"""
+        return not self.texto.strip()
+
+    # ==================== DERIVAÇÕES MEMOIZADAS ====================
+
+    @cached_property
+    def texto_upper(self) -> str:
+        return self.texto.upper()
+
+    @cached_property
+    def linhas(self) -> List[str]:
+        return self.texto.splitlines()
+
+    @cached_property
+    def linhas_upper(self) -> List[str]:
+        return [linha.upper() for linha in self.linhas]
+
+    @cached_property
+    def ancoras(self) -> "MapaAncoras":
+        """Índices das linhas de cada rótulo de ANCORAS (uma varredura)"""
+        return MapaAncoras(self.linhas_upper)
+
+    @cached_property
+    def linha_digitavel(self) -> Optional[LinhaDigitavel]:
+        """Linha digitável com dígitos verificadores corretos (ou None)"""
+        return linha_digitavel_das_linhas(self.linhas)
+
+    @cached_property
+    def compacto(self) -> str:
+        """Texto com espaços/quebras colapsados (regex de 'mesma linha')"""
+        return ESPACOS.sub(' ', self.texto).strip()
+
+    @cached_property
+    def deteccao_fidc(self) -> Optional[DeteccaoFIDC]:
+        """FIDC, palavra-chave e posição (detector único do FIDC_CONFIG)"""
+        return detectar_fidc(self.texto_upper)
+
+    @cached_property
+    def fidc(self) -> Optional[str]:
+        """
+        FIDC detectado pelas palavras-chave do FIDC_CONFIG (ordem do config).
+
+        Returns:
+            Chave do FIDC ou None se nenhuma palavra-chave aparecer
+        """
+        deteccao = self.deteccao_fidc
+        return deteccao.fidc if deteccao else None
+
+    # ==================== COMPATIBILIDADE ====================
+
+    def __str__(self) -> str:
+        return self.texto
+
+    def __bool__(self) -> bool:
+        return not self.vazio
+
+    def __repr__(self) -> str:
+        origem = self.caminho or "<texto>"
+        return f"<ParsedBoleto origem='{origem}' carregado={self._texto is not None}>"
+
+
+# Tipo aceito pelos métodos dos extratores
+TextoBoleto = Union[str, ParsedBoleto]
+
+
+# ==================== ÂNCORAS ====================
+
+# Rótulos procurados nas linhas em maiúsculas pelos extratores
+ANCORAS = ('DESTINAT', 'REMETENTE', 'PAGADOR', 'VENCIMENTO', 'MERO DA NOTA', 'MERO DO DOCUMENTO', 'FATURA')
+
+
+class MapaAncoras:
+    """
+    Rótulo -> índices (em ordem) das linhas em maiúsculas que o contêm.
+
+    Uso:
+        for i in doc.ancoras['VENCIMENTO']: ...
+        for i in doc.ancoras.com_todas('DESTINAT', 'REMETENTE'): ...
+    """
+
+    __slots__ = ('_indices',)
+
+    def __init__(self, linhas_upper: List[str], ancoras=ANCORAS):
+        indices = {ancora: [] for ancora in ancoras}
+        itens = tuple(indices.items())
+        for i, linha in enumerate(linhas_upper):
+            for ancora, lista in itens:
+                if ancora in linha:
+                    lista.append(i)
+        self._indices = indices
+
+    def __getitem__(self, ancora: str) -> List[int]:
+        return self._indices[ancora]
+
+    def __contains__(self, ancora: str) -> bool:
+        """True se alguma linha tem o rótulo"""
+        return bool(self._indices.get(ancora))
+
+    def com_todas(self, *ancoras: str) -> List[int]:
+        """Linhas que contêm todos os rótulos (ex: DESTINAT e REMETENTE)"""
+        primeira, *outras = ancoras
+        if not outras:
+            return self._indices[primeira]
+        comuns = set(self._indices[primeira]).intersection(*(self._indices[a] for a in outras))
+        return sorted(comuns)
+
+    def __repr__(self) -> str:
+        contagem = ', '.join(f"{a}={len(l)}" for a, l in self._indices.items() if l)
+        return f"<MapaAncoras {contagem}>"
+
+
+def campos_obrigatorios_encontrados(doc: ParsedBoleto) -> bool:
+    """
+    Condição de parada da leitura parcial: FIDC detectado e todos os
+    campos obrigatórios do extrator desse FIDC presentes no texto lido.
+
+    Enquanto o FIDC não aparece, continua lendo.
+    """
+    fidc = doc.fidc
+    if not fidc:
+        return False
+
+    # Import tardio (factory importa os extratores, que importam este módulo)
+    from .factory import ExtractorFactory
+
+    return ExtractorFactory.get_extractor(fidc).campos_satisfeitos(doc)
@@ -0,0 +1,317 @@
+# ===============================================
+# Padrões Regex - Registro Compilado (Todos os FIDCs)
+# ===============================================
+#
+# Os extratores chamavam re.search(r'...', linha) com o padrão escrito
+# dentro dos laços (ex: CPF/CNPJ testados linha a linha em
+# extrair_cnpj_cpf_boleto). Cada chamada passava pelo cache interno do
+# módulo re (hash do padrão + flags) antes de casar. Aqui todos os
+# padrões são compilados UMA vez, na importação, e recebem um nome.
+#
+# Contadores por padrão (chamadas, acertos, tempo):
+# - desligados por padrão: padrao.search É o método do regex compilado
+#   (nenhum custo extra por chamada)
+# - habilitar_medicao(True) troca os métodos por versões que contam;
+#   estatisticas() / imprimir_estatisticas() mostram o resultado
+#
+# Uso:
+#   from .padroes import CPF_FORMATADO, DATA_DIA_MES
+#
+#   match = DATA_DIA_MES.search(linha)
+#
+#   habilitar_medicao(True)
+#   ...
+#   imprimir_estatisticas()
+#
+# ===============================================
+
+import re
+import time
+from typing import Dict, List
+
+# nome -> Padrao (ordem de registro)
+PADROES: Dict[str, "Padrao"] = {}
+
+# Métodos do regex compilado expostos por Padrao
+_METODOS = ('search', 'match', 'fullmatch', 'findall', 'finditer', 'sub', 'split')
+
+_medindo = False
+
+
+class Padrao:
+    """
+    Regex compilado com nome e contadores de uso.
+
+    Expõe os métodos do re.Pattern (search, match, findall, sub...).
+    Acerto = resultado "verdadeiro" (match encontrado, lista não vazia,
+    texto alterado no sub).
+    """
+
+    __slots__ = ('nome', 'regex', 'chamadas', 'acertos', 'tempo_ns') + _METODOS
+
+    def __init__(self, nome: str, padrao: str, flags: int = 0):
+        self.nome = nome
+        self.regex = re.compile(padrao, flags)
+        self.zerar()
+        self._ligar_metodos(_medindo)
+
+    @property
+    def pattern(self) -> str:
+        return self.regex.pattern
+
+    @property
+    def flags(self) -> int:
+        return self.regex.flags
+
+    def zerar(self) -> None:
+        self.chamadas = 0
+        self.acertos = 0
+        self.tempo_ns = 0
+
+    def _ligar_metodos(self, medir: bool) -> None:
+        for metodo in _METODOS:
+            original = getattr(self.regex, metodo)
+            setattr(self, metodo, self._medido(original, metodo) if medir else original)
+
+    def _medido(self, original, metodo: str):
+        relogio = time.perf_counter_ns
+
+        def medido(*args, **kwargs):
+            inicio = relogio()
+            resultado = original(*args, **kwargs)
+            self.tempo_ns += relogio() - inicio
+            self.chamadas += 1
+            if metodo == 'sub':
+                texto = args[1] if len(args) > 1 else kwargs.get('string')
+                if resultado != texto:
+                    self.acertos += 1
+            elif metodo != 'finditer' and resultado:
+                self.acertos += 1
+            return resultado
+
+        return medido
+
+    def __repr__(self) -> str:
+        return f"<Padrao {self.nome} chamadas={self.chamadas} acertos={self.acertos}>"
+
+
+def registrar(nome: str, padrao: str, flags: int = 0) -> Padrao:
+    """
+    Compila e registra um padrão com nome.
+
+    Registrar de novo o mesmo nome com o mesmo padrão devolve o objeto
+    existente; com padrão diferente é erro (nomes são únicos).
+    """
+    existente = PADROES.get(nome)
+    if existente is not None:
+        if existente.pattern != padrao or existente.regex.flags != re.compile(padrao, flags).flags:
+            raise ValueError(f"Padrão '{nome}' já registrado com outra expressão")
+        return existente
+    PADROES[nome] = Padrao(nome, padrao, flags)
+    return PADROES[nome]
+
+
+def obter(nome: str) -> Padrao:
+    """Padrão registrado pelo nome (KeyError se não existir)."""
+    return PADROES[nome]
+
+
+# ==================== MEDIÇÃO ====================
+
+def habilitar_medicao(habilitada: bool = True) -> bool:
+    """
+    Liga/desliga os contadores de todos os padrões.
+
+    Returns:
+        Valor anterior
+    """
+    global _medindo
+    anterior = _medindo
+    _medindo = habilitada
+    for padrao in PADROES.values():
+        padrao._ligar_metodos(habilitada)
+    return anterior
+
+
+def zerar_contadores() -> None:
+    for padrao in PADROES.values():
+        padrao.zerar()
+
+
+def estatisticas() -> List[dict]:
+    """Contadores dos padrões usados, do mais caro para o mais barato."""
+    linhas = [
+        {'nome': p.nome, 'chamadas': p.chamadas, 'acertos': p.acertos, 'tempo_ms': p.tempo_ns / 1e6}
+        for p in PADROES.values() if p.chamadas
+    ]
+    return sorted(linhas, key=lambda linha: linha['tempo_ms'], reverse=True)
+
+
+def imprimir_estatisticas(limite: int = 20) -> None:
+    linhas = estatisticas()
+    print()
+    print("[REGEX] ============================================================")
+    print(f"[REGEX] {'padrão':<34} {'chamadas':>9} {'acertos':>8} {'tempo (ms)':>11}")
+    for linha in linhas[:limite]:
+        print(f"[REGEX] {linha['nome']:<34} {linha['chamadas']:>9} {linha['acertos']:>8} {linha['tempo_ms']:>11.2f}")
+    if not linhas:
+        print("[REGEX] (nenhuma chamada medida - use habilitar_medicao(True))")
+    print("[REGEX] ============================================================")
+
+
+# ==================== DATAS ====================
+
+DATA_DIA_MES = registrar('data_dia_mes', r'(\d{2})/(\d{2})/\d{4}')
+DATA_COMPLETA = registrar('data_completa', r'(\d{2}/\d{2}/\d{4})')
+DATA_DIA_MES_SEPARADOR = registrar('data_dia_mes_separador', r'(\d{2})[/-](\d{2})')
+VENCIMENTO_DD_MM = registrar('vencimento_dd_mm', r'(\d{2})-(\d{2})')
+VENCIMENTO_APOS_ROTULO = registrar('vencimento_apos_rotulo', r'Vencimento\s+(\d{2}/\d{2}/\d{4})', re.IGNORECASE)
+VENCIMENTO_ROTULADO = registrar(
+    'vencimento_rotulado', r'Vencimento[:\s\n]*(\d{2}[\/\-]\d{2}[\/\-]\d{2,4})', re.IGNORECASE | re.MULTILINE
+)
+VENCIMENTO_AMPLO = registrar(
+    'vencimento_amplo', r'(?:venc|data|pagamento)[:\s]*(\d{2}[\/\-]\d{2}[\/\-]\d{2,4})', re.IGNORECASE
+)
+
+# ==================== NÚMERO DA NOTA ====================
+
+NOTA_6_DIGITOS = registrar('nota_6_digitos', r'0?(\d{6})')
+NOTA_DOCUMENTO = registrar('nota_documento', r'0?(\d{6})(?:/\d{3})?')
+NOTA_DOCUMENTO_PARCELA = registrar('nota_documento_parcela', r'0?(\d{6})/\d{3}')
+NOTA_ARQUIVO_COM_SERIE = registrar('nota_arquivo_com_serie', r'\d+-0?(\d{6})\.')
+NOTA_ARQUIVO = registrar('nota_arquivo', r'^0?(\d{6})\.')
+# Nome gerado pela renomeação: "NOME - NF 310284 - DATA - VALOR.pdf"
+NOTA_NOME_RENOMEADO = registrar('nota_nome_renomeado', r'NF\s+(\d{6})', re.IGNORECASE)
+
+NUMERO_DOCUMENTO_PROXIMA_LINHA = registrar(
+    'numero_documento_proxima_linha', r'N[u�úü]mero\s+do\s+Documento.*?\n\s*(\d{6}[/\d]*)', re.IGNORECASE | re.DOTALL
+)
+NUMERO_DOCUMENTO_MESMA_LINHA = (
+    registrar('numero_documento_6_digitos', r'N[u�úü]mero\s+(?:do\s+)?Documento[:\s]*(\d{6})', re.IGNORECASE),
+    registrar('numero_documento_digitos', r'N[u�úü]mero\s+do\s+Documento[:\s]*(\d+)', re.IGNORECASE),
+)
+NUMERO_DOCUMENTO_ABREVIADO = registrar('numero_documento_abreviado', r'n[º°]?\s+do\s+documento[:\s]*(\d{6})', re.IGNORECASE)
+NUMERO_NOTA_FALLBACK = (
+    registrar('nota_nosso_numero', r'Nosso\s+N(?:úmero|umero)[:\s]*(?:\d+-)?(\d{6,})', re.IGNORECASE),
+    registrar('nota_seu_numero', r'Seu\s+N(?:úmero|umero)[:\s]*(\d{6,})', re.IGNORECASE),
+    registrar('nota_n_doc', r'N[ºo°]\.?\s*Doc(?:umento)?[:\s]*(\d{6,})', re.IGNORECASE),
+    registrar('nota_fiscal_rotulada', r'Nota\s+Fiscal[:\s]*(\d{6,})', re.IGNORECASE),
+    registrar('nota_nf_rotulada', r'NF[:\s]*(\d{6,})', re.IGNORECASE),
+)
+
+# ==================== VALOR ====================
+
+VALOR_BR = registrar('valor_br', r'\d{1,3}(?:\.\d{3})*,\d{2}')
+VALOR_FATURA = registrar(
+    'valor_fatura',
+    r'FATURA.*?[\r\n]+.*?[\r\n]+\s*\d{3}\s+\d{2}/\d{2}/\d{4}\s+(\d{1,3}(?:\.\d{3})*,\d{2})(?:\s|$)',
+    re.IGNORECASE | re.DOTALL
+)
+# "(=) Valor Documento" e "Valor Documento", nessa ordem
+VALOR_DOCUMENTO = (
+    registrar('valor_documento_igual', r'\(=\)\s*Valor\s+(?:do\s+)?Documento\s*[:\s]*(?:R\$\s*)?([\d\.\,]+)',
+              re.IGNORECASE | re.MULTILINE),
+    registrar('valor_documento', r'Valor\s+(?:do\s+)?Documento\s*[:\s]*(?:R\$\s*)?([\d\.\,]+)',
+              re.IGNORECASE | re.MULTILINE),
+)
+VALOR_DOCUMENTO_CREDVALE = registrar(
+    'valor_documento_credvale', r'\(=\)\s*Valor\s+do\s+Documento\s+[\d/\s\w]+?\s+([\d\.\,]+)', re.IGNORECASE | re.MULTILINE
+)
+VALOR_DOCUMENTO_COM_CREDVALE = VALOR_DOCUMENTO + (VALOR_DOCUMENTO_CREDVALE,)
+VALOR_APOS_NUMERO_E_DATA = registrar('valor_apos_numero_e_data', r'\d{6}[/\d]*\s+\d{2}/\d{2}/\d{4}\s+([\d\.\,]+)')
+VALOR_APOS_DATA = registrar('valor_apos_data', r'\d{2}/\d{2}/\d{4}\s+([\d\.\,]+)')
+VALOR_APOS_RS = registrar('valor_apos_rs', r'R\$\s*([\d\.\,]+)')
+LINHA_DIGITAVEL_VALOR = registrar(
+    'linha_digitavel_valor', r'\d{5}\.\d{5}\s+\d{5}\.\d{6}\s+\d{5}\.\d{6}\s+\d\s+(\d{14})'
+)
+INICIO_LINHA_DIGITAVEL = registrar('inicio_linha_digitavel', r'^\d{5}\.\d{5}\s+\d{5}')
+# Linha digitável completa (boleto de 47 ou arrecadação de 48 dígitos),
+# com ou sem pontos/espaços; decodificada em codigo_barras.py
+LINHA_DIGITAVEL = registrar(
+    'linha_digitavel',
+    r'(?<!\d)(?:\d{5}\.?\d{5}[ \t]*\d{5}\.?\d{6}[ \t]*\d{5}\.?\d{6}[ \t]*\d[ \t]*\d{14}'
+    r'|8\d{10}-?\d[ \t]*\d{11}-?\d[ \t]*\d{11}-?\d[ \t]*\d{11}-?\d)(?!\d)'
+)
+
+# Valor total no PDF da nota fiscal, do rótulo mais confiável ao mais genérico
+VALOR_TOTAL_NOTA = (
+    registrar('valor_total_nota', r'Valor\s+Total\s+(?:da\s+)?(?:Nota|NF)[:\s]*R?\$?\s*([\d\.\,]+)', re.IGNORECASE),
+    registrar('total_nota', r'Total\s+(?:da\s+)?(?:Nota|NF)[:\s]*R?\$?\s*([\d\.\,]+)', re.IGNORECASE),
+    registrar('valor_nf', r'Valor\s+NF[:\s]*R?\$?\s*([\d\.\,]+)', re.IGNORECASE),
+)
+
+# ==================== CPF / CNPJ ====================
+
+CPF_FORMATADO = registrar('cpf_formatado', r'(\d{3}\.\d{3}\.\d{3}-\d{2})')
+CNPJ_FORMATADO = registrar('cnpj_formatado', r'(\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2})')
+CPF_ROTULADO = registrar('cpf_rotulado', r'CPF[:\s]*(\d{3}\.\d{3}\.\d{3}-\d{2})', re.IGNORECASE)
+CNPJ_ROTULADO = registrar('cnpj_rotulado', r'CNPJ[:\s]*(\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2})', re.IGNORECASE)
+PONTUACAO_CPF = registrar('pontuacao_cpf', r'[.-]')
+PONTUACAO_CNPJ = registrar('pontuacao_cnpj', r'[./-]')
+NAO_DIGITO = registrar('nao_digito', r'\D')
+
+CNPJ_DANFE_DESTINATARIO = registrar(
+    'cnpj_danfe_destinatario',
+    r'DESTINAT[AÁ]RIO.*?REMETENTE.*?CNPJ[\/\s]*CPF.*?[\r\n]+.*?(\d{2,3}[\.\s]?\d{3}[\.\s]?\d{3}[\/\-\s]?\d{2,4}[\-\s]?\d{2})',
+    re.IGNORECASE | re.DOTALL
+)
+CNPJ_DANFE = registrar(
+    'cnpj_danfe',
+    r'DESTINAT[AÁ]RIO.*?CNPJ[\/\s]*CPF.*?[\r\n]+.*?(\d{2,3}[\.\s]?\d{3}[\.\s]?\d{3}[\/\-\s]?\d{2,4}[\-\s]?\d{2})',
+    re.IGNORECASE | re.DOTALL
+)
+CNPJ_PAGADOR_NOVAX = registrar(
+    'cnpj_pagador_novax',
+    r'Pagador:\s*([A-Z\s]+)\s+CNPJ[\/\s]*CPF\s*[:\s]*(\d{2}\.\d{3}\.\d{3}\/\d{4}\-\d{2})', re.IGNORECASE
+)
+CPF_PAGADOR_NOVAX = registrar(
+    'cpf_pagador_novax',
+    r'Pagador:\s*([A-Z\s]+)\s+CNPJ[\/\s]*CPF\s*[:\s]*(\d{3}\.\d{3}\.\d{3}\-\d{2})', re.IGNORECASE
+)
+SECAO_PAGADOR = registrar(
+    'secao_pagador',
+    r'Pagador[:\s]+(.*?)(?:Instruções|Autenticação|Demonstrativo|Sacador|Código de Baixa|Beneficiário Final|$)',
+    re.IGNORECASE | re.DOTALL
+)
+# CPF/CNPJ dentro da seção do Pagador, do mais específico ao mais genérico
+_DOC = r'(\d{2,3}[\.\s]?\d{3}[\.\s]?\d{3}[\/\-\s]?\d{2,4}[\-\s]?\d{2})'
+CNPJ_SECAO_PAGADOR = (
+    registrar('cnpj_secao_hifen', r'[-]\s*(?:CNPJ|CPF)[:\s]+' + _DOC, re.IGNORECASE),            # SQUID
+    registrar('cnpj_secao_virgula', r',\s*(?:CNPJ|CPF)[:\s]+' + _DOC, re.IGNORECASE),            # CAPITAL RS
+    registrar('cnpj_secao_epp', r'[-]\s*EPP\s*[-]\s*' + _DOC, re.IGNORECASE),                    # CREDVALE
+    registrar('cnpj_secao_rotulo', r'CNPJ[\/\s]*(?:CPF)?[:\s]+' + _DOC, re.IGNORECASE),          # NOVAX
+    registrar('cnpj_secao_qualquer', r'(\d{2}[\.\s]?\d{3}[\.\s]?\d{3}[\/\s]?\d{4}[\-\s]?\d{2})', re.IGNORECASE),
+    registrar('cpf_secao_qualquer', r'(\d{3}[\.\s]?\d{3}[\.\s]?\d{3}[\-\s]?\d{2})', re.IGNORECASE),
+)
+# Mesma lista aceitando travessão (–) além do hífen (usada no envio)
+CNPJ_SECAO_PAGADOR_TRAVESSAO = (
+    registrar('cnpj_secao_hifen_travessao', r'[-–]\s*(?:CNPJ|CPF)[:\s]+' + _DOC, re.IGNORECASE),
+    CNPJ_SECAO_PAGADOR[1],
+    registrar('cnpj_secao_epp_travessao', r'[-–]\s*EPP\s*[-–]\s*' + _DOC, re.IGNORECASE),
+) + CNPJ_SECAO_PAGADOR[3:]
+CNPJ_FORA_DE_VALOR = registrar(
+    'cnpj_fora_de_valor', r'(?<!R\$\s)(\d{2}[\.\s]?\d{3}[\.\s]?\d{3}[\/]\d{4}[\-]\d{2})', re.IGNORECASE
+)
+
+# ==================== PAGADOR ====================
+
+PAGADOR_ROTULADO = registrar(
+    'pagador_rotulado', r'Pagador:\s*([A-Z0-9][A-Z0-9\s\.\-&]+?)(?:\s+CNPJ[/\s]|\s+CPF)', re.IGNORECASE
+)
+PAGADOR_PROXIMA_LINHA = registrar(
+    'pagador_proxima_linha', r'Pagador\s*\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s\.\-&]+?)\s*-\s*(?:CNPJ|CPF)', re.IGNORECASE | re.MULTILINE
+)
+
+# Limpeza do nome lido (normalizacao_nomes.limpar_nome_pagador): corta em
+# ",", "CNPJ", "CPF", "Beneficiario" e tira o documento colado no fim
+CORTE_NOME_PAGADOR = registrar('corte_nome_pagador', r',|CNPJ|CPF|Beneficiario', re.IGNORECASE)
+DOC_COM_HIFEN_NO_NOME = registrar(
+    'doc_com_hifen_no_nome', r'\s*-\s*\d{2,3}[\.\s]*\d{3}[\.\s]*\d{3}[/-]?\d{0,4}[-]?\d{0,2}.*$'
+)
+DOC_NO_FIM_DO_NOME = registrar(
+    'doc_no_fim_do_nome', r'\s+\d{2,3}[\.\s]?\d{3}[\.\s]?\d{3}[\/\-\s]?\d{2,4}[\-\s]?\d{2}.*$'
+)
+
+# ==================== TEXTO ====================
+
+ESPACOS = registrar('espacos', r'\s+')
@@ -0,0 +1,390 @@
+"""
+================================================================================
+indice_nfe.py - Índices em Memória sobre o Mapa de NFe
+================================================================================
+
+O matching boleto -> XML percorria o mapa_xmls inteiro para cada boleto
+(O(boletos x XMLs)). Este módulo monta, uma vez por mapa, dicionários
+auxiliares para que cada busca seja O(1) em média:
+
+- por CPF/CNPJ do destinatário
+- por (CPF/CNPJ, dia, mês) do vencimento de uma duplicata
+- por (CPF/CNPJ, vencimento 'YYYY-MM-DD', valor da duplicata em centavos)
+- por valor total da nota em centavos
+- por nome do destinatário (tokens/trigramas, montado sob demanda em
+  motor_nomes() - ver similaridade_nomes.py)
+
+Cada entrada guarda a POSIÇÃO da chave no mapa_xmls, então as buscas
+devolvem exatamente o que o laço antigo devolvia (a primeira nota, na
+ordem do mapa, que satisfaz a regra).
+
+Uso:
+    indice = obter_indice_nfe(mapa_xmls)
+    numero_nota, dados_xml, duplicata = indice.buscar_por_cnpj_e_vencimento(cnpj, "17", "11")
+
+Autor: Sistema de Boletos v7.1
+Data: 2026-10-17
+================================================================================
+"""
+
+
+from bisect import insort
+
+from registro_nfe import NFeRecord
+from normalizacao_nomes import normalizar_nome_empresa
+from similaridade_nomes import MotorNomes, LIMIAR_NOME_SIMILAR, TOP_K_CANDIDATOS
+
+
+def _centavos(valor) -> int:
+    """Mesma conversão usada no matching: int(valor * 100), 0 se vazio."""
+    return int(valor * 100) if valor else 0
+
+
+def _chaves_da_nota(dados) -> tuple:
+    """
+    Calcula uma vez as chaves de índice de uma nota.
+
+    Returns:
+        (cpf_cnpj_busca, parcela_unica, vencimentos, duplicatas, centavos_total)
+        - parcela_unica: (duplicata|None,) se a nota tem 0 ou 1 duplicata, senão None
+        - vencimentos: [((cpf_cnpj, dia, mês), duplicata)]
+        - duplicatas: [((cpf_cnpj, 'YYYY-MM-DD', centavos), duplicata)]
+    """
+    if isinstance(dados, NFeRecord):
+        # Registro compacto: centavos já calculados
+        cpf_cnpj = dados.cpf_cnpj
+        cpf_cnpj_busca = cpf_cnpj or dados.cnpj
+        duplicatas = dados.duplicatas
+        valores = [dup.valor_cents for dup in duplicatas]
+        vencimentos_texto = [dup.vencimento for dup in duplicatas]
+        centavos_total = dados.valor_total_cents
+    else:
+        cpf_cnpj = dados.get('cpf_cnpj', '')
+        cpf_cnpj_busca = cpf_cnpj or dados.get('cnpj', '')
+        duplicatas = dados.get('duplicatas', [])
+        valores = [_centavos(dup['valor']) for dup in duplicatas] if cpf_cnpj else []
+        vencimentos_texto = [dup.get('vencimento') for dup in duplicatas]
+        centavos_total = _centavos(dados.get('valor_total')) if dados.get('xml_valido') else 0
+
+    parcela_unica = None
+    vencimentos = []
+    if cpf_cnpj_busca:
+        if len(duplicatas) <= 1:
+            parcela_unica = (duplicatas[0] if duplicatas else None,)
+        for dup, venc in zip(duplicatas, vencimentos_texto):
+            partes = (venc or '').split('-')  # "2025-11-17"
+            if len(partes) == 3:
+                vencimentos.append(((cpf_cnpj_busca, partes[2], partes[1]), dup))
+
+    chaves_duplicata = []
+    if cpf_cnpj:
+        chaves_duplicata = [
+            ((cpf_cnpj, venc, centavos), dup)
+            for dup, venc, centavos in zip(duplicatas, vencimentos_texto, valores)
+        ]
+
+    return cpf_cnpj_busca, parcela_unica, vencimentos, chaves_duplicata, centavos_total
+
+
+class IndiceNFe:
+    """
+    Índices secundários de um mapa {numero_nota: dados_xml}.
+
+    Aceita o MapaNFe de indexar_xmls_por_nota ou um dicionário comum.
+    O mapa não deve ser alterado depois de indexado (ele é montado uma vez
+    por execução por indexar_xmls_por_nota); as exceções são as do modo
+    vigia: chaves NOVAS acrescentadas ao fim do mapa, que entram com
+    estender(), e chaves que passaram a apontar para outra nota, que são
+    reindexadas no lugar com substituir().
+    """
+
+    def __init__(self, mapa_xmls: dict):
+        self.mapa_xmls = mapa_xmls
+        self.entradas = list(mapa_xmls.items())  # posição -> (numero_nota, dados_xml)
+        self._posicao_da_chave = {numero_nota: posicao for posicao, (numero_nota, _) in enumerate(self.entradas)}
+
+        self.por_cnpj = {}              # cpf_cnpj -> [posição]
+        self.por_vencimento = {}        # (cpf_cnpj, dia, mês) -> (posição, duplicata) da 1ª nota
+        self.por_parcela_unica = {}     # cpf_cnpj -> (posição, duplicata|None) da 1ª nota com 0/1 duplicata
+        self.por_duplicata = {}         # (cpf_cnpj, 'YYYY-MM-DD', centavos) -> {posição: duplicata}
+        self.por_valor_total = {}       # centavos -> [posição] (só XMLs válidos)
+
+        # Nomes: montados só quando o matching por nome é usado
+        self._motor_nomes = None
+        self._nota_da_posicao = []      # posição -> posição da 1ª chave da mesma nota
+        self._posicoes_da_nota = {}     # posição da 1ª chave -> [posição] de todas as chaves
+
+        # A mesma nota aparece em duas chaves: calcular as chaves uma vez só
+        calculadas = {}
+        for posicao, (_, dados) in enumerate(self.entradas):
+            chaves = calculadas.get(id(dados))
+            if chaves is None:
+                chaves = calculadas[id(dados)] = _chaves_da_nota(dados)
+            self._indexar(posicao, *chaves)
+
+    def _indexar(self, posicao: int, cpf_cnpj_busca: str, parcela_unica, vencimentos: list,
+                 chaves_duplicata: list, centavos_total: int) -> None:
+        if cpf_cnpj_busca:
+            self.por_cnpj.setdefault(cpf_cnpj_busca, []).append(posicao)
+            if parcela_unica is not None:
+                self.por_parcela_unica.setdefault(cpf_cnpj_busca, (posicao, parcela_unica[0]))
+
+        for chave, dup in vencimentos:
+            self.por_vencimento.setdefault(chave, (posicao, dup))
+
+        for chave, dup in chaves_duplicata:
+            self.por_duplicata.setdefault(chave, {}).setdefault(posicao, dup)
+
+        if centavos_total > 0:
+            self.por_valor_total.setdefault(centavos_total, []).append(posicao)
+
+    def estender(self) -> int:
+        """
+        Indexa as chaves acrescentadas ao mapa depois da montagem.
+
+        Só vale para chaves novas (elas vão para o fim do mapa e as
+        posições antigas não mudam); uma chave que passou a apontar para
+        outra nota entra com substituir().
+
+        Returns:
+            Quantidade de chaves indexadas
+        """
+        inicio = len(self.entradas)
+        novas = list(self.mapa_xmls.items())[inicio:]
+        calculadas = {}
+        primeira_chave = {}
+        for posicao, (numero_nota, dados) in enumerate(novas, inicio):
+            self.entradas.append((numero_nota, dados))
+            self._posicao_da_chave[numero_nota] = posicao
+            chaves = calculadas.get(id(dados))
+            if chaves is None:
+                chaves = calculadas[id(dados)] = _chaves_da_nota(dados)
+            self._indexar(posicao, *chaves)
+
+            # Motor de nomes já montado: acrescenta a nota nele também
+            if self._motor_nomes is not None:
+                nota = primeira_chave.setdefault(id(dados), posicao)
+                self._nota_da_posicao.append(nota)
+                self._posicoes_da_nota.setdefault(nota, []).append(posicao)
+                if nota == posicao and dados.get('xml_valido'):
+                    self._motor_nomes.indexar(nota, dados.get('nome', ''))
+        return len(novas)
+
+    def substituir(self, chaves) -> int:
+        """
+        Reindexa, no lugar, chaves já indexadas que passaram a apontar
+        para outra nota (XML alterado no modo vigia).
+
+        A chave continua na mesma posição do mapa, então só as entradas
+        dessas posições saem e entram de novo; as "primeira nota" por
+        vencimento e por parcela única são recalculadas só para os
+        CPF/CNPJ envolvidos. Chaves ainda não indexadas ficam para
+        estender().
+
+        Returns:
+            Quantidade de chaves reindexadas
+        """
+        posicoes = [self._posicao_da_chave[chave] for chave in chaves if chave in self._posicao_da_chave]
+        cnpjs, vencimentos, grupos = set(), set(), set()
+
+        for posicao in posicoes:
+            numero_nota, antigo = self.entradas[posicao]
+            novo = self.mapa_xmls[numero_nota]
+            if self._motor_nomes is not None:
+                grupos.add(self._nota_da_posicao[posicao])
+
+            cpf_cnpj, _, venc_antigos, dups_antigas, total = _chaves_da_nota(antigo)
+            if cpf_cnpj:
+                self._retirar(self.por_cnpj, cpf_cnpj, posicao)
+                cnpjs.add(cpf_cnpj)
+            for chave, _ in dups_antigas:
+                por_posicao = self.por_duplicata[chave]
+                por_posicao.pop(posicao, None)
+                if not por_posicao:
+                    del self.por_duplicata[chave]
+            if total > 0:
+                self._retirar(self.por_valor_total, total, posicao)
+
+            self.entradas[posicao] = (numero_nota, novo)
+            cpf_cnpj, _, venc_novos, dups_novas, total = _chaves_da_nota(novo)
+            if cpf_cnpj:
+                insort(self.por_cnpj.setdefault(cpf_cnpj, []), posicao)
+                cnpjs.add(cpf_cnpj)
+            for chave, dup in dups_novas:
+                por_posicao = self.por_duplicata.setdefault(chave, {})
+                if posicao not in por_posicao:
+                    por_posicao[posicao] = dup
+                    self.por_duplicata[chave] = dict(sorted(por_posicao.items()))
+            if total > 0:
+                insort(self.por_valor_total.setdefault(total, []), posicao)
+            vencimentos.update(chave for chave, _ in venc_antigos + venc_novos)
+
+        # 1ª nota (na ordem do mapa) por vencimento e por parcela única dos CPF/CNPJ mexidos
+        for chave in vencimentos:
+            self.por_vencimento.pop(chave, None)
+        for cpf_cnpj in cnpjs:
+            self.por_parcela_unica.pop(cpf_cnpj, None)
+            for posicao in self.por_cnpj.get(cpf_cnpj, ()):
+                _, parcela_unica, venc, _, _ = _chaves_da_nota(self.entradas[posicao][1])
+                if parcela_unica is not None:
+                    self.por_parcela_unica.setdefault(cpf_cnpj, (posicao, parcela_unica[0]))
+                for chave, dup in venc:
+                    if chave in vencimentos:
+                        self.por_vencimento.setdefault(chave, (posicao, dup))
+
+        if grupos:
+            self._reagrupar_nomes(grupos, posicoes)
+        return len(posicoes)
+
+    @staticmethod
+    def _retirar(indice: dict, chave, posicao: int) -> None:
+        """Tira a posição da lista indice[chave] (e a chave, se a lista esvaziar)."""
+        lista = indice[chave]
+        lista.remove(posicao)
+        if not lista:
+            del indice[chave]
+
+    def _reagrupar_nomes(self, grupos: set, posicoes: list) -> None:
+        """Refaz, no motor de nomes já montado, as notas das posições substituídas."""
+        afetadas = set(posicoes)
+        for nota in grupos:
+            self._motor_nomes.remover(nota)
+            afetadas.update(self._posicoes_da_nota.pop(nota))
+
+        primeira_chave = {}
+        for posicao in sorted(afetadas):
+            dados = self.entradas[posicao][1]
+            nota = primeira_chave.setdefault(id(dados), posicao)
+            self._nota_da_posicao[posicao] = nota
+            self._posicoes_da_nota.setdefault(nota, []).append(posicao)
+            if nota == posicao and dados.get('xml_valido'):
+                self._motor_nomes.indexar(nota, dados.get('nome', ''))
+
+    def motor_nomes(self, normalizar=normalizar_nome_empresa) -> MotorNomes:
+        """
+        Nomes das notas já normalizados (uma vez por nota, não por chave).
+
+        Args:
+            normalizar: Função de normalização (padrão: normalizar_nome_empresa)
+        """
+        if self._motor_nomes is None or self._motor_nomes.normalizar is not normalizar:
+            motor = MotorNomes(normalizar)
+            primeira_chave = {}
+            self._nota_da_posicao = []
+            self._posicoes_da_nota = {}
+            for posicao, (_, dados) in enumerate(self.entradas):
+                nota = primeira_chave.setdefault(id(dados), posicao)
+                self._nota_da_posicao.append(nota)
+                self._posicoes_da_nota.setdefault(nota, []).append(posicao)
+                if nota == posicao and dados.get('xml_valido'):
+                    motor.indexar(nota, dados.get('nome', ''))
+            self._motor_nomes = motor
+        return self._motor_nomes
+
+    # -------------------- buscas --------------------
+    def buscar_por_cnpj_e_vencimento(self, cpf_cnpj: str, dia: str, mes: str) -> tuple:
+        """
+        Primeira nota (na ordem do mapa) do CPF/CNPJ que tem uma duplicata
+        no dia/mês informado, ou que tem no máximo uma duplicata.
+
+        Returns:
+            (numero_nota, dados_xml, duplicata|None) ou (None, None, None)
+        """
+        candidatos = [
+            achado for achado in (
+                self.por_vencimento.get((cpf_cnpj, dia, mes)),
+                self.por_parcela_unica.get(cpf_cnpj),
+            ) if achado is not None
+        ]
+        if not candidatos:
+            return (None, None, None)
+
+        posicao, duplicata = min(candidatos, key=lambda achado: achado[0])
+        numero_nota, dados_xml = self.entradas[posicao]
+        return (numero_nota, dados_xml, duplicata)
+
+    def duplicatas_com(self, cpf_cnpj: str, vencimento: str, valor_cents: int) -> dict:
+        """
+        Duplicatas com CPF/CNPJ + vencimento ('YYYY-MM-DD') + valor exatos.
+
+        Returns:
+            {posição: primeira duplicata da nota que bate}
+        """
+        return self.por_duplicata.get((cpf_cnpj, vencimento, valor_cents), {})
+
+    def posicoes_por_nome(self, consulta_normalizada: str, k: int = TOP_K_CANDIDATOS) -> list:
+        """
+        Posições (todas as chaves) das k notas de nome mais parecido.
+
+        Requer motor_nomes() chamado antes; consulta já normalizada por ele.
+        """
+        if self._motor_nomes is None:
+            return []
+        posicoes = []
+        for nota in self._motor_nomes.candidatos(consulta_normalizada, k):
+            posicoes.extend(self._posicoes_da_nota[nota])
+        return posicoes
+
+    def similaridade_nome(self, posicao: int, consulta_normalizada: str,
+                          minimo: float = LIMIAR_NOME_SIMILAR) -> float:
+        """Similaridade entre a consulta e o nome da nota na posição (0.0 abaixo do mínimo)."""
+        return self._motor_nomes.similaridade(consulta_normalizada, self._nota_da_posicao[posicao], minimo)
+
+    def candidatos(self, cpf_cnpj: str, valor_cents: int, posicoes_extras=()) -> list:
+        """
+        Notas com o mesmo CPF/CNPJ ou com o mesmo valor total (mais as
+        posicoes_extras, ex: de posicoes_por_nome), na ordem do mapa.
+
+        Returns:
+            [(posição, numero_nota, dados_xml)]
+        """
+        posicoes = set(self.por_cnpj.get(cpf_cnpj, ())) if cpf_cnpj else set()
+        if valor_cents > 0:
+            posicoes.update(self.por_valor_total.get(valor_cents, ()))
+        posicoes.update(posicoes_extras)
+        return [(posicao, *self.entradas[posicao]) for posicao in sorted(posicoes)]
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def __repr__(self):
+        return f"<IndiceNFe chaves={len(self.entradas)} cnpjs={len(self.por_cnpj)}>"
+
+
+# ==================== ÍNDICE DA EXECUÇÃO ====================
+_ultimo = None  # (mapa_xmls, IndiceNFe)
+
+
+def obter_indice_nfe(mapa_xmls: dict) -> IndiceNFe:
+    """
+    Retorna o índice do mapa, montado só na primeira chamada com ele.
+
+    Os extratores e o matching recebem o mesmo mapa_xmls para todos os
+    boletos da execução; o índice é refeito quando chega um mapa diferente.
+    """
+    global _ultimo
+    if _ultimo is None or _ultimo[0] is not mapa_xmls or len(_ultimo[1]) != len(mapa_xmls):
+        _ultimo = (mapa_xmls, IndiceNFe(mapa_xmls))
+    return _ultimo[1]
+
+
+def atualizar_indice_nfe(mapa_xmls: dict, substituidas=()) -> IndiceNFe:
+    """
+    Índice do mapa depois de notas acrescentadas com o índice já montado
+    (modo vigia: XML que chega em Notas/ enquanto o processo está no ar).
+
+    Args:
+        mapa_xmls: O mesmo mapa passado a obter_indice_nfe
+        substituidas: Chaves já existentes que mudaram de nota (XML
+                      alterado); só elas são reindexadas
+
+    Returns:
+        IndiceNFe em dia com o mapa
+    """
+    global _ultimo
+    if _ultimo is None or _ultimo[0] is not mapa_xmls or len(_ultimo[1]) > len(mapa_xmls):
+        _ultimo = (mapa_xmls, IndiceNFe(mapa_xmls))
+    else:
+        _ultimo[1].substituir(substituidas)
+        _ultimo[1].estender()
+    return _ultimo[1]
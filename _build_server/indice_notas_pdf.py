@@ -0,0 +1,111 @@
+"""
+================================================================================
+indice_notas_pdf.py - Índice dos PDFs de Notas Fiscais por Número
+================================================================================
+
+O envio procurava o PDF da nota de cada documento testando `base6 in
+digitos_do_arquivo` contra TODOS os arquivos da pasta, e ficava com o
+primeiro que aparecesse no os.listdir() (ordem não garantida). Aqui a
+pasta é lida uma vez (os.scandir) e cada arquivo vai para um dicionário
+pelo número de 6 dígitos da nota:
+
+- cada sequência de 6+ dígitos do nome contribui com os seus 6 últimos
+  ("3-0310227.pdf" -> "310227", "NF 310227 - 2.pdf" -> "310227")
+- número presente em mais de um arquivo é AMBÍGUO: vale o arquivo em que
+  ele é o único número; empatando, o primeiro em ordem alfabética (e o
+  envio avisa quais eram as alternativas)
+- número fora do dicionário cai na busca antiga por substring, na ordem
+  alfabética (nomes fora do padrão continuam sendo encontrados)
+
+Uso:
+    indice = IndiceNotasPDF(PASTA_NOTAS)
+    caminho = indice.buscar("310227")
+    indice.candidatos("310227")   # todos os arquivos com esse número
+
+Autor: Sistema de Boletos v7.1
+Data: 2026-10-17
+================================================================================
+"""
+
+import os
+import re
+
+_RE_DIGITOS = re.compile(r'\d+')
+_RE_NAO_DIGITO = re.compile(r'[^0-9]')
+
+
+def numeros_do_arquivo(nome_arquivo: str) -> list:
+    """Números de nota (6 dígitos) no nome do arquivo, sem repetir, na ordem"""
+    nome = os.path.splitext(nome_arquivo)[0]
+    numeros = [sequencia[-6:] for sequencia in _RE_DIGITOS.findall(nome) if len(sequencia) >= 6]
+    return list(dict.fromkeys(numeros))
+
+
+class IndiceNotasPDF:
+    """
+    PDFs de notas da pasta, indexados pelo número de 6 dígitos.
+
+    Args:
+        pasta: Pasta das notas fiscais (inexistente = índice vazio)
+    """
+
+    def __init__(self, pasta: str):
+        self.pasta = pasta
+        self.arquivos = []          # [(caminho, só os dígitos do nome)] em ordem alfabética
+        self.por_numero = {}        # número -> [caminho] em ordem alfabética
+        self._unico = set()         # caminhos cujo nome tem um número só
+
+        if not os.path.isdir(pasta):
+            return
+
+        with os.scandir(pasta) as entradas:
+            nomes = sorted(
+                entrada.name for entrada in entradas
+                if entrada.is_file() and entrada.name.lower().endswith(".pdf")
+            )
+
+        for nome in nomes:
+            caminho = os.path.join(pasta, nome)
+            self.arquivos.append((caminho, _RE_NAO_DIGITO.sub('', nome)))
+            numeros = numeros_do_arquivo(nome)
+            if len(numeros) == 1:
+                self._unico.add(caminho)
+            for numero in numeros:
+                self.por_numero.setdefault(numero, []).append(caminho)
+
+    def candidatos(self, numero: str) -> list:
+        """Todos os arquivos com esse número de nota no nome (ordem alfabética)"""
+        return list(self.por_numero.get(numero, ()))
+
+    def ambiguo(self, numero: str) -> bool:
+        """True se mais de um arquivo tem esse número"""
+        return len(self.por_numero.get(numero, ())) > 1
+
+    def buscar(self, numero: str) -> str | None:
+        """
+        Caminho do PDF da nota (ou None).
+
+        Ambíguo: prefere o arquivo em que o número é o único; depois o
+        primeiro em ordem alfabética. Sem entrada no índice: busca por
+        substring nos dígitos do nome (comportamento antigo).
+        """
+        if not numero:
+            return None
+
+        caminhos = self.por_numero.get(numero)
+        if caminhos:
+            for caminho in caminhos:
+                if caminho in self._unico:
+                    return caminho
+            return caminhos[0]
+
+        for caminho, digitos in self.arquivos:
+            if numero in digitos:
+                return caminho
+        return None
+
+    def __len__(self):
+        return len(self.arquivos)
+
+    def __repr__(self):
+        return f"<IndiceNotasPDF arquivos={len(self.arquivos)} numeros={len(self.por_numero)}>"
@@ -0,0 +1,110 @@
+"""
+================================================================================
+normalizacao_nomes.py - Normalização de Nomes de Clientes/Pagadores
+================================================================================
+
+Funções de normalização usadas pela renomeação, pelo envio e pelos
+extratores, num lugar só:
+
+- remover_acentos: passo de unidecode compartilhado ("JOÃO" -> "JOAO")
+- normalizar_nome_empresa: nome para matching (sem acentos, pontuação e
+  sufixos societários, abreviações expandidas)
+- normalizar_pagador: chave simples do pagador (maiúsculas, espaços únicos)
+- limpar_nome_pagador: tira CNPJ/CPF e lixo do nome lido no boleto
+
+Os padrões são compilados uma vez (sufixos e abreviações numa única
+alternância cada) e os resultados ficam num cache LRU pelo nome original:
+no matching o mesmo nome é normalizado milhares de vezes.
+
+Uso:
+    from normalizacao_nomes import normalizar_nome_empresa
+    normalizar_nome_empresa("Acme Eng. e Const. Ltda")  # "ACME ENGENHARIA E CONSTRUCAO"
+
+Autor: Sistema de Boletos v7.1
+Data: 2026-10-17
+================================================================================
+"""
+
+import re
+from functools import lru_cache
+
+from unidecode import unidecode
+
+from extractors.padroes import CORTE_NOME_PAGADOR, DOC_COM_HIFEN_NO_NOME, DOC_NO_FIM_DO_NOME
+
+# ==================== CONFIGURAÇÕES ====================
+# Nomes distintos guardados por função (uma execução tem ~20k notas)
+TAMANHO_MEMO_NOMES = 32768
+
+# Sufixos societários removidos do nome (a ordem define a prioridade
+# quando dois casam na mesma posição, como no laço de re.sub antigo)
+SUFIXOS_EMPRESA = (
+    'LTDA', 'LTD', 'LIMITADA',
+    'EIRELI', 'EPP', 'ME', 'MEI',
+    'S/A', 'SA', 'S.A.',
+    'SOCIEDADE', 'EMPRESARIAL',
+    'CIA', 'COMPANHIA',
+)
+
+# Abreviações comuns expandidas depois da remoção dos sufixos
+ABREVIACOES_EMPRESA = {
+    'ENG': 'ENGENHARIA',
+    'CONST': 'CONSTRUCAO',
+    'EMPREENDIMENTO': 'EMPREENDIMENTOS',
+    'EMPREENDIMENTOS': 'EMPREENDIMENTOS',
+    'SPE': 'SOCIEDADE PROPOSITO ESPECIFICO',
+}
+
+# ==================== PADRÕES ====================
+_RE_PONTUACAO = re.compile(r'[.,\-]')
+_RE_SUFIXOS = re.compile(r'\b(?:' + '|'.join(re.escape(sufixo) for sufixo in SUFIXOS_EMPRESA) + r')\b')
+_RE_ABREVIACOES = re.compile(r'\b(?:' + '|'.join(re.escape(abrev) for abrev in ABREVIACOES_EMPRESA) + r')\b')
+_RE_ESPACOS = re.compile(r'\s+')
+# Os do nome do pagador (limpar_nome_pagador) ficam no registro de
+# extractors/padroes.py, com os contadores dos extratores
+
+
+@lru_cache(maxsize=TAMANHO_MEMO_NOMES)
+def remover_acentos(texto: str) -> str:
+    """Transliteração para ASCII (unidecode), com cache."""
+    return unidecode(texto)
+
+
+@lru_cache(maxsize=TAMANHO_MEMO_NOMES)
+def normalizar_nome_empresa(nome: str) -> str:
+    """
+    Normaliza nome de empresa para matching mais flexível.
+    Remove acentos, sufixos comuns, pontuações, espaços extras.
+    """
+    if not nome:
+        return ""
+
+    # Sem acentos e em maiúsculas
+    nome_norm = remover_acentos(nome).upper().strip()
+
+    # Remover pontuação
+    nome_norm = _RE_PONTUACAO.sub(' ', nome_norm)
+
+    # Remover sufixos comuns de empresas
+    nome_norm = _RE_SUFIXOS.sub('', nome_norm)
+
+    # Expandir abreviações comuns
+    nome_norm = _RE_ABREVIACOES.sub(lambda m: ABREVIACOES_EMPRESA[m.group(0)], nome_norm)
+
+    # Remover espaços múltiplos
+    return _RE_ESPACOS.sub(' ', nome_norm).strip()
+
+
+@lru_cache(maxsize=TAMANHO_MEMO_NOMES)
+def normalizar_pagador(nome) -> str:
+    """Chave do pagador: espaços únicos, maiúsculas."""
+    return _RE_ESPACOS.sub(' ', str(nome or '')).strip().upper()
+
+
+@lru_cache(maxsize=TAMANHO_MEMO_NOMES)
+def limpar_nome_pagador(nome: str) -> str:
+    """Remove CNPJ/CPF e caracteres indesejados do nome do pagador"""
+    nome = CORTE_NOME_PAGADOR.split(nome, maxsplit=1)[0].strip()
+    nome = DOC_COM_HIFEN_NO_NOME.sub('', nome)
+    nome = DOC_NO_FIM_DO_NOME.sub('', nome)
+    return nome.strip()
@@ -0,0 +1,179 @@
+"""
+================================================================================
+pdf_backends.py - Motores de Extração de Texto de PDFs
+================================================================================
+
+Interface única para as bibliotecas que extraem texto de PDFs, para que
+pdf_texto.py possa trocar de motor sem mudar quem consome o texto.
+
+Motores:
+- "pdfplumber": motor original (análise de layout em Python, mais lento)
+- "pdfium":     pypdfium2 (biblioteca nativa do Chrome, bem mais rápido)
+
+O texto do pdfium é normalizado para o formato do pdfplumber (quebras de
+linha "\\n"). Mesmo assim a ordem das palavras pode variar em layouts
+complexos; por isso pdf_texto volta para o pdfplumber quando o texto do
+motor rápido não passa na conferência do extrator (ver ParsedBoleto).
+
+Uso:
+    motor = obter_motor("pdfium")
+    with motor.abrir(caminho_pdf) as pdf:
+        for i in range(pdf.total_paginas):
+            texto = pdf.texto_pagina(i)
+
+Autor: Sistema de Boletos v7.1
+Data: 2026-10-17
+================================================================================
+"""
+
+try:
+    import pdfplumber
+    PDFPLUMBER_DISPONIVEL = True
+except ImportError:
+    PDFPLUMBER_DISPONIVEL = False
+
+try:
+    import pypdfium2
+    PDFIUM_DISPONIVEL = True
+except ImportError:
+    PDFIUM_DISPONIVEL = False
+
+# ==================== CONFIGURAÇÕES ====================
+# Motor de referência: usado como fallback quando o texto de outro motor
+# não passa na conferência dos extratores
+MOTOR_SEGURO = "pdfplumber"
+
+
+# ==================== DOCUMENTO ABERTO ====================
+
+class DocumentoPDF:
+    """
+    PDF aberto por um motor (usar com `with`).
+
+    Subclasses implementam total_paginas, texto_pagina() e fechar().
+    """
+
+    @property
+    def total_paginas(self) -> int:
+        raise NotImplementedError
+
+    def texto_pagina(self, indice: int) -> str:
+        """Texto da página `indice` (0 = primeira), "" se não tiver texto"""
+        raise NotImplementedError
+
+    def fechar(self) -> None:
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+        return False
+
+
+class _DocumentoPdfplumber(DocumentoPDF):
+    def __init__(self, caminho: str):
+        self._pdf = pdfplumber.open(caminho)
+
+    @property
+    def total_paginas(self) -> int:
+        return len(self._pdf.pages)
+
+    def texto_pagina(self, indice: int) -> str:
+        return self._pdf.pages[indice].extract_text() or ""
+
+    def fechar(self) -> None:
+        self._pdf.close()
+
+
+class _DocumentoPdfium(DocumentoPDF):
+    def __init__(self, caminho: str):
+        self._pdf = pypdfium2.PdfDocument(caminho)
+
+    @property
+    def total_paginas(self) -> int:
+        return len(self._pdf)
+
+    def texto_pagina(self, indice: int) -> str:
+        pagina = self._pdf[indice]
+        textpage = pagina.get_textpage()
+        try:
+            texto = textpage.get_text_range()
+        finally:
+            textpage.close()
+            pagina.close()
+        # pdfium usa \r\n; o resto do sistema espera o formato do pdfplumber
+        return texto.replace("\r\n", "\n").replace("\r", "\n")
+
+    def fechar(self) -> None:
+        self._pdf.close()
+
+
+# ==================== MOTORES ====================
+
+class MotorPDF:
+    """
+    Motor de extração de texto.
+
+    Attributes:
+        nome: Identificador usado no config e na chave do cache
+        disponivel: False se a biblioteca não estiver instalada
+    """
+
+    nome = ""
+    disponivel = False
+
+    def abrir(self, caminho_pdf: str) -> DocumentoPDF:
+        """Abre o PDF (erros de leitura são propagados)"""
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"<MotorPDF '{self.nome}' disponivel={self.disponivel}>"
+
+
+class MotorPdfplumber(MotorPDF):
+    nome = "pdfplumber"
+    disponivel = PDFPLUMBER_DISPONIVEL
+
+    def abrir(self, caminho_pdf: str) -> DocumentoPDF:
+        if not PDFPLUMBER_DISPONIVEL:
+            raise ImportError("pdfplumber não instalado")
+        return _DocumentoPdfplumber(caminho_pdf)
+
+
+class MotorPdfium(MotorPDF):
+    nome = "pdfium"
+    disponivel = PDFIUM_DISPONIVEL
+
+    def abrir(self, caminho_pdf: str) -> DocumentoPDF:
+        if not PDFIUM_DISPONIVEL:
+            raise ImportError("pypdfium2 não instalado")
+        return _DocumentoPdfium(caminho_pdf)
+
+
+# Motores registrados (nome -> instância)
+MOTORES = {
+    MotorPdfplumber.nome: MotorPdfplumber(),
+    MotorPdfium.nome: MotorPdfium(),
+}
+
+
+def obter_motor(nome: str | None = None) -> MotorPDF:
+    """
+    Retorna o motor pelo nome.
+
+    Nome desconhecido ou biblioteca não instalada caem no MOTOR_SEGURO.
+
+    Args:
+        nome: "pdfplumber", "pdfium" ou None (= MOTOR_SEGURO)
+    """
+    motor = MOTORES.get(nome or MOTOR_SEGURO)
+    if motor is None or not motor.disponivel:
+        return MOTORES[MOTOR_SEGURO]
+    return motor
+
+
+def listar_motores() -> list:
+    """Nomes dos motores disponíveis nesta instalação"""
+    return [nome for nome, motor in MOTORES.items() if motor.disponivel]
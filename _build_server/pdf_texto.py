@@ -0,0 +1,261 @@
+"""
+================================================================================
+pdf_texto.py - Extração de Texto de PDFs (compartilhada entre as etapas)
+================================================================================
+
+Ponto único de leitura de PDFs do sistema. Tanto a renomeação
+(RenomeaçãoBoletos.py) quanto o envio (EnvioBoleto.py) passam por aqui,
+de forma que o texto de um boleto extraído na renomeação é reaproveitado
+pelo envio através do cache em disco (cache_pdf.py).
+
+Funcionalidades:
+- Extração do texto por página, sob demanda (iterador)
+- Motor de extração configurável por FIDC (pdfplumber ou pdfium, ver pdf_backends.py)
+- Parada antecipada: páginas que ninguém precisa não são lidas
+- Cache persistente endereçado pelo SHA-256 do PDF (+ motor usado)
+- Junção das páginas no mesmo formato usado antes ("texto\\n" por página)
+
+Autor: Sistema de Boletos v7.1
+Data: 2026-10-17
+================================================================================
+"""
+
+import os
+
+from cache_pdf import CacheTextoPDF, calcular_sha256
+from pdf_backends import obter_motor, MOTOR_SEGURO
+from config_server import (
+    PASTA_CACHE,
+    USAR_CACHE_TEXTO_PDF,
+    CACHE_TEXTO_PDF_MAX_MB,
+    MOTOR_PDF_PADRAO,
+    MOTOR_PDF_POR_FIDC
+)
+
+# ==================== CACHE GLOBAL ====================
+_cache = None
+
+
+def obter_cache() -> CacheTextoPDF | None:
+    """
+    Retorna a instância única do cache de texto (criada na primeira chamada).
+
+    Returns:
+        CacheTextoPDF ou None se o cache estiver desabilitado na configuração
+    """
+    global _cache
+    if not USAR_CACHE_TEXTO_PDF:
+        return None
+    if _cache is None:
+        _cache = CacheTextoPDF(os.path.join(PASTA_CACHE, "texto_pdf"), CACHE_TEXTO_PDF_MAX_MB)
+    return _cache
+
+
+def definir_cache(cache: CacheTextoPDF | None) -> None:
+    """Substitui a instância global do cache (usado em testes)."""
+    global _cache
+    _cache = cache
+
+
+def habilitar_cache(habilitado: bool) -> bool:
+    """
+    Liga/desliga o cache neste processo (ex: workers de benchmark).
+
+    Returns:
+        Valor anterior da configuração
+    """
+    global USAR_CACHE_TEXTO_PDF
+    anterior = USAR_CACHE_TEXTO_PDF
+    USAR_CACHE_TEXTO_PDF = habilitado
+    return anterior
+
+
+# ==================== MOTOR ====================
+
+def motor_para_fidc(fidc: str | None) -> str:
+    """
+    Nome do motor configurado para o FIDC.
+
+    Args:
+        fidc: Nome do FIDC ou None (ainda não detectado)
+
+    Returns:
+        Nome do motor (MOTOR_PDF_POR_FIDC, senão MOTOR_PDF_PADRAO)
+    """
+    if fidc and fidc in MOTOR_PDF_POR_FIDC:
+        return obter_motor(MOTOR_PDF_POR_FIDC[fidc]).nome
+    return obter_motor(MOTOR_PDF_PADRAO).nome
+
+
+def _chave_cache(sha256: str, motor: str) -> str:
+    # Texto de motores diferentes fica em entradas diferentes; o motor
+    # original mantém a chave antiga (só o hash) para aproveitar o cache existente
+    return sha256 if motor == MOTOR_SEGURO else f"{sha256}-{motor}"
+
+
+# ==================== EXTRAÇÃO ====================
+
+# Páginas lidas x puladas neste processo (leitura preguiçosa com parada antecipada)
+ESTATISTICAS_PAGINAS = {'lidas': 0, 'do_cache': 0, 'puladas': 0}
+
+
+def iterar_paginas_pdf(caminho_pdf: str, usar_cache: bool = True, motor: str | None = None):
+    """
+    Entrega o texto do PDF página por página, sob demanda.
+
+    Quem consome pode parar a qualquer momento (break / close()): as
+    páginas restantes não passam pelo motor de extração e contam como puladas.
+    Páginas já conhecidas pelo cache (entrada completa ou parcial) vêm
+    do cache; as demais são lidas e o cache é atualizado ao final.
+
+    Args:
+        caminho_pdf: Caminho do arquivo PDF
+        usar_cache: False força a leitura do PDF (o resultado ainda é gravado)
+        motor: "pdfplumber", "pdfium" ou None (= MOTOR_PDF_PADRAO)
+
+    Yields:
+        Texto de cada página ("" para páginas sem texto)
+    """
+    motor = obter_motor(motor or MOTOR_PDF_PADRAO)
+    cache = obter_cache()
+    chave = _chave_cache(calcular_sha256(caminho_pdf), motor.nome) if cache is not None else None
+
+    paginas = []
+    completo = False
+    total = None
+    if cache is not None and usar_cache:
+        entrada = cache.obter_entrada(chave)
+        if entrada is not None:
+            paginas = list(entrada['paginas'])
+            completo = entrada['completo']
+            total = entrada['total_paginas']
+
+    entregues = 0
+    novas = 0
+    try:
+        for texto in paginas:
+            entregues += 1
+            ESTATISTICAS_PAGINAS['do_cache'] += 1
+            yield texto
+
+        if completo:
+            return
+
+        with motor.abrir(caminho_pdf) as pdf:
+            total = pdf.total_paginas
+            for indice in range(len(paginas), total):
+                texto = pdf.texto_pagina(indice)
+                paginas.append(texto)
+                novas += 1
+                entregues += 1
+                ESTATISTICAS_PAGINAS['lidas'] += 1
+                yield texto
+        completo = True
+
+    finally:
+        if total is not None:
+            ESTATISTICAS_PAGINAS['puladas'] += max(0, total - entregues)
+        if cache is not None and novas:
+            cache.salvar(chave, paginas, completo=completo, total_paginas=total)
+
+
+def extrair_paginas_pdf(caminho_pdf: str, usar_cache: bool = True, motor: str | None = None) -> list:
+    """
+    Extrai o texto de TODAS as páginas do PDF.
+
+    Consulta o cache pelo SHA-256 do arquivo antes de abrir o PDF.
+    Erros de leitura do PDF são propagados (cada etapa trata do seu jeito).
+
+    Args:
+        caminho_pdf: Caminho do arquivo PDF
+        usar_cache: False força a leitura do PDF (o resultado ainda é gravado)
+        motor: "pdfplumber", "pdfium" ou None (= MOTOR_PDF_PADRAO)
+
+    Returns:
+        Lista com o texto de cada página ("" para páginas sem texto)
+    """
+    return list(iterar_paginas_pdf(caminho_pdf, usar_cache, motor))
+
+
+def juntar_paginas(paginas: list) -> str:
+    """Junta as páginas com quebra de linha, ignorando páginas vazias."""
+    return "".join(t + "\n" for t in paginas if t)
+
+
+def extrair_texto_pdf(caminho_pdf: str, usar_cache: bool = True, motor: str | None = None) -> str:
+    """
+    Extrai o texto completo do PDF (todas as páginas, com cache).
+
+    Returns:
+        Texto do PDF ("" se nenhuma página tiver texto)
+    """
+    return juntar_paginas(extrair_paginas_pdf(caminho_pdf, usar_cache, motor))
+
+
+def extrair_texto_ate(caminho_pdf: str, condicao, motor: str | None = None) -> tuple:
+    """
+    Lê páginas até `condicao(texto_acumulado)` ser verdadeira.
+
+    Args:
+        caminho_pdf: Caminho do arquivo PDF
+        condicao: Função que recebe o texto das páginas lidas até agora
+        motor: "pdfplumber", "pdfium" ou None (= MOTOR_PDF_PADRAO)
+
+    Returns:
+        (texto_acumulado, completo) - completo=True se leu todas as páginas
+        sem a condição ser satisfeita antes
+    """
+    paginas = []
+    iterador = iterar_paginas_pdf(caminho_pdf, motor=motor)
+    try:
+        for pagina in iterador:
+            paginas.append(pagina)
+            texto = juntar_paginas(paginas)
+            if condicao(texto):
+                return texto, False
+    finally:
+        iterador.close()
+    return juntar_paginas(paginas), True
+
+
+def estatisticas_paginas() -> dict:
+    """Retorna uma cópia dos contadores de páginas lidas/puladas."""
+    return dict(ESTATISTICAS_PAGINAS)
+
+
+def estatisticas_cache() -> dict | None:
+    """Retorna os contadores do cache ou None se desabilitado."""
+    cache = obter_cache()
+    return cache.estatisticas() if cache is not None else None
+
+
+def imprimir_estatisticas_cache(stats: dict | None = None) -> None:
+    """
+    Imprime o resumo de acertos/falhas do cache de texto.
+
+    Args:
+        stats: Contadores já somados (ex: vindos dos workers). Se None,
+               usa os contadores do cache deste processo.
+    """
+    if stats is None:
+        stats = estatisticas_cache()
+    if not stats:
+        return
+    consultas = stats['acertos'] + stats['falhas']
+    taxa = stats['acertos'] / consultas if consultas else 0.0
+    print(f"[CACHE] Texto PDF: {stats['acertos']} acerto(s), {stats['falhas']} falha(s) "
+          f"({taxa:.0%}), {stats.get('removidos', 0)} removido(s)")
+
+
+def imprimir_estatisticas_paginas(stats: dict | None = None) -> None:
+    """
+    Imprime quantas páginas passaram pelo motor de extração e quantas foram puladas.
+
+    Args:
+        stats: Contadores já somados (ex: vindos dos workers). Se None,
+               usa os contadores deste processo.
+    """
+    if stats is None:
+        stats = ESTATISTICAS_PAGINAS
+    print(f"[PDF] Paginas: {stats['lidas']} lida(s), {stats['do_cache']} do cache, "
+          f"{stats['puladas']} pulada(s)")
@@ -0,0 +1,405 @@
+"""
+================================================================================
+pipeline.py - Motor de Etapas com Filas Limitadas (renomeação e envio)
+================================================================================
+
+processar_boletos() e executar() eram laços únicos que misturavam leitura
+do PDF, casamento, validação, log e E/S: o envio só começava depois do
+último PDF lido. Aqui cada fase vira uma ETAPA com seus próprios workers,
+ligada à seguinte por uma fila limitada:
+
+    entradas -> [etapa 1] -> fila -> [etapa 2] -> fila -> ... -> [etapa N]
+
+- Fila cheia bloqueia a etapa anterior (contrapressão): um extrator
+  rápido não enche a memória esperando um envio lento
+- Cada etapa tem N threads; com processos=True a função roda num
+  ProcessPoolExecutor (leitura de PDF, que é CPU) e as threads só
+  esperam o resultado
+- ordenada=True entrega os itens na ordem de entrada (log e renomeação
+  determinísticos mesmo com extração paralela)
+- ao_terminar() roda quando a etapa recebeu tudo (barreira: casamento em
+  lote; descarga de grupos pendentes)
+- na_thread_principal=True roda a etapa na thread de quem chamou
+  (Outlook/COM)
+- em_bloco() imprime o log de cada item de uma vez, sem misturar com o
+  das outras etapas
+- Tempo por etapa: ocupado (na função), bloqueado (fila seguinte cheia) e
+  ocioso (esperando a anterior)
+
+Cada item que entra ganha um número de sequência e cada etapa devolve,
+para cada envelope recebido, UM envelope com as saídas (possivelmente
+vazio), com o mesmo número: é o que permite reordenar depois de etapas
+paralelas e de etapas que filtram.
+
+Uso:
+    etapas = [Etapa("extracao", extrair, workers=4, processos=True),
+              Etapa("renomeacao", renomear, ordenada=True)]
+    estatisticas = Pipeline(etapas).executar(caminhos)
+    imprimir_estatisticas(estatisticas)
+
+Autor: Sistema de Boletos v7.1
+Data: 2026-10-17
+================================================================================
+"""
+
+import io
+import sys
+import time
+import queue
+import threading
+import functools
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional
+
+# ==================== CONFIGURAÇÕES ====================
+# Envelopes por fila entre duas etapas (além disso a etapa anterior espera)
+CAPACIDADE_PADRAO = 8
+
+# Intervalo (s) em que threads bloqueadas conferem se o pipeline foi abortado
+INTERVALO_ABORTO = 0.1
+
+# Sequência dos envelopes gerados por ao_terminar() (depois de todos os itens)
+SEQUENCIA_FINAL = sys.maxsize
+
+_FIM = object()
+
+
+# ==================== SAÍDA POR THREAD ====================
+
+class _SaidaPorThread(io.TextIOBase):
+    """sys.stdout que manda o texto de cada thread para o seu destino (ou o original)."""
+
+    def __init__(self, original):
+        self.original = original
+        self.local = threading.local()
+
+    def write(self, texto):
+        return (getattr(self.local, 'destino', None) or self.original).write(texto)
+
+    def flush(self):
+        (getattr(self.local, 'destino', None) or self.original).flush()
+
+    @property
+    def encoding(self):
+        return getattr(self.original, 'encoding', 'utf-8')
+
+    def isatty(self):
+        return False
+
+
+_trava_saida = threading.Lock()
+_saida_instalada = None
+_capturas_ativas = 0
+
+
+@contextlib.contextmanager
+def capturar_saida():
+    """
+    Captura o que ESTA thread imprimir (as outras continuam no console).
+
+    Substitui contextlib.redirect_stdout, que troca o sys.stdout do
+    processo inteiro e engoliria o log das outras etapas.
+
+    Yields:
+        io.StringIO com o texto capturado
+    """
+    global _saida_instalada, _capturas_ativas
+    with _trava_saida:
+        if _capturas_ativas == 0 or sys.stdout is not _saida_instalada:
+            _saida_instalada = _SaidaPorThread(sys.stdout)
+            sys.stdout = _saida_instalada
+        _capturas_ativas += 1
+        saida_thread = _saida_instalada
+
+    buffer = io.StringIO()
+    anterior = getattr(saida_thread.local, 'destino', None)
+    saida_thread.local.destino = buffer
+    try:
+        yield buffer
+    finally:
+        saida_thread.local.destino = anterior
+        with _trava_saida:
+            _capturas_ativas -= 1
+            if _capturas_ativas == 0 and sys.stdout is saida_thread:
+                sys.stdout = saida_thread.original
+                _saida_instalada = None
+
+
+def em_bloco(funcao: Callable) -> Callable:
+    """
+    Envolve funcao(item): o que ela imprimir sai de uma vez, no fim.
+
+    Com várias etapas imprimindo ao mesmo tempo, o log de um boleto não
+    fica intercalado com o de outro.
+    """
+    @functools.wraps(funcao)
+    def envolvida(item):
+        saida = None
+        try:
+            with capturar_saida() as saida:
+                return funcao(item)
+        finally:
+            if saida is not None and saida.getvalue():
+                sys.stdout.write(saida.getvalue())
+                sys.stdout.flush()
+    return envolvida
+
+
+# ==================== ETAPAS ====================
+
+@dataclass(slots=True)
+class Etapa:
+    """
+    Uma fase do pipeline.
+
+    funcao(item) devolve um iterável com as saídas para a etapa seguinte
+    (None ou [] = o item para aqui). ao_terminar() devolve as saídas
+    finais, depois que todos os itens passaram.
+    """
+
+    nome: str
+    funcao: Callable
+    workers: int = 1
+    ordenada: bool = False               # na ordem de entrada (exige 1 worker)
+    processos: bool = False              # funcao num ProcessPoolExecutor (se workers > 1)
+    inicializador: Optional[Callable] = None   # por processo; sem pool, uma vez neste processo
+    argumentos_inicializador: tuple = ()
+    ao_terminar: Optional[Callable] = None
+    na_thread_principal: bool = False    # no máximo uma etapa; 1 worker
+
+
+@dataclass(slots=True)
+class EstatisticaEtapa:
+    """Tempos e contagens de uma etapa."""
+
+    nome: str
+    workers: int
+    itens: int = 0          # itens processados pela função
+    saidas: int = 0         # itens entregues à etapa seguinte
+    ocupado: float = 0.0    # soma do tempo dentro da função (todos os workers)
+    bloqueado: float = 0.0  # esperando vaga na fila seguinte
+    ocioso: float = 0.0     # esperando item da etapa anterior
+    inicio: float = 0.0
+    fim: float = 0.0
+
+    @property
+    def duracao(self) -> float:
+        return max(0.0, self.fim - self.inicio)
+
+
+# ==================== MOTOR ====================
+
+class Pipeline:
+    """
+    Liga as etapas por filas limitadas e roda tudo até a última saída.
+
+    Args:
+        etapas: Lista de Etapa, na ordem
+        capacidade: Envelopes por fila entre etapas
+    """
+
+    def __init__(self, etapas: List[Etapa], capacidade: int = CAPACIDADE_PADRAO):
+        if not etapas:
+            raise ValueError("Pipeline sem etapas")
+        for etapa in etapas:
+            if (etapa.ordenada or etapa.na_thread_principal) and etapa.workers != 1:
+                raise ValueError(f"Etapa '{etapa.nome}': ordenada/na_thread_principal exige 1 worker")
+        if sum(1 for e in etapas if e.na_thread_principal) > 1:
+            raise ValueError("Só uma etapa pode rodar na thread principal")
+        self.etapas = etapas
+        self.capacidade = max(1, capacidade)
+        self.resultados = []  # saídas da última etapa
+
+        self._filas = []
+        self._estatisticas = []
+        self._travas = []
+        self._restantes = []
+        self._pools = {}
+        self._abortar = threading.Event()
+        self._erro = None
+
+    # -------------------- filas --------------------
+    def _pegar(self, indice: int):
+        fila = self._filas[indice]
+        inicio = time.perf_counter()
+        try:
+            while True:
+                if self._abortar.is_set():
+                    return _FIM
+                try:
+                    return fila.get(timeout=INTERVALO_ABORTO)
+                except queue.Empty:
+                    continue
+        finally:
+            self._somar(indice, 'ocioso', time.perf_counter() - inicio)
+
+    def _entregar(self, indice: int, envelope) -> None:
+        """Põe o envelope na fila da etapa `indice` (ou nos resultados, depois da última)."""
+        if indice == len(self.etapas):
+            self.resultados.extend(envelope[1])
+            return
+        fila = self._filas[indice]
+        inicio = time.perf_counter()
+        try:
+            while not self._abortar.is_set():
+                try:
+                    fila.put(envelope, timeout=INTERVALO_ABORTO)
+                    return
+                except queue.Full:
+                    continue
+        finally:
+            if indice > 0:
+                self._somar(indice - 1, 'bloqueado', time.perf_counter() - inicio)
+
+    def _somar(self, indice: int, campo: str, valor: float) -> None:
+        with self._travas[indice]:
+            estatistica = self._estatisticas[indice]
+            setattr(estatistica, campo, getattr(estatistica, campo) + valor)
+
+    # -------------------- workers --------------------
+    def _alimentar(self, entradas: Iterable) -> None:
+        try:
+            for sequencia, item in enumerate(entradas):
+                if self._abortar.is_set():
+                    return
+                self._entregar(0, (sequencia, [item]))
+            for _ in range(self.etapas[0].workers):
+                self._entregar(0, _FIM)
+        except BaseException as e:
+            self._falhar(e)
+
+    def _processar(self, indice: int, envelope) -> None:
+        etapa = self.etapas[indice]
+        sequencia, itens = envelope
+        saidas = []
+        for item in itens:
+            inicio = time.perf_counter()
+            if indice in self._pools:
+                resultado = self._pools[indice].submit(etapa.funcao, item).result()
+            else:
+                resultado = etapa.funcao(item)
+            self._somar(indice, 'ocupado', time.perf_counter() - inicio)
+            self._somar(indice, 'itens', 1)
+            if resultado:
+                saidas.extend(resultado)
+        self._somar(indice, 'saidas', len(saidas))
+        self._entregar(indice + 1, (sequencia, saidas))
+
+    def _trabalhar(self, indice: int) -> None:
+        etapa = self.etapas[indice]
+        try:
+            proxima, em_espera, finais = 0, {}, []
+            while True:
+                envelope = self._pegar(indice)
+                if envelope is _FIM:
+                    break
+                if not etapa.ordenada:
+                    self._processar(indice, envelope)
+                    continue
+                # Ordenada: segura os envelopes que chegaram antes da vez
+                if envelope[0] >= SEQUENCIA_FINAL:
+                    finais.append(envelope)
+                    continue
+                em_espera[envelope[0]] = envelope
+                while proxima in em_espera:
+                    self._processar(indice, em_espera.pop(proxima))
+                    proxima += 1
+            if self._abortar.is_set():
+                return
+            for sequencia in sorted(em_espera):
+                self._processar(indice, em_espera[sequencia])
+            for envelope in finais:
+                self._processar(indice, envelope)
+            self._encerrar_worker(indice)
+        except BaseException as e:
+            self._falhar(e)
+
+    def _encerrar_worker(self, indice: int) -> None:
+        """O último worker da etapa roda ao_terminar() e avisa a etapa seguinte."""
+        with self._travas[indice]:
+            self._restantes[indice] -= 1
+            ultimo = self._restantes[indice] == 0
+        if not ultimo:
+            return
+
+        etapa = self.etapas[indice]
+        if etapa.ao_terminar is not None:
+            inicio = time.perf_counter()
+            saidas = list(etapa.ao_terminar() or [])
+            self._somar(indice, 'ocupado', time.perf_counter() - inicio)
+            self._somar(indice, 'saidas', len(saidas))
+            self._entregar(indice + 1, (SEQUENCIA_FINAL, saidas))
+        self._estatisticas[indice].fim = time.perf_counter()
+        if indice + 1 < len(self.etapas):
+            for _ in range(self.etapas[indice + 1].workers):
+                self._entregar(indice + 1, _FIM)
+
+    def _falhar(self, erro: BaseException) -> None:
+        if self._erro is None:
+            self._erro = erro
+        self._abortar.set()
+
+    # -------------------- execução --------------------
+    def executar(self, entradas: Iterable) -> List[EstatisticaEtapa]:
+        """
+        Roda o pipeline até a última etapa terminar.
+
+        A primeira exceção de qualquer etapa aborta todas e é relançada aqui.
+
+        Returns:
+            EstatisticaEtapa de cada etapa (na ordem)
+        """
+        agora = time.perf_counter()
+        self._filas = [queue.Queue(maxsize=self.capacidade) for _ in self.etapas]
+        self._estatisticas = [EstatisticaEtapa(e.nome, e.workers, inicio=agora) for e in self.etapas]
+        self._travas = [threading.Lock() for _ in self.etapas]
+        self._restantes = [e.workers for e in self.etapas]
+        self._pools = {
+            indice: ProcessPoolExecutor(max_workers=etapa.workers, initializer=etapa.inicializador,
+                                        initargs=etapa.argumentos_inicializador)
+            for indice, etapa in enumerate(self.etapas) if etapa.processos and etapa.workers > 1
+        }
+        for indice, etapa in enumerate(self.etapas):
+            if etapa.inicializador is not None and indice not in self._pools:
+                etapa.inicializador(*etapa.argumentos_inicializador)  # sem pool: roda aqui mesmo
+        self.resultados = []
+        self._abortar.clear()
+        self._erro = None
+
+        threads = [threading.Thread(target=self._alimentar, args=(entradas,), daemon=True)]
+        for indice, etapa in enumerate(self.etapas):
+            if etapa.na_thread_principal:
+                continue
+            threads += [threading.Thread(target=self._trabalhar, args=(indice,), daemon=True,
+                                         name=f"etapa-{etapa.nome}-{n}")
+                        for n in range(etapa.workers)]
+        try:
+            for thread in threads:
+                thread.start()
+            for indice, etapa in enumerate(self.etapas):
+                if etapa.na_thread_principal:
+                    self._trabalhar(indice)
+            for thread in threads:
+                thread.join()
+        except BaseException as e:  # KeyboardInterrupt na thread principal
+            self._falhar(e)
+            for thread in threads:
+                thread.join()
+        finally:
+            for pool in self._pools.values():
+                pool.shutdown(cancel_futures=True)
+            self._pools = {}
+
+        if self._erro is not None:
+            raise self._erro
+        return list(self._estatisticas)
+
+
+def imprimir_estatisticas(estatisticas: List[EstatisticaEtapa], prefixo: str = "[TEMPO]") -> None:
+    """Uma linha por etapa: itens, workers e onde o tempo foi gasto."""
+    for e in estatisticas:
+        print(f"{prefixo} [{e.nome}] {e.itens} item(ns), {e.workers} worker(s): "
+              f"{e.duracao:.2f}s de etapa, {e.ocupado:.2f}s ocupado, "
+              f"{e.bloqueado:.2f}s bloqueado, {e.ocioso:.2f}s ocioso")
@@ -0,0 +1,312 @@
+"""
+================================================================================
+registro_envios.py - Registro de Envios (SQLite, idempotente)
+================================================================================
+
+Até aqui a única proteção contra mandar o mesmo boleto duas vezes era
+mover o PDF para BoletosEnviados depois do envio. No modo preview (nada é
+movido) e quando o move falha (arquivo aberto, rede), o boleto ficava na
+pasta e era lido, extraído e validado de novo na execução seguinte.
+
+Agora cada boleto enviado entra num registro SQLite indexado por:
+
+    SHA-256 do conteúdo do PDF + nota + duplicata (parcela)
+
+O executar() consulta o registro ANTES de abrir qualquer PDF (só o hash
+dos bytes é calculado; nota e parcela saem do nome do arquivo e do XML):
+- Mesmo PDF já enviado: ignorado (em produção, o move que faltou é feito)
+- Outro PDF para nota + parcela já enviadas: aviso (ou ignorado, conforme
+  REGISTRO_PARCELA_REPETIDA)
+
+Envios do modo preview ficam registrados como "preview" e só evitam que o
+preview seguinte abra o mesmo e-mail de novo; não impedem o envio real.
+
+Consultas:
+    registro = RegistroEnvios(ARQUIVO_REGISTRO_ENVIOS)
+    envio = registro.enviado("310100", 2)      # parcela 2 da NF 310100
+    envio.enviado_em, envio.destinatarios      # quando e para quem
+    registro.consultar_nota("310100")          # todas as parcelas
+
+    python registro_envios.py --nota 310100 [--parcela 2]
+
+Estrutura em disco:
+    Auditoria/registro_envios.sqlite
+
+Autor: Sistema de Boletos v7.1
+Data: 2026-10-17
+================================================================================
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import argparse
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from cache_pdf import calcular_sha256
+
+# ==================== CONFIGURAÇÕES ====================
+# Versão do formato da tabela (PRAGMA user_version). O registro é histórico:
+# uma versão nova deve migrar as linhas, nunca apagar.
+VERSAO_REGISTRO = 1
+
+# Espera máxima (s) pelo lock do SQLite
+TIMEOUT_SQLITE = 30
+
+MODO_PRODUCAO = "producao"
+MODO_PREVIEW = "preview"
+
+# "NOME - NF 310100 - 10-11 - R$ 1.234,56.pdf" (nome gerado pela renomeação)
+PADRAO_NOME_BOLETO = re.compile(r'NF\s+(\d{6})(?:\s*-\s*(\d{2})-(\d{2}))?', re.IGNORECASE)
+
+
+@dataclass(slots=True)
+class ImpressaoBoleto:
+    """Identidade de um boleto para o registro (calculada sem ler o PDF)."""
+
+    arquivo: str
+    sha256: str
+    nota: str = ""          # 6 dígitos, como no nome do arquivo
+    duplicata: str = ""     # normalizada ("001" -> "1"); "" = parcela não identificada
+    vencimento: str = ""    # 'YYYY-MM-DD' da duplicata no XML
+
+
+@dataclass(slots=True)
+class EnvioRegistrado:
+    """Um boleto enviado, como gravado no registro."""
+
+    sha256: str
+    nota: str
+    duplicata: str
+    arquivo: str
+    vencimento: str
+    destinatarios: List[str] = field(default_factory=list)
+    cc: List[str] = field(default_factory=list)
+    assunto: str = ""
+    fidc: str = ""
+    modo: str = MODO_PRODUCAO
+    execucao: str = ""
+    enviado_em: Optional[datetime] = None
+
+
+# ==================== IDENTIFICAÇÃO ====================
+
+def normalizar_duplicata(numero) -> str:
+    """Número da parcela como comparado no registro: "001", "1" e 1 viram "1"."""
+    texto = str(numero).strip()
+    return str(int(texto)) if texto.isdigit() else texto.upper()
+
+
+def identificar_boleto(caminho_pdf: str, mapa_xmls=None) -> ImpressaoBoleto:
+    """
+    Identidade do boleto sem extrair texto do PDF.
+
+    A nota e o vencimento vêm do nome do arquivo; a duplicata é a única da
+    nota no XML ou a que vence no dia/mês do nome.
+
+    Args:
+        caminho_pdf: Boleto renomeado ("NOME - NF 310100 - 10-11 - VALOR.pdf")
+        mapa_xmls: MapaNFe/dicionário de indexar_xmls_por_nota (opcional)
+    """
+    arquivo = os.path.basename(caminho_pdf)
+    impressao = ImpressaoBoleto(arquivo, calcular_sha256(caminho_pdf))
+    match = PADRAO_NOME_BOLETO.search(os.path.splitext(arquivo)[0])
+    if not match:
+        return impressao
+    impressao.nota = match.group(1)
+
+    dados = mapa_xmls.get(impressao.nota) if mapa_xmls is not None else None
+    if not dados:
+        return impressao
+    duplicatas = dados.get('duplicatas', [])
+    if not duplicatas:
+        impressao.duplicata = "1"  # à vista: parcela única
+        return impressao
+
+    if len(duplicatas) > 1 and match.group(2):
+        dia_mes = f"-{match.group(3)}-{match.group(2)}"  # 'YYYY-MM-DD' termina em -MM-DD
+        duplicatas = [dup for dup in duplicatas if (dup['vencimento'] or "").endswith(dia_mes)]
+    if len(duplicatas) == 1:
+        impressao.duplicata = normalizar_duplicata(duplicatas[0]['numero'])
+        impressao.vencimento = duplicatas[0]['vencimento'] or ""
+    return impressao
+
+
+# ==================== REGISTRO ====================
+
+class RegistroEnvios:
+    """
+    Registro SQLite dos boletos enviados.
+
+    Uso:
+        registro = RegistroEnvios(ARQUIVO_REGISTRO_ENVIOS)
+        registro.consultar(impressao.sha256)    # O(1): chave primária
+        registro.registrar([impressao], mensagem, modo="producao")
+    """
+
+    def __init__(self, caminho_db: str):
+        self.caminho_db = caminho_db
+
+        pasta = os.path.dirname(caminho_db)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._criar_tabela()
+
+    # -------------------- banco --------------------
+    def _conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.caminho_db, timeout=TIMEOUT_SQLITE)
+
+    def _criar_tabela(self) -> None:
+        with self._conectar() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS envios ("
+                " sha256 TEXT NOT NULL,"
+                " nota TEXT NOT NULL,"
+                " duplicata TEXT NOT NULL,"
+                " modo TEXT NOT NULL,"
+                " arquivo TEXT NOT NULL,"
+                " vencimento TEXT NOT NULL,"
+                " destinatarios TEXT NOT NULL,"
+                " cc TEXT NOT NULL,"
+                " assunto TEXT NOT NULL,"
+                " fidc TEXT NOT NULL,"
+                " execucao TEXT NOT NULL,"
+                " enviado_em REAL NOT NULL,"
+                " PRIMARY KEY (sha256, nota, duplicata, modo))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS envios_parcela ON envios (nota, duplicata)")
+            conn.execute(f"PRAGMA user_version = {VERSAO_REGISTRO}")
+        conn.close()
+
+    @staticmethod
+    def _envio(linha) -> EnvioRegistrado:
+        (sha256, nota, duplicata, modo, arquivo, vencimento, destinatarios, cc,
+         assunto, fidc, execucao, enviado_em) = linha
+        return EnvioRegistrado(sha256, nota, duplicata, arquivo, vencimento, json.loads(destinatarios),
+                               json.loads(cc), assunto, fidc, modo, execucao,
+                               datetime.fromtimestamp(enviado_em))
+
+    def _buscar(self, onde: str, parametros: tuple, modos: Iterable[str]) -> List[EnvioRegistrado]:
+        modos = tuple(modos)
+        sql = (
+            "SELECT sha256, nota, duplicata, modo, arquivo, vencimento, destinatarios, cc,"
+            " assunto, fidc, execucao, enviado_em FROM envios "
+            f"WHERE {onde} AND modo IN ({', '.join('?' * len(modos))}) ORDER BY enviado_em"
+        )
+        conn = self._conectar()
+        try:
+            return [self._envio(linha) for linha in conn.execute(sql, parametros + modos)]
+        finally:
+            conn.close()
+
+    # -------------------- gravação --------------------
+    def registrar(self, impressoes: Iterable[ImpressaoBoleto], mensagem, modo: str = MODO_PRODUCAO,
+                  execucao: str = "", enviado_em: Optional[float] = None) -> int:
+        """
+        Grava os boletos de uma mensagem enviada (idempotente: repetir não duplica).
+
+        Args:
+            impressoes: Boletos anexados (identificar_boleto)
+            mensagem: MensagemEmail enviada (destinatários, CC, assunto, FIDC)
+            modo: "producao" ou "preview"
+            execucao: Id da execução (auditoria)
+
+        Returns:
+            Linhas novas gravadas
+        """
+        enviado_em = time.time() if enviado_em is None else enviado_em
+        linhas = [
+            (imp.sha256, imp.nota, imp.duplicata, modo, imp.arquivo, imp.vencimento,
+             json.dumps(list(mensagem.para), ensure_ascii=False), json.dumps(list(mensagem.cc), ensure_ascii=False),
+             mensagem.assunto, mensagem.fidc, execucao, enviado_em)
+            for imp in impressoes
+        ]
+        with self._conectar() as conn:
+            antes = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO envios VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", linhas)
+            gravadas = conn.total_changes - antes
+        conn.close()
+        return gravadas
+
+    # -------------------- consultas --------------------
+    def consultar(self, sha256: str, modos: Iterable[str] = (MODO_PRODUCAO,),
+                  nota: Optional[str] = None) -> Optional[EnvioRegistrado]:
+        """Primeiro envio deste PDF (pelo conteúdo; e desta nota, se informada), ou None."""
+        if nota is None:
+            envios = self._buscar("sha256 = ?", (sha256,), modos)
+        else:
+            envios = self._buscar("sha256 = ? AND nota = ?", (sha256, _nota(nota)), modos)
+        return envios[0] if envios else None
+
+    def enviado(self, nota: str, duplicata, modos: Iterable[str] = (MODO_PRODUCAO,)) -> Optional[EnvioRegistrado]:
+        """
+        A parcela `duplicata` da nota já foi enviada? Quando e para quem.
+
+        Returns:
+            Primeiro envio da parcela (qualquer PDF), ou None
+        """
+        envios = self._buscar("nota = ? AND duplicata = ?", (_nota(nota), normalizar_duplicata(duplicata)), modos)
+        return envios[0] if envios else None
+
+    def consultar_nota(self, nota: str, modos: Iterable[str] = (MODO_PRODUCAO, MODO_PREVIEW)) -> List[EnvioRegistrado]:
+        """Todos os envios da nota (todas as parcelas), do mais antigo ao mais novo."""
+        return self._buscar("nota = ?", (_nota(nota),), modos)
+
+    def verificar(self, impressao: ImpressaoBoleto,
+                  modos: Iterable[str] = (MODO_PRODUCAO,)) -> Tuple[Optional[EnvioRegistrado], Optional[EnvioRegistrado]]:
+        """
+        Situação de um boleto antes de processá-lo.
+
+        Returns:
+            (mesmo_pdf, mesma_parcela): envio anterior deste PDF e, se não
+            houver, envio anterior de outro PDF para a mesma nota + parcela
+        """
+        modos = tuple(modos)
+        mesmo_pdf = self.consultar(impressao.sha256, modos, nota=impressao.nota)
+        if mesmo_pdf is not None or not (impressao.nota and impressao.duplicata):
+            return mesmo_pdf, None
+        return None, self.enviado(impressao.nota, impressao.duplicata, modos)
+
+    def __len__(self):
+        conn = self._conectar()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM envios").fetchone()[0]
+        finally:
+            conn.close()
+
+
+def _nota(nota) -> str:
+    """Nota como gravada: os 6 últimos dígitos."""
+    return re.sub(r'\D', '', str(nota))[-6:]
+
+
+# ==================== LINHA DE COMANDO ====================
+
+def main():
+    from config_server import ARQUIVO_REGISTRO_ENVIOS
+
+    parser = argparse.ArgumentParser(description="Consulta o registro de boletos enviados")
+    parser.add_argument("--nota", required=True, help="Número da nota (ex: 310100)")
+    parser.add_argument("--parcela", help="Número da duplicata (ex: 2)")
+    parser.add_argument("--db", default=ARQUIVO_REGISTRO_ENVIOS, help="Arquivo do registro")
+    args = parser.parse_args()
+
+    registro = RegistroEnvios(args.db)
+    envios = registro.consultar_nota(args.nota)
+    if args.parcela is not None:
+        envios = [e for e in envios if e.duplicata == normalizar_duplicata(args.parcela)]
+
+    if not envios:
+        print(f"[REGISTRO] NF {_nota(args.nota)}: nenhum envio registrado")
+        return
+    for envio in envios:
+        print(f"[REGISTRO] NF {envio.nota} parcela {envio.duplicata or '?'} ({envio.modo}) "
+              f"em {envio.enviado_em:%d/%m/%Y %H:%M} para {', '.join(envio.destinatarios)} - {envio.arquivo}")
+
+
+if __name__ == "__main__":
+    main()
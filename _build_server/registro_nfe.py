@@ -0,0 +1,233 @@
+"""
+================================================================================
+registro_nfe.py - Registros Compactos das NFe Indexadas
+================================================================================
+
+O mapa de XMLs guardava cada nota como um dicionário (com Decimal e
+listas) e o mesmo dicionário aparecia duas vezes: na chave de 6 dígitos
+e na chave completa. Aqui cada nota vira um NFeRecord (__slots__, valores
+em centavos, vencimentos já convertidos para date), guardado UMA vez no
+MapaNFe, com uma tabela de apelidos (chave -> registro) à parte.
+
+Compatibilidade (migração):
+- NFeRecord e Duplicata aceitam o acesso de dicionário usado até aqui
+  (dados['nome'], dados.get('emails', []), dup['valor'] em Decimal...)
+- MapaNFe é um Mapping {chave: NFeRecord}: mapa.get(), `in`, items()
+  continuam funcionando como no dicionário antigo
+- Para percorrer cada nota uma única vez, use mapa.notas()
+
+Autor: Sistema de Boletos v7.1
+Data: 2026-10-17
+================================================================================
+"""
+
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+
+
+def para_centavos(valor) -> int:
+    """Decimal/str do XML -> centavos (NFe usa 2 casas decimais)."""
+    return int(Decimal(valor) * 100) if valor else 0
+
+
+def de_centavos(centavos: int) -> Decimal:
+    """Centavos -> Decimal com 2 casas (ex: 150050 -> Decimal('1500.50'))."""
+    return Decimal(centavos).scaleb(-2)
+
+
+def _data_iso(texto: str) -> date | None:
+    """'YYYY-MM-DD' -> date (None se vazio ou inválido)."""
+    try:
+        return date.fromisoformat(texto)
+    except (TypeError, ValueError):
+        return None
+
+
+class _AcessoDict:
+    """
+    Acesso somente-leitura no estilo dicionário (adaptador de migração).
+
+    As subclasses definem CHAVES (nomes aceitos em registro['chave'], na
+    ordem do dicionário antigo) e _CHAVES = frozenset(CHAVES).
+    """
+    __slots__ = ()
+    CHAVES = ()
+    _CHAVES = frozenset()
+
+    def __getitem__(self, chave):
+        if chave not in self._CHAVES:
+            raise KeyError(chave)
+        return getattr(self, chave)
+
+    def get(self, chave, padrao=None):
+        return getattr(self, chave) if chave in self._CHAVES else padrao
+
+    def __contains__(self, chave):
+        return chave in self._CHAVES
+
+    def keys(self):
+        return iter(self.CHAVES)
+
+    def para_dict(self) -> dict:
+        """Dicionário no formato antigo (para JSON/auditoria)."""
+        return {chave: getattr(self, chave) for chave in self.CHAVES}
+
+
+# ==================== DUPLICATA ====================
+
+@dataclass(slots=True)
+class Duplicata(_AcessoDict):
+    """Parcela (<dup>) da nota: valor em centavos e vencimento já em date."""
+
+    CHAVES = ('numero', 'vencimento', 'valor')
+    _CHAVES = frozenset(CHAVES)
+
+    numero: str
+    vencimento: str                 # Texto do XML ('YYYY-MM-DD')
+    valor_cents: int
+    data_vencimento: date | None = None
+
+    @property
+    def valor(self) -> Decimal:
+        return de_centavos(self.valor_cents)
+
+    @classmethod
+    def de_dados(cls, dup: dict) -> "Duplicata":
+        return cls(
+            numero=dup['numero'],
+            vencimento=dup['vencimento'],
+            valor_cents=para_centavos(dup['valor']),
+            data_vencimento=_data_iso(dup['vencimento']),
+        )
+
+    def para_dict(self) -> dict:
+        return {'numero': self.numero, 'vencimento': self.vencimento, 'valor': self.valor}
+
+
+# ==================== NOTA ====================
+
+@dataclass(slots=True)
+class NFeRecord(_AcessoDict):
+    """Dados de um XML válido (mesmos campos de extrair_dados_nfe)."""
+
+    CHAVES = (
+        'xml_valido', 'xml_path', 'emails', 'emails_invalidos', 'cnpj', 'cpf',
+        'cpf_cnpj', 'nome', 'numero_nota', 'valor_total', 'duplicatas', 'erro',
+    )
+    _CHAVES = frozenset(CHAVES)
+
+    numero_nota: str
+    nome: str
+    cpf_cnpj: str = ''
+    cnpj: str = ''
+    cpf: str = ''
+    valor_total_cents: int = 0
+    duplicatas: list = field(default_factory=list)      # [Duplicata]
+    emails: list = field(default_factory=list)
+    emails_invalidos: list = field(default_factory=list)
+    xml_path: str = ''
+
+    # Só XMLs válidos viram registro
+    @property
+    def xml_valido(self) -> bool:
+        return True
+
+    @property
+    def erro(self):
+        return None
+
+    @property
+    def valor_total(self) -> Decimal:
+        return de_centavos(self.valor_total_cents)
+
+    @classmethod
+    def de_dados(cls, dados: dict) -> "NFeRecord":
+        """Converte o dicionário de extrair_dados_nfe() (XML válido)."""
+        return cls(
+            numero_nota=dados['numero_nota'],
+            nome=dados['nome'],
+            cpf_cnpj=dados['cpf_cnpj'],
+            cnpj=dados['cnpj'],
+            cpf=dados['cpf'],
+            valor_total_cents=para_centavos(dados['valor_total']),
+            duplicatas=[Duplicata.de_dados(dup) for dup in dados['duplicatas']],
+            emails=dados['emails'],
+            emails_invalidos=dados['emails_invalidos'],
+            xml_path=dados['xml_path'],
+        )
+
+    def para_dict(self) -> dict:
+        dados = super(NFeRecord, self).para_dict()
+        dados['duplicatas'] = [dup.para_dict() for dup in self.duplicatas]
+        return dados
+
+
+# ==================== MAPA ====================
+
+class MapaNFe(Mapping):
+    """
+    Notas indexadas: cada NFeRecord guardado uma vez + tabela de apelidos.
+
+    Uso:
+        mapa = MapaNFe()
+        mapa.adicionar(registro, ['310227', '000310227'])
+        mapa['310227'] is mapa['000310227']   # True
+        for registro in mapa.notas(): ...      # cada nota uma vez
+    """
+
+    def __init__(self):
+        self.registros = []    # NFeRecord (posição = id interno; None = posição livre)
+        self.apelidos = {}     # chave -> posição em self.registros
+        self.referencias = []  # posição -> quantas chaves apontam para ela
+        self.livres = []       # posições sem nenhuma chave (reaproveitadas)
+
+    def adicionar(self, registro: NFeRecord, chaves) -> None:
+        """
+        Guarda o registro e aponta as chaves para ele (a última vence).
+
+        Um registro que perde todas as chaves (XML alterado no modo vigia)
+        cede a posição ao novo no lugar, sem acumular notas órfãs.
+        """
+        chaves = list(dict.fromkeys(chaves))
+        anteriores = [self.apelidos.get(chave) for chave in chaves]
+        for posicao in anteriores:
+            if posicao is not None:
+                self.referencias[posicao] -= 1
+        orfas = [posicao for posicao in dict.fromkeys(anteriores)
+                 if posicao is not None and self.referencias[posicao] == 0]
+
+        if orfas:
+            posicao = orfas.pop(0)
+        elif self.livres:
+            posicao = self.livres.pop()
+        else:
+            posicao = len(self.registros)
+            self.registros.append(None)
+            self.referencias.append(0)
+        for orfa in orfas:
+            self.registros[orfa] = None
+            self.livres.append(orfa)
+
+        self.registros[posicao] = registro
+        self.referencias[posicao] = len(chaves)
+        for chave in chaves:
+            self.apelidos[chave] = posicao
+
+    def notas(self) -> list:
+        """Registros apontados por alguma chave (cada nota uma vez), na ordem das posições."""
+        return [registro for registro in self.registros if registro is not None]
+
+    # -------------------- Mapping --------------------
+    def __getitem__(self, chave) -> NFeRecord:
+        return self.registros[self.apelidos[chave]]
+
+    def __iter__(self):
+        return iter(self.apelidos)
+
+    def __len__(self):
+        return len(self.apelidos)
+
+    def __repr__(self):
+        return f"<MapaNFe chaves={len(self.apelidos)} notas={len(self.registros) - len(self.livres)}>"
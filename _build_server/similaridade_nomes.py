@@ -0,0 +1,164 @@
+"""
+================================================================================
+similaridade_nomes.py - Matching Aproximado de Nomes de Clientes
+================================================================================
+
+Comparar o nome do pagador com o <xNome> de cada XML custava uma
+normalização dos dois nomes + um SequenceMatcher por par. Aqui:
+
+- o nome de cada nota é normalizado UMA vez, quando a nota é indexada
+- um índice invertido de trigramas aponta, para um nome buscado,
+  as notas que têm pedaços em comum (as demais nem são comparadas)
+- o SequenceMatcher completo só roda nos top-k candidatos, e só quando
+  os limites superiores baratos (real_quick_ratio/quick_ratio) ainda
+  alcançam o mínimo pedido
+
+A similaridade devolvida é a mesma de SequenceMatcher(None, a, b).ratio()
+sobre os nomes normalizados, então os limiares de sempre (0.70 e 0.85)
+continuam valendo.
+
+Uso:
+    motor = MotorNomes()   # normalizar_nome_empresa por padrão
+    motor.indexar(chave, "EMPRESA TESTE LTDA")
+    consulta = motor.normalizar("EMPRESA TESTE")
+    motor.similaridade(consulta, chave, minimo=0.70)   # ratio ou 0.0
+    motor.similares("EMPRESA TESTE", minimo=0.70)      # [(chave, ratio)]
+
+Autor: Sistema de Boletos v7.1
+Data: 2026-10-17
+================================================================================
+"""
+
+import heapq
+from collections import Counter
+from difflib import SequenceMatcher
+
+from normalizacao_nomes import normalizar_nome_empresa
+
+# ==================== CONFIGURAÇÕES ====================
+# Limiares usados no matching boleto x XML
+LIMIAR_NOME_SIMILAR = 0.70
+LIMIAR_NOME_MATCH = 0.85
+
+# Quantos candidatos (por trigramas em comum) passam pelo SequenceMatcher
+TOP_K_CANDIDATOS = 20
+
+
+def trigramas(nome_normalizado: str) -> set:
+    """Trigramas do nome (com espaço nas pontas para pegar início/fim de palavra)."""
+    texto = f" {nome_normalizado} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def similaridade_minima(a: str, b: str, minimo: float = 0.0) -> float:
+    """
+    SequenceMatcher(None, a, b).ratio(), ou 0.0 se ficar abaixo de `minimo`.
+
+    real_quick_ratio() e quick_ratio() são limites superiores do ratio(),
+    então o descarte antecipado não muda nenhum resultado >= minimo.
+    Dois nomes vazios valem 1.0, como no SequenceMatcher.
+    """
+    matcher = SequenceMatcher(None, a, b)
+    if minimo > 0 and (matcher.real_quick_ratio() < minimo or matcher.quick_ratio() < minimo):
+        return 0.0
+    ratio = matcher.ratio()
+    return ratio if ratio >= minimo else 0.0
+
+
+class MotorNomes:
+    """
+    Nomes normalizados + índice invertido de trigramas.
+
+    Args:
+        normalizar: Função de normalização aplicada aos dois lados
+                    (padrão: normalizacao_nomes.normalizar_nome_empresa)
+    """
+
+    def __init__(self, normalizar=normalizar_nome_empresa):
+        self.normalizar = normalizar
+        self.nomes = {}               # chave -> nome normalizado
+        self.por_trigrama = {}        # trigrama -> {chave}
+        self.sem_nome = []            # chaves cujo nome normalizado ficou vazio (ex: "LTDA")
+        self.total_trigramas = {}     # chave -> quantidade de trigramas do nome
+
+    def indexar(self, chave, nome: str) -> None:
+        """Normaliza e indexa o nome de uma nota (chave = id da nota)."""
+        normalizado = self.normalizar(nome or '')
+        self.nomes[chave] = normalizado
+        if not normalizado:
+            self.sem_nome.append(chave)
+            return
+        gramas = trigramas(normalizado)
+        self.total_trigramas[chave] = len(gramas)
+        for trigrama in gramas:
+            self.por_trigrama.setdefault(trigrama, set()).add(chave)
+
+    def remover(self, chave) -> None:
+        """Tira uma nota do índice (nota substituída no modo vigia)."""
+        normalizado = self.nomes.pop(chave, None)
+        if normalizado is None:
+            return
+        if not normalizado:
+            self.sem_nome.remove(chave)
+            return
+        del self.total_trigramas[chave]
+        for trigrama in trigramas(normalizado):
+            chaves = self.por_trigrama[trigrama]
+            chaves.discard(chave)
+            if not chaves:
+                del self.por_trigrama[trigrama]
+
+    # -------------------- comparação --------------------
+    def similaridade(self, consulta_normalizada: str, chave, minimo: float = LIMIAR_NOME_SIMILAR) -> float:
+        """Ratio entre a consulta (já normalizada) e o nome da nota, ou 0.0 abaixo do mínimo."""
+        return similaridade_minima(consulta_normalizada, self.nomes.get(chave, ''), minimo)
+
+    def candidatos(self, consulta_normalizada: str, k: int = TOP_K_CANDIDATOS) -> list:
+        """
+        Notas que compartilham trigramas com a consulta, as k mais
+        próximas primeiro (coeficiente de Dice dos trigramas, que não
+        favorece nomes longos).
+
+        Uma consulta vazia só é parecida (1.0) com os nomes que também
+        ficaram vazios na normalização.
+
+        Returns:
+            [chave]
+        """
+        if not consulta_normalizada:
+            return self.sem_nome[:k]
+
+        gramas = trigramas(consulta_normalizada)
+        comuns = Counter()
+        for trigrama in gramas:
+            comuns.update(self.por_trigrama.get(trigrama, ()))
+
+        total = len(gramas)
+        return heapq.nlargest(
+            k, comuns,
+            key=lambda chave: comuns[chave] / (total + self.total_trigramas[chave])
+        )
+
+    def similares(self, nome: str, minimo: float = LIMIAR_NOME_SIMILAR, k: int = TOP_K_CANDIDATOS) -> list:
+        """
+        Notas com nome parecido com `nome` (SequenceMatcher só nos top-k).
+
+        Returns:
+            [(chave, similaridade)] com similaridade >= minimo, maior primeiro
+        """
+        if not nome:
+            return []
+        consulta = self.normalizar(nome)
+        achados = []
+        for chave in self.candidatos(consulta, k):
+            similaridade = self.similaridade(consulta, chave, minimo)
+            if similaridade > 0:
+                achados.append((chave, similaridade))
+        achados.sort(key=lambda achado: achado[1], reverse=True)
+        return achados
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def __repr__(self):
+        return f"<MotorNomes nomes={len(self.nomes)} trigramas={len(self.por_trigrama)}>"
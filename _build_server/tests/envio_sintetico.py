@@ -0,0 +1,57 @@
+"""
+Lote sintético para o EnvioBoleto (testes e benchmarks)
+
+Gera, para cada cliente (nota, nome, email), um boleto CAPITAL já
+renomeado, o XML e o PDF da nota, e aponta o EnvioBoleto para pastas
+temporárias em modo produção (caixa de saída, registro de envios e cache
+de texto dos PDFs também no temporário, nada é gravado na árvore do
+projeto). Usado pelos testes do pipeline/transporte e pelo benchmark do
+envio a seco.
+"""
+
+import os
+import sys
+
+from pdf_sintetico import gerar_pdf
+from nfe_sintetica import gerar_xml_nfe
+
+
+def gerar_arquivos_envio(pasta_boletos: str, pasta_notas: str, clientes: list) -> None:
+    """Um boleto CAPITAL renomeado, o XML e o PDF da nota para cada (nota, nome, email)"""
+    for nota, nome, email in clientes:
+        gerar_pdf(os.path.join(pasta_boletos, f"{nome} - NF {nota} - 10-11 - R$ 1.234,56.pdf"), [
+            f"CAPITAL RS FIDC NP MULTISSETORIAL\nDANFE\nDESTINATÁRIO / REMETENTE\n"
+            f"NOME / RAZÃO SOCIAL CNPJ / CPF\n{nome} 12.345.678/0001-00\nNÚMERO DA NOTA\n000{nota}\n"
+            f"Vencimento\n10/11/2025\nValor do Documento R$ 1.234,56"])
+        gerar_xml_nfe(os.path.join(pasta_notas, f"3-0{nota}.xml"), nota, nome, cnpj="12345678000100",
+                      valor_total="1234.56", duplicatas=[("001", "2025-11-10", "1234.56")], email=email)
+        gerar_pdf(os.path.join(pasta_notas, f"3-0{nota}.pdf"),
+                  [f"DANFE\n{nome} 12.345.678/0001-00\n{nota}\nVALOR TOTAL DA NOTA 1.234,56"])
+
+
+def preparar_envio(tmp_path, monkeypatch, clientes: list):
+    """EnvioBoleto em modo produção apontado para pastas temporárias com os arquivos dos clientes"""
+    monkeypatch.setitem(sys.modules, "win32com", None)
+    monkeypatch.setitem(sys.modules, "win32com.client", None)
+    import EnvioBoleto
+    import pdf_texto
+    from cache_pdf import CacheTextoPDF
+    from xml_nfe_reader import indexar_xmls_por_nota
+
+    pastas = {nome: tmp_path / nome for nome in ("Boletos", "Notas", "Auditoria", "Erros", "Enviados")}
+    for pasta in pastas.values():
+        pasta.mkdir()
+    gerar_arquivos_envio(str(pastas["Boletos"]), str(pastas["Notas"]), clientes)
+
+    for nome, pasta in (("PASTA_BOLETOS", "Boletos"), ("PASTA_NOTAS", "Notas"), ("PASTA_AUDITORIA", "Auditoria"),
+                        ("PASTA_ERROS", "Erros"), ("PASTA_ENVIADOS", "Enviados")):
+        monkeypatch.setattr(EnvioBoleto, nome, str(pastas[pasta]))
+    monkeypatch.setattr(EnvioBoleto, "ARQUIVO_CAIXA_SAIDA", str(pastas["Auditoria"] / "caixa_saida.sqlite"))
+    monkeypatch.setattr(EnvioBoleto, "ARQUIVO_REGISTRO_ENVIOS", str(pastas["Auditoria"] / "registro.sqlite"))
+    monkeypatch.setattr(EnvioBoleto, "MODO_PREVIEW", False)
+    monkeypatch.setattr(EnvioBoleto, "ENVIO_LIMITE_POR_SEGUNDO", {})
+    monkeypatch.setattr(EnvioBoleto, "carregar_dados_xmls",
+                        lambda: indexar_xmls_por_nota(str(pastas["Notas"]), usar_cache=False))
+    # Cache de texto dos PDFs no temporário (restaurado pelo monkeypatch)
+    monkeypatch.setattr(pdf_texto, "_cache", CacheTextoPDF(str(tmp_path / "Cache" / "texto_pdf")))
+    return EnvioBoleto, pastas
@@ -0,0 +1,65 @@
+"""
+Gerador de XMLs NFe sintéticos para testes
+
+Escreve XMLs no layout da NFe (namespace do portal fiscal) apenas com os
+campos lidos por xml_nfe_reader.py. Usado pelos testes de indexação e
+pelos benchmarks.
+"""
+
+from xml.sax.saxutils import escape
+
+
+def gerar_xml_nfe(caminho: str, numero_nota: str, nome: str, cnpj: str = "",
+                  cpf: str = "", valor_total: str = "100.00", duplicatas: list = None,
+                  email: str = "", itens: int = 1) -> str:
+    """
+    Gera um XML NFe mínimo.
+
+    Args:
+        caminho: Arquivo de saída
+        numero_nota: Conteúdo de <nNF>
+        nome: Razão social do destinatário (<xNome>)
+        cnpj / cpf: Documento do destinatário
+        valor_total: Conteúdo de <vNF> (formato "1234.56")
+        duplicatas: Lista de tuplas (nDup, dVenc 'YYYY-MM-DD', vDup)
+        email: Conteúdo de <email> (pode ter ; ou ,)
+        itens: Quantidade de itens <det> (notas grandes para benchmark)
+
+    Returns:
+        O próprio caminho
+    """
+    doc_dest = f"<CNPJ>{cnpj}</CNPJ>" if cnpj else f"<CPF>{cpf}</CPF>"
+    email_dest = f"<email>{escape(email)}</email>" if email else ""
+
+    det = "".join(
+        f'<det nItem="{i}"><prod><cProd>{i}</cProd><xProd>PRODUTO {i}</xProd>'
+        f'<vProd>{valor_total}</vProd></prod></det>'
+        for i in range(1, itens + 1)
+    )
+
+    cobr = ""
+    if duplicatas:
+        dups = "".join(
+            f"<dup><nDup>{n}</nDup><dVenc>{v}</dVenc><vDup>{valor}</vDup></dup>"
+            for n, v, valor in duplicatas
+        )
+        cobr = f"<cobr><fat><nFat>{numero_nota}</nFat></fat>{dups}</cobr>"
+
+    xml = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<nfeProc xmlns="http://www.portalfiscal.inf.br/nfe" versao="4.00">'
+        '<NFe><infNFe Id="NFe0000" versao="4.00">'
+        f'<ide><cUF>43</cUF><nNF>{numero_nota}</nNF></ide>'
+        '<emit><CNPJ>11222333000181</CNPJ><xNome>JOTA JOTA LTDA</xNome></emit>'
+        f'<dest>{doc_dest}<xNome>{escape(nome)}</xNome>'
+        '<enderDest><xLgr>RUA TESTE</xLgr><nro>1</nro></enderDest>'
+        f'{email_dest}</dest>'
+        f'{det}'
+        f'<total><ICMSTot><vProd>{valor_total}</vProd><vNF>{valor_total}</vNF></ICMSTot></total>'
+        f'{cobr}'
+        '</infNFe></NFe></nfeProc>'
+    )
+
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write(xml)
+    return caminho
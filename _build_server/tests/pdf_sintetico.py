@@ -0,0 +1,65 @@
+"""
+Gerador de PDFs sintéticos para testes
+
+Escreve PDFs mínimos (texto puro, fonte Helvetica) sem depender de
+bibliotecas externas. Usado pelos testes de cache/leitura de PDF e
+pelos benchmarks, que precisam de muitos arquivos com texto conhecido.
+"""
+
+
+def _escapar(linha: str) -> bytes:
+    """Escapa caracteres especiais de strings PDF e codifica em latin-1."""
+    linha = linha.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return linha.encode('latin-1', errors='replace')
+
+
+def gerar_pdf(caminho: str, paginas: list) -> str:
+    """
+    Gera um PDF com uma página por item de `paginas`.
+
+    Args:
+        caminho: Arquivo de saída
+        paginas: Lista de textos (quebras de linha viram linhas no PDF)
+
+    Returns:
+        O próprio caminho (para encadear em fixtures)
+    """
+    objetos = []  # conteúdo de cada objeto, na ordem dos números (1..n)
+
+    n_paginas = len(paginas)
+    # 1 = catálogo, 2 = árvore de páginas, 3 = fonte, depois (página, conteúdo) por página
+    ids_paginas = [4 + 2 * i for i in range(n_paginas)]
+
+    objetos.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = b" ".join(f"{i} 0 R".encode() for i in ids_paginas)
+    objetos.append(b"<< /Type /Pages /Kids [" + kids + b"] /Count " + str(n_paginas).encode() + b" >>")
+    objetos.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    for i, texto in enumerate(paginas):
+        id_conteudo = ids_paginas[i] + 1
+        objetos.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents " + f"{id_conteudo} 0 R".encode() + b" >>"
+        )
+        stream = b"BT /F1 10 Tf 12 TL 40 800 Td\n"
+        for linha in texto.split("\n"):
+            stream += b"(" + _escapar(linha) + b") Tj T*\n"
+        stream += b"ET"
+        objetos.append(b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream")
+
+    saida = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, corpo in enumerate(objetos, 1):
+        offsets.append(len(saida))
+        saida += f"{num} 0 obj\n".encode() + corpo + b"\nendobj\n"
+
+    inicio_xref = len(saida)
+    saida += f"xref\n0 {len(objetos) + 1}\n".encode()
+    saida += b"0000000000 65535 f \n"
+    for off in offsets:
+        saida += f"{off:010d} 00000 n \n".encode()
+    saida += f"trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\nstartxref\n{inicio_xref}\n%%EOF\n".encode()
+
+    with open(caminho, 'wb') as f:
+        f.write(bytes(saida))
+    return caminho
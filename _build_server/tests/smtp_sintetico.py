@@ -0,0 +1,167 @@
+"""
+Servidor SMTP local para testes (recebe e grava, não entrega nada)
+
+Roda como processo separado, no lugar do servidor de e-mail real:
+
+    python tests/smtp_sintetico.py --pasta SAIDA [--porta 0] [--derrubar-apos N]
+
+A primeira linha impressa é a porta escolhida. Cada mensagem vira um
+.eml em SAIDA e cada evento (conexao, login, mensagem) uma linha JSON em
+SAIDA/registro.jsonl, para os testes contarem conexões e logins.
+--derrubar-apos N fecha a conexão (sem aviso) no comando seguinte à
+N-ésima mensagem, como um servidor que derruba sessões ociosas/longas.
+
+Usado pelos testes e pelos benchmarks do transporte SMTP.
+"""
+
+import os
+import sys
+import json
+import base64
+import argparse
+import threading
+import subprocess
+import socketserver
+
+_trava = threading.Lock()
+
+
+class _Sessao(socketserver.StreamRequestHandler):
+    """Uma conexão SMTP (subconjunto do protocolo usado pelo smtplib)."""
+
+    def _responder(self, texto: str) -> None:
+        self.wfile.write(texto.encode() + b"\r\n")
+
+    def _linha(self) -> str:
+        linha = self.rfile.readline()
+        if not linha:
+            raise ConnectionError("cliente fechou a conexão")
+        return linha.decode('utf-8', 'replace').rstrip("\r\n")
+
+    def _registrar(self, evento: dict) -> None:
+        with _trava:
+            with open(os.path.join(self.server.pasta, "registro.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps(evento) + "\n")
+
+    def handle(self):
+        with _trava:
+            self.server.conexoes += 1
+            conexao = self.server.conexoes
+        self._registrar({'evento': 'conexao', 'conexao': conexao})
+        self._responder("220 smtp-sintetico ESMTP")
+
+        remetente, destinatarios, mensagens = None, [], 0
+        try:
+            while True:
+                comando = self._linha()
+                verbo = comando.split(' ', 1)[0].upper()
+                derrubar = self.server.derrubar_apos
+                if derrubar and mensagens >= derrubar:
+                    return  # fecha sem responder
+
+                if verbo == "EHLO":
+                    self._responder("250-smtp-sintetico\r\n250-AUTH PLAIN LOGIN\r\n250-8BITMIME\r\n250 SIZE 104857600")
+                elif verbo == "HELO":
+                    self._responder("250 smtp-sintetico")
+                elif verbo == "AUTH":
+                    partes = comando.split()
+                    if partes[1].upper() == "PLAIN":
+                        if len(partes) < 3:
+                            self._responder("334 ")
+                            partes.append(self._linha())
+                        usuario = base64.b64decode(partes[2]).split(b"\0")[1].decode()
+                    else:
+                        self._responder("334 VXNlcm5hbWU6")
+                        usuario = base64.b64decode(self._linha()).decode()
+                        self._responder("334 UGFzc3dvcmQ6")
+                        self._linha()
+                    self._registrar({'evento': 'login', 'conexao': conexao, 'usuario': usuario})
+                    self._responder("235 2.7.0 Autenticado")
+                elif verbo == "MAIL":
+                    remetente, destinatarios = comando.split(':', 1)[1].split()[0].strip('<>'), []
+                    self._responder("250 OK")
+                elif verbo == "RCPT":
+                    destinatarios.append(comando.split(':', 1)[1].split()[0].strip('<>'))
+                    self._responder("250 OK")
+                elif verbo == "DATA":
+                    self._responder("354 Fim com <CRLF>.<CRLF>")
+                    linhas = []
+                    while True:
+                        linha = self.rfile.readline()
+                        if linha in (b".\r\n", b".\n", b""):
+                            break
+                        linhas.append(linha[1:] if linha.startswith(b"..") else linha)
+                    mensagens += 1
+                    with _trava:
+                        self.server.mensagens += 1
+                        numero = self.server.mensagens
+                    arquivo = os.path.join(self.server.pasta, f"{numero:05d}.eml")
+                    with open(arquivo, "wb") as f:
+                        f.writelines(linhas)
+                    self._registrar({'evento': 'mensagem', 'conexao': conexao, 'de': remetente,
+                                     'para': destinatarios, 'arquivo': os.path.basename(arquivo)})
+                    self._responder("250 OK")
+                elif verbo in ("RSET", "NOOP"):
+                    self._responder("250 OK")
+                elif verbo == "QUIT":
+                    self._responder("221 Tchau")
+                    return
+                else:
+                    self._responder("502 Comando não implementado")
+        except ConnectionError:
+            return
+
+
+class ServidorSMTPSintetico(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, porta: int, pasta: str, derrubar_apos: int = 0):
+        super().__init__(("127.0.0.1", porta), _Sessao)
+        self.pasta = pasta
+        self.derrubar_apos = derrubar_apos
+        self.conexoes = 0
+        self.mensagens = 0
+
+
+def ler_registro(pasta: str) -> list:
+    """Eventos gravados pelo servidor (lista de dicts)."""
+    caminho = os.path.join(pasta, "registro.jsonl")
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, encoding="utf-8") as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+def iniciar_processo(pasta: str, derrubar_apos: int = 0) -> tuple:
+    """
+    Sobe o servidor em outro processo.
+
+    Returns:
+        (processo, porta) - encerrar com processo.terminate()
+    """
+    processo = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--pasta", pasta, "--porta", "0",
+         "--derrubar-apos", str(derrubar_apos)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    porta = int(processo.stdout.readline())
+    return processo, porta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor SMTP local que só grava as mensagens")
+    parser.add_argument("--pasta", required=True, help="Onde gravar .eml e registro.jsonl")
+    parser.add_argument("--porta", type=int, default=0, help="Porta (0 = qualquer livre)")
+    parser.add_argument("--derrubar-apos", type=int, default=0,
+                        help="Derruba a conexão depois de N mensagens (0 = nunca)")
+    args = parser.parse_args()
+
+    os.makedirs(args.pasta, exist_ok=True)
+    with ServidorSMTPSintetico(args.porta, args.pasta, args.derrubar_apos) as servidor:
+        print(servidor.server_address[1], flush=True)
+        servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Testes para o Índice Persistente de NFe (cache_nfe.py)
+
+Garante que o índice devolve exatamente o mesmo que o parsing direto,
+que só XMLs novos/alterados são relidos e que XMLs apagados saem do
+índice.
+"""
+
+import pytest
+import sys
+import os
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cache_nfe
+from cache_nfe import CacheNFe
+from xml_nfe_reader import indexar_xmls_por_nota, extrair_dados_nfe
+from nfe_sintetica import gerar_xml_nfe
+
+
+class TestCacheNFe:
+    """
+    Suite de testes para CacheNFe
+
+    Testa:
+    - Equivalência com extrair_dados_nfe
+    - Releitura só de XMLs novos/alterados
+    - Remoção de XMLs apagados
+    - Integração com indexar_xmls_por_nota
+    """
+
+    @pytest.fixture
+    def pasta_notas(self, tmp_path):
+        """Fixture com 3 XMLs (um com 3 emails e duas duplicatas)"""
+        pasta = tmp_path / "Notas"
+        pasta.mkdir()
+        gerar_xml_nfe(str(pasta / "3-0310001.xml"), "310001", "CLIENTE UM LTDA", cnpj="12345678000190",
+                      valor_total="1500.50", email="a@empresa.com.br;b@empresa.com.br;c@empresa.com.br",
+                      duplicatas=[("001", "2025-11-10", "750.25"), ("002", "2025-12-10", "750.25")])
+        gerar_xml_nfe(str(pasta / "3-0310002.xml"), "310002", "CLIENTE DOIS", cpf="12345678901",
+                      email="pessoa@gmail.com")
+        gerar_xml_nfe(str(pasta / "3-0310003.xml"), "310003", "CLIENTE TRES LTDA", cnpj="98765432000110")
+        return pasta
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        """Fixture com índice isolado em pasta temporária"""
+        return CacheNFe(str(tmp_path / "cache" / "indice_nfe.sqlite"))
+
+    @pytest.fixture
+    def contador_parse(self, monkeypatch):
+        """Fixture que conta as chamadas de extrair_dados_nfe pelo índice"""
+        chamadas = []
+        original = cache_nfe.extrair_dados_nfe
+
+        def extrair_contando(caminho, max_emails=2):
+            chamadas.append(os.path.basename(caminho))
+            return original(caminho, max_emails)
+
+        monkeypatch.setattr(cache_nfe, "extrair_dados_nfe", extrair_contando)
+        return chamadas
+
+    # ================================================================
+    # TESTES DE EQUIVALÊNCIA
+    # ================================================================
+
+    @pytest.mark.parametrize("max_emails", [1, 2, 5])
+    def test_mesmo_resultado_que_parse_direto(self, cache, pasta_notas, max_emails):
+        """Teste: dados do índice (1ª e 2ª execução) == extrair_dados_nfe"""
+        arquivos = sorted(os.listdir(pasta_notas))
+        esperado = [extrair_dados_nfe(str(pasta_notas / a), max_emails) for a in arquivos]
+
+        assert cache.sincronizar(str(pasta_notas), arquivos, max_emails) == esperado
+        assert cache.sincronizar(str(pasta_notas), arquivos, max_emails) == esperado
+
+    # ================================================================
+    # TESTES INCREMENTAIS
+    # ================================================================
+
+    def test_segunda_execucao_nao_rele(self, cache, pasta_notas, contador_parse):
+        """Teste: nada mudou = nenhum XML relido"""
+        arquivos = sorted(os.listdir(pasta_notas))
+        cache.sincronizar(str(pasta_notas), arquivos)
+        assert len(contador_parse) == 3
+
+        cache.sincronizar(str(pasta_notas), arquivos)
+
+        assert len(contador_parse) == 3
+        assert cache.estatisticas() == {'reaproveitados': 3, 'lidos': 0, 'removidos': 0}
+
+    def test_xml_alterado_e_novo_sao_relidos(self, cache, pasta_notas, contador_parse):
+        """Teste: só o XML alterado e o novo passam pelo parsing"""
+        cache.sincronizar(str(pasta_notas), sorted(os.listdir(pasta_notas)))
+        contador_parse.clear()
+
+        gerar_xml_nfe(str(pasta_notas / "3-0310002.xml"), "310002", "CLIENTE DOIS ALTERADO", cpf="12345678901")
+        gerar_xml_nfe(str(pasta_notas / "3-0310004.xml"), "310004", "CLIENTE QUATRO", cnpj="11111111000111")
+
+        arquivos = sorted(os.listdir(pasta_notas))
+        dados = cache.sincronizar(str(pasta_notas), arquivos)
+
+        assert sorted(contador_parse) == ["3-0310002.xml", "3-0310004.xml"]
+        assert dados[1]['nome'] == "CLIENTE DOIS ALTERADO"
+        assert dados[3]['numero_nota'] == "310004"
+
+    def test_arquivo_tocado_sem_mudar_conteudo(self, cache, pasta_notas, contador_parse):
+        """Teste: mtime diferente com mesmo conteúdo não reparseia"""
+        arquivos = sorted(os.listdir(pasta_notas))
+        cache.sincronizar(str(pasta_notas), arquivos)
+        contador_parse.clear()
+
+        caminho = pasta_notas / "3-0310001.xml"
+        st = os.stat(caminho)
+        os.utime(caminho, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000_000))
+
+        cache.sincronizar(str(pasta_notas), arquivos)
+        assert contador_parse == []
+
+    def test_xml_apagado_sai_do_indice(self, cache, pasta_notas):
+        """Teste: XML removido da pasta é removido do índice"""
+        cache.sincronizar(str(pasta_notas), sorted(os.listdir(pasta_notas)))
+        os.remove(pasta_notas / "3-0310003.xml")
+
+        dados = cache.sincronizar(str(pasta_notas), sorted(os.listdir(pasta_notas)))
+
+        assert len(dados) == 2
+        assert cache.removidos == 1
+
+    def test_versao_diferente_recria_indice(self, tmp_path, pasta_notas, contador_parse, monkeypatch):
+        """Teste: mudar VERSAO_INDICE descarta o índice antigo"""
+        caminho_db = str(tmp_path / "indice.sqlite")
+        arquivos = sorted(os.listdir(pasta_notas))
+        CacheNFe(caminho_db).sincronizar(str(pasta_notas), arquivos)
+
+        monkeypatch.setattr(cache_nfe, "VERSAO_INDICE", cache_nfe.VERSAO_INDICE + 1)
+        CacheNFe(caminho_db).sincronizar(str(pasta_notas), arquivos)
+
+        assert len(contador_parse) == 6
+
+    # ================================================================
+    # TESTES DE INTEGRAÇÃO
+    # ================================================================
+
+    def test_indexar_xmls_usa_indice(self, cache, pasta_notas, monkeypatch):
+        """Teste: indexar_xmls_por_nota dá o mesmo mapa com e sem índice"""
+        monkeypatch.setattr(cache_nfe, "USAR_CACHE_NFE", True)
+        cache_nfe.definir_cache_nfe(cache)
+        try:
+            sem_indice = indexar_xmls_por_nota(str(pasta_notas), usar_cache=False)
+            primeira = indexar_xmls_por_nota(str(pasta_notas))
+            segunda = indexar_xmls_por_nota(str(pasta_notas))
+        finally:
+            cache_nfe.definir_cache_nfe(None)
+
+        assert primeira == sem_indice
+        assert segunda == sem_indice
+        assert cache.reaproveitados == 3
+
+    def test_indice_com_erro_cai_no_parse(self, pasta_notas, monkeypatch, capsys):
+        """Teste: falha do SQLite não impede a indexação"""
+        def falhar():
+            raise RuntimeError("banco travado")
+
+        monkeypatch.setattr(cache_nfe, "obter_cache_nfe", falhar)
+
+        mapa = indexar_xmls_por_nota(str(pasta_notas))
+
+        assert '310001' in mapa
+        assert "banco travado" in capsys.readouterr().out
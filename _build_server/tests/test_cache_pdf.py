@@ -0,0 +1,124 @@
+"""
+Testes para o Cache de Texto de PDFs
+
+Garante que o texto extraído de um PDF é reaproveitado entre a
+renomeação e o envio (mesmo conteúdo em pastas diferentes) e que o
+cache respeita versão e limite de tamanho.
+"""
+
+import pytest
+import sys
+import os
+import shutil
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pdf_texto
+from cache_pdf import CacheTextoPDF, calcular_sha256
+from pdf_sintetico import gerar_pdf
+
+
+class TestCacheTextoPDF:
+    """
+    Suite de testes para o cache de texto de PDFs
+
+    Testa:
+    - Acerto/falha e contadores
+    - Reuso entre pastas (Entrada -> Renomeados)
+    - Invalidação por versão
+    - Remoção LRU por tamanho
+    """
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        """Fixture que instala um cache isolado em pasta temporária"""
+        cache = CacheTextoPDF(str(tmp_path / "cache"), tamanho_maximo_mb=10)
+        pdf_texto.definir_cache(cache)
+        yield cache
+        pdf_texto.definir_cache(None)
+
+    @pytest.fixture
+    def pdf_boleto(self, tmp_path):
+        """Fixture com PDF sintético de duas páginas"""
+        return gerar_pdf(str(tmp_path / "boleto.pdf"), [
+            "CAPITAL RS FIDC\nPAGADOR: EMPRESA TESTE LTDA\nVencimento 10/11/2025",
+            "Valor do Documento R$ 1.234,56",
+        ])
+
+    # ================================================================
+    # TESTES DE ACERTO/FALHA
+    # ================================================================
+
+    def test_primeira_leitura_falha_segunda_acerta(self, cache, pdf_boleto):
+        """Teste: primeira leitura vai ao pdfplumber, segunda vem do cache"""
+        texto1 = pdf_texto.extrair_texto_pdf(pdf_boleto)
+        texto2 = pdf_texto.extrair_texto_pdf(pdf_boleto)
+
+        assert texto1 == texto2
+        assert "EMPRESA TESTE LTDA" in texto1
+        assert cache.falhas == 1
+        assert cache.acertos == 1
+        assert cache.gravacoes == 1
+
+    def test_formato_texto_igual_ao_original(self, cache, pdf_boleto):
+        """Teste: junção das páginas mantém o formato 'texto\\n' por página"""
+        texto = pdf_texto.extrair_texto_pdf(pdf_boleto)
+        assert texto.endswith("R$ 1.234,56\n")
+        assert texto.count("\n") >= 4
+
+    def test_mesmo_conteudo_em_outra_pasta(self, cache, pdf_boleto, tmp_path):
+        """Teste: boleto movido para Renomeados não é lido de novo"""
+        pdf_texto.extrair_texto_pdf(pdf_boleto)
+
+        destino = tmp_path / "Renomeados"
+        destino.mkdir()
+        movido = str(destino / "EMPRESA TESTE - NF 000123 - 10-11 - R$ 1.234,56.pdf")
+        shutil.move(pdf_boleto, movido)
+
+        pdf_texto.extrair_texto_pdf(movido)
+        assert cache.acertos == 1
+
+    def test_conteudo_diferente_chave_diferente(self, tmp_path):
+        """Teste: PDFs diferentes geram hashes diferentes"""
+        a = gerar_pdf(str(tmp_path / "a.pdf"), ["PAGADOR: A"])
+        b = gerar_pdf(str(tmp_path / "b.pdf"), ["PAGADOR: B"])
+        assert calcular_sha256(a) != calcular_sha256(b)
+
+    # ================================================================
+    # TESTES DE VERSÃO E LIMITE
+    # ================================================================
+
+    def test_versao_diferente_invalida(self, tmp_path):
+        """Teste: entrada gravada com outra versão é tratada como falha"""
+        pasta = str(tmp_path / "cache")
+        CacheTextoPDF(pasta, versao=1).salvar("ab" * 32, ["texto"])
+
+        cache_v2 = CacheTextoPDF(pasta, versao=2)
+        assert cache_v2.obter("ab" * 32) is None
+        assert cache_v2.falhas == 1
+
+    def test_remocao_lru(self, tmp_path):
+        """Teste: ao estourar o limite, a entrada menos usada sai primeiro"""
+        cache = CacheTextoPDF(str(tmp_path / "cache"), tamanho_maximo_mb=0.01)  # ~10 KB
+        pagina = "x" * 3000
+
+        cache.salvar("aa" * 32, [pagina])
+        cache.salvar("bb" * 32, [pagina])
+        os.utime(cache._caminho_entrada("aa" * 32), (1, 1))
+        os.utime(cache._caminho_entrada("bb" * 32), (2, 2))
+
+        cache.salvar("cc" * 32, [pagina])
+        cache.salvar("dd" * 32, [pagina])
+
+        assert cache.removidos >= 1
+        assert cache.obter("aa" * 32) is None
+        assert cache.obter("dd" * 32) == [pagina]
+
+    def test_cache_desabilitado(self, pdf_boleto, monkeypatch):
+        """Teste: USAR_CACHE_TEXTO_PDF=False lê o PDF diretamente"""
+        monkeypatch.setattr(pdf_texto, "USAR_CACHE_TEXTO_PDF", False)
+        pdf_texto.definir_cache(None)
+        assert pdf_texto.obter_cache() is None
+        assert "EMPRESA TESTE LTDA" in pdf_texto.extrair_texto_pdf(pdf_boleto)
@@ -0,0 +1,326 @@
+"""
+Testes para a Caixa de Saída do Envio (caixa_saida.py)
+
+Garante que cada mensagem passa por pendente -> enviando -> enviada ->
+concluida, que uma execução interrompida retoma sem reenviar o que já
+saiu, que erros temporários são tentados de novo com espera exponencial
+e os permanentes não, que vários workers não mandam a mesma mensagem duas
+vezes, que o limite por segundo vale para todos juntos, que o Outlook
+fica com um worker só e que preview e produção não enxergam as mensagens
+um do outro.
+"""
+
+import pytest
+import sys
+import os
+import json
+import time
+import sqlite3
+import threading
+from dataclasses import asdict
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from caixa_saida import CaixaSaida, Despachante, LimiteTaxa
+from registro_envios import MODO_PREVIEW, MODO_PRODUCAO
+from transporte_email import ErroTransporte, MensagemEmail, TransporteEmail, TransporteSMTP
+from smtp_sintetico import iniciar_processo, ler_registro
+
+
+class Registrador(TransporteEmail):
+    """Transporte falso: guarda os assuntos; `falhas` erros antes de aceitar cada assunto"""
+
+    def __init__(self, enviados: list, falhas: int = 0, erro=ConnectionError, atraso: float = 0.0):
+        super().__init__()
+        self.enviados = enviados
+        self.falhas = falhas
+        self.erro = erro
+        self.atraso = atraso
+        self.tentativas = {}
+        self.threads = set()
+
+    def _enviar(self, mensagem):
+        self.threads.add(threading.get_ident())
+        vezes = self.tentativas[mensagem.assunto] = self.tentativas.get(mensagem.assunto, 0) + 1
+        if vezes <= self.falhas:
+            raise self.erro("servidor indisponível")
+        time.sleep(self.atraso)
+        self.enviados.append(mensagem.assunto)
+
+
+class RegistradorOutlook(Registrador):
+    conexoes_simultaneas = False
+
+
+def mensagem(i: int) -> MensagemEmail:
+    return MensagemEmail(para=[f"cliente{i}@empresa.com.br"], assunto=f"Boleto {i}",
+                         corpo_html=f"<p>{i}</p>", cc=["adm@jotajota.net.br"], fidc="CAPITAL")
+
+
+@pytest.fixture
+def caixa(tmp_path):
+    caixa = CaixaSaida(str(tmp_path / "caixa_saida.sqlite"))
+    yield caixa
+    caixa.fechar()
+
+
+def encher(caixa: CaixaSaida, quantidade: int) -> list:
+    return [caixa.enfileirar(mensagem(i), {'boletos': [f"/boletos/boleto_{i}.pdf"]}) for i in range(quantidade)]
+
+
+class TestCaixaSaida:
+    """
+    Suite de testes para caixa_saida
+
+    Testa:
+    - Estados da mensagem no diário
+    - Retomada depois de uma queda
+    - Preview e produção separados no mesmo arquivo
+    - Novas tentativas e erros permanentes
+    - Transporte indisponível parando o Despachante
+    - Workers, limite por segundo e Outlook com um worker
+    - Cada transporte fechado uma única vez
+    - Envio real por SMTP
+    """
+
+    def test_estados_da_mensagem(self, caixa):
+        """Teste: mensagem volta do disco igual; estados avançam um por vez"""
+        item_id, = encher(caixa, 1)
+
+        item = caixa.pegar_proxima()
+        assert item.id == item_id and item.estado == "enviando"
+        assert item.mensagem == mensagem(0)
+        assert item.contexto == {'boletos': ["/boletos/boleto_0.pdf"]}
+        assert caixa.pegar_proxima() is None
+
+        caixa.marcar_enviada(item_id)
+        assert [i.id for i in caixa.enviadas_sem_conclusao()] == [item_id]
+        caixa.marcar_concluida(item_id)
+        assert caixa.contar() == {'concluida': 1}
+        assert caixa.arquivos_em_aberto() == set()
+
+    def test_retoma_execucao_interrompida(self, tmp_path):
+        """Teste: queda no meio - "enviando" volta; "enviada" não é reenviada"""
+        caminho = str(tmp_path / "caixa_saida.sqlite")
+        caixa = CaixaSaida(caminho)
+        encher(caixa, 4)
+        primeira, segunda = caixa.pegar_proxima(), caixa.pegar_proxima()
+        assert segunda.estado == "enviando" and segunda.mensagem == mensagem(1)
+        caixa.marcar_enviada(primeira.id)   # saiu, mas os boletos não foram movidos
+        caixa.fechar()                      # "queda" com a segunda em envio
+
+        caixa = CaixaSaida(caminho)
+        assert caixa.recuperar() == {'interrompidas': 1, 'pendentes': 3, 'sem_conclusao': 1}
+        assert caixa.arquivos_em_aberto() == {f"boleto_{i}.pdf" for i in range(4)}
+
+        enviados = []
+        resumo = Despachante(caixa, lambda: Registrador(enviados)).drenar()
+        assert resumo == {'enviadas': 3, 'reagendadas': 0, 'falhas': 0}
+        assert sorted(enviados) == ["Boleto 1", "Boleto 2", "Boleto 3"]
+        assert [i.id for i in caixa.enviadas_sem_conclusao()] == [primeira.id]
+        caixa.fechar()
+
+    def test_preview_e_producao_separados(self, tmp_path):
+        """Teste: mesmo arquivo - preview interrompido não sai na produção, e vice-versa"""
+        caminho = str(tmp_path / "caixa_saida.sqlite")
+        preview = CaixaSaida(caminho, modo=MODO_PREVIEW)
+        encher(preview, 2)
+        preview.marcar_enviada(preview.pegar_proxima().id)
+        preview.pegar_proxima()
+        preview.fechar()                    # queda com uma "enviando" e uma "enviada"
+
+        producao = CaixaSaida(caminho, modo=MODO_PRODUCAO)
+        producao.enfileirar(mensagem(9), {'boletos': ["/boletos/boleto_9.pdf"]})
+        assert producao.recuperar() == {'interrompidas': 0, 'pendentes': 1, 'sem_conclusao': 0}
+        assert producao.arquivos_em_aberto() == {"boleto_9.pdf"}
+        assert producao.enviadas_sem_conclusao() == []
+
+        enviados = []
+        Despachante(producao, lambda: Registrador(enviados)).drenar()
+        assert enviados == ["Boleto 9"]
+        producao.fechar()
+
+        preview = CaixaSaida(caminho, modo=MODO_PREVIEW)
+        assert preview.recuperar() == {'interrompidas': 1, 'pendentes': 1, 'sem_conclusao': 1}
+        assert preview.pegar(3) is None     # a mensagem da produção não é do preview
+        assert preview.contar() == {'pendente': 1, 'enviada': 1}
+        preview.fechar()
+
+        with pytest.raises(ValueError):
+            CaixaSaida(caminho, modo="teste")
+
+    def test_caixa_antiga_sem_modo(self, tmp_path):
+        """Teste: caixa gravada antes da coluna modo - as mensagens ficam com a produção"""
+        caminho = str(tmp_path / "caixa_saida.sqlite")
+        conn = sqlite3.connect(caminho)
+        conn.execute("CREATE TABLE mensagens (id INTEGER PRIMARY KEY AUTOINCREMENT, execucao TEXT NOT NULL,"
+                     " estado TEXT NOT NULL, mensagem TEXT NOT NULL, contexto TEXT NOT NULL,"
+                     " tentativas INTEGER NOT NULL DEFAULT 0, proxima_tentativa REAL NOT NULL DEFAULT 0,"
+                     " erro TEXT, criada_em REAL NOT NULL, enviada_em REAL)")
+        conn.execute("INSERT INTO mensagens (execucao, estado, mensagem, contexto, criada_em) "
+                     "VALUES ('x', 'pendente', ?, '{}', 0)", (json.dumps(asdict(mensagem(1))),))
+        conn.commit()
+        conn.close()
+
+        for modo, pendentes in ((MODO_PREVIEW, 0), (MODO_PRODUCAO, 1)):
+            caixa = CaixaSaida(caminho, modo=modo)
+            assert caixa.contar().get('pendente', 0) == pendentes
+            caixa.fechar()
+
+    def test_erro_temporario_tenta_de_novo(self, caixa, capsys):
+        """Teste: duas quedas do servidor - reagenda com espera dobrando e envia"""
+        encher(caixa, 1)
+        enviados = []
+        despachante = Despachante(caixa, lambda: Registrador(enviados, falhas=2),
+                                  espera_base=0.05, max_tentativas=5)
+
+        concluidas = []
+        resumo = despachante.drenar(ao_enviar=lambda item: concluidas.append(item.id))
+
+        assert resumo == {'enviadas': 1, 'reagendadas': 2, 'falhas': 0}
+        assert enviados == ["Boleto 0"] and concluidas == [1]
+        assert caixa.contar() == {'concluida': 1}
+        assert [despachante.espera_para(t) for t in range(3)] == [0.05, 0.1, 0.2]
+        assert "nova tentativa (2/5)" in capsys.readouterr().out
+
+    def test_esgota_tentativas_e_erro_permanente(self, caixa):
+        """Teste: servidor sempre fora - falhou após N tentativas; anexo faltando falha na hora"""
+        encher(caixa, 1)
+        falhas = []
+        Despachante(caixa, lambda: Registrador([], falhas=99), espera_base=0.01,
+                    max_tentativas=3).drenar(ao_falhar=lambda item, erro: falhas.append(item.tentativas))
+        assert falhas == [3]
+
+        caixa.enfileirar(mensagem(1))
+        resumo = Despachante(caixa, lambda: Registrador([], falhas=1, erro=FileNotFoundError)).drenar()
+        assert resumo == {'enviadas': 0, 'reagendadas': 0, 'falhas': 1}
+        assert caixa.contar() == {'falhou': 2}
+
+        # "falhou" é final: a próxima execução monta a mensagem de novo
+        assert caixa.recuperar()['pendentes'] == 0
+        assert caixa.arquivos_em_aberto() == set()
+
+    def test_transporte_indisponivel_para_tudo(self, caixa):
+        """Teste: conta/login recusado ao abrir - para na hora, nada vira falha nem nova tentativa"""
+        encher(caixa, 6)
+        aberturas = []
+
+        class SemConta(Registrador):
+            def abrir(self):
+                aberturas.append(threading.get_ident())
+                raise ErroTransporte("Conta cobranca@jotajota.net.br não encontrada")
+
+        despachante = Despachante(caixa, lambda: SemConta([]), workers=3, espera_base=60)
+        inicio = time.perf_counter()
+        with pytest.raises(ErroTransporte, match="não encontrada"):
+            despachante.drenar()
+        assert time.perf_counter() - inicio < 5
+        assert 1 <= len(aberturas) <= 3              # no máximo uma tentativa por worker
+        assert despachante.resumo == {'enviadas': 0, 'reagendadas': 0, 'falhas': 0}
+        assert caixa.contar() == {'pendente': 6}
+        assert caixa.pegar_proxima().tentativas == 0
+        caixa.recuperar()
+
+        # O envio do pipeline também não tenta de novo
+        with pytest.raises(ErroTransporte):
+            despachante.enviar_item(1)
+        assert caixa.contar() == {'pendente': 6}
+
+    def test_pos_envio_com_erro_fica_enviada(self, caixa, capsys):
+        """Teste: erro ao mover boletos não reenvia; fica para a próxima execução"""
+        encher(caixa, 1)
+
+        def ao_enviar(item):
+            raise PermissionError("arquivo aberto")
+
+        Despachante(caixa, lambda: Registrador([])).drenar(ao_enviar=ao_enviar)
+        assert caixa.contar() == {'enviada': 1}
+        assert "Pós-envio da mensagem #1 falhou" in capsys.readouterr().out
+
+    def test_varios_workers_sem_duplicar(self, caixa):
+        """Teste: 4 workers, 40 mensagens - cada uma sai exatamente uma vez, em paralelo"""
+        encher(caixa, 40)
+        enviados, transportes = [], []
+
+        def criar():
+            transportes.append(Registrador(enviados, atraso=0.01))
+            return transportes[-1]
+
+        inicio = time.perf_counter()
+        resumo = Despachante(caixa, criar, workers=4).drenar()
+        duracao = time.perf_counter() - inicio
+
+        assert resumo['enviadas'] == 40
+        assert sorted(enviados) == sorted(f"Boleto {i}" for i in range(40))
+        assert len(transportes) == 4 and all(not t.aberto for t in transportes)
+        assert duracao < 40 * 0.01  # em série levaria 0,4s
+
+    def test_transporte_fechado_uma_vez(self, caixa):
+        """Teste: enviar_item + drenar + fechar - cada transporte fecha exatamente uma vez"""
+        ids = encher(caixa, 6)
+        fechamentos = []
+
+        class Contador(Registrador):
+            def fechar(self):
+                fechamentos.append(id(self))
+                super().fechar()
+
+        transportes = []
+
+        def criar():
+            transportes.append(Contador([]))
+            return transportes[-1]
+
+        despachante = Despachante(caixa, criar, workers=3)
+        despachante.concluir(despachante.enviar_item(ids[0]))
+        despachante.drenar()
+        despachante.fechar()
+
+        assert len(transportes) == 3
+        assert sorted(fechamentos) == sorted(id(t) for t in transportes)
+
+    def test_limite_por_segundo(self, caixa):
+        """Teste: 20/s somando 4 workers - 11 mensagens levam pelo menos 0,5s"""
+        encher(caixa, 11)
+        inicio = time.perf_counter()
+        Despachante(caixa, lambda: Registrador([]), workers=4, por_segundo=20).drenar()
+        assert time.perf_counter() - inicio >= 0.45
+
+        limite = LimiteTaxa(0)
+        inicio = time.perf_counter()
+        for _ in range(1000):
+            limite.aguardar()
+        assert time.perf_counter() - inicio < 0.1
+
+    def test_outlook_um_worker(self, caixa):
+        """Teste: transporte sem conexões simultâneas - um transporte, na thread de quem chamou"""
+        encher(caixa, 5)
+        transportes = []
+
+        def criar():
+            transportes.append(RegistradorOutlook([]))
+            return transportes[-1]
+
+        Despachante(caixa, criar, workers=4).drenar()
+        assert len(transportes) == 1
+        assert transportes[0].threads == {threading.get_ident()}
+        assert transportes[0].enviados == [f"Boleto {i}" for i in range(5)]
+
+    def test_envio_smtp_com_workers(self, caixa, tmp_path):
+        """Teste: 12 mensagens por SMTP com 3 workers - 3 conexões, 12 recebidas"""
+        encher(caixa, 12)
+        processo, porta = iniciar_processo(str(tmp_path / "smtp"))
+        try:
+            criar = lambda: TransporteSMTP("127.0.0.1", porta, "cobranca@jotajota.net.br",
+                                           seguranca="nenhuma", timeout=10)
+            resumo = Despachante(caixa, criar, workers=3).drenar()
+        finally:
+            processo.terminate()
+            processo.wait(timeout=10)
+
+        eventos = ler_registro(str(tmp_path / "smtp"))
+        assert resumo['enviadas'] == 12
+        assert sum(1 for e in eventos if e['evento'] == 'mensagem') == 12
+        assert sum(1 for e in eventos if e['evento'] == 'conexao') <= 3
@@ -0,0 +1,202 @@
+"""
+Testes para o Casamento em Lote (casamento_lote.py)
+
+Garante que cada duplicata vai para no máximo um boleto, que a
+atribuição é a de maior score total (comparada com força bruta), que
+conflitos e boletos sem nota são reportados e que a renomeação com
+--lote não dá a mesma nota para dois boletos.
+"""
+
+import sys
+import os
+import random
+import itertools
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from decimal import Decimal
+import pdf_texto
+import cache_nfe
+import RenomeaçãoBoletos as renomeacao
+from casamento_lote import PedidoBoleto, casar_lote, hungaro
+from pdf_sintetico import gerar_pdf
+from nfe_sintetica import gerar_xml_nfe
+
+CNPJ_A = "12345678000190"
+CNPJ_B = "98765432000110"
+
+
+def nota(numero, cpf_cnpj, duplicatas=(), nome="CLIENTE TESTE LTDA", valor_total="100.00"):
+    """Dados de um XML no formato de extrair_dados_nfe()"""
+    return {
+        'xml_valido': True, 'numero_nota': numero, 'cpf_cnpj': cpf_cnpj, 'cnpj': cpf_cnpj,
+        'nome': nome, 'valor_total': Decimal(valor_total), 'emails': [],
+        'duplicatas': [
+            {'numero': f"00{i}", 'vencimento': venc, 'valor': Decimal(valor)}
+            for i, (venc, valor) in enumerate(duplicatas, 1)
+        ],
+    }
+
+
+class TestCasamentoLote:
+    """
+    Suite de testes para casar_lote e o método húngaro
+
+    Testa:
+    - Atribuição ótima (força bruta em matrizes pequenas)
+    - Uma duplicata por boleto, com conflitos reportados
+    - Resultado independente da ordem dos boletos
+    """
+
+    # ================================================================
+    # TESTES DO MÉTODO HÚNGARO
+    # ================================================================
+
+    def test_hungaro_igual_forca_bruta(self):
+        """Teste: custo mínimo igual ao de todas as permutações"""
+        rng = random.Random(3)
+        for _ in range(200):
+            n = rng.randint(1, 5)
+            m = rng.randint(n, 6)
+            custos = [[rng.randint(0, 20) for _ in range(m)] for _ in range(n)]
+
+            colunas = hungaro(custos)
+            melhor = min(sum(custos[i][c] for i, c in enumerate(perm))
+                         for perm in itertools.permutations(range(m), n))
+
+            assert len(set(colunas)) == n
+            assert sum(custos[i][c] for i, c in enumerate(colunas)) == melhor
+
+    # ================================================================
+    # TESTES DO CASAMENTO
+    # ================================================================
+
+    def test_valor_separa_notas_do_mesmo_vencimento(self):
+        """Teste: duas notas com o mesmo vencimento - cada boleto fica com a do seu valor"""
+        mapa = {
+            "310001": nota("310001", CNPJ_A, [("2025-11-10", "100.00")]),
+            "310002": nota("310002", CNPJ_A, [("2025-11-10", "200.00")]),
+        }
+        pedidos = [
+            PedidoBoleto("y.pdf", cnpj=CNPJ_A, vencimento="10-11", valor_cents=20000),
+            PedidoBoleto("x.pdf", cnpj=CNPJ_A, vencimento="10-11", valor_cents=10000),
+        ]
+
+        resultado = casar_lote(pedidos, mapa)
+
+        assert resultado.atribuicoes["x.pdf"].numero_nota == "310001"
+        assert resultado.atribuicoes["y.pdf"].numero_nota == "310002"
+        assert resultado.conflitos == [] and resultado.sem_match == []
+
+    def test_disputa_resolvida_pelo_total(self):
+        """Teste: quem só tem uma opção fica com ela; o outro vai para a segunda"""
+        mapa = {
+            "310001": nota("310001", CNPJ_A, [("2025-11-10", "100.00")]),
+            "310002": nota("310002", CNPJ_A, [("2025-11-10", "150.00")]),
+            "310003": nota("310003", CNPJ_B, [("2025-11-10", "100.00")]),
+        }
+        pedidos = [
+            # Melhor opção: 310001 (vencimento + valor); também serve 310002
+            PedidoBoleto("x.pdf", cnpj=CNPJ_A, vencimento="10-11", valor_cents=10000),
+            # Só serve 310001 (número impresso no boleto)
+            PedidoBoleto("y.pdf", cnpj=CNPJ_B, vencimento="10-12", numero_nota="310001"),
+        ]
+
+        resultado = casar_lote(pedidos, mapa)
+
+        assert resultado.atribuicoes["y.pdf"].numero_nota == "310001"
+        assert resultado.atribuicoes["x.pdf"].numero_nota == "310002"
+        assert len(resultado.conflitos) == 1
+        assert resultado.conflitos[0].pedidos == ["x.pdf", "y.pdf"]
+        assert resultado.conflitos[0].vencedor == "y.pdf"
+
+    def test_boleto_repetido_fica_sem_nota(self):
+        """Teste: o mesmo boleto duas vezes - só o primeiro leva a duplicata"""
+        mapa = {"310001": nota("310001", CNPJ_A, [("2025-11-10", "100.00")])}
+        pedidos = [PedidoBoleto(chave, cnpj=CNPJ_A, vencimento="10-11") for chave in ("a.pdf", "b.pdf")]
+
+        resultado = casar_lote(pedidos, mapa)
+
+        assert list(resultado.atribuicoes) == ["a.pdf"]
+        assert resultado.sem_match == [("b.pdf", "duplicatas ficaram com outros boletos")]
+        assert resultado.conflitos[0].vencedor == "a.pdf"
+
+    def test_sem_candidatos(self):
+        """Teste: CNPJ sem notas e sem número impresso"""
+        resultado = casar_lote([PedidoBoleto("a.pdf", cnpj=CNPJ_B, vencimento="10-11")],
+                               {"310001": nota("310001", CNPJ_A)})
+
+        assert resultado.atribuicoes == {}
+        assert resultado.sem_match[0][0] == "a.pdf"
+
+    def test_parcelas_diferentes_da_mesma_nota(self):
+        """Teste: duas parcelas da mesma nota vão para os dois boletos"""
+        dados = nota("1310001", CNPJ_A, [("2025-11-10", "50.00"), ("2025-12-10", "50.00")])
+        mapa = {"310001": dados, "1310001": dados}
+        pedidos = [PedidoBoleto("nov.pdf", cnpj=CNPJ_A, vencimento="10-11"),
+                   PedidoBoleto("dez.pdf", cnpj=CNPJ_A, vencimento="10-12")]
+
+        resultado = casar_lote(pedidos, mapa)
+
+        assert resultado.atribuicoes["nov.pdf"].duplicata['vencimento'] == "2025-11-10"
+        assert resultado.atribuicoes["dez.pdf"].duplicata['vencimento'] == "2025-12-10"
+        assert {a.numero_nota for a in resultado.atribuicoes.values()} == {"310001"}
+
+    def test_independe_da_ordem_dos_boletos(self):
+        """Teste: lote embaralhado dá a mesma atribuição (sem empates de score)"""
+        rng = random.Random(11)
+        mapa = {}
+        for i in range(30):
+            cnpj = rng.choice([CNPJ_A, CNPJ_B])
+            venc = f"2025-11-{rng.randint(10, 12)}"
+            mapa[f"3100{i:02d}"] = nota(f"3100{i:02d}", cnpj, [(venc, f"{100 + i}.00")])
+        pedidos = [
+            PedidoBoleto(f"{i}.pdf", cnpj=dados['cpf_cnpj'], vencimento=f"{dados['duplicatas'][0]['vencimento'][8:]}-11",
+                         valor_cents=int(dados['duplicatas'][0]['valor'] * 100))
+            for i, dados in enumerate(mapa.values())
+        ]
+
+        esperado = {chave: a.numero_nota for chave, a in casar_lote(pedidos, mapa).atribuicoes.items()}
+        rng.shuffle(pedidos)
+        obtido = {chave: a.numero_nota for chave, a in casar_lote(pedidos, mapa).atribuicoes.items()}
+
+        assert obtido == esperado
+        assert len(set(esperado.values())) == len(esperado) == 30
+
+    # ================================================================
+    # TESTE DA RENOMEAÇÃO
+    # ================================================================
+
+    def test_renomeacao_em_lote(self, tmp_path, monkeypatch):
+        """Teste: dois PDFs do mesmo boleto - só um é renomeado com a nota"""
+        entrada, destino, notas, auditoria = (tmp_path / nome for nome in
+                                              ("Entrada", "Renomeados", "Notas", "Auditoria"))
+        for pasta in (entrada, destino, notas, auditoria):
+            pasta.mkdir()
+
+        texto = (
+            "CAPITAL RS FIDC NP MULTISSETORIAL\nDANFE\nDESTINATÁRIO / REMETENTE\n"
+            "NOME / RAZÃO SOCIAL CNPJ / CPF\nCLIENTE TESTE LTDA 12.345.678/0001-90\n"
+            "Vencimento\n10/11/2025\nValor do Documento R$ 100,00"
+        )
+        for arquivo in ("a.pdf", "b.pdf"):
+            gerar_pdf(str(entrada / arquivo), [texto])
+        gerar_xml_nfe(str(notas / "3-0310001.xml"), "310001", "CLIENTE TESTE LTDA", cnpj=CNPJ_A,
+                      valor_total="100.00", duplicatas=[("001", "2025-11-10", "100.00")])
+
+        monkeypatch.setattr(renomeacao, "PASTA_ENTRADA", str(entrada))
+        monkeypatch.setattr(renomeacao, "PASTA_DESTINO", str(destino))
+        monkeypatch.setattr(renomeacao, "PASTA_NOTAS", str(notas))
+        monkeypatch.setattr(renomeacao, "PASTA_AUDITORIA", str(auditoria))
+        monkeypatch.setattr(renomeacao, "ARQUIVO_LOG", str(auditoria / "log_erros.txt"))
+        monkeypatch.setattr(pdf_texto, "USAR_CACHE_TEXTO_PDF", False)
+        pdf_texto.definir_cache(None)
+        monkeypatch.setattr(cache_nfe, "USAR_CACHE_NFE", False)
+
+        renomeacao.processar_boletos(workers=1, em_lote=True)
+
+        assert [p.name for p in destino.iterdir()] == ["CLIENTE TESTE LTDA - NF 310001 - 10-11 - R$ 100,00.pdf"]
+        assert len(list(entrada.iterdir())) == 1
+        assert "Casamento em lote" in (auditoria / "log_erros.txt").read_text(encoding="utf-8")
@@ -0,0 +1,129 @@
+"""
+Testes para a Linha Digitável (extractors/codigo_barras.py)
+
+Garante que os dígitos verificadores são conferidos, que valor e fator de
+vencimento (inclusive o reinício do fator em 22/02/2025) são decodificados
+e que os extratores usam a linha digitável antes dos regex.
+"""
+
+import pytest
+import sys
+import os
+from datetime import date
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extractors import ParsedBoleto, ExtractorFactory, codigo_barras
+from extractors.codigo_barras import (
+    decodificar_linha_digitavel, encontrar_linha_digitavel, fator_para_data,
+    modulo10, modulo11_arrecadacao, ORIGEM_CODIGO_BARRAS, ORIGEM_REGEX,
+)
+
+# Boleto real: R$ 2.221,20, fator 1360 (17/02/2026 no ciclo novo)
+LINHA = "23790.36706 40000.911947 49000.840501 3 13600000222120"
+LINHA_DV_ERRADO = "23790.36706 40000.911947 49000.840501 4 13600000222120"
+
+TEXTO_CREDVALE = """CREDVALE FUNDO DE INVESTIMENTO
+Vencimento
+10/11/2025
+(=) Valor do Documento R$ 1.234,56
+Pagador
+EMPRESA TESTE LTDA
+{linha}"""
+
+
+def arrecadacao(corpo_43: str) -> str:
+    """Linha de arrecadação (48 dígitos) com DVs de módulo 11 calculados"""
+    codigo = corpo_43[:3] + str(modulo11_arrecadacao(corpo_43)) + corpo_43[3:]
+    blocos = [codigo[i:i + 11] for i in range(0, 44, 11)]
+    return ' '.join(f"{b}-{modulo11_arrecadacao(b)}" for b in blocos)
+
+
+class TestCodigoBarras:
+    """
+    Suite de testes para codigo_barras
+
+    Testa:
+    - Dígitos verificadores e decodificação
+    - Fator de vencimento nos dois ciclos
+    - Linha digitável antes dos regex nos extratores
+    """
+
+    def test_decodifica_boleto_bancario(self):
+        """Teste: valor e fator saem do campo 5, DVs conferem"""
+        linha = decodificar_linha_digitavel(LINHA)
+
+        assert linha.valida
+        assert linha.valor_cents == 222120
+        assert linha.fator_vencimento == 1360
+        assert linha.codigo_barras == "23793136000002221200367040000911944900084050"
+        assert linha.vencimento(referencia=date(2026, 1, 1)) == date(2026, 2, 17)
+
+    def test_dv_errado_nao_vale(self):
+        """Teste: DV geral ou de campo errado - linha inválida"""
+        assert not decodificar_linha_digitavel(LINHA_DV_ERRADO).valida
+        assert not decodificar_linha_digitavel(LINHA.replace("36706", "36707")).valida
+        assert encontrar_linha_digitavel(f"Autenticação\n{LINHA_DV_ERRADO}") is None
+        assert modulo10("237903670") == 6
+
+    def test_encontra_com_e_sem_pontuacao(self):
+        """Teste: linha digitável formatada ou com os 47 dígitos colados"""
+        colada = LINHA.replace(".", "").replace(" ", "")
+
+        assert encontrar_linha_digitavel(f"Recibo do Pagador\n{LINHA}\nFicha").valor_cents == 222120
+        assert encontrar_linha_digitavel(f"codigo {colada} fim").valor_cents == 222120
+        assert encontrar_linha_digitavel(f"{LINHA_DV_ERRADO}\n{LINHA}").digitos == colada
+        assert encontrar_linha_digitavel(f"1{colada}") is None
+
+    @pytest.mark.parametrize("fator,referencia,esperado", [
+        (1000, date(2000, 7, 1), date(2000, 7, 3)),
+        (9999, date(2025, 2, 1), date(2025, 2, 21)),
+        (1000, date(2025, 3, 1), date(2025, 2, 22)),
+        (1360, date(2001, 6, 1), date(2001, 6, 28)),
+        (1360, date(2026, 1, 1), date(2026, 2, 17)),
+        (0, date(2026, 1, 1), None),
+    ])
+    def test_fator_de_vencimento(self, fator, referencia, esperado):
+        """Teste: ciclo mais próximo da referência (fator reiniciou em 22/02/2025)"""
+        assert fator_para_data(fator, referencia) == esperado
+
+    def test_arrecadacao(self):
+        """Teste: 48 dígitos com valor em reais (3º dígito 8), sem vencimento"""
+        # produto 8, segmento 2, identificador 8 (reais, módulo 11), valor 123,45
+        texto = arrecadacao("828" + "00000012345" + "0001" + "0" * 25)
+        linha = encontrar_linha_digitavel(texto)
+
+        assert linha.arrecadacao and linha.valida
+        assert linha.valor_cents == 12345
+        assert linha.vencimento() is None
+
+    @pytest.mark.parametrize("fidc", ["CAPITAL", "NOVAX", "CREDVALE", "SQUID"])
+    def test_extratores_usam_linha_digitavel(self, fidc):
+        """Teste: linha digitável válida vence os regex; com DV errado vale o regex"""
+        extractor = ExtractorFactory.get_extractor(fidc)
+        codigo_barras.zerar_contadores()
+
+        doc = ParsedBoleto.de_texto(TEXTO_CREDVALE.format(linha=LINHA))
+        assert extractor.extrair_valor(doc) == "R$ 2.221,20"
+        vencimento = extractor.extrair_vencimento(doc)
+        assert vencimento == doc.linha_digitavel.vencimento().strftime("%d-%m")
+        extractor.extrair_valor(doc)  # extrair de novo (leitura parcial, pedido) não conta em dobro
+        codigo_barras.contar_origens(doc.origens)
+
+        doc = ParsedBoleto.de_texto(TEXTO_CREDVALE.format(linha=LINHA_DV_ERRADO))
+        assert extractor.extrair_valor(doc) == "R$ 1.234,56"
+        assert extractor.extrair_vencimento(doc) == "10-11"
+        assert doc.origens == {'valor': ORIGEM_REGEX, 'vencimento': ORIGEM_REGEX}
+        codigo_barras.contar_origens(doc.origens)
+
+        assert codigo_barras.estatisticas() == {
+            'valor': {ORIGEM_CODIGO_BARRAS: 1, ORIGEM_REGEX: 1},
+            'vencimento': {ORIGEM_CODIGO_BARRAS: 1, ORIGEM_REGEX: 1},
+        }
+
+    def test_fallback_antigo_le_valor_na_posicao_certa(self):
+        """Teste: último fallback (sem DV) lê o valor nos 10 últimos dígitos"""
+        extractor = ExtractorFactory.get_extractor("NOVAX")
+
+        assert extractor.extrair_valor(f"NOVAX\n{LINHA_DV_ERRADO}") == "R$ 2.221,20"
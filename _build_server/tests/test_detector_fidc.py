@@ -0,0 +1,113 @@
+"""
+Testes para o Detector de FIDC (extractors/detector_fidc.py)
+
+Garante que a detecção segue a prioridade do FIDC_CONFIG (não a ordem no
+texto), informa palavra-chave e posição, é compilada uma vez por config
+(e de novo com recompilar_detector()) e dá o mesmo resultado na
+renomeação e no envio.
+"""
+
+import pytest
+import sys
+import os
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_server import FIDC_CONFIG
+from extractors import ParsedBoleto, detector_fidc
+from extractors.detector_fidc import (
+    DetectorFIDC, DeteccaoFIDC, assinatura_config, detectar_fidc, obter_detector, recompilar_detector
+)
+
+
+def detectar_antigo(texto_upper, config=FIDC_CONFIG):
+    """Detecção anterior: "in" por palavra-chave, na ordem do config"""
+    for fidc, dados in config.items():
+        for palavra in dados["palavras_chave"]:
+            if palavra.upper() in texto_upper:
+                return fidc
+    return None
+
+
+class TestDetectorFIDC:
+    """
+    Suite de testes para DetectorFIDC
+
+    Testa:
+    - Prioridade do config, palavra-chave e posição
+    - Compilação uma vez por config e recompilação
+    - Mesmo resultado na renomeação e no envio
+    """
+
+    def test_prioridade_do_config(self):
+        """Teste: SQUID antes no texto, mas CAPITAL vem primeiro no config"""
+        texto = "SQUID FUNDO DE INVESTIMENTO ... CEDENTE CAPITAL RS FIDC NP"
+
+        deteccao = detectar_fidc(texto)
+
+        assert deteccao == DeteccaoFIDC("CAPITAL", "CAPITAL RS FIDC", texto.index("CAPITAL"))
+
+    def test_primeira_ocorrencia_e_palavra_mais_longa(self):
+        """Teste: posição da primeira ocorrência e a palavra-chave mais longa nela"""
+        texto = "BENEFICIARIO NOVAX\nNOVAX FUNDO DE INVEST"
+        deteccao = detectar_fidc(texto)
+        assert (deteccao.fidc, deteccao.palavra_chave, deteccao.posicao) == ("NOVAX", "NOVAX", 13)
+
+        deteccao = detectar_fidc("X NOVAX FUNDO")
+        assert (deteccao.palavra_chave, deteccao.posicao) == ("NOVAX FUNDO", 2)
+
+    def test_sem_palavra_chave(self):
+        """Teste: texto sem FIDC - None"""
+        assert detectar_fidc("DANFE DOCUMENTO AUXILIAR DA NOTA FISCAL") is None
+        assert detectar_fidc("") is None
+
+    @pytest.mark.parametrize("texto", [
+        "CAPITAL RS", "CAPITAL R S NOVAX", "CREDVALE SQUID", "SQUID FIDC", "NOVAX CAPITAL RS FIDC",
+        "CREDVALE FIDC NOVAX FUNDO", "NADA AQUI", "CAPITALRS SQUIDNOVAX",
+    ])
+    def test_igual_a_deteccao_antiga(self, texto):
+        """Teste: mesmo FIDC que os "in" por palavra-chave"""
+        deteccao = detectar_fidc(texto)
+        assert (deteccao.fidc if deteccao else None) == detectar_antigo(texto)
+
+    def test_palavras_redundantes_nao_sao_buscadas(self):
+        """Teste: "NOVAX FIDC" contém "NOVAX" - só "NOVAX" entra na busca"""
+        detector = DetectorFIDC(assinatura_config(FIDC_CONFIG))
+
+        fidc, minimas, completas = detector.tabela[1]
+        assert fidc == "NOVAX"
+        assert minimas == ("NOVAX",)
+        assert completas[-1] == "NOVAX" and len(completas) == 3
+        assert detector.fidcs == list(FIDC_CONFIG)
+
+    def test_recompila_quando_config_muda(self, monkeypatch):
+        """Teste: mesmo config não recompila (nem percorre o config); outro config ou recompilar_detector() sim"""
+        config = {
+            "ALFA": {"palavras_chave": ["ALFA FIDC"]},
+            "BETA": {"palavras_chave": ["beta"]},
+        }
+        primeiro = obter_detector(config)
+        assert detectar_fidc("FUNDO ALFA", config) is None
+
+        # Detecções seguintes com o mesmo config: nenhuma assinatura recalculada
+        monkeypatch.setattr(detector_fidc, "assinatura_config", None)
+        assert obter_detector(config) is primeiro
+        monkeypatch.undo()
+
+        config["ALFA"]["palavras_chave"].append("fundo alfa")
+        recompilar_detector()
+        assert obter_detector(config) is not primeiro
+        assert detectar_fidc("FUNDO ALFA BETA", config) == DeteccaoFIDC("ALFA", "FUNDO ALFA", 0)
+
+        outro = {"GAMA": {"palavras_chave": ["gama"]}}
+        assert detectar_fidc("GAMA", outro) == DeteccaoFIDC("GAMA", "GAMA", 0)
+
+    def test_renomeacao_e_envio_iguais(self):
+        """Teste: detectar_fidc da renomeação e ParsedBoleto.fidc (envio) concordam"""
+        import RenomeaçãoBoletos
+
+        for texto in ["Beneficiário\nSquid Fundo de Investimento", "CREDVALE FIDC", "Capital RS Fidc NP"]:
+            doc = ParsedBoleto.de_texto(texto)
+            assert RenomeaçãoBoletos.detectar_fidc(texto) == doc.fidc
+            assert doc.deteccao_fidc.fidc == doc.fidc
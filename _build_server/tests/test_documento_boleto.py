@@ -0,0 +1,161 @@
+"""
+Testes para o ParsedBoleto (documento lido uma vez)
+
+Garante que um boleto custa exatamente uma leitura de PDF por execução,
+mesmo passando por detecção de FIDC, extração de campos e processamento
+com XML, e que os extratores dão o mesmo resultado com str ou documento.
+"""
+
+import pytest
+import sys
+import os
+from decimal import Decimal
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pdf_texto
+import pdf_backends
+from extractors import ParsedBoleto, ExtractorFactory
+from extractors.documento import ANCORAS
+from pdf_sintetico import gerar_pdf
+
+
+TEXTO_CAPITAL = """CAPITAL RS FIDC NP MULTISSETORIAL
+DANFE
+DESTINATÁRIO / REMETENTE
+NOME / RAZÃO SOCIAL CNPJ / CPF
+EMPRESA TESTE LTDA 12.345.678/0001-90
+NÚMERO DA NOTA
+000123456
+Vencimento
+10/11/2025
+Valor do Documento R$ 1.234,56"""
+
+MAPA_XMLS = {
+    '123456': {
+        'numero_nota': '123456',
+        'nome': 'EMPRESA TESTE LTDA',
+        'cpf_cnpj': '12345678000190',
+        'cnpj': '12345678000190',
+        'emails': ['financeiro@empresa.com.br'],
+        'valor_total': Decimal('1234.56'),
+        'duplicatas': [{'numero': '001', 'vencimento': '2025-11-10', 'valor': Decimal('1234.56')}],
+    }
+}
+
+
+class TestParsedBoleto:
+    """
+    Suite de testes para o documento do boleto
+
+    Testa:
+    - Uma leitura de PDF por boleto
+    - Memoização das derivações
+    - Equivalência str x ParsedBoleto nos extratores
+    """
+
+    @pytest.fixture
+    def contador_pdfplumber(self, monkeypatch):
+        """Fixture que desliga o cache e conta as aberturas do pdfplumber"""
+        monkeypatch.setattr(pdf_texto, "USAR_CACHE_TEXTO_PDF", False)
+        pdf_texto.definir_cache(None)
+
+        chamadas = {'open': 0}
+        abrir_original = pdf_backends.pdfplumber.open
+
+        def abrir_contando(*args, **kwargs):
+            chamadas['open'] += 1
+            return abrir_original(*args, **kwargs)
+
+        monkeypatch.setattr(pdf_backends.pdfplumber, "open", abrir_contando)
+        return chamadas
+
+    @pytest.fixture
+    def pdf_capital(self, tmp_path):
+        """Fixture com boleto CAPITAL sintético"""
+        return gerar_pdf(str(tmp_path / "boleto.pdf"), [TEXTO_CAPITAL])
+
+    # ================================================================
+    # TESTES DE LEITURA ÚNICA
+    # ================================================================
+
+    def test_uma_leitura_por_boleto(self, contador_pdfplumber, pdf_capital):
+        """Teste: detecção + extração + XML usam a mesma leitura do PDF"""
+        doc = ParsedBoleto.de_arquivo(pdf_capital)
+
+        extractor = ExtractorFactory.get_extractor(doc.fidc)
+        extractor.extrair_dados(doc)
+        extractor.extrair_cnpj_cpf_boleto(doc)
+        resultado = extractor.processar_boleto_com_xml(doc, MAPA_XMLS)
+
+        assert doc.fidc == "CAPITAL"
+        assert resultado['status'] == 'ok'
+        assert resultado['numero_nota'] == '123456'
+        assert contador_pdfplumber['open'] == 1
+
+    def test_leitura_preguicosa(self, contador_pdfplumber, pdf_capital):
+        """Teste: criar o documento não lê o PDF"""
+        doc = ParsedBoleto.de_arquivo(pdf_capital)
+        assert contador_pdfplumber['open'] == 0
+        assert "EMPRESA TESTE LTDA" in doc.texto
+        assert contador_pdfplumber['open'] == 1
+
+    def test_pdf_inexistente_nao_levanta(self, contador_pdfplumber, tmp_path):
+        """Teste: falha de leitura deixa texto vazio e registra o erro"""
+        doc = ParsedBoleto.de_arquivo(str(tmp_path / "nao_existe.pdf"))
+        assert doc.vazio
+        assert doc.erro
+        assert doc.fidc is None
+
+    # ================================================================
+    # TESTES DE MEMOIZAÇÃO E EQUIVALÊNCIA
+    # ================================================================
+
+    def test_derivacoes_memoizadas(self):
+        """Teste: linhas e maiúsculas são calculadas uma vez"""
+        doc = ParsedBoleto.de_texto(TEXTO_CAPITAL)
+        assert doc.linhas is doc.linhas
+        assert doc.linhas_upper is doc.linhas_upper
+        assert doc.linhas_upper[0] == TEXTO_CAPITAL.splitlines()[0].upper()
+
+    def test_de_devolve_mesmo_objeto(self):
+        """Teste: ParsedBoleto.de não recria documento existente"""
+        doc = ParsedBoleto.de_texto(TEXTO_CAPITAL)
+        assert ParsedBoleto.de(doc) is doc
+
+    @pytest.mark.parametrize("fidc", ["CAPITAL", "NOVAX", "CREDVALE", "SQUID"])
+    def test_str_e_documento_equivalentes(self, fidc):
+        """Teste: extratores retornam o mesmo com str ou ParsedBoleto"""
+        extractor = ExtractorFactory.get_extractor(fidc)
+        doc = ParsedBoleto.de_texto(TEXTO_CAPITAL)
+
+        assert extractor.extrair_dados(TEXTO_CAPITAL) == extractor.extrair_dados(doc)
+        assert extractor.extrair_cnpj_cpf_boleto(TEXTO_CAPITAL) == extractor.extrair_cnpj_cpf_boleto(doc)
+        assert extractor.extrair_numero_nota(TEXTO_CAPITAL) == extractor.extrair_numero_nota(doc)
+
+    # ================================================================
+    # TESTES DO MAPA DE ÂNCORAS
+    # ================================================================
+
+    def test_ancoras_indices_das_linhas(self):
+        """Teste: cada rótulo aponta para as linhas (em maiúsculas) que o contêm"""
+        doc = ParsedBoleto.de_texto(TEXTO_CAPITAL)
+        linhas = TEXTO_CAPITAL.splitlines()
+
+        assert doc.ancoras['VENCIMENTO'] == [linhas.index("Vencimento")]
+        assert doc.ancoras['MERO DA NOTA'] == [linhas.index("NÚMERO DA NOTA")]
+        assert doc.ancoras.com_todas('DESTINAT', 'REMETENTE') == [2]
+        assert 'PAGADOR' not in doc.ancoras
+        assert doc.ancoras['PAGADOR'] == []
+
+    def test_ancoras_iguais_a_varredura(self):
+        """Teste: mesmo resultado que procurar o rótulo linha a linha"""
+        texto = TEXTO_CAPITAL + "\nPagador\nEMPRESA TESTE LTDA\nPAGADOR: OUTRA\nDestinatário sem remetente"
+        doc = ParsedBoleto.de_texto(texto)
+
+        for ancora in ANCORAS:
+            esperado = [i for i, linha in enumerate(texto.splitlines()) if ancora in linha.upper()]
+            assert doc.ancoras[ancora] == esperado
+        assert doc.ancoras is doc.ancoras
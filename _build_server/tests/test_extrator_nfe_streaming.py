@@ -0,0 +1,192 @@
+"""
+Testes para o Extrator de NFe em uma passada (extrair_dados_nfe)
+
+Garante que a leitura com iterparse (streaming=True) devolve exatamente
+o mesmo dicionário que a leitura com a árvore completa (streaming=False),
+inclusive nos casos de erro, e que o modo é escolhido pelo tamanho.
+"""
+
+import pytest
+import sys
+import os
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from decimal import Decimal
+import xml_nfe_reader
+from xml_nfe_reader import extrair_dados_nfe
+from nfe_sintetica import gerar_xml_nfe
+
+
+CABECALHO = '<nfeProc xmlns="http://www.portalfiscal.inf.br/nfe"><NFe><infNFe>'
+RODAPE = '</infNFe></NFe></nfeProc>'
+
+
+def escrever(caminho, corpo: str) -> str:
+    """Escreve um XML NFe com o corpo informado dentro de <infNFe>"""
+    caminho.write_text(CABECALHO + corpo + RODAPE, encoding="utf-8")
+    return str(caminho)
+
+
+class TestExtratorNFeStreaming:
+    """
+    Suite de testes para extrair_dados_nfe (iterparse)
+
+    Testa:
+    - Equivalência com a leitura em árvore
+    - Primeira ocorrência e filhos diretos de <dest>/<dup>
+    - Erros (arquivo ausente, XML malformado, dados mínimos)
+    - Escolha do modo pelo tamanho do arquivo
+    """
+
+    def comparar(self, caminho: str, max_emails: int = 2) -> dict:
+        """Extrai nos dois modos, confere igualdade e retorna o resultado"""
+        streaming = extrair_dados_nfe(caminho, max_emails, streaming=True)
+        assert streaming == extrair_dados_nfe(caminho, max_emails, streaming=False)
+        return streaming
+
+    # ================================================================
+    # TESTES DE EQUIVALÊNCIA
+    # ================================================================
+
+    @pytest.mark.parametrize("max_emails", [1, 2, 5])
+    def test_nota_completa_cnpj(self, tmp_path, max_emails):
+        """Teste: CNPJ, 3 emails (um inválido) e duas duplicatas"""
+        caminho = gerar_xml_nfe(
+            str(tmp_path / "nota.xml"), "310001", "CLIENTE UM LTDA", cnpj="12345678000190",
+            valor_total="1500.50", email="a@empresa.com.br; invalido@ , b@empresa.com.br;c@empresa.com.br",
+            duplicatas=[("001", "2025-11-10", "750.25"), ("002", "2025-12-10", "750.25")]
+        )
+
+        dados = self.comparar(caminho, max_emails)
+
+        assert dados['xml_valido']
+        assert dados['cpf_cnpj'] == "12345678000190"
+        assert dados['valor_total'] == Decimal("1500.50")
+        assert len(dados['emails']) == min(max_emails, 3)
+        assert dados['emails_invalidos'] == ["invalido@"]
+        assert [d['numero'] for d in dados['duplicatas']] == ["001", "002"]
+
+    def test_nota_pessoa_fisica(self, tmp_path):
+        """Teste: CPF sem CNPJ e sem email"""
+        caminho = gerar_xml_nfe(str(tmp_path / "nota.xml"), "310002", "PESSOA", cpf="12345678901")
+
+        dados = self.comparar(caminho)
+
+        assert dados['cpf'] == "12345678901"
+        assert dados['cnpj'] == ""
+        assert dados['emails'] == []
+
+    def test_nota_com_muitos_itens(self, tmp_path):
+        """Teste: nota com 5.000 <det> dá o mesmo resultado"""
+        caminho = gerar_xml_nfe(str(tmp_path / "nota.xml"), "310003", "CLIENTE GRANDE", cnpj="98765432000110",
+                                duplicatas=[("001", "2025-11-10", "100.00")], itens=5000)
+
+        dados = self.comparar(caminho)
+
+        assert dados['numero_nota'] == "310003"
+        assert len(dados['duplicatas']) == 1
+
+    def test_primeira_ocorrencia_vence(self, tmp_path):
+        """Teste: nNF de nota referenciada e segundo <dest> são ignorados"""
+        caminho = escrever(tmp_path / "nota.xml", (
+            '<ide><nNF>310004</nNF><NFref><refNF><nNF>999999</nNF></refNF></NFref></ide>'
+            '<dest><CNPJ>12345678000190</CNPJ><CPF>12345678901</CPF><xNome> CLIENTE </xNome>'
+            '<enderDest><xNome>NAO E O NOME</xNome><email>nao@usar.com</email></enderDest>'
+            '<email>cliente@empresa.com.br</email><email>segundo@empresa.com.br</email></dest>'
+            '<dest><xNome>OUTRO</xNome></dest>'
+            '<total><ICMSTot><vNF>10.00</vNF></ICMSTot></total><vNF>99.00</vNF>'
+        ))
+
+        dados = self.comparar(caminho)
+
+        assert dados['numero_nota'] == "310004"
+        assert dados['nome'] == "CLIENTE"
+        assert dados['cpf'] == ""
+        assert dados['emails'] == ["cliente@empresa.com.br"]
+        assert dados['valor_total'] == Decimal("10.00")
+
+    def test_duplicata_incompleta_ignorada(self, tmp_path):
+        """Teste: <dup> sem <vDup> não entra na lista"""
+        caminho = escrever(tmp_path / "nota.xml", (
+            '<ide><nNF>310005</nNF></ide><dest><xNome>CLIENTE</xNome></dest>'
+            '<cobr><dup><nDup>001</nDup><dVenc>2025-11-10</dVenc></dup>'
+            '<dup><nDup> 002 </nDup><dVenc>2025-12-10</dVenc><vDup>50.00</vDup></dup></cobr>'
+        ))
+
+        dados = self.comparar(caminho)
+
+        assert dados['duplicatas'] == [{'numero': "002", 'vencimento': "2025-12-10", 'valor': Decimal("50.00")}]
+
+    def test_nota_sem_namespace(self, tmp_path):
+        """Teste: XML fora do namespace da NFe não tem campos"""
+        caminho = tmp_path / "nota.xml"
+        caminho.write_text("<nfeProc><ide><nNF>1</nNF></ide><dest><xNome>X</xNome></dest></nfeProc>",
+                           encoding="utf-8")
+
+        dados = self.comparar(str(caminho))
+
+        assert not dados['xml_valido']
+
+    # ================================================================
+    # TESTES DE ERRO
+    # ================================================================
+
+    def test_arquivo_inexistente(self, tmp_path):
+        """Teste: arquivo ausente"""
+        dados = self.comparar(str(tmp_path / "nao_existe.xml"))
+
+        assert dados['erro'].startswith("Arquivo não encontrado")
+
+    def test_xml_malformado(self, tmp_path):
+        """Teste: XML truncado não devolve dados parciais"""
+        caminho = tmp_path / "quebrado.xml"
+        caminho.write_text(CABECALHO + '<ide><nNF>310006</nNF></ide><dest><xNome>X</xNome>', encoding="utf-8")
+
+        dados = self.comparar(str(caminho))
+
+        assert dados['erro'].startswith("XML malformado")
+        assert dados['numero_nota'] == ""
+
+    def test_sem_dados_minimos(self, tmp_path):
+        """Teste: nota sem <dest>"""
+        dados = self.comparar(escrever(tmp_path / "nota.xml", '<ide><nNF>310007</nNF></ide>'))
+
+        assert dados['erro'] == "XML não contém dados mínimos necessários (nome e número da nota)"
+
+    def test_duplicata_sem_texto(self, tmp_path):
+        """Teste: <nDup/> vazio cai em 'Erro ao processar XML' como antes"""
+        caminho = escrever(tmp_path / "nota.xml", (
+            '<ide><nNF>310008</nNF></ide><dest><xNome>CLIENTE</xNome></dest>'
+            '<cobr><dup><nDup/><dVenc>2025-11-10</dVenc><vDup>50.00</vDup></dup></cobr>'
+        ))
+
+        dados = self.comparar(caminho)
+
+        assert dados['erro'].startswith("Erro ao processar XML")
+
+    # ================================================================
+    # TESTES DE ESCOLHA DO MODO
+    # ================================================================
+
+    def test_modo_pelo_tamanho(self, tmp_path, monkeypatch):
+        """Teste: só XMLs a partir do limite usam iterparse"""
+        pequeno = gerar_xml_nfe(str(tmp_path / "pequeno.xml"), "310009", "CLIENTE", cnpj="12345678000190")
+        grande = gerar_xml_nfe(str(tmp_path / "grande.xml"), "310010", "CLIENTE", cnpj="12345678000190",
+                               itens=200)
+        monkeypatch.setattr(xml_nfe_reader, "TAMANHO_MIN_STREAMING_XML", os.path.getsize(grande))
+
+        usados = []
+        original = xml_nfe_reader._ler_campos_nfe_streaming
+
+        def ler_contando(caminho):
+            usados.append(os.path.basename(caminho))
+            return original(caminho)
+
+        monkeypatch.setattr(xml_nfe_reader, "_ler_campos_nfe_streaming", ler_contando)
+
+        assert extrair_dados_nfe(pequeno)['xml_valido']
+        assert extrair_dados_nfe(grande)['xml_valido']
+        assert usados == ["grande.xml"]
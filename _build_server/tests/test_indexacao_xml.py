@@ -0,0 +1,125 @@
+"""
+Testes para a Indexação de XMLs (indexar_xmls_por_nota)
+
+Garante que o modo paralelo gera exatamente o mesmo mapa que o
+sequencial, que o resultado não depende da ordem do os.listdir e que
+conflitos de chave e XMLs inválidos aparecem no resumo agregado.
+"""
+
+import pytest
+import sys
+import os
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import xml_nfe_reader
+from xml_nfe_reader import indexar_xmls_por_nota, indexar_xmls_com_resumo, resolver_workers_xml
+from nfe_sintetica import gerar_xml_nfe
+
+
+class TestIndexacaoXML:
+    """
+    Suite de testes para a indexação de XMLs
+
+    Testa:
+    - Paralelo x sequencial
+    - Ordem determinística
+    - Conflitos de chave de 6 dígitos
+    - Resumo agregado de erros
+    """
+
+    @pytest.fixture
+    def pasta_notas(self, tmp_path):
+        """Fixture com 120 XMLs válidos e 2 inválidos"""
+        pasta = tmp_path / "Notas"
+        pasta.mkdir()
+        for i in range(120):
+            numero = f"{310000 + i}"
+            gerar_xml_nfe(str(pasta / f"3-0{numero}.xml"), numero, f"CLIENTE {i} LTDA",
+                          cnpj=f"{12345678000100 + i:014d}", email=f"c{i}@empresa.com.br",
+                          duplicatas=[("001", "2025-11-10", "100.00")])
+        (pasta / "quebrado.xml").write_text("<nfeProc><NFe>", encoding="utf-8")
+        (pasta / "vazio.xml").write_text(
+            '<nfeProc xmlns="http://www.portalfiscal.inf.br/nfe"><NFe/></nfeProc>', encoding="utf-8"
+        )
+        return pasta
+
+    # ================================================================
+    # TESTES DE PARALELISMO E ORDEM
+    # ================================================================
+
+    def test_paralelo_igual_sequencial(self, pasta_notas, monkeypatch):
+        """Teste: workers=2 gera o mesmo mapa e o mesmo resumo"""
+        monkeypatch.setattr(xml_nfe_reader, "MIN_XMLS_POR_WORKER", 10)
+
+        mapa_seq, resumo_seq = indexar_xmls_com_resumo(str(pasta_notas), usar_cache=False, workers=1)
+        mapa_par, resumo_par = indexar_xmls_com_resumo(str(pasta_notas), usar_cache=False, workers=2)
+
+        assert mapa_par == mapa_seq
+        assert list(mapa_par) == list(mapa_seq)
+        assert resumo_par == resumo_seq
+        assert resumo_seq['validos'] == 120
+
+    def test_ordem_do_listdir_nao_importa(self, pasta_notas, monkeypatch):
+        """Teste: os.listdir em outra ordem gera o mesmo mapa"""
+        normal = indexar_xmls_por_nota(str(pasta_notas), usar_cache=False)
+
+        listdir_original = os.listdir
+        monkeypatch.setattr(xml_nfe_reader.os, "listdir", lambda p: list(reversed(listdir_original(p))))
+        invertido = indexar_xmls_por_nota(str(pasta_notas), usar_cache=False)
+
+        assert list(invertido) == list(normal)
+
+    @pytest.mark.parametrize("pedido,total,esperado", [
+        (1, 1000, 1),
+        (4, 1000, 4),
+        (8, 3, 3),
+        (4, 0, 1),
+    ])
+    def test_resolver_workers_xml(self, pedido, total, esperado):
+        """Teste: nunca usa mais processos que XMLs"""
+        assert resolver_workers_xml(pedido, total) == esperado
+
+    # ================================================================
+    # TESTES DE CONFLITO E RESUMO
+    # ================================================================
+
+    def test_conflito_chave_curta(self, tmp_path):
+        """Teste: nota 1310001 e nota 310001 disputam a chave '310001'"""
+        pasta = tmp_path / "Notas"
+        pasta.mkdir()
+        gerar_xml_nfe(str(pasta / "a_1310001.xml"), "1310001", "CLIENTE LONGO", cnpj="11111111000111")
+        gerar_xml_nfe(str(pasta / "b_310001.xml"), "310001", "CLIENTE CURTO", cnpj="22222222000122")
+
+        mapa, resumo = indexar_xmls_com_resumo(str(pasta), usar_cache=False)
+
+        # Mesma regra de antes: o arquivo que vem depois fica com a chave
+        assert mapa['310001']['nome'] == "CLIENTE CURTO"
+        assert mapa['1310001']['nome'] == "CLIENTE LONGO"
+        assert resumo['conflitos'] == [('310001', 'b_310001.xml', 'a_1310001.xml')]
+
+    def test_copia_do_mesmo_xml_nao_e_conflito(self, tmp_path):
+        """Teste: o mesmo XML com dois nomes não gera aviso"""
+        pasta = tmp_path / "Notas"
+        pasta.mkdir()
+        gerar_xml_nfe(str(pasta / "310001.xml"), "310001", "CLIENTE", cnpj="11111111000111")
+        gerar_xml_nfe(str(pasta / "3-0310001.xml"), "310001", "CLIENTE", cnpj="11111111000111")
+
+        _, resumo = indexar_xmls_com_resumo(str(pasta), usar_cache=False)
+
+        assert resumo['conflitos'] == []
+
+    def test_erros_agrupados_por_tipo(self, pasta_notas, capsys):
+        """Teste: XMLs inválidos aparecem agrupados, sem uma linha por arquivo"""
+        _, resumo = indexar_xmls_com_resumo(str(pasta_notas), usar_cache=False)
+        saida = capsys.readouterr().out
+
+        assert resumo['invalidos'] == 2
+        assert resumo['erros'] == {
+            'XML malformado': ['quebrado.xml'],
+            'XML não contém dados mínimos necessários (nome e número da nota)': ['vazio.xml'],
+        }
+        assert "[AVISO] XML inválido:" not in saida
+        assert "[AVISO] XML malformado: 1 XML(s) - quebrado.xml" in saida
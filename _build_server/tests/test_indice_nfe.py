@@ -0,0 +1,145 @@
+"""
+Testes para os Índices do Mapa de NFe (indice_nfe.py)
+
+Garante que as buscas pelo índice devolvem a mesma nota que o laço
+antigo sobre o mapa_xmls inteiro (primeira nota na ordem do mapa) e que
+o matching da renomeação passa a olhar só os candidatos do índice.
+"""
+
+import pytest
+import sys
+import os
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from decimal import Decimal
+import indice_nfe
+from indice_nfe import IndiceNFe, obter_indice_nfe
+from extractors import CAPITALExtractor
+
+
+def nota(numero, cpf_cnpj, nome="CLIENTE", valor_total="100.00", duplicatas=(), valido=True):
+    """Monta os dados de um XML no formato de extrair_dados_nfe()"""
+    return {
+        'xml_valido': valido,
+        'numero_nota': numero,
+        'cpf_cnpj': cpf_cnpj,
+        'cnpj': cpf_cnpj if len(cpf_cnpj) == 14 else '',
+        'nome': nome,
+        'valor_total': Decimal(valor_total),
+        'emails': [],
+        'duplicatas': [
+            {'numero': f"00{i}", 'vencimento': venc, 'valor': Decimal(valor)}
+            for i, (venc, valor) in enumerate(duplicatas, 1)
+        ],
+    }
+
+
+def buscar_linear(cnpj_boleto, vencimento_boleto, mapa_xmls):
+    """Laço antigo de buscar_xml_por_cnpj_e_vencimento (referência)"""
+    dia, mes = vencimento_boleto.split('-')
+    for numero_nota, dados_xml in mapa_xmls.items():
+        if cnpj_boleto == (dados_xml.get('cpf_cnpj', '') or dados_xml.get('cnpj', '')):
+            duplicatas = dados_xml.get('duplicatas', [])
+            if duplicatas:
+                for dup in duplicatas:
+                    partes = dup['vencimento'].split('-')
+                    if len(partes) == 3 and (dia, mes) == (partes[2], partes[1]):
+                        return (numero_nota, dados_xml, dup)
+                if len(duplicatas) == 1:
+                    return (numero_nota, dados_xml, duplicatas[0])
+            else:
+                return (numero_nota, dados_xml, None)
+    return (None, None, None)
+
+
+CNPJ_A = "12345678000190"
+CNPJ_B = "98765432000110"
+
+MAPA = {
+    "310001": nota("310001", CNPJ_A, duplicatas=[("2025-11-10", "50.00"), ("2025-12-10", "50.00")]),
+    "310002": nota("310002", CNPJ_A, duplicatas=[("2025-11-20", "100.00")]),
+    "310003": nota("310003", CNPJ_A, valor_total="300.00",
+                   duplicatas=[("2026-01-10", "150.00"), ("2026-02-10", "150.00")]),
+    "310004": nota("310004", CNPJ_B, nome="OUTRO CLIENTE", valor_total="300.00"),
+    "310005": nota("310005", "12345678901", nome="PESSOA FISICA", valor_total="80.00", valido=False),
+}
+
+
+class TestIndiceNFe:
+    """
+    Suite de testes para IndiceNFe
+
+    Testa:
+    - Equivalência com o laço antigo de busca por CNPJ + vencimento
+    - Candidatos por CNPJ e por valor total
+    - Reaproveitamento do índice por mapa
+    """
+
+    # ================================================================
+    # TESTES DE BUSCA POR CNPJ + VENCIMENTO
+    # ================================================================
+
+    @pytest.mark.parametrize("cnpj,vencimento", [
+        (CNPJ_A, "10-12"),   # 2ª duplicata da 1ª nota
+        (CNPJ_A, "20-11"),   # nota de parcela única
+        (CNPJ_A, "10-02"),   # parcela única vem antes na ordem do mapa
+        (CNPJ_A, "01-01"),   # sem vencimento: cai na parcela única
+        (CNPJ_B, "15-03"),   # nota sem duplicatas
+        ("11111111000111", "10-11"),
+    ])
+    def test_mesmo_resultado_que_laco(self, cnpj, vencimento):
+        """Teste: índice devolve a mesma nota e a mesma duplicata"""
+        assert IndiceNFe(MAPA).buscar_por_cnpj_e_vencimento(cnpj, *vencimento.split('-')) == \
+            buscar_linear(cnpj, vencimento, MAPA)
+
+    def test_extrator_usa_indice(self):
+        """Teste: buscar_xml_por_cnpj_e_vencimento do extrator passa pelo índice"""
+        numero, dados, dup = CAPITALExtractor().buscar_xml_por_cnpj_e_vencimento(CNPJ_A, "10-11", MAPA)
+
+        assert numero == "310001"
+        assert dados is MAPA["310001"]
+        assert dup['numero'] == "001"
+
+    def test_primeira_nota_na_ordem_do_mapa(self):
+        """Teste: duas notas com a mesma parcela - vale a que vem antes"""
+        mapa = {
+            "2": nota("2", CNPJ_A, duplicatas=[("2025-11-10", "10.00"), ("2025-12-10", "10.00")]),
+            "1": nota("1", CNPJ_A, duplicatas=[("2025-11-10", "10.00")]),
+        }
+
+        assert IndiceNFe(mapa).buscar_por_cnpj_e_vencimento(CNPJ_A, "10", "11")[0] == "2"
+
+    # ================================================================
+    # TESTES DE CANDIDATOS
+    # ================================================================
+
+    def test_candidatos_por_cnpj_ou_valor(self):
+        """Teste: notas do CNPJ + notas válidas com o mesmo valor total, sem repetir"""
+        numeros = [numero for _, numero, _ in IndiceNFe(MAPA).candidatos(CNPJ_A, 30000)]
+
+        assert numeros == ["310001", "310002", "310003", "310004"]
+
+    def test_valor_de_xml_invalido_nao_indexado(self):
+        """Teste: XML inválido não entra no índice de valor total"""
+        assert IndiceNFe(MAPA).candidatos("", 8000) == []
+
+    def test_duplicatas_com(self):
+        """Teste: CNPJ + vencimento + valor em centavos"""
+        indice = IndiceNFe(MAPA)
+
+        assert list(indice.duplicatas_com(CNPJ_A, "2026-02-10", 15000)) == [2]
+        assert indice.duplicatas_com(CNPJ_A, "2026-02-10", 15001) == {}
+
+    # ================================================================
+    # TESTES DE REAPROVEITAMENTO
+    # ================================================================
+
+    def test_indice_montado_uma_vez_por_mapa(self, monkeypatch):
+        """Teste: mesmo mapa reaproveita o índice; mapa novo monta outro"""
+        monkeypatch.setattr(indice_nfe, "_ultimo", None)
+
+        primeiro = obter_indice_nfe(MAPA)
+        assert obter_indice_nfe(MAPA) is primeiro
+        assert obter_indice_nfe(dict(MAPA)) is not primeiro
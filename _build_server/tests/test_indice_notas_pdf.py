@@ -0,0 +1,86 @@
+"""
+Testes para o Índice dos PDFs de Notas (indice_notas_pdf.py)
+
+Garante que a busca por número de 6 dígitos encontra os mesmos arquivos
+que a busca antiga por substring nos nomes usuais, de forma
+determinística, e que nomes ambíguos são resolvidos sempre do mesmo jeito.
+"""
+
+import pytest
+import sys
+import os
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indice_notas_pdf import IndiceNotasPDF, numeros_do_arquivo
+
+
+def criar_pasta(tmp_path, nomes):
+    """Pasta de notas com PDFs vazios (só o nome importa)"""
+    pasta = tmp_path / "Notas"
+    pasta.mkdir()
+    for nome in nomes:
+        (pasta / nome).write_bytes(b"%PDF-1.4")
+    return pasta
+
+
+class TestIndiceNotasPDF:
+    """
+    Suite de testes para IndiceNotasPDF
+
+    Testa:
+    - Números extraídos dos formatos de nome usados
+    - Busca por número igual à busca antiga
+    - Ambiguidade e fallback por substring
+    """
+
+    @pytest.mark.parametrize("nome,esperado", [
+        ("310227.pdf", ["310227"]),
+        ("3-0310227.pdf", ["310227"]),
+        ("0310227.pdf", ["310227"]),
+        ("NF 310227 - 2.pdf", ["310227"]),
+        ("NF 310227 e 310228.pdf", ["310227", "310228"]),
+        ("nota 12345.pdf", []),
+    ])
+    def test_numeros_do_arquivo(self, nome, esperado):
+        """Teste: últimos 6 dígitos de cada sequência com 6+ dígitos"""
+        assert numeros_do_arquivo(nome) == esperado
+
+    def test_busca_igual_a_antiga(self, tmp_path):
+        """Teste: nomes usuais - mesmo arquivo que o teste por substring"""
+        nomes = ["3-0310227.pdf", "0310228.pdf", "310229.pdf", "NF 310230.pdf", "leia-me.txt"]
+        pasta = criar_pasta(tmp_path, nomes)
+        indice = IndiceNotasPDF(str(pasta))
+
+        assert len(indice) == 4
+        for numero, nome in [("310227", "3-0310227.pdf"), ("310228", "0310228.pdf"),
+                             ("310229", "310229.pdf"), ("310230", "NF 310230.pdf")]:
+            assert indice.buscar(numero) == str(pasta / nome)
+            assert not indice.ambiguo(numero)
+        assert indice.buscar("999999") is None
+
+    def test_ambiguo_prefere_arquivo_de_um_numero(self, tmp_path):
+        """Teste: número em dois arquivos - vale o que só tem esse número"""
+        pasta = criar_pasta(tmp_path, ["NF 310227 e 310228.pdf", "z-310227.pdf", "a-310227-copia.pdf"])
+        indice = IndiceNotasPDF(str(pasta))
+
+        assert indice.ambiguo("310227")
+        assert indice.candidatos("310227") == [
+            str(pasta / "NF 310227 e 310228.pdf"), str(pasta / "a-310227-copia.pdf"), str(pasta / "z-310227.pdf")
+        ]
+        assert indice.buscar("310227") == str(pasta / "a-310227-copia.pdf")
+        assert indice.buscar("310228") == str(pasta / "NF 310227 e 310228.pdf")
+
+    def test_fallback_por_substring(self, tmp_path):
+        """Teste: número colado em outros dígitos ainda é encontrado"""
+        pasta = criar_pasta(tmp_path, ["310227001.pdf"])
+
+        assert IndiceNotasPDF(str(pasta)).buscar("310227") == str(pasta / "310227001.pdf")
+
+    def test_pasta_inexistente(self, tmp_path):
+        """Teste: sem pasta, índice vazio"""
+        indice = IndiceNotasPDF(str(tmp_path / "nao_existe"))
+
+        assert len(indice) == 0
+        assert indice.buscar("310227") is None
@@ -0,0 +1,178 @@
+"""
+Testes para a Leitura Parcial de PDFs (parada antecipada)
+
+Garante que as páginas depois dos campos obrigatórios não passam pelo
+pdfplumber, que o resultado dos extratores é o mesmo da leitura completa
+e que o cache guarda entradas parciais e as completa depois.
+"""
+
+import pytest
+import sys
+import os
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pdf_texto
+from cache_pdf import CacheTextoPDF, calcular_sha256
+from extractors import ParsedBoleto, ExtractorFactory
+from pdf_sintetico import gerar_pdf
+from test_documento_boleto import TEXTO_CAPITAL, MAPA_XMLS
+
+
+# Páginas de "layout" depois da ficha (demonstrativo, itens da nota...)
+PAGINAS_EXTRAS = [f"DEMONSTRATIVO PAGINA {i}\nITEM 001 PRODUTO 10,00" for i in range(2, 6)]
+
+
+class TestLeituraParcial:
+    """
+    Suite de testes para iterar_paginas_pdf / ParsedBoleto(parcial=True)
+
+    Testa:
+    - Páginas puladas quando os campos já foram encontrados
+    - Mesmo resultado que a leitura completa
+    - Entradas parciais no cache
+    - Parada por condição (extrair_texto_ate)
+    """
+
+    @pytest.fixture
+    def sem_cache(self, monkeypatch):
+        """Fixture que desliga o cache de texto"""
+        monkeypatch.setattr(pdf_texto, "USAR_CACHE_TEXTO_PDF", False)
+        pdf_texto.definir_cache(None)
+
+    @pytest.fixture
+    def cache(self, tmp_path, monkeypatch):
+        """Fixture que instala um cache isolado em pasta temporária"""
+        monkeypatch.setattr(pdf_texto, "USAR_CACHE_TEXTO_PDF", True)
+        cache = CacheTextoPDF(str(tmp_path / "cache"), tamanho_maximo_mb=10)
+        pdf_texto.definir_cache(cache)
+        yield cache
+        pdf_texto.definir_cache(None)
+
+    @pytest.fixture
+    def pdf_longo(self, tmp_path):
+        """Fixture com boleto CAPITAL na página 1 e mais 4 páginas"""
+        return gerar_pdf(str(tmp_path / "boleto.pdf"), [TEXTO_CAPITAL] + PAGINAS_EXTRAS)
+
+    # ================================================================
+    # TESTES DE PARADA ANTECIPADA
+    # ================================================================
+
+    def test_paginas_puladas(self, sem_cache, pdf_longo):
+        """Teste: campos na página 1 = 4 páginas puladas"""
+        antes = pdf_texto.estatisticas_paginas()
+
+        doc = ParsedBoleto.de_arquivo(pdf_longo, parcial=True)
+        assert doc.fidc == "CAPITAL"
+
+        depois = pdf_texto.estatisticas_paginas()
+        assert doc.paginas_lidas == 1
+        assert not doc.completo
+        assert depois['lidas'] - antes['lidas'] == 1
+        assert depois['puladas'] - antes['puladas'] == 4
+
+    def test_mesmo_resultado_que_leitura_completa(self, sem_cache, pdf_longo):
+        """Teste: processar_boleto_com_xml igual com leitura parcial e completa"""
+        extractor = ExtractorFactory.get_extractor("CAPITAL")
+
+        parcial = extractor.processar_boleto_com_xml(ParsedBoleto.de_arquivo(pdf_longo, parcial=True), MAPA_XMLS)
+        completo = extractor.processar_boleto_com_xml(ParsedBoleto.de_arquivo(pdf_longo), MAPA_XMLS)
+
+        assert parcial == completo
+        assert parcial['status'] == 'ok'
+
+    def test_campos_em_pagina_posterior(self, sem_cache, tmp_path):
+        """Teste: se um campo só aparece depois, continua lendo até ele"""
+        linhas = TEXTO_CAPITAL.split("\n")
+        pagina_1 = "\n".join(l for l in linhas if "Valor do Documento" not in l)
+        pdf = gerar_pdf(str(tmp_path / "boleto.pdf"),
+                        [pagina_1, PAGINAS_EXTRAS[0], "Valor do Documento R$ 1.234,56"] + PAGINAS_EXTRAS[1:])
+
+        doc = ParsedBoleto.de_arquivo(pdf, parcial=True)
+        extractor = ExtractorFactory.get_extractor("CAPITAL")
+
+        assert extractor.extrair_valor(doc) == "R$ 1.234,56"
+        assert doc.paginas_lidas == 3
+
+    def test_sem_fidc_le_tudo(self, sem_cache, tmp_path):
+        """Teste: sem FIDC detectado a leitura vai até a última página"""
+        pdf = gerar_pdf(str(tmp_path / "outro.pdf"), ["DOCUMENTO QUALQUER"] + PAGINAS_EXTRAS)
+
+        doc = ParsedBoleto.de_arquivo(pdf, parcial=True)
+
+        assert doc.fidc is None
+        assert doc.paginas_lidas == 5
+        assert doc.completo
+
+    def test_carregar_completo(self, sem_cache, pdf_longo):
+        """Teste: carregar_completo() lê as páginas que faltaram"""
+        doc = ParsedBoleto.de_arquivo(pdf_longo, parcial=True)
+        assert "DEMONSTRATIVO" not in doc.texto
+
+        doc.carregar_completo()
+
+        assert doc.completo
+        assert "DEMONSTRATIVO PAGINA 5" in doc.texto
+        assert doc.texto == pdf_texto.extrair_texto_pdf(pdf_longo)
+
+    # ================================================================
+    # TESTES DE CACHE PARCIAL
+    # ================================================================
+
+    def test_cache_guarda_entrada_parcial(self, cache, pdf_longo):
+        """Teste: leitura parcial grava entrada parcial; leitura completa a completa"""
+        chave = calcular_sha256(pdf_longo)
+
+        ParsedBoleto.de_arquivo(pdf_longo, parcial=True).texto
+        entrada = cache.obter_entrada(chave)
+        assert entrada['completo'] is False
+        assert len(entrada['paginas']) == 1
+        assert entrada['total_paginas'] == 5
+
+        # Leitura completa: página 1 vem do cache, as outras do PDF
+        antes = pdf_texto.estatisticas_paginas()
+        paginas = pdf_texto.extrair_paginas_pdf(pdf_longo)
+        depois = pdf_texto.estatisticas_paginas()
+
+        assert len(paginas) == 5
+        assert depois['do_cache'] - antes['do_cache'] == 1
+        assert depois['lidas'] - antes['lidas'] == 4
+        assert cache.obter(chave) == paginas
+
+    def test_parcial_com_cache_completo(self, cache, pdf_longo):
+        """Teste: com entrada completa no cache nenhuma página vai ao pdfplumber"""
+        pdf_texto.extrair_paginas_pdf(pdf_longo)
+
+        antes = pdf_texto.estatisticas_paginas()
+        doc = ParsedBoleto.de_arquivo(pdf_longo, parcial=True)
+        assert doc.fidc == "CAPITAL"
+        depois = pdf_texto.estatisticas_paginas()
+
+        assert depois['lidas'] == antes['lidas']
+        assert depois['do_cache'] - antes['do_cache'] == 1
+
+    # ================================================================
+    # TESTES DE PARADA POR CONDIÇÃO
+    # ================================================================
+
+    def test_extrair_texto_ate(self, sem_cache, tmp_path):
+        """Teste: para na primeira página que satisfaz a condição"""
+        pdf = gerar_pdf(str(tmp_path / "nota.pdf"),
+                        ["CABECALHO DA NOTA", "Valor Total da Nota R$ 606,08"] + PAGINAS_EXTRAS)
+
+        texto, completo = pdf_texto.extrair_texto_ate(pdf, lambda t: "Valor Total" in t)
+
+        assert not completo
+        assert "606,08" in texto
+        assert "DEMONSTRATIVO" not in texto
+
+    def test_extrair_texto_ate_sem_condicao_satisfeita(self, sem_cache, tmp_path):
+        """Teste: sem a condição, devolve o texto completo"""
+        pdf = gerar_pdf(str(tmp_path / "nota.pdf"), ["CABECALHO DA NOTA"] + PAGINAS_EXTRAS)
+
+        texto, completo = pdf_texto.extrair_texto_ate(pdf, lambda t: "Valor Total" in t)
+
+        assert completo
+        assert texto == pdf_texto.extrair_texto_pdf(pdf)
@@ -0,0 +1,163 @@
+"""
+Testes para a Normalização de Nomes (normalizacao_nomes.py)
+
+Garante que as versões pré-compiladas e com cache devolvem o mesmo que o
+código antigo (um re.sub por sufixo/abreviação, regex recompilada a cada
+chamada) sobre um corpus de nomes de clientes no formato real.
+"""
+
+import pytest
+import sys
+import os
+import re
+import random
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unidecode import unidecode
+import normalizacao_nomes
+from normalizacao_nomes import (
+    normalizar_nome_empresa, normalizar_pagador, limpar_nome_pagador, remover_acentos
+)
+from extractors import CAPITALExtractor, NOVAXExtractor, CREDVALEExtractor, SQUIDExtractor
+
+
+def normalizar_nome_empresa_antigo(nome: str) -> str:
+    """Versão antiga de RenomeaçãoBoletos.normalizar_nome_empresa (referência)"""
+    if not nome:
+        return ""
+    nome_norm = nome.upper().strip()
+    nome_norm = re.sub(r'[.,\-]', ' ', nome_norm)
+    sufixos = [
+        'LTDA', 'LTD', 'LIMITADA', 'EIRELI', 'EPP', 'ME', 'MEI', 'S/A', 'SA', 'S.A.',
+        'SOCIEDADE', 'EMPRESARIAL', 'CIA', 'COMPANHIA'
+    ]
+    for sufixo in sufixos:
+        nome_norm = re.sub(rf'\b{re.escape(sufixo)}\b', '', nome_norm)
+    abreviacoes = {
+        r'\bENG\b': 'ENGENHARIA',
+        r'\bCONST\b': 'CONSTRUCAO',
+        r'\bEMPREENDIMENTOS?\b': 'EMPREENDIMENTOS',
+        r'\bSPE\b': 'SOCIEDADE PROPOSITO ESPECIFICO'
+    }
+    for abrev, completo in abreviacoes.items():
+        nome_norm = re.sub(abrev, completo, nome_norm)
+    return re.sub(r'\s+', ' ', nome_norm).strip()
+
+
+def limpar_nome_antigo(nome: str) -> str:
+    """Versão antiga de _limpar_nome dos extratores (referência)"""
+    nome = re.split(r',|CNPJ|CPF|Beneficiario', nome, maxsplit=1, flags=re.IGNORECASE)[0].strip()
+    nome = re.sub(r'\s*-\s*\d{2,3}[\.\s]*\d{3}[\.\s]*\d{3}[/-]?\d{0,4}[-]?\d{0,2}.*$', '', nome)
+    nome = re.sub(r'\s+\d{2,3}[\.\s]?\d{3}[\.\s]?\d{3}[\/\-\s]?\d{2,4}[\-\s]?\d{2}.*$', '', nome)
+    return nome.strip()
+
+
+NOMES_REAIS = [
+    "ACME COMERCIO DE MATERIAIS LTDA", "Acme Com. e Ind. Ltda.", "ACME COMERCIO LTDA - ME",
+    "BETA ENG. E CONST. LTDA", "BETA ENGENHARIA E CONSTRUCAO LTDA EPP",
+    "GAMA EMPREENDIMENTO IMOBILIARIO SPE LTDA", "GAMA EMPREENDIMENTOS SPE S/A",
+    "DELTA S.A.", "DELTA SA", "DELTA S/A", "CIA BRASILEIRA DE DISTRIBUICAO",
+    "COMPANHIA DE SANEAMENTO", "EMPRESARIAL SOCIEDADE DE ADVOGADOS", "MEI JOAO DA SILVA",
+    "JOÃO DA SILVA ME", "JOSÉ CONSTRUÇÕES EIRELI", "CONSTRUTORA ÁGUA BRANCA LTDA",
+    "ITAJAÍ MADEIRAS LTDA.", "MATERIAIS DE CONSTRUÇÃO SÃO JOSÉ LTDA - EPP",
+    "  ESPAÇOS   DUPLOS   LTDA  ", "LTDA", "ME", "S/A", "SA/A", "S/SA", "MEI ME MEIA",
+    "ENGENHO NOVO ENG", "CONSTRUTIVA CONST", "SPECIAL SPE", "A-B-C COMERCIO,LTDA",
+    "MECANICA ME LTDA", "LIMITADA LTDA LTD", "Transportes Nova Aliança Ltda",
+    "PEDRO ÁLVARES CABRAL", "FERRAGENS Nº 1 LTDA", "ÓTICA ª ESPECIAL", "",
+]
+
+PAGADORES_BOLETO = [
+    "ACME COMERCIO LTDA - 12.345.678/0001-90", "ACME COMERCIO LTDA 12.345.678/0001-90",
+    "ACME COMERCIO LTDA, RUA DAS FLORES 100", "JOSE DA SILVA CPF 123.456.789-01",
+    "BETA ENGENHARIA CNPJ: 12345678000190", "GAMA LTDA Beneficiario: FIDC",
+    "DELTA SA - 123.456.789-01", "EMPRESA SEM DOCUMENTO", "  COM ESPAÇOS  ",
+    "LOJA 123 456 789 0001 90", "cnpj em minusculas 12.345.678/0001-90",
+]
+
+
+def corpus(quantidade=2000, semente=7):
+    """Nomes reais + combinações aleatórias das palavras deles"""
+    rng = random.Random(semente)
+    palavras = [p for nome in NOMES_REAIS for p in re.split(r'(\s+)', nome) if p.strip()]
+    gerados = [
+        rng.choice(["", " ", ".", "-"]).join(rng.choice(palavras) for _ in range(rng.randint(1, 5)))
+        for _ in range(quantidade)
+    ]
+    return NOMES_REAIS + gerados
+
+
+class TestNormalizacaoNomes:
+    """
+    Suite de testes para normalizacao_nomes
+
+    Testa:
+    - Equivalência com a normalização antiga (sufixos/abreviações)
+    - Passo de unidecode aplicado antes da normalização
+    - Limpeza do nome do pagador igual à dos extratores
+    """
+
+    # ================================================================
+    # TESTES DE EQUIVALÊNCIA
+    # ================================================================
+
+    def test_equivalente_ao_antigo(self):
+        """Teste: mesmo resultado que o laço de re.sub (após remover acentos)"""
+        for nome in corpus():
+            assert normalizar_nome_empresa(nome) == normalizar_nome_empresa_antigo(unidecode(nome)), nome
+
+    def test_nomes_sem_acento_inalterados(self):
+        """Teste: para nomes ASCII o resultado é exatamente o antigo"""
+        for nome in corpus():
+            if nome.isascii():
+                assert normalizar_nome_empresa(nome) == normalizar_nome_empresa_antigo(nome), nome
+
+    def test_acentos_nao_afetam_matching(self):
+        """Teste: XML com acento e boleto sem acento normalizam igual"""
+        assert normalizar_nome_empresa("JOSÉ CONSTRUÇÕES LTDA") == normalizar_nome_empresa("JOSE CONSTRUCOES")
+        assert remover_acentos("ITAJAÍ") == "ITAJAI"
+
+    @pytest.mark.parametrize("nome,esperado", [
+        ("BETA ENG. E CONST. LTDA", "BETA ENGENHARIA E CONSTRUCAO"),
+        ("GAMA EMPREENDIMENTO SPE S/A", "GAMA EMPREENDIMENTOS SOCIEDADE PROPOSITO ESPECIFICO"),
+        ("MEI ME MEIA", "MEIA"),
+        (None, ""),
+    ])
+    def test_exemplos(self, nome, esperado):
+        """Teste: sufixos removidos, abreviações expandidas"""
+        assert normalizar_nome_empresa(nome) == esperado
+
+    def test_normalizar_pagador(self):
+        """Teste: mesma chave do normalize_pagador antigo"""
+        for nome in corpus(200) + [None, 123]:
+            assert normalizar_pagador(nome) == re.sub(r"\s+", " ", str(nome or "")).strip().upper()
+
+    # ================================================================
+    # TESTES DE LIMPEZA DO PAGADOR
+    # ================================================================
+
+    @pytest.mark.parametrize("pagador", PAGADORES_BOLETO)
+    def test_limpar_nome_equivalente(self, pagador):
+        """Teste: limpeza igual à dos extratores antigos"""
+        assert limpar_nome_pagador(pagador) == limpar_nome_antigo(pagador)
+
+    def test_extratores_usam_modulo(self):
+        """Teste: _limpar_nome de todos os FIDCs passa pela função compartilhada"""
+        for extrator in (CAPITALExtractor(), NOVAXExtractor(), CREDVALEExtractor(), SQUIDExtractor()):
+            for pagador in PAGADORES_BOLETO:
+                assert extrator._limpar_nome(pagador) == limpar_nome_antigo(pagador)
+
+    # ================================================================
+    # TESTES DE CACHE
+    # ================================================================
+
+    def test_cache_por_nome(self):
+        """Teste: o mesmo nome não é normalizado duas vezes"""
+        normalizar_nome_empresa.cache_clear()
+        normalizar_nome_empresa("ACME COMERCIO LTDA")
+        normalizar_nome_empresa("ACME COMERCIO LTDA")
+
+        info = normalizar_nome_empresa.cache_info()
+        assert (info.hits, info.misses) == (1, 1)
+        assert info.maxsize == normalizacao_nomes.TAMANHO_MEMO_NOMES
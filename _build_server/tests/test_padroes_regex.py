@@ -0,0 +1,110 @@
+"""
+Testes para o Registro de Padrões Regex (extractors/padroes.py)
+
+Garante que os padrões são compilados uma vez com nome único, que os
+contadores só custam algo quando a medição está ligada e que os
+extratores dão o mesmo resultado com e sem medição.
+"""
+
+import pytest
+import sys
+import os
+import re
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extractors import padroes, SQUIDExtractor, NOVAXExtractor
+from extractors.padroes import registrar, CPF_FORMATADO, CNPJ_FORMATADO, PONTUACAO_CNPJ
+
+TEXTO_BOLETO = """
+Vencimento
+20/07/2025
+Número do Documento
+310922/003
+(=) Valor do Documento R$ 3.750,00
+Pagador
+EMPRESA TESTE LTDA - CNPJ: 98.765.432/0001-10
+"""
+
+
+@pytest.fixture
+def medicao():
+    """Liga a medição com contadores zerados e restaura ao final"""
+    anterior = padroes.habilitar_medicao(True)
+    padroes.zerar_contadores()
+    yield
+    padroes.habilitar_medicao(anterior)
+    padroes.zerar_contadores()
+
+
+class TestPadroesRegex:
+    """
+    Suite de testes para o registro de padrões
+
+    Testa:
+    - Registro (nomes únicos, compilação na importação)
+    - Contadores de chamadas/acertos
+    - Mesmos resultados com e sem medição
+    - Padrões do envio e do nome do pagador no registro
+    """
+
+    def test_registro_nomes_unicos(self):
+        """Teste: cada nome aponta para um padrão compilado"""
+        assert padroes.obter('cpf_formatado') is CPF_FORMATADO
+        assert all(isinstance(p.regex, re.Pattern) for p in padroes.PADROES.values())
+        assert len({p.nome for p in padroes.PADROES.values()}) == len(padroes.PADROES)
+
+    def test_registrar_de_novo(self):
+        """Teste: mesmo nome e padrão devolve o existente; padrão diferente é erro"""
+        assert registrar('cpf_formatado', CPF_FORMATADO.pattern) is CPF_FORMATADO
+        with pytest.raises(ValueError):
+            registrar('cpf_formatado', r'\d{11}')
+
+    def test_sem_medicao_usa_metodo_compilado(self):
+        """Teste: medição desligada - nenhum invólucro nos métodos"""
+        assert CPF_FORMATADO.search == CPF_FORMATADO.regex.search
+        assert CPF_FORMATADO.chamadas == 0
+
+    def test_contadores(self, medicao):
+        """Teste: chamadas e acertos por padrão"""
+        CNPJ_FORMATADO.search("CNPJ 98.765.432/0001-10")
+        CNPJ_FORMATADO.search("sem documento")
+        PONTUACAO_CNPJ.sub('', "98.765.432/0001-10")
+        PONTUACAO_CNPJ.sub('', "98765432000110")
+
+        assert (CNPJ_FORMATADO.chamadas, CNPJ_FORMATADO.acertos) == (2, 1)
+        assert (PONTUACAO_CNPJ.chamadas, PONTUACAO_CNPJ.acertos) == (2, 1)
+        nomes = [linha['nome'] for linha in padroes.estatisticas()]
+        assert set(nomes) == {'cnpj_formatado', 'pontuacao_cnpj'}
+
+    @pytest.mark.parametrize("extrator", [SQUIDExtractor(), NOVAXExtractor()])
+    def test_extratores_iguais_com_medicao(self, extrator):
+        """Teste: ligar a medição não muda o resultado dos extratores"""
+        metodos = ('extrair_pagador', 'extrair_vencimento', 'extrair_valor',
+                   'extrair_numero_nota', 'extrair_cnpj_cpf_boleto')
+        sem = [getattr(extrator, m)(TEXTO_BOLETO) for m in metodos]
+
+        anterior = padroes.habilitar_medicao(True)
+        try:
+            com = [getattr(extrator, m)(TEXTO_BOLETO) for m in metodos]
+            assert sum(p.chamadas for p in padroes.PADROES.values()) > 0
+        finally:
+            padroes.habilitar_medicao(anterior)
+            padroes.zerar_contadores()
+
+        assert com == sem
+        assert sem[4] == "98765432000110"
+
+    def test_envio_e_nome_do_pagador_pelo_registro(self, medicao):
+        """Teste: valor da nota, nota do nome do arquivo e limpeza do pagador contam no registro"""
+        import EnvioBoleto
+        from normalizacao_nomes import limpar_nome_pagador
+
+        assert EnvioBoleto._valor_nota_padrao_principal("VALOR TOTAL DA NOTA 1.234,56")
+        assert EnvioBoleto.numero_nota_do_arquivo("CLIENTE - NF 310100 - 10-11.pdf") == ("310100", True)
+        limpar_nome_pagador.cache_clear()
+        assert limpar_nome_pagador("EMPRESA REGISTRO LTDA, CNPJ 12.345.678/0001-90") == "EMPRESA REGISTRO LTDA"
+
+        nomes = {linha['nome'] for linha in padroes.estatisticas()}
+        assert {'valor_total_nota', 'nota_nome_renomeado', 'corte_nome_pagador'} <= nomes
@@ -0,0 +1,196 @@
+"""
+Testes para os Motores de PDF (pdfplumber x pdfium)
+
+Garante que os 4 extratores dão o mesmo resultado com o texto dos dois
+motores, que o motor é escolhido pelo FIDC e que um texto ruim do motor
+rápido volta automaticamente para o pdfplumber.
+"""
+
+import pytest
+import sys
+import os
+
+# Adicionar pasta pai ao path para importar módulos
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE, "benchmarks"))
+
+import pdf_texto
+import pdf_backends
+from cache_pdf import CacheTextoPDF, calcular_sha256
+from extractors import ParsedBoleto
+from pdf_sintetico import gerar_pdf
+from test_documento_boleto import TEXTO_CAPITAL
+
+
+# Um boleto sintético de cada FIDC (layouts dos testes de cada extrator)
+TEXTOS_FIDC = {
+    "CAPITAL": TEXTO_CAPITAL,
+    "NOVAX": (
+        "NOVAX FUNDO DE INVESTIMENTO\n"
+        "Vencimento 15/06/2025\n"
+        "Pagador: EMPRESA NOVAX LTDA CNPJ 12.345.678/0001-90\n"
+        "Numero do Documento 305537/001\n"
+        "(=) Valor do Documento R$ 5.678,90"
+    ),
+    "CREDVALE": (
+        "CREDVALE FUNDO DE INVESTIMENTO\n"
+        "Vencimento\n"
+        "20/07/2025\n"
+        "Pagador\n"
+        "EMPRESA CREDVALE TESTE LTDA - CNPJ: 98.765.432/0001-10\n"
+        "(=) Valor do Documento R$ 3.750,00"
+    ),
+    "SQUID": (
+        "SQUID FUNDO DE INVESTIMENTO\n"
+        "DESTINATÁRIO REMETENTE\n"
+        "NOME/RAZÃO SOCIAL\n"
+        "EMPRESA TESTE LTDA\n"
+        "VENCIMENTO\n"
+        "01/12/2025\n"
+        "FATURA\n"
+        "NÚMERO VENCIMENTO VALOR\n"
+        "001 01/12/2025 1.234,56"
+    ),
+}
+
+requer_pdfium = pytest.mark.skipif(not pdf_backends.PDFIUM_DISPONIVEL, reason="pypdfium2 não instalado")
+
+
+class TestParidadeMotoresPDF:
+    """
+    Suite de testes para pdf_backends + escolha de motor no ParsedBoleto
+
+    Testa:
+    - Paridade dos extratores nos dois motores
+    - Motor por FIDC e fallback para pdfplumber
+    - Cache separado por motor
+    """
+
+    @pytest.fixture
+    def sem_cache(self, monkeypatch):
+        """Fixture que desliga o cache de texto"""
+        monkeypatch.setattr(pdf_texto, "USAR_CACHE_TEXTO_PDF", False)
+        pdf_texto.definir_cache(None)
+
+    @pytest.fixture
+    def pdfs_fidc(self, tmp_path):
+        """Fixture com um PDF por FIDC"""
+        return {
+            fidc: gerar_pdf(str(tmp_path / f"{fidc.lower()}.pdf"), [texto, "DEMONSTRATIVO"])
+            for fidc, texto in TEXTOS_FIDC.items()
+        }
+
+    # ================================================================
+    # TESTES DE PARIDADE
+    # ================================================================
+
+    @requer_pdfium
+    @pytest.mark.parametrize("fidc", list(TEXTOS_FIDC))
+    def test_extratores_iguais_nos_dois_motores(self, pdfs_fidc, fidc):
+        """Teste: harness não encontra diferenças nos 4 extratores"""
+        from paridade_motores_pdf import comparar_pdf
+
+        relatorio = comparar_pdf(pdfs_fidc[fidc], ["pdfplumber", "pdfium"])
+
+        assert relatorio['erros'] == {}
+        assert relatorio['diferencas'] == []
+        assert len(relatorio['tempos']['pdfium']) == 2
+        assert len(relatorio['tempos']['pdfplumber']) == 2
+
+    @requer_pdfium
+    def test_texto_pdfium_no_formato_pdfplumber(self, sem_cache, pdfs_fidc):
+        """Teste: pdfium devolve \\n (não \\r\\n) e o mesmo texto"""
+        caminho = pdfs_fidc["CAPITAL"]
+        texto_pdfium = pdf_texto.extrair_texto_pdf(caminho, usar_cache=False, motor="pdfium")
+
+        assert "\r" not in texto_pdfium
+        assert texto_pdfium == pdf_texto.extrair_texto_pdf(caminho, usar_cache=False, motor="pdfplumber")
+
+    def test_motor_desconhecido_usa_pdfplumber(self):
+        """Teste: nome inválido cai no motor de referência"""
+        assert pdf_backends.obter_motor("nao_existe").nome == "pdfplumber"
+        assert pdf_backends.obter_motor(None).nome == "pdfplumber"
+
+    # ================================================================
+    # TESTES DE ESCOLHA DE MOTOR
+    # ================================================================
+
+    @requer_pdfium
+    def test_motor_por_fidc(self, sem_cache, pdfs_fidc, monkeypatch):
+        """Teste: FIDC configurado com pdfium é lido com pdfium"""
+        monkeypatch.setattr(pdf_texto, "MOTOR_PDF_PADRAO", "pdfium")
+        monkeypatch.setattr(pdf_texto, "MOTOR_PDF_POR_FIDC", {"NOVAX": "pdfium", "CAPITAL": "pdfplumber"})
+
+        novax = ParsedBoleto.de_arquivo(pdfs_fidc["NOVAX"])
+        capital = ParsedBoleto.de_arquivo(pdfs_fidc["CAPITAL"])
+
+        assert novax.fidc == "NOVAX"
+        assert novax.motor == "pdfium"
+        assert not novax.motor_fallback
+        # Primeira leitura com pdfium, FIDC pede pdfplumber: relido
+        assert capital.fidc == "CAPITAL"
+        assert capital.motor == "pdfplumber"
+
+    @requer_pdfium
+    def test_texto_que_confere_nao_e_relido(self, sem_cache, pdfs_fidc, monkeypatch):
+        """Teste: 1ª leitura (pdfplumber) já tem os campos do FIDC com pdfium - não relê"""
+        monkeypatch.setattr(pdf_texto, "MOTOR_PDF_PADRAO", "pdfplumber")
+        monkeypatch.setattr(pdf_texto, "MOTOR_PDF_POR_FIDC", {"CAPITAL": "pdfium"})
+        motores = []
+        iterar = pdf_texto.iterar_paginas_pdf
+        monkeypatch.setattr(pdf_texto, "iterar_paginas_pdf",
+                            lambda caminho, motor=None: motores.append(motor) or iterar(caminho, motor=motor))
+
+        doc = ParsedBoleto.de_arquivo(pdfs_fidc["CAPITAL"])
+
+        assert doc.fidc == "CAPITAL"
+        assert motores == ["pdfplumber"]
+        assert not doc.motor_fallback
+
+    @requer_pdfium
+    def test_fallback_quando_texto_falha(self, sem_cache, pdfs_fidc, monkeypatch):
+        """Teste: texto do pdfium sem os campos obrigatórios -> relê com pdfplumber"""
+        monkeypatch.setattr(pdf_texto, "MOTOR_PDF_PADRAO", "pdfium")
+        monkeypatch.setattr(pdf_texto, "MOTOR_PDF_POR_FIDC", {"CAPITAL": "pdfium"})
+
+        # Simula pdfium perdendo a linha do valor
+        texto_original = pdf_backends._DocumentoPdfium.texto_pagina
+        monkeypatch.setattr(
+            pdf_backends._DocumentoPdfium, "texto_pagina",
+            lambda self, i: texto_original(self, i).replace("Valor do Documento R$ 1.234,56", "")
+        )
+
+        doc = ParsedBoleto.de_arquivo(pdfs_fidc["CAPITAL"])
+
+        assert "1.234,56" in doc.texto
+        assert doc.motor == "pdfplumber"
+        assert doc.motor_fallback
+
+    @requer_pdfium
+    def test_motor_forcado_sem_fallback(self, sem_cache, pdfs_fidc):
+        """Teste: motor explícito não é trocado"""
+        doc = ParsedBoleto.de_arquivo(pdfs_fidc["CAPITAL"], motor="pdfium")
+
+        assert doc.fidc == "CAPITAL"
+        assert doc.motor == "pdfium"
+
+    @requer_pdfium
+    def test_cache_separado_por_motor(self, tmp_path, pdfs_fidc, monkeypatch):
+        """Teste: texto de cada motor fica em uma entrada própria"""
+        monkeypatch.setattr(pdf_texto, "USAR_CACHE_TEXTO_PDF", True)
+        cache = CacheTextoPDF(str(tmp_path / "cache"), tamanho_maximo_mb=10)
+        pdf_texto.definir_cache(cache)
+        try:
+            caminho = pdfs_fidc["SQUID"]
+            sha = calcular_sha256(caminho)
+
+            pdf_texto.extrair_paginas_pdf(caminho, motor="pdfplumber")
+            pdf_texto.extrair_paginas_pdf(caminho, motor="pdfium")
+
+            assert cache.obter(sha) is not None
+            assert cache.obter(f"{sha}-pdfium") is not None
+            assert cache.gravacoes == 2
+        finally:
+            pdf_texto.definir_cache(None)
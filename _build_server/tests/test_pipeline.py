@@ -0,0 +1,294 @@
+"""
+Testes para o Motor de Etapas (pipeline.py)
+
+Garante que a etapa ordenada entrega na ordem de entrada mesmo depois de
+etapas paralelas, que a fila limitada segura a etapa rápida (contrapressão),
+que ao_terminar() roda depois do último item, que um erro em qualquer etapa
+aborta todas, que a captura de saída é por thread e que, no EnvioBoleto,
+um grupo completo é enviado enquanto outros PDFs ainda estão sendo lidos.
+"""
+
+import pytest
+import sys
+import os
+import time
+import random
+import shutil
+import itertools
+import threading
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pipeline import Etapa, Pipeline, capturar_saida, em_bloco
+from transporte_email import ErroTransporte, TransporteEmail
+from envio_sintetico import gerar_arquivos_envio, preparar_envio
+
+# Valor definido pelo inicializador em cada processo do pool
+_fator = None
+
+
+def _inicializar(fator):
+    global _fator
+    _fator = fator
+
+
+def _multiplicar(item):
+    return [(item * _fator, os.getpid())]
+
+
+def dormindo(item):
+    time.sleep(random.uniform(0, 0.01))
+    return [item]
+
+
+class TestPipeline:
+    """
+    Suite de testes para pipeline
+
+    Testa:
+    - Ordem com workers paralelos
+    - Contrapressão da fila limitada
+    - Barreira ao_terminar
+    - Abortar no primeiro erro
+    - Saída por thread e thread principal
+    - Envio começando antes da leitura terminar (EnvioBoleto)
+    - Boleto já enviado baixando a contagem do grupo (EnvioBoleto)
+    - Transporte indisponível interrompendo o envio (EnvioBoleto)
+    - Resumo de cache/páginas com a extração em processos (EnvioBoleto)
+    """
+
+    def test_ordem_com_workers_paralelos(self):
+        """Teste: 4 workers fora de ordem + etapa que filtra - a ordenada recebe na ordem"""
+        recebidos = []
+        pipeline = Pipeline([
+            Etapa("lenta", dormindo, workers=4),
+            Etapa("filtro", lambda n: [n] if n % 3 else []),
+            Etapa("ordenada", lambda n: recebidos.append(n) or [n * 10], ordenada=True),
+        ])
+        estatisticas = pipeline.executar(range(60))
+
+        esperados = [n for n in range(60) if n % 3]
+        assert recebidos == esperados
+        assert pipeline.resultados == [n * 10 for n in esperados]
+        assert [(e.nome, e.itens, e.saidas) for e in estatisticas] == [
+            ("lenta", 60, 60), ("filtro", 60, 40), ("ordenada", 40, 40)]
+
+    def test_contrapressao(self):
+        """Teste: capacidade 1 e última etapa lenta - a primeira não corre na frente"""
+        produzidos, consumidos, maior_folga = [0], [0], [0]
+
+        def produzir(item):
+            produzidos[0] += 1
+            maior_folga[0] = max(maior_folga[0], produzidos[0] - consumidos[0])
+            return [item]
+
+        def consumir(item):
+            time.sleep(0.005)
+            consumidos[0] += 1
+            return []
+
+        estatisticas = Pipeline([Etapa("rapida", produzir), Etapa("lenta", consumir)],
+                                capacidade=1).executar(range(40))
+        assert consumidos[0] == 40
+        assert maior_folga[0] <= 3  # fila (1) + em processamento (1) + esperando vaga (1)
+        assert estatisticas[0].bloqueado > 0.1 and estatisticas[1].ocupado >= 0.2
+
+    def test_ao_terminar_barreira(self):
+        """Teste: barreira junta tudo e só no fim entrega à etapa seguinte"""
+        juntos = []
+        pipeline = Pipeline([
+            Etapa("leitura", dormindo, workers=3),
+            Etapa("barreira", lambda n: juntos.append(n) or [], ordenada=True,
+                  ao_terminar=lambda: [sum(juntos), len(juntos)]),
+            Etapa("saida", lambda n: [n]),
+        ])
+        pipeline.executar(range(10))
+        assert pipeline.resultados == [45, 10]
+
+    def test_erro_aborta_tudo(self):
+        """Teste: erro numa etapa no meio de uma entrada sem fim - aborta e relança"""
+        def quebrar(n):
+            if n == 25:
+                raise ValueError("item 25 inválido")
+            return [n]
+
+        inicio = time.perf_counter()
+        with pytest.raises(ValueError, match="item 25"):
+            Pipeline([Etapa("copia", lambda n: [n], workers=2), Etapa("quebra", quebrar),
+                      Etapa("fim", lambda n: [])]).executar(itertools.count())
+        assert time.perf_counter() - inicio < 5
+
+        with pytest.raises(ValueError):
+            Pipeline([Etapa("ordenada", dormindo, workers=2, ordenada=True)])
+        with pytest.raises(ValueError):
+            Pipeline([Etapa("a", dormindo, na_thread_principal=True),
+                      Etapa("b", dormindo, na_thread_principal=True)])
+
+    def test_processos_com_inicializador(self):
+        """Teste: processos=True roda a função no pool, com o inicializador de cada processo"""
+        pipeline = Pipeline([Etapa("pool", _multiplicar, workers=2, processos=True,
+                                   inicializador=_inicializar, argumentos_inicializador=(3,)),
+                             Etapa("ordem", lambda r: [r], ordenada=True)])
+        pipeline.executar(range(8))
+        assert [valor for valor, _ in pipeline.resultados] == [n * 3 for n in range(8)]
+        assert os.getpid() not in {pid for _, pid in pipeline.resultados}
+
+        # workers=1: sem pool, o inicializador roda uma vez aqui mesmo
+        pipeline = Pipeline([Etapa("local", _multiplicar, processos=True,
+                                   inicializador=_inicializar, argumentos_inicializador=(5,))])
+        pipeline.executar([2])
+        assert pipeline.resultados == [(10, os.getpid())]
+
+    def test_saida_por_thread_e_thread_principal(self, capsys):
+        """Teste: cada thread captura só o seu log; etapa na thread principal roda aqui"""
+        capturas = {}
+
+        def imprimir(nome):
+            with capturar_saida() as saida:
+                for i in range(50):
+                    print(f"{nome} {i}")
+            capturas[nome] = saida.getvalue()
+
+        threads = [threading.Thread(target=imprimir, args=(n,)) for n in ("a", "b", "c")]
+        for thread in threads:
+            thread.start()
+        print("principal")
+        for thread in threads:
+            thread.join()
+
+        for nome, texto in capturas.items():
+            assert texto.splitlines() == [f"{nome} {i}" for i in range(50)]
+        assert capsys.readouterr().out == "principal\n"
+
+        threads_envio = set()
+        Pipeline([
+            Etapa("log", em_bloco(lambda n: print(f"item {n}") or [n]), workers=2),
+            Etapa("principal", lambda n: threads_envio.add(threading.get_ident()) or [n],
+                  na_thread_principal=True),
+            Etapa("fim", lambda n: []),
+        ]).executar(range(5))
+        assert threads_envio == {threading.get_ident()}
+        assert sorted(capsys.readouterr().out.splitlines()) == [f"item {n}" for n in range(5)]
+
+    def test_envio_comeca_antes_da_leitura_terminar(self, tmp_path, monkeypatch):
+        """Teste: 3 clientes - um e-mail sai enquanto o último PDF ainda está sendo lido"""
+        clientes = [("310100", "CLIENTE A LTDA", "a@empresa.com.br"),
+                    ("310101", "CLIENTE B LTDA", "b@empresa.com.br"),
+                    ("310102", "CLIENTE C LTDA", "c@empresa.com.br")]
+        EnvioBoleto, pastas = preparar_envio(tmp_path, monkeypatch, clientes)
+
+        primeiro_enviado = threading.Event()
+        enviados, leitura_esperou = [], []
+
+        class Transporte(TransporteEmail):
+            def _enviar(self, mensagem):
+                enviados.append(mensagem.para[0])
+                primeiro_enviado.set()
+
+        extrair = EnvioBoleto._extrair_boleto_envio
+
+        def extrair_ultimo_devagar(boleto):
+            if boleto['idx'] == len(clientes):
+                # Só continua depois que algum e-mail saiu (travaria se o envio esperasse a leitura)
+                leitura_esperou.append(primeiro_enviado.wait(timeout=10))
+            return extrair(boleto)
+
+        monkeypatch.setattr(EnvioBoleto, "criar_transporte", lambda: Transporte())
+        monkeypatch.setattr(EnvioBoleto, "_extrair_boleto_envio", extrair_ultimo_devagar)
+        EnvioBoleto.executar()
+
+        assert leitura_esperou == [True]
+        assert sorted(enviados) == [email for _, _, email in clientes]
+        assert len(os.listdir(pastas["Enviados"])) == 3 and os.listdir(pastas["Boletos"]) == []
+
+    def test_boleto_ja_enviado_baixa_o_grupo(self, tmp_path, monkeypatch):
+        """Teste: grupo com um boleto já no registro - sai sem esperar a leitura do último PDF"""
+        EnvioBoleto, pastas = preparar_envio(tmp_path, monkeypatch, [("310100", "CLIENTE A LTDA", "a@empresa.com.br")])
+        enviados = []
+
+        class Transporte(TransporteEmail):
+            def _enviar(self, mensagem):
+                enviados.append(mensagem.para[0])
+                grupo_enviado.set()
+
+        grupo_enviado = threading.Event()
+        monkeypatch.setattr(EnvioBoleto, "criar_transporte", lambda: Transporte())
+        EnvioBoleto.executar()  # 1ª execução: registra e move a nota 310100
+
+        # Boleto já enviado de volta na pasta + mais uma nota do mesmo cliente + outro cliente
+        for arquivo in os.listdir(pastas["Enviados"]):
+            shutil.copy(pastas["Enviados"] / arquivo, pastas["Boletos"] / arquivo)
+        gerar_arquivos_envio(str(pastas["Boletos"]), str(pastas["Notas"]),
+                             [("310101", "CLIENTE A LTDA", "a@empresa.com.br"),
+                              ("310102", "CLIENTE Z LTDA", "z@empresa.com.br")])
+
+        grupo_enviado.clear()
+        extrair, leitura_esperou = EnvioBoleto._extrair_boleto_envio, []
+
+        def extrair_z_devagar(boleto):
+            if "CLIENTE Z" in boleto['arquivo']:
+                # O grupo do cliente A (2 previstos, 1 já enviado) tem que sair antes
+                leitura_esperou.append(grupo_enviado.wait(timeout=10))
+            return extrair(boleto)
+
+        monkeypatch.setattr(EnvioBoleto, "_extrair_boleto_envio", extrair_z_devagar)
+        EnvioBoleto.executar()
+
+        assert leitura_esperou == [True]
+        assert enviados == ["a@empresa.com.br", "a@empresa.com.br", "z@empresa.com.br"]
+        assert os.listdir(pastas["Boletos"]) == []
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_resumo_conta_leituras_dos_processos(self, tmp_path, monkeypatch, capsys, workers):
+        """Teste: extração em processos - cache e páginas do resumo iguais aos da leitura sequencial"""
+        clientes = [("310100", "CLIENTE A LTDA", "a@empresa.com.br"),
+                    ("310101", "CLIENTE B LTDA", "b@empresa.com.br")]
+        EnvioBoleto, _ = preparar_envio(tmp_path, monkeypatch, clientes)
+        import pdf_texto
+        monkeypatch.setattr(pdf_texto, "ESTATISTICAS_PAGINAS", dict.fromkeys(pdf_texto.ESTATISTICAS_PAGINAS, 0))
+        monkeypatch.setattr(EnvioBoleto, "WORKERS_ENVIO_EXTRACAO", workers)
+
+        class Transporte(TransporteEmail):
+            def _enviar(self, mensagem):
+                pass
+
+        monkeypatch.setattr(EnvioBoleto, "criar_transporte", lambda: Transporte())
+        EnvioBoleto.executar()
+
+        saida = capsys.readouterr().out
+        assert "[CACHE] Texto PDF: 0 acerto(s), 2 falha(s)" in saida
+        assert "[PDF] Paginas: 2 lida(s), 0 do cache" in saida
+
+    def test_transporte_indisponivel_interrompe_envio(self, tmp_path, monkeypatch, capsys):
+        """Teste: conta do Outlook ausente - aborta o envio; boletos ficam e a caixa retoma depois"""
+        clientes = [("310100", "CLIENTE A LTDA", "a@empresa.com.br"),
+                    ("310101", "CLIENTE B LTDA", "b@empresa.com.br")]
+        EnvioBoleto, pastas = preparar_envio(tmp_path, monkeypatch, clientes)
+        enviados = []
+
+        class SemConta(TransporteEmail):
+            def abrir(self):
+                raise ErroTransporte("Conta cobranca@jotajota.net.br não encontrada no Outlook")
+
+            def _enviar(self, mensagem):
+                enviados.append(mensagem.para[0])
+
+        monkeypatch.setattr(EnvioBoleto, "criar_transporte", lambda: SemConta())
+        EnvioBoleto.executar()
+
+        saida = capsys.readouterr().out
+        assert "[ERRO] Envio interrompido: Conta cobranca@jotajota.net.br" in saida
+        assert "nova(s) tentativa(s), 0 falha(s)" in saida
+        assert len(os.listdir(pastas["Boletos"])) == 2 and os.listdir(pastas["Enviados"]) == []
+
+        # Conta de volta: o que ficou na caixa sai e os demais boletos são processados
+        class Transporte(TransporteEmail):
+            def _enviar(self, mensagem):
+                enviados.append(mensagem.para[0])
+
+        monkeypatch.setattr(EnvioBoleto, "criar_transporte", lambda: Transporte())
+        EnvioBoleto.executar()
+        assert sorted(enviados) == [email for _, _, email in clientes]
+        assert os.listdir(pastas["Boletos"]) == []
@@ -0,0 +1,172 @@
+"""
+Testes para o Registro de Envios (registro_envios.py)
+
+Garante que a identidade do boleto (hash + nota + parcela) sai do nome do
+arquivo e do XML sem ler o PDF, que registrar é idempotente, que as
+consultas respondem "a parcela X da nota Y foi enviada, quando e para
+quem", que o preview não bloqueia o envio real e que o EnvioBoleto ignora
+os boletos já enviados antes de processá-los.
+"""
+
+import pytest
+import sys
+import os
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import registro_envios
+from registro_envios import (
+    MODO_PREVIEW, MODO_PRODUCAO, RegistroEnvios, identificar_boleto, normalizar_duplicata,
+)
+from transporte_email import MensagemEmail
+from pdf_sintetico import gerar_pdf
+
+MAPA = {
+    "310100": {'duplicatas': [
+        {'numero': "001", 'vencimento': "2025-10-10", 'valor': "500.00"},
+        {'numero': "002", 'vencimento': "2025-11-10", 'valor': "500.00"},
+    ]},
+    "310101": {'duplicatas': [{'numero': "001", 'vencimento': "2025-12-01", 'valor': "90.00"}]},
+    "310102": {'duplicatas': []},
+}
+
+
+def boleto(pasta, nome: str, conteudo: str = "BOLETO") -> str:
+    return gerar_pdf(str(pasta / nome), [conteudo])
+
+
+def mensagem(para=("cliente@empresa.com.br",)) -> MensagemEmail:
+    return MensagemEmail(para=list(para), assunto="Boleto e Nota Fiscal (310100)", corpo_html="<p/>",
+                         cc=["adm@jotajota.net.br"], fidc="CAPITAL")
+
+
+@pytest.fixture
+def registro(tmp_path):
+    return RegistroEnvios(str(tmp_path / "registro_envios.sqlite"))
+
+
+class TestRegistroEnvios:
+    """
+    Suite de testes para registro_envios
+
+    Testa:
+    - Identidade do boleto sem ler o PDF
+    - Gravação idempotente e consultas por nota/parcela
+    - Preview x produção
+    - Filtro de já enviados no EnvioBoleto
+    """
+
+    def test_identifica_parcela_pelo_vencimento_do_nome(self, tmp_path):
+        """Teste: nota com 2 parcelas - a do dia/mês do nome; única e à vista viram parcela 1"""
+        segunda = identificar_boleto(boleto(tmp_path, "CLIENTE - NF 310100 - 10-11 - R$ 500,00.pdf"), MAPA)
+        assert (segunda.nota, segunda.duplicata, segunda.vencimento) == ("310100", "2", "2025-11-10")
+        assert len(segunda.sha256) == 64
+
+        unica = identificar_boleto(boleto(tmp_path, "CLIENTE - NF 310101 - 01-12 - R$ 90,00.pdf"), MAPA)
+        assert (unica.duplicata, unica.vencimento) == ("1", "2025-12-01")
+        a_vista = identificar_boleto(boleto(tmp_path, "CLIENTE - NF 310102 - 01-12 - R$ 90,00.pdf"), MAPA)
+        assert a_vista.duplicata == "1"
+
+        # Vencimento que não bate, nota fora do mapa, nome fora do padrão: parcela desconhecida
+        for nome in ("CLIENTE - NF 310100 - 15-11 - R$ 500,00.pdf", "CLIENTE - NF 999999 - 10-11 - X.pdf",
+                     "boleto_solto.pdf"):
+            assert identificar_boleto(boleto(tmp_path, nome), MAPA).duplicata == ""
+        assert identificar_boleto(boleto(tmp_path, "boleto_solto.pdf"), MAPA).nota == ""
+
+    def test_registrar_e_consultar(self, registro, tmp_path):
+        """Teste: gravar duas vezes não duplica; consulta por hash e por nota + parcela"""
+        impressao = identificar_boleto(boleto(tmp_path, "CLIENTE - NF 310100 - 10-11 - R$ 500,00.pdf"), MAPA)
+
+        assert registro.registrar([impressao], mensagem(), execucao="exec1") == 1
+        assert registro.registrar([impressao], mensagem(), execucao="exec2") == 0
+        assert len(registro) == 1
+
+        envio = registro.consultar(impressao.sha256)
+        assert envio.destinatarios == ["cliente@empresa.com.br"] and envio.cc == ["adm@jotajota.net.br"]
+        assert (envio.execucao, envio.modo, envio.fidc) == ("exec1", MODO_PRODUCAO, "CAPITAL")
+        assert envio.enviado_em is not None
+
+        for parcela in (2, "2", "002"):
+            assert registro.enviado("310100", parcela).arquivo == impressao.arquivo
+        assert registro.enviado("3-0310100", 2) is not None   # nota completa também serve
+        assert registro.enviado("310100", 1) is None
+        assert [e.duplicata for e in registro.consultar_nota("310100")] == ["2"]
+        assert normalizar_duplicata(" 010 ") == "10" and normalizar_duplicata("a1") == "A1"
+
+    def test_outro_pdf_mesma_parcela(self, registro, tmp_path):
+        """Teste: PDF reemitido para parcela já enviada é apontado; parcela desconhecida não"""
+        nome = "CLIENTE - NF 310100 - 10-11 - R$ 500,00.pdf"
+        registro.registrar([identificar_boleto(boleto(tmp_path, nome, "BOLETO v1"), MAPA)], mensagem())
+
+        (tmp_path / "novo").mkdir()
+        reemitido = identificar_boleto(boleto(tmp_path / "novo", nome, "BOLETO v2"), MAPA)
+        mesmo_pdf, mesma_parcela = registro.verificar(reemitido)
+        assert mesmo_pdf is None and mesma_parcela.duplicata == "2"
+
+        desconhecida = identificar_boleto(boleto(tmp_path, "CLIENTE - NF 310100 - 15-11 - X.pdf"), MAPA)
+        assert registro.verificar(desconhecida) == (None, None)
+
+    def test_preview_nao_bloqueia_producao(self, registro, tmp_path):
+        """Teste: aberto em preview conta para o preview, não para o envio real"""
+        impressao = identificar_boleto(boleto(tmp_path, "CLIENTE - NF 310101 - 01-12 - R$ 90,00.pdf"), MAPA)
+        registro.registrar([impressao], mensagem(), modo=MODO_PREVIEW)
+
+        assert registro.consultar(impressao.sha256) is None
+        assert registro.consultar(impressao.sha256, (MODO_PRODUCAO, MODO_PREVIEW)).modo == MODO_PREVIEW
+
+        registro.registrar([impressao], mensagem(), modo=MODO_PRODUCAO)
+        assert [e.modo for e in registro.consultar_nota("310101")] == [MODO_PREVIEW, MODO_PRODUCAO]
+
+    def test_linha_de_comando(self, registro, tmp_path, monkeypatch, capsys):
+        """Teste: --nota/--parcela mostram quando e para quem"""
+        impressao = identificar_boleto(boleto(tmp_path, "CLIENTE - NF 310100 - 10-11 - R$ 500,00.pdf"), MAPA)
+        registro.registrar([impressao], mensagem(["a@x.com", "b@y.com"]))
+
+        monkeypatch.setattr(sys, "argv", ["registro_envios.py", "--db", registro.caminho_db,
+                                          "--nota", "310100", "--parcela", "002"])
+        registro_envios.main()
+        monkeypatch.setattr(sys, "argv", ["registro_envios.py", "--db", registro.caminho_db, "--nota", "310199"])
+        registro_envios.main()
+
+        saida = capsys.readouterr().out
+        assert "NF 310100 parcela 2 (producao)" in saida and "para a@x.com, b@y.com" in saida
+        assert "NF 310199: nenhum envio registrado" in saida
+
+    def test_envio_boleto_ignora_ja_enviados(self, registro, tmp_path, monkeypatch):
+        """Teste: mesmo PDF é ignorado e movido; parcela repetida segue a configuração"""
+        monkeypatch.setitem(sys.modules, "win32com", None)
+        monkeypatch.setitem(sys.modules, "win32com.client", None)
+        import EnvioBoleto
+        from auditoria import AuditoriaExecucao
+
+        boletos, enviados = tmp_path / "Boletos", tmp_path / "Enviados"
+        boletos.mkdir()
+        enviados.mkdir()
+        monkeypatch.setattr(EnvioBoleto, "PASTA_BOLETOS", str(boletos))
+        monkeypatch.setattr(EnvioBoleto, "PASTA_ENVIADOS", str(enviados))
+        monkeypatch.setattr(EnvioBoleto, "MODO_PREVIEW", False)
+
+        ja_enviado = "CLIENTE - NF 310101 - 01-12 - R$ 90,00.pdf"
+        reemitido = "CLIENTE - NF 310100 - 10-11 - R$ 500,00.pdf"
+        novo = "CLIENTE - NF 310100 - 10-10 - R$ 500,00.pdf"
+        registro.registrar([identificar_boleto(boleto(boletos, ja_enviado), MAPA)], mensagem())
+        (tmp_path / "antigo").mkdir()
+        registro.registrar([identificar_boleto(boleto(tmp_path / "antigo", reemitido, "v1"), MAPA)], mensagem())
+        boleto(boletos, reemitido, "v2")
+        boleto(boletos, novo, "parcela 1")
+        arquivos = sorted(os.listdir(boletos))
+
+        monkeypatch.setattr(EnvioBoleto, "REGISTRO_PARCELA_REPETIDA", "avisar")
+        auditoria = AuditoriaExecucao()
+        restantes, impressoes = EnvioBoleto.filtrar_boletos_enviados(registro, arquivos, MAPA, auditoria)
+        assert restantes == [novo, reemitido]
+        assert impressoes[novo].duplicata == "1"
+        assert os.listdir(enviados) == [ja_enviado]     # o move que tinha falhado
+        assert len(auditoria.avisos) == 2
+
+        monkeypatch.setattr(EnvioBoleto, "REGISTRO_PARCELA_REPETIDA", "pular")
+        restantes, _ = EnvioBoleto.filtrar_boletos_enviados(registro, sorted(os.listdir(boletos)), MAPA,
+                                                            AuditoriaExecucao())
+        assert restantes == [novo]
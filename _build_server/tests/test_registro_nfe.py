@@ -0,0 +1,149 @@
+"""
+Testes para os Registros Compactos de NFe (registro_nfe.py)
+
+Garante que NFeRecord/Duplicata devolvem pelo acesso de dicionário os
+mesmos valores de extrair_dados_nfe() e que o MapaNFe guarda cada nota
+uma vez, com as duas chaves apontando para o mesmo registro.
+"""
+
+import pytest
+import sys
+import os
+import pickle
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import date
+from decimal import Decimal
+from registro_nfe import NFeRecord, Duplicata, MapaNFe
+from xml_nfe_reader import extrair_dados_nfe, indexar_xmls_com_resumo
+from nfe_sintetica import gerar_xml_nfe
+
+
+class TestRegistroNFe:
+    """
+    Suite de testes para NFeRecord, Duplicata e MapaNFe
+
+    Testa:
+    - Acesso de dicionário igual ao de extrair_dados_nfe
+    - Centavos e datas pré-convertidos
+    - Uma cópia por nota no mapa
+    - Posição de nota substituída reaproveitada
+    """
+
+    @pytest.fixture
+    def dados(self, tmp_path):
+        """Fixture com o dicionário de um XML com duas duplicatas"""
+        caminho = gerar_xml_nfe(
+            str(tmp_path / "3-01310001.xml"), "1310001", "CLIENTE UM LTDA", cnpj="12345678000190",
+            valor_total="1500.50", email="a@empresa.com.br;b@empresa",
+            duplicatas=[("001", "2025-11-10", "750.25"), ("002", "2025-12-10", "750.25")]
+        )
+        return extrair_dados_nfe(caminho)
+
+    # ================================================================
+    # TESTES DO REGISTRO
+    # ================================================================
+
+    def test_acesso_de_dicionario(self, dados):
+        """Teste: registro['chave'] e .get() iguais ao dicionário original"""
+        registro = NFeRecord.de_dados(dados)
+
+        assert registro.para_dict() == dados
+        for chave, valor in dados.items():
+            if chave != 'duplicatas':
+                assert registro[chave] == valor
+                assert registro.get(chave) == valor
+        for dup, esperado in zip(registro['duplicatas'], dados['duplicatas']):
+            assert {chave: dup[chave] for chave in esperado} == esperado
+        assert registro.get('nao_existe', 'padrao') == 'padrao'
+        with pytest.raises(KeyError):
+            registro['nao_existe']
+
+    def test_centavos_e_datas(self, dados):
+        """Teste: valores em centavos e vencimento em date"""
+        registro = NFeRecord.de_dados(dados)
+        dup = registro['duplicatas'][0]
+
+        assert registro.valor_total_cents == 150050
+        assert registro['valor_total'] == Decimal("1500.50")
+        assert isinstance(dup, Duplicata)
+        assert dup.valor_cents == 75025
+        assert dup['valor'] == Decimal("750.25")
+        assert str(dup['valor']) == "750.25"
+        assert dup.data_vencimento == date(2025, 11, 10)
+        assert dup['vencimento'] == "2025-11-10"
+
+    def test_vencimento_invalido(self):
+        """Teste: vencimento fora do padrão fica sem data"""
+        dup = Duplicata.de_dados({'numero': '001', 'vencimento': '10/11/2025', 'valor': Decimal("1.00")})
+
+        assert dup.data_vencimento is None
+        assert dup['vencimento'] == '10/11/2025'
+
+    # ================================================================
+    # TESTES DO MAPA
+    # ================================================================
+
+    def test_mapa_guarda_uma_copia(self, dados):
+        """Teste: chave curta e completa apontam para o mesmo registro"""
+        mapa = MapaNFe()
+        mapa.adicionar(NFeRecord.de_dados(dados), ['310001', '1310001'])
+
+        assert mapa['310001'] is mapa['1310001']
+        assert list(mapa) == ['310001', '1310001']
+        assert len(mapa) == 2
+        assert len(mapa.notas()) == 1
+        assert '310001' in mapa and '999999' not in mapa
+
+    def test_registro_substituido_sai_de_notas(self, dados):
+        """Teste: nota que perdeu todas as chaves não aparece em notas()"""
+        mapa = MapaNFe()
+        mapa.adicionar(NFeRecord.de_dados(dados), ['310001'])
+        mapa.adicionar(NFeRecord.de_dados(dict(dados, nome="OUTRO")), ['310001'])
+
+        assert [registro.nome for registro in mapa.notas()] == ["OUTRO"]
+
+    def test_registro_substituido_cede_a_posicao(self, dados):
+        """Teste: XML alterado várias vezes não acumula registros; posição órfã é reaproveitada"""
+        mapa = MapaNFe()
+        mapa.adicionar(NFeRecord.de_dados(dados), ['310001', '1310001'])
+        for i in range(5):
+            mapa.adicionar(NFeRecord.de_dados(dict(dados, nome=f"VERSAO {i}")), ['310001', '1310001'])
+        assert len(mapa.registros) == 1 and mapa['310001'].nome == "VERSAO 4"
+
+        # Uma nota só na chave curta: a anterior continua na longa
+        mapa.adicionar(NFeRecord.de_dados(dict(dados, nome="CURTA")), ['310001'])
+        assert [registro.nome for registro in mapa.notas()] == ["VERSAO 4", "CURTA"]
+
+        # As duas chaves de novo juntas: uma posição fica com a nota, a outra fica livre
+        mapa.adicionar(NFeRecord.de_dados(dict(dados, nome="JUNTA")), ['310001', '1310001'])
+        assert [registro.nome for registro in mapa.notas()] == ["JUNTA"] and len(mapa.livres) == 1
+        mapa.adicionar(NFeRecord.de_dados(dict(dados, nome="OUTRA")), ['310002'])
+        assert len(mapa.registros) == 2 and mapa.livres == []
+        assert [mapa[chave].nome for chave in mapa] == ["JUNTA", "JUNTA", "OUTRA"]
+
+    def test_indexacao_devolve_mapa_compacto(self, tmp_path):
+        """Teste: indexar_xmls_com_resumo monta um MapaNFe sem duplicar notas"""
+        pasta = tmp_path / "Notas"
+        pasta.mkdir()
+        gerar_xml_nfe(str(pasta / "a.xml"), "1310001", "CLIENTE LONGO", cnpj="11111111000111")
+        gerar_xml_nfe(str(pasta / "b.xml"), "310002", "CLIENTE CURTO", cnpj="22222222000122")
+
+        mapa, resumo = indexar_xmls_com_resumo(str(pasta), usar_cache=False)
+
+        assert isinstance(mapa, MapaNFe)
+        assert list(mapa) == ['310001', '1310001', '310002']
+        assert len(mapa.notas()) == resumo['validos'] == 2
+
+    def test_mapa_serializavel(self, dados):
+        """Teste: mapa vai para os processos do pool (pickle) sem perder dados"""
+        mapa = MapaNFe()
+        mapa.adicionar(NFeRecord.de_dados(dados), ['310001', '1310001'])
+
+        copia = pickle.loads(pickle.dumps(mapa))
+
+        assert copia == mapa
+        assert copia['310001'] is copia['1310001']
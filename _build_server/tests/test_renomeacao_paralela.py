@@ -0,0 +1,151 @@
+"""
+Testes para a Renomeação Paralela
+
+Garante que o modo com ProcessPoolExecutor produz exatamente os mesmos
+arquivos renomeados, o mesmo log (na mesma ordem) e o mesmo relatório
+que o modo sequencial.
+"""
+
+import pytest
+import sys
+import os
+import re
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pdf_texto
+import cache_nfe
+import RenomeaçãoBoletos as renomeacao
+from pdf_sintetico import gerar_pdf
+from nfe_sintetica import gerar_xml_nfe
+
+
+def texto_boleto_capital(numero_nota: str, cnpj_fmt: str, nome: str) -> str:
+    """Texto de um boleto CAPITAL (DANFE) com os campos usados pelo extrator"""
+    return (
+        "CAPITAL RS FIDC NP MULTISSETORIAL\n"
+        "DANFE\n"
+        "DESTINATÁRIO / REMETENTE\n"
+        "NOME / RAZÃO SOCIAL CNPJ / CPF\n"
+        f"{nome} {cnpj_fmt}\n"
+        "NÚMERO DA NOTA\n"
+        f"000{numero_nota}\n"
+        "Vencimento\n"
+        "10/11/2025\n"
+        "Valor do Documento R$ 1.234,56"
+    )
+
+
+@pytest.fixture
+def ambiente(tmp_path, monkeypatch):
+    """Pastas temporárias com 6 boletos (5 com XML, 1 sem) e caches desligados"""
+    entrada = tmp_path / "Entrada"
+    destino = tmp_path / "Renomeados"
+    notas = tmp_path / "Notas"
+    auditoria = tmp_path / "Auditoria"
+    for pasta in (entrada, destino, notas, auditoria):
+        pasta.mkdir()
+
+    for i in range(6):
+        numero = f"{310100 + i}"
+        cnpj = f"{12345678000100 + i:014d}"
+        cnpj_fmt = f"{cnpj[:2]}.{cnpj[2:5]}.{cnpj[5:8]}/{cnpj[8:12]}-{cnpj[12:]}"
+        nome = f"CLIENTE {i} LTDA"
+        gerar_pdf(str(entrada / f"boleto_{i}.pdf"), [texto_boleto_capital(numero, cnpj_fmt, nome)])
+        if i != 3:  # boleto_3 fica sem XML (erro esperado)
+            gerar_xml_nfe(
+                str(notas / f"3-0{numero}.xml"), numero, nome, cnpj=cnpj,
+                valor_total="1234.56", duplicatas=[("001", "2025-11-10", "1234.56")],
+                email=f"cliente{i}@empresa.com.br"
+            )
+
+    monkeypatch.setattr(renomeacao, "PASTA_ENTRADA", str(entrada))
+    monkeypatch.setattr(renomeacao, "PASTA_DESTINO", str(destino))
+    monkeypatch.setattr(renomeacao, "PASTA_NOTAS", str(notas))
+    monkeypatch.setattr(renomeacao, "PASTA_AUDITORIA", str(auditoria))
+    monkeypatch.setattr(renomeacao, "ARQUIVO_LOG", str(auditoria / "log_erros.txt"))
+    monkeypatch.setattr(pdf_texto, "USAR_CACHE_TEXTO_PDF", False)
+    pdf_texto.definir_cache(None)
+    monkeypatch.setattr(cache_nfe, "USAR_CACHE_NFE", False)
+
+    return {'entrada': entrada, 'destino': destino, 'notas': notas}
+
+
+def _normalizar_log(saida: str) -> str:
+    """Remove linhas que mudam entre execuções (tempos, modo paralelo)"""
+    linhas = [
+        l for l in saida.splitlines()
+        if not re.match(r'\s*(Tempo|\[INFO\] Processamento paralelo|\[RELATORIO\])', l)
+    ]
+    return "\n".join(linhas)
+
+
+class TestRenomeacaoParalela:
+    """
+    Suite de testes para processar_boletos(workers=N)
+
+    Testa:
+    - Mesmos arquivos renomeados no modo sequencial e paralelo
+    - Mesmo log, na ordem dos arquivos
+    - Resolução do número de workers
+    """
+
+    def test_sequencial_e_paralelo_iguais(self, ambiente, capsys, tmp_path):
+        """Teste: workers=2 gera os mesmos arquivos e o mesmo log que workers=1"""
+        nomes_entrada = sorted(os.listdir(ambiente['entrada']))
+        copia = tmp_path / "copia"
+        copia.mkdir()
+        for nome in nomes_entrada:
+            (copia / nome).write_bytes((ambiente['entrada'] / nome).read_bytes())
+
+        renomeacao.processar_boletos(workers=1)
+        log_seq = _normalizar_log(capsys.readouterr().out)
+        renomeados_seq = sorted(os.listdir(ambiente['destino']))
+
+        # Restaurar entrada e limpar destino
+        for nome in os.listdir(ambiente['destino']):
+            os.remove(ambiente['destino'] / nome)
+        for nome in os.listdir(ambiente['entrada']):
+            os.remove(ambiente['entrada'] / nome)
+        for nome in nomes_entrada:
+            (ambiente['entrada'] / nome).write_bytes((copia / nome).read_bytes())
+
+        renomeacao.processar_boletos(workers=2)
+        saida_par = capsys.readouterr().out
+        log_par = _normalizar_log(saida_par)
+        renomeados_par = sorted(os.listdir(ambiente['destino']))
+
+        assert "[INFO] Processamento paralelo: 2 processos" in saida_par
+        # Origens de valor/vencimento somadas dos processos (uma vez por boleto)
+        assert "[CODIGO-BARRAS] vencimento   total=6 " in saida_par
+        assert len(renomeados_seq) == 5
+        assert renomeados_par == renomeados_seq
+        assert log_par == log_seq
+        assert os.listdir(ambiente['entrada']) == ["boleto_3.pdf"]
+
+    def test_analises_na_ordem_dos_arquivos(self, ambiente):
+        """Teste: analisar_boletos devolve as análises na ordem de entrada"""
+        mapa = renomeacao.indexar_xmls_por_nota(str(ambiente['notas']))
+        caminhos = sorted(str(p) for p in ambiente['entrada'].iterdir())
+
+        analises = list(renomeacao.analisar_boletos(caminhos, mapa, workers=3, usar_cache=False))
+
+        notas = [a['resultado']['numero_nota'] for a in analises]
+        assert notas == ['310100', '310101', '310102', 'SEM_NOTA', '310104', '310105']
+        assert analises[3]['resultado']['status'] == 'erro'
+
+    @pytest.mark.parametrize("pedido,arquivos,esperado", [
+        (1, 10, 1),
+        (4, 10, 4),
+        (8, 3, 3),
+        (4, 0, 1),
+    ])
+    def test_resolver_workers(self, pedido, arquivos, esperado):
+        """Teste: nunca usa mais processos que arquivos"""
+        assert renomeacao.resolver_workers(pedido, arquivos) == esperado
+
+    def test_resolver_workers_todos_nucleos(self):
+        """Teste: 0 = todos os núcleos"""
+        assert renomeacao.resolver_workers(0, 1000) == min(os.cpu_count() or 1, 1000)
@@ -0,0 +1,129 @@
+"""
+Testes para o Matching Aproximado de Nomes (similaridade_nomes.py)
+
+Garante que a similaridade devolvida é a mesma de calcular_similaridade()
+(SequenceMatcher sobre os nomes normalizados), que o índice de trigramas
+encontra as variações de nome entre muitos distratores e que o matching
+da renomeação continua pontuando o nome como antes.
+"""
+
+import pytest
+import sys
+import os
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from decimal import Decimal
+from similaridade_nomes import MotorNomes, similaridade_minima, trigramas
+from indice_nfe import IndiceNFe
+import RenomeaçãoBoletos as renomeacao
+
+
+NOMES = [
+    "ACME COMERCIO LTDA", "ACME COMERCIO", "ACME COM. E IND. LTDA",
+    "BETA ENG CONST SPE LTDA", "BETA ENGENHARIA CONSTRUCAO SOCIEDADE PROPOSITO ESPECIFICO",
+    "GAMA S.A.", "GAMA S/A", "DELTA EMPREENDIMENTO IMOBILIARIO EIRELI",
+    "DELTA EMPREENDIMENTOS IMOBILIARIOS", "JOAO DA SILVA", "JOÃO DA SILVA ME", "LTDA", "ME",
+]
+
+
+def nota(numero, cpf_cnpj, nome, valor_total="100.00"):
+    """Dados mínimos de um XML válido para o matching"""
+    return {
+        'xml_valido': True, 'numero_nota': numero, 'cpf_cnpj': cpf_cnpj, 'cnpj': cpf_cnpj,
+        'nome': nome, 'valor_total': Decimal(valor_total), 'duplicatas': [], 'emails': [],
+    }
+
+
+class TestSimilaridadeNomes:
+    """
+    Suite de testes para MotorNomes e a busca de nomes do IndiceNFe
+
+    Testa:
+    - Mesma similaridade de calcular_similaridade nos limiares 0.70/0.85
+    - Candidatos por trigramas (top-k) entre distratores
+    - Nome normalizado uma vez por nota no índice
+    """
+
+    @pytest.fixture
+    def motor(self):
+        """Fixture com os nomes da lista indexados pela posição"""
+        motor = MotorNomes(renomeacao.normalizar_nome_empresa)
+        for chave, nome in enumerate(NOMES):
+            motor.indexar(chave, nome)
+        return motor
+
+    # ================================================================
+    # TESTES DE SIMILARIDADE
+    # ================================================================
+
+    @pytest.mark.parametrize("minimo", [0.0, 0.70, 0.85])
+    def test_mesma_similaridade_que_calcular_similaridade(self, motor, minimo):
+        """Teste: ratio igual ao antigo quando >= mínimo, 0.0 abaixo dele"""
+        for consulta in NOMES:
+            consulta_norm = motor.normalizar(consulta)
+            for chave, nome in enumerate(NOMES):
+                esperado = renomeacao.calcular_similaridade(consulta, nome)
+                obtido = motor.similaridade(consulta_norm, chave, minimo)
+                assert obtido == (esperado if esperado >= minimo else 0.0), (consulta, nome)
+
+    def test_nomes_vazios_apos_normalizar(self, motor):
+        """Teste: 'ME' x 'LTDA' ficam vazios e valem 1.0, como no SequenceMatcher"""
+        assert similaridade_minima("", "", 0.70) == 1.0
+        assert set(motor.candidatos("")) == {NOMES.index("LTDA"), NOMES.index("ME")}
+
+    def test_trigramas_com_bordas(self):
+        """Teste: espaços nas pontas marcam início e fim do nome"""
+        assert trigramas("ABC") == {" AB", "ABC", "BC "}
+
+    # ================================================================
+    # TESTES DE CANDIDATOS
+    # ================================================================
+
+    def test_similares_entre_distratores(self, motor):
+        """Teste: variações do nome aparecem mesmo com milhares de outros nomes"""
+        for i in range(3000):
+            motor.indexar(f"d{i}", f"CLIENTE {i} COMERCIO DE PECAS LTDA")
+
+        achados = dict(motor.similares("ACME COMERCIO LTDA", minimo=0.70, k=10))
+
+        assert achados[0] == 1.0
+        assert achados[1] == 1.0
+        assert all(not str(chave).startswith("d") for chave in achados)
+
+    def test_consulta_sem_nome(self, motor):
+        """Teste: nome vazio no boleto não procura nada"""
+        assert motor.similares("") == []
+
+    def test_indice_normaliza_uma_vez_por_nota(self):
+        """Teste: as duas chaves da nota apontam para o mesmo nome normalizado"""
+        dados = nota("1310001", "12345678000190", "ACME COMERCIO LTDA")
+        indice = IndiceNFe({"310001": dados, "1310001": dados,
+                            "310002": nota("310002", "98765432000110", "OUTRO NOME")})
+        motor = indice.motor_nomes(renomeacao.normalizar_nome_empresa)
+
+        assert len(motor) == 2
+        assert indice.posicoes_por_nome(motor.normalizar("ACME COMERCIO"), k=1) == [0, 1]
+        assert indice.similaridade_nome(1, "ACME COMERCIO") == 1.0
+        assert indice.motor_nomes(renomeacao.normalizar_nome_empresa) is motor
+
+    # ================================================================
+    # TESTES DO MATCHING DA RENOMEAÇÃO
+    # ================================================================
+
+    def test_cnpj_mais_nome_aceita(self):
+        """Teste: CNPJ (50) + nome igual (30) aceita mesmo com valor diferente"""
+        mapa = {"310001": nota("310001", "12345678000190", "ACME COMERCIO LTDA", "999.00")}
+
+        assert renomeacao.extrair_numero_nota_xml(
+            "12345678000190", 10000, "ACME COMERCIO", "10/11", mapa) == ("310001", None)
+
+    def test_nome_sozinho_so_aparece_no_diagnostico(self, capsys):
+        """Teste: nota achada só pelo nome entra no [XML-BAIXO-SCORE], sem aceitar"""
+        mapa = {"310001": nota("310001", "12345678000190", "ACME COMERCIO LTDA", "999.00")}
+
+        resultado = renomeacao.extrair_numero_nota_xml("", 10000, "ACME COMERCIO", "10/11", mapa)
+
+        assert resultado == ("", None)
+        assert "[XML-BAIXO-SCORE] Melhor match: Nota 310001 (score: 30, NOME_MATCH_100%)" in capsys.readouterr().out
@@ -0,0 +1,294 @@
+"""
+Testes para o Transporte de E-mail (transporte_email.py)
+
+Garante que o SMTP usa uma conexão (e um login) para o lote inteiro,
+reconecta quando o servidor derruba a sessão, monta o MIME com a
+assinatura inline e os anexos, que o Outlook localiza a conta uma vez só,
+que o transporte "arquivo" grava .eml com os tempos de cada mensagem e
+que o EnvioBoleto importa sem win32com. O SMTP é testado contra um
+servidor local em outro processo (tests/smtp_sintetico.py).
+"""
+
+import pytest
+import sys
+import os
+import types
+from email import message_from_bytes, policy
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from transporte_email import (
+    CID_ASSINATURA, ErroTransporte, MensagemEmail, TransporteArquivoEML, TransporteEmail, TransporteOutlook,
+    TransporteSMTP, criar_transporte, ler_tempos_eml, separar_emails,
+)
+from pdf_sintetico import gerar_pdf
+from smtp_sintetico import iniciar_processo, ler_registro
+from envio_sintetico import preparar_envio
+
+CONTA = "cobranca@jotajota.net.br"
+
+
+@pytest.fixture
+def servidor_smtp(tmp_path):
+    """Sobe o servidor SMTP local: servidor_smtp(derrubar_apos=0) -> (porta, pasta)"""
+    processos = []
+
+    def subir(derrubar_apos: int = 0):
+        pasta = str(tmp_path / f"smtp_{len(processos)}")
+        processo, porta = iniciar_processo(pasta, derrubar_apos)
+        processos.append(processo)
+        return porta, pasta
+
+    yield subir
+    for processo in processos:
+        processo.terminate()
+        processo.wait(timeout=10)
+
+
+@pytest.fixture
+def mensagens(tmp_path):
+    """Fábrica de mensagens com um boleto PDF anexo e a assinatura inline"""
+    assinatura = tmp_path / "assinatura.jpg"
+    assinatura.write_bytes(b"\xff\xd8\xff\xe0JFIF-sintetico\xff\xd9")
+    boleto = gerar_pdf(str(tmp_path / "CLIENTE - NF 310100.pdf"), ["BOLETO"])
+
+    def criar(quantidade: int):
+        return [
+            MensagemEmail(
+                para=[f"cliente{i}@empresa.com.br", f"financeiro{i}@empresa.com.br"],
+                cc=["adm@jotajota.net.br"],
+                assunto=f"Boleto e Nota Fiscal (31010{i})",
+                corpo_html=f'<p>Cliente {i}</p><p><img src="cid:{CID_ASSINATURA}"></p>',
+                anexos=[boleto],
+                imagem_inline=str(assinatura),
+                fidc="CAPITAL",
+            )
+            for i in range(quantidade)
+        ]
+    return criar
+
+
+def smtp_local(porta: int, **opcoes) -> TransporteSMTP:
+    return TransporteSMTP("127.0.0.1", porta, CONTA, usuario=CONTA, senha="x",
+                          seguranca="nenhuma", timeout=10, **opcoes)
+
+
+def contar(eventos: list, evento: str) -> int:
+    return sum(1 for e in eventos if e['evento'] == evento)
+
+
+class TestTransporteEmail:
+    """
+    Suite de testes para transporte_email
+
+    Testa:
+    - Uma conexão SMTP por lote, reconexão e renovação
+    - MIME com assinatura inline e anexos
+    - Outlook: conta localizada uma vez
+    - Envio a seco em arquivos .eml
+    - EnvioBoleto sem win32com
+    """
+
+    def test_smtp_uma_conexao_para_o_lote(self, servidor_smtp, mensagens):
+        """Teste: 20 mensagens, 1 conexão e 1 login"""
+        porta, pasta = servidor_smtp()
+
+        with smtp_local(porta) as transporte:
+            for mensagem in mensagens(20):
+                transporte.enviar(mensagem)
+            assert transporte.conexoes == 1 and transporte.enviadas == 20
+
+        eventos = ler_registro(pasta)
+        assert (contar(eventos, 'conexao'), contar(eventos, 'login'), contar(eventos, 'mensagem')) == (1, 1, 20)
+        primeira = next(e for e in eventos if e['evento'] == 'mensagem')
+        assert primeira['de'] == CONTA
+        assert primeira['para'] == ["cliente0@empresa.com.br", "financeiro0@empresa.com.br", "adm@jotajota.net.br"]
+
+    def test_mime_com_assinatura_inline_e_anexo(self, servidor_smtp, mensagens):
+        """Teste: HTML multipart/related com a imagem pelo Content-ID e o PDF anexo"""
+        porta, pasta = servidor_smtp()
+        with smtp_local(porta) as transporte:
+            transporte.enviar(mensagens(1)[0])
+
+        with open(os.path.join(pasta, "00001.eml"), "rb") as f:
+            recebida = message_from_bytes(f.read(), policy=policy.default)
+
+        assert recebida['Subject'] == "Boleto e Nota Fiscal (310100)"
+        assert recebida['Cc'] == "adm@jotajota.net.br"
+        assert "cid:assinatura_jotajota" in recebida.get_body(('html',)).get_content()
+        imagens = [p for p in recebida.walk() if p['Content-ID'] == f"<{CID_ASSINATURA}>"]
+        assert len(imagens) == 1 and imagens[0].get_content_type() == "image/jpeg"
+        anexos = list(recebida.iter_attachments())
+        assert [a.get_filename() for a in anexos] == ["CLIENTE - NF 310100.pdf"]
+        assert anexos[0].get_content().startswith(b"%PDF")
+
+    def test_reconecta_quando_servidor_derruba(self, servidor_smtp, mensagens):
+        """Teste: servidor fecha a sessão a cada 2 mensagens - nenhuma se perde"""
+        porta, pasta = servidor_smtp(derrubar_apos=2)
+
+        with smtp_local(porta) as transporte:
+            for mensagem in mensagens(5):
+                transporte.enviar(mensagem)
+
+        eventos = ler_registro(pasta)
+        assert contar(eventos, 'mensagem') == 5
+        assert contar(eventos, 'conexao') == 3 and transporte.conexoes == 3
+
+    def test_renova_a_cada_n_mensagens(self, servidor_smtp, mensagens):
+        """Teste: mensagens_por_conexao=2 - 5 mensagens em 3 conexões"""
+        porta, pasta = servidor_smtp()
+
+        with smtp_local(porta, mensagens_por_conexao=2) as transporte:
+            for mensagem in mensagens(5):
+                transporte.enviar(mensagem)
+
+        eventos = ler_registro(pasta)
+        assert [e['conexao'] for e in eventos if e['evento'] == 'mensagem'] == [1, 1, 2, 2, 3]
+
+    def test_anexo_inexistente_nao_envia(self, servidor_smtp, mensagens, tmp_path):
+        """Teste: anexo faltando - FileNotFoundError, nada enviado, conexão segue válida"""
+        porta, pasta = servidor_smtp()
+        ruim, boa = mensagens(2)
+        ruim.anexos = [str(tmp_path / "nao_existe.pdf")]
+
+        with smtp_local(porta) as transporte:
+            with pytest.raises(FileNotFoundError):
+                transporte.enviar(ruim)
+            transporte.enviar(boa)
+
+        eventos = ler_registro(pasta)
+        assert contar(eventos, 'mensagem') == 1 and contar(eventos, 'conexao') == 1
+
+    def test_servidor_fora_do_ar(self, tmp_path):
+        """Teste: conexão recusada vira ErroTransporte"""
+        import socket
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            porta = s.getsockname()[1]
+
+        with pytest.raises(ErroTransporte):
+            smtp_local(porta).abrir()
+
+    def test_outlook_conta_localizada_uma_vez(self, monkeypatch, mensagens, tmp_path):
+        """Teste: Dispatch e varredura de contas só na primeira mensagem"""
+        chamadas = {'dispatch': 0, 'contas': 0, 'enviados': []}
+
+        class Email:
+            def __init__(self):
+                self._oleobj_ = types.SimpleNamespace(Invoke=lambda *args: None)
+                self.Attachments = types.SimpleNamespace(Add=lambda caminho: types.SimpleNamespace(
+                    PropertyAccessor=types.SimpleNamespace(SetProperty=lambda *a: None)))
+
+            def Send(self):
+                chamadas['enviados'].append((self.To, self.CC))
+
+        class Sessao:
+            @property
+            def Accounts(self):
+                chamadas['contas'] += 1
+                return [types.SimpleNamespace(SmtpAddress="outra@x.com"),
+                        types.SimpleNamespace(SmtpAddress=CONTA.upper())]
+
+        def dispatch(nome):
+            chamadas['dispatch'] += 1
+            return types.SimpleNamespace(Session=Sessao(), CreateItem=lambda tipo: Email())
+
+        cliente = types.ModuleType("win32com.client")
+        cliente.Dispatch = dispatch
+        monkeypatch.setitem(sys.modules, "win32com", types.ModuleType("win32com"))
+        monkeypatch.setitem(sys.modules, "win32com.client", cliente)
+
+        with TransporteOutlook(CONTA, pasta_log=str(tmp_path)) as transporte:
+            for mensagem in mensagens(3):
+                transporte.enviar(mensagem)
+
+        assert (chamadas['dispatch'], chamadas['contas']) == (1, 1)
+        assert chamadas['enviados'][0] == ("cliente0@empresa.com.br; financeiro0@empresa.com.br",
+                                           "adm@jotajota.net.br")
+
+        # Conta ausente: erro registrado e nenhuma nova tentativa de abrir
+        transporte = TransporteOutlook("naoexiste@jotajota.net.br", pasta_log=str(tmp_path))
+        for _ in range(2):
+            with pytest.raises(ErroTransporte):
+                transporte.enviar(mensagens(1)[0])
+        assert chamadas['dispatch'] == 2
+        assert os.path.exists(tmp_path / "log_falha_conta.txt")
+
+    def test_arquivo_eml(self, mensagens, tmp_path):
+        """Teste: dois transportes na mesma pasta - .eml numerados, MIME completo e tempos no CSV"""
+        pasta = str(tmp_path / "eml" / "execucao")
+        lote = mensagens(3)
+        with TransporteArquivoEML(pasta, CONTA) as primeiro, TransporteArquivoEML(pasta, CONTA) as segundo:
+            primeiro.enviar(lote[0])
+            segundo.enviar(lote[1])
+            primeiro.enviar(lote[2])
+
+        arquivos = sorted(f for f in os.listdir(pasta) if f.endswith(".eml"))
+        assert arquivos == ["00001 - Boleto e Nota Fiscal (310100).eml", "00002 - Boleto e Nota Fiscal (310101).eml",
+                            "00003 - Boleto e Nota Fiscal (310102).eml"]
+        with open(os.path.join(pasta, arquivos[1]), "rb") as f:
+            bruto = f.read()
+        assert b"\r\n" in bruto and b"\n" not in bruto.replace(b"\r\n", b"")
+        gravada = message_from_bytes(bruto, policy=policy.default)
+        assert gravada['From'] == CONTA and gravada['To'] == "cliente1@empresa.com.br, financeiro1@empresa.com.br"
+        assert [p for p in gravada.walk() if p['Content-ID'] == f"<{CID_ASSINATURA}>"]
+        assert [a.get_filename() for a in gravada.iter_attachments()] == ["CLIENTE - NF 310100.pdf"]
+
+        tempos = ler_tempos_eml(pasta)
+        assert [t.arquivo for t in tempos] == arquivos
+        assert tempos[1].tamanho == len(bruto) and tempos[1].anexos == 1
+        assert all(t.renderizacao > 0 and t.escrita > 0 for t in tempos)
+        assert len(primeiro.tempos) == 2 and len(segundo.tempos) == 1
+
+    def test_envio_boleto_simulado(self, tmp_path, monkeypatch):
+        """Teste: transporte "arquivo" no EnvioBoleto - gera .eml; nada é movido, registrado ou enviado"""
+        EnvioBoleto, pastas = preparar_envio(tmp_path, monkeypatch, [
+            ("310100", "CLIENTE A LTDA", "a@empresa.com.br"), ("310101", "CLIENTE B LTDA", "b@empresa.com.br")])
+        (tmp_path / "assinatura.jpg").write_bytes(b"\xff\xd8\xff\xe0JFIF-sintetico\xff\xd9")
+        monkeypatch.setattr(EnvioBoleto, "ASSINATURA_IMG", str(tmp_path / "assinatura.jpg"))
+        monkeypatch.setattr(EnvioBoleto, "TRANSPORTE_EMAIL", "arquivo")
+        monkeypatch.setattr(EnvioBoleto, "PASTA_EML", str(tmp_path / "EML"))
+
+        for _ in range(2):  # nada registrado: a segunda execução gera tudo de novo
+            EnvioBoleto.executar()
+
+        tempos = [t for execucao in os.listdir(tmp_path / "EML")
+                  for t in ler_tempos_eml(str(tmp_path / "EML" / execucao))]
+        assert len(tempos) == 4 and all(t.anexos == 2 for t in tempos)  # boleto + nota
+        assert len(os.listdir(pastas["Boletos"])) == 2 and os.listdir(pastas["Enviados"]) == []
+        assert not os.path.exists(pastas["Auditoria"] / "caixa_saida.sqlite")
+        from registro_envios import RegistroEnvios
+        assert len(RegistroEnvios(str(pastas["Auditoria"] / "registro.sqlite"))) == 0
+
+    def test_envio_boleto_sem_win32com(self, monkeypatch):
+        """Teste: EnvioBoleto importa sem win32com e manda CC do FIDC pelo transporte"""
+        monkeypatch.setitem(sys.modules, "win32com", None)
+        monkeypatch.setitem(sys.modules, "win32com.client", None)
+        import EnvioBoleto
+
+        class Captura(TransporteEmail):
+            def __init__(self):
+                super().__init__()
+                self.mensagens = []
+
+            def _enviar(self, mensagem):
+                self.mensagens.append(mensagem)
+
+        transporte = Captura()
+        EnvioBoleto.enviar_email(transporte, "a@x.com; b@y.com", "Assunto", "<p>oi</p>", [], "NOVAX")
+
+        mensagem, = transporte.mensagens
+        assert mensagem.para == ["a@x.com", "b@y.com"]
+        assert mensagem.cc == ["adm@jotajota.net.br", "controladoria@novaxfidc.com.br"]
+        assert mensagem.imagem_inline == EnvioBoleto.ASSINATURA_IMG
+
+    def test_criar_transporte(self):
+        """Teste: nome do config vira a classe certa; nome inválido é erro"""
+        assert isinstance(criar_transporte("smtp"), TransporteSMTP)
+        assert isinstance(criar_transporte("outlook", preview=True), TransporteOutlook)
+        assert criar_transporte("arquivo", pasta="/tmp/eml").pasta == "/tmp/eml"
+        assert separar_emails("a@x.com; b@y.com,c@z.com ;") == ["a@x.com", "b@y.com", "c@z.com"]
+        with pytest.raises(ValueError):
+            criar_transporte("pombo")
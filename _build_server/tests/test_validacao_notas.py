@@ -0,0 +1,119 @@
+"""
+Testes para a Validação das Notas Anexadas (validacao_notas.py)
+
+Garante que CPF/CNPJ e valor vêm do XML quando a nota está no mapa, que
+sem XML o PDF é lido uma única vez (mesmo com outro nome de arquivo) e
+que a origem usada fica registrada.
+"""
+
+import pytest
+import sys
+import os
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from decimal import Decimal
+from registro_nfe import MapaNFe, NFeRecord
+from validacao_notas import ValidadorNotas, DadosNota, dados_do_xml, ORIGEM_XML, ORIGEM_PDF
+
+CNPJ_XML = "12345678000190"
+CNPJ_PDF = "98765432000110"
+
+
+class LeitorFalso:
+    """ler_pdf que conta as leituras por caminho"""
+
+    def __init__(self, cnpj=CNPJ_PDF, valor_cents=10000):
+        self.resultado = (cnpj, valor_cents)
+        self.lidos = []
+
+    def __call__(self, caminho):
+        self.lidos.append(caminho)
+        return self.resultado
+
+
+def mapa_com_nota(numero="310227", cpf_cnpj=CNPJ_XML, valor_total="606.08"):
+    mapa = MapaNFe()
+    mapa.adicionar(NFeRecord(numero_nota=numero, nome="CLIENTE TESTE LTDA", cpf_cnpj=cpf_cnpj,
+                             valor_total_cents=int(Decimal(valor_total) * 100)),
+                   [numero[-6:], numero])
+    return mapa
+
+
+def criar_pdf(tmp_path, nome, conteudo=b"%PDF-1.4 nota"):
+    caminho = tmp_path / nome
+    caminho.write_bytes(conteudo)
+    return str(caminho)
+
+
+class TestValidadorNotas:
+    """
+    Suite de testes para ValidadorNotas
+
+    Testa:
+    - XML do mapa como fonte principal
+    - Uma leitura do PDF por conteúdo (SHA-256)
+    - Origem registrada em cada resultado
+    """
+
+    def test_xml_tem_prioridade(self, tmp_path):
+        """Teste: nota com XML - PDF não é lido"""
+        leitor = LeitorFalso()
+        validador = ValidadorNotas(mapa_com_nota(), leitor)
+
+        dados = validador.dados_da_nota("310227", criar_pdf(tmp_path, "3-0310227.pdf"))
+
+        assert dados == DadosNota(CNPJ_XML, 60608, ORIGEM_XML)
+        assert leitor.lidos == []
+        assert validador.consultas_xml == 1
+
+    def test_sem_xml_le_pdf(self, tmp_path):
+        """Teste: nota fora do mapa - CNPJ e valor do PDF"""
+        leitor = LeitorFalso()
+        validador = ValidadorNotas(mapa_com_nota(), leitor)
+        caminho = criar_pdf(tmp_path, "310999.pdf")
+
+        dados = validador.dados_da_nota("310999", caminho)
+
+        assert dados == DadosNota(CNPJ_PDF, 10000, ORIGEM_PDF)
+        assert leitor.lidos == [caminho]
+
+    def test_pdf_lido_uma_vez_por_conteudo(self, tmp_path):
+        """Teste: mesmo PDF consultado de novo ou com outro nome - uma leitura"""
+        leitor = LeitorFalso()
+        validador = ValidadorNotas(None, leitor)
+        a = criar_pdf(tmp_path, "310001.pdf")
+        b = criar_pdf(tmp_path, "copia-310001.pdf")
+        c = criar_pdf(tmp_path, "310002.pdf", b"%PDF-1.4 outra nota")
+
+        for numero, caminho in [("310001", a), ("310001", a), ("310001", b), ("310002", c)]:
+            validador.dados_da_nota(numero, caminho)
+
+        assert leitor.lidos == [a, c]
+        assert validador.leituras_pdf == 2
+
+    def test_pdf_inexistente_nao_e_memorizado(self, tmp_path):
+        """Teste: sem arquivo para o hash - lê sempre (o leitor decide o resultado)"""
+        leitor = LeitorFalso(cnpj=None, valor_cents=None)
+        validador = ValidadorNotas({}, leitor)
+        caminho = str(tmp_path / "sumiu.pdf")
+
+        assert validador.dados_da_nota("310001", caminho) == DadosNota(None, None, ORIGEM_PDF)
+        validador.dados_da_nota("310001", caminho)
+        assert len(leitor.lidos) == 2
+
+    @pytest.mark.parametrize("dados", [
+        None,
+        {'xml_valido': False, 'cpf_cnpj': CNPJ_XML, 'valor_total': Decimal("1.00")},
+        {'xml_valido': True, 'cpf_cnpj': '', 'valor_total': Decimal("1.00")},
+    ])
+    def test_xml_sem_cnpj_cai_no_pdf(self, dados):
+        """Teste: XML inválido ou sem CPF/CNPJ não serve de fonte"""
+        assert dados_do_xml(dados) is None
+
+    def test_xml_dicionario_e_cpf(self):
+        """Teste: dicionário antigo e CPF (11 dígitos) também valem"""
+        dados = dados_do_xml({'xml_valido': True, 'cpf_cnpj': "12345678909", 'valor_total': Decimal("0")})
+
+        assert dados == DadosNota("12345678909", None, ORIGEM_XML)
@@ -0,0 +1,285 @@
+"""
+Testes para o Modo Vigia (vigia_pastas.py + RenomeaçãoBoletos.vigiar_pastas)
+
+Garante que arquivos pela metade não são entregues (debounce), que as
+fontes de eventos enxergam arquivos novos, que o índice de NFe estendido
+com notas novas é igual ao montado do zero e que o vigia renomeia os
+boletos que chegam, inclusive o que esperava pela nota.
+"""
+
+import pytest
+import sys
+import os
+import time
+import threading
+
+# Adicionar pasta pai ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pdf_texto
+import cache_nfe
+import indice_nfe
+import RenomeaçãoBoletos as renomeacao
+from indice_nfe import IndiceNFe, atualizar_indice_nfe, obter_indice_nfe
+from vigia_pastas import Estabilizador, FonteInotify, FontePolling, criar_fonte
+from xml_nfe_reader import adicionar_xml_ao_mapa, indexar_xmls_por_nota
+from pdf_sintetico import gerar_pdf
+from nfe_sintetica import gerar_xml_nfe
+
+
+def texto_boleto_capital(numero_nota: str, cnpj_fmt: str, nome: str) -> str:
+    """Texto de um boleto CAPITAL (DANFE) com os campos usados pelo extrator"""
+    return (
+        "CAPITAL RS FIDC NP MULTISSETORIAL\n"
+        "DANFE\n"
+        "DESTINATÁRIO / REMETENTE\n"
+        "NOME / RAZÃO SOCIAL CNPJ / CPF\n"
+        f"{nome} {cnpj_fmt}\n"
+        "NÚMERO DA NOTA\n"
+        f"000{numero_nota}\n"
+        "Vencimento\n"
+        "10/11/2025\n"
+        "Valor do Documento R$ 1.234,56"
+    )
+
+
+def cliente(i: int) -> dict:
+    numero = f"{310100 + i}"
+    cnpj = f"{12345678000100 + i:014d}"
+    return {
+        'numero': numero, 'cnpj': cnpj, 'nome': f"CLIENTE {i} LTDA",
+        'cnpj_fmt': f"{cnpj[:2]}.{cnpj[2:5]}.{cnpj[5:8]}/{cnpj[8:12]}-{cnpj[12:]}",
+    }
+
+
+def gerar_xml_cliente(pasta, i: int, valor: str = "1234.56") -> str:
+    dados = cliente(i)
+    return gerar_xml_nfe(
+        str(pasta / f"3-0{dados['numero']}.xml"), dados['numero'], dados['nome'], cnpj=dados['cnpj'],
+        valor_total=valor, duplicatas=[("001", "2025-11-10", valor)],
+        email=f"cliente{i}@empresa.com.br"
+    )
+
+
+def esperar(condicao, limite: float = 15.0) -> bool:
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        if condicao():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def ambiente(tmp_path, monkeypatch):
+    """Pastas temporárias com 3 boletos (XML só dos 2 primeiros) e caches desligados"""
+    entrada = tmp_path / "Entrada"
+    destino = tmp_path / "Renomeados"
+    notas = tmp_path / "Notas"
+    auditoria = tmp_path / "Auditoria"
+    for pasta in (entrada, destino, notas, auditoria):
+        pasta.mkdir()
+
+    for i in range(3):
+        dados = cliente(i)
+        gerar_pdf(str(entrada / f"boleto_{i}.pdf"),
+                  [texto_boleto_capital(dados['numero'], dados['cnpj_fmt'], dados['nome'])])
+        if i != 2:
+            gerar_xml_cliente(notas, i)
+
+    monkeypatch.setattr(renomeacao, "PASTA_ENTRADA", str(entrada))
+    monkeypatch.setattr(renomeacao, "PASTA_DESTINO", str(destino))
+    monkeypatch.setattr(renomeacao, "PASTA_NOTAS", str(notas))
+    monkeypatch.setattr(renomeacao, "PASTA_AUDITORIA", str(auditoria))
+    monkeypatch.setattr(renomeacao, "ARQUIVO_LOG", str(auditoria / "log_erros.txt"))
+    monkeypatch.setattr(pdf_texto, "USAR_CACHE_TEXTO_PDF", False)
+    pdf_texto.definir_cache(None)
+    monkeypatch.setattr(cache_nfe, "USAR_CACHE_NFE", False)
+
+    return {'entrada': entrada, 'destino': destino, 'notas': notas}
+
+
+class TestVigiaPastas:
+    """
+    Suite de testes para o modo vigia
+
+    Testa:
+    - Debounce de arquivos pela metade
+    - Fontes de eventos (polling e inotify)
+    - Índice de NFe estendido com XMLs que chegam
+    - Índice de NFe reindexado no lugar com XMLs alterados
+    - Renomeação dos boletos que chegam na entrada
+    """
+
+    def test_pdf_pela_metade_espera(self, tmp_path):
+        """Teste: PDF sem %%EOF não sai; completo e estável por `espera` segundos sai"""
+        caminho = str(tmp_path / "boleto.pdf")
+        conteudo = open(gerar_pdf(caminho, ["BOLETO"]), 'rb').read()
+        with open(caminho, 'wb') as arquivo:
+            arquivo.write(conteudo[:len(conteudo) // 2])
+
+        estabilizador = Estabilizador(espera=2.0, espera_maxima=60.0)
+        estabilizador.observar([caminho], agora=0.0)
+        assert estabilizador.prontos(agora=0.0) == []
+        assert estabilizador.prontos(agora=5.0) == []       # estável, mas incompleto
+
+        with open(caminho, 'wb') as arquivo:
+            arquivo.write(conteudo)
+        assert estabilizador.prontos(agora=6.0) == []       # mudou: recomeça a espera
+        assert estabilizador.prontos(agora=7.5) == []
+        assert estabilizador.prontos(agora=8.0) == [caminho]
+        assert len(estabilizador) == 0
+
+    def test_incompleto_liberado_na_espera_maxima(self, tmp_path):
+        """Teste: arquivo que nunca fica completo sai depois da espera máxima"""
+        caminho = tmp_path / "truncado.xml"
+        caminho.write_bytes(b"<nfeProc><NFe>")
+
+        estabilizador = Estabilizador(espera=1.0, espera_maxima=10.0)
+        estabilizador.observar([str(caminho)], agora=0.0)
+        assert estabilizador.prontos(agora=5.0) == []
+        assert estabilizador.prontos(agora=10.0) == [str(caminho)]
+
+    def test_removido_sai_da_espera(self, tmp_path):
+        """Teste: arquivo apagado antes de ficar pronto é esquecido"""
+        caminho = tmp_path / "a.xml"
+        caminho.write_bytes(b"<a/>")
+        estabilizador = Estabilizador(espera=1.0)
+        estabilizador.observar([str(caminho)], agora=0.0)
+
+        caminho.unlink()
+
+        assert estabilizador.prontos(agora=5.0) == []
+        assert len(estabilizador) == 0
+
+    @pytest.mark.parametrize("backend", ["polling", "inotify"])
+    def test_fonte_enxerga_arquivos_novos(self, tmp_path, backend):
+        """Teste: arquivo novo e alterado aparecem; extensão não vigiada não"""
+        (tmp_path / "velho.pdf").write_bytes(b"1")
+        try:
+            fonte = criar_fonte([str(tmp_path)], backend)
+        except OSError:
+            pytest.skip("inotify indisponível")
+
+        try:
+            (tmp_path / "novo.pdf").write_bytes(b"%PDF")
+            (tmp_path / "velho.pdf").write_bytes(b"12")
+            (tmp_path / "leia-me.txt").write_bytes(b"x")
+
+            vistos = set()
+            fim = time.monotonic() + 5
+            while len(vistos) < 2 and time.monotonic() < fim:
+                vistos |= fonte.aguardar(0.05)
+        finally:
+            fonte.fechar()
+
+        assert vistos == {str(tmp_path / "novo.pdf"), str(tmp_path / "velho.pdf")}
+
+    def test_backend_auto_e_invalido(self, tmp_path):
+        """Teste: auto escolhe inotify quando ele funciona (senão polling); nome inválido é erro"""
+        try:
+            FonteInotify([str(tmp_path)]).fechar()
+            esperado = FonteInotify
+        except OSError:
+            esperado = FontePolling
+        fonte = criar_fonte([str(tmp_path)])
+        fonte.fechar()
+        assert isinstance(fonte, esperado)
+
+        with pytest.raises(ValueError):
+            criar_fonte([str(tmp_path)], "kqueue")
+
+    def test_indice_estendido_igual_ao_novo(self, tmp_path, monkeypatch):
+        """Teste: notas novas via estender() dão o mesmo índice que montar do zero"""
+        monkeypatch.setattr(indice_nfe, "_ultimo", None)
+        gerar_xml_cliente(tmp_path, 0)
+        mapa = indexar_xmls_por_nota(str(tmp_path), usar_cache=False, workers=1)
+        indice = obter_indice_nfe(mapa)
+        indice.motor_nomes()
+
+        for i in (1, 2):
+            chaves, substituidas = adicionar_xml_ao_mapa(mapa, gerar_xml_cliente(tmp_path, i))
+            assert chaves == [cliente(i)['numero']] and substituidas == []
+            assert atualizar_indice_nfe(mapa) is indice
+
+        novo = IndiceNFe(mapa)
+        novo.motor_nomes()
+        for atributo in ('entradas', 'por_cnpj', 'por_vencimento', 'por_parcela_unica',
+                         'por_duplicata', 'por_valor_total', '_nota_da_posicao', '_posicoes_da_nota'):
+            assert getattr(indice, atributo) == getattr(novo, atributo)
+        assert indice._motor_nomes.nomes == novo._motor_nomes.nomes
+        assert obter_indice_nfe(mapa) is indice
+
+    def test_xml_alterado_reindexa_no_lugar(self, tmp_path, monkeypatch):
+        """Teste: XML igual não muda nada; XML alterado reindexa só as suas chaves, no mesmo índice"""
+        monkeypatch.setattr(indice_nfe, "_ultimo", None)
+        for i in range(3):
+            gerar_xml_cliente(tmp_path, i)
+        gerar_xml_nfe(str(tmp_path / "3-1310103.xml"), "1310103", "CLIENTE LONGO LTDA",
+                      cnpj=cliente(0)['cnpj'], valor_total="50.00", duplicatas=[("001", "2025-11-10", "50.00")])
+        mapa = indexar_xmls_por_nota(str(tmp_path), usar_cache=False, workers=1)
+        indice = obter_indice_nfe(mapa)
+        indice.motor_nomes()
+
+        caminho = gerar_xml_cliente(tmp_path, 1)
+        assert adicionar_xml_ao_mapa(mapa, caminho) == ([], [])
+
+        # (alteração, registros a mais no mapa): nota substituída por inteiro cede a posição
+        alteracoes = [
+            # Mesmo XML com outro valor
+            (lambda: gerar_xml_cliente(tmp_path, 1, valor="999.00"), 0),
+            # Outro destinatário (CNPJ do cliente 0, que passa a ter duas notas com 0/1 duplicata)
+            (lambda: gerar_xml_nfe(caminho, cliente(1)['numero'], "CLIENTE NOVO SA", cnpj=cliente(0)['cnpj'],
+                                   valor_total="10.00", duplicatas=[("001", "2025-11-10", "10.00")]), 0),
+            # Nota de 6 dígitos que toma só a chave curta da nota longa
+            (lambda: gerar_xml_nfe(str(tmp_path / "3-0310103.xml"), "310103", "CLIENTE CURTO ME",
+                                   cnpj=cliente(2)['cnpj'], valor_total="1234.56",
+                                   duplicatas=[("001", "2025-11-10", "1234.56")]), 1),
+        ]
+        for alterar, registros_novos in alteracoes:
+            registros = len(mapa.registros)
+            chaves, substituidas = adicionar_xml_ao_mapa(mapa, alterar())
+            assert chaves and substituidas == chaves
+            assert atualizar_indice_nfe(mapa, substituidas) is indice
+
+            novo = IndiceNFe(mapa)
+            novo.motor_nomes()
+            for atributo in ('entradas', 'por_cnpj', 'por_vencimento', 'por_parcela_unica',
+                             'por_duplicata', 'por_valor_total', '_nota_da_posicao', '_posicoes_da_nota'):
+                assert getattr(indice, atributo) == getattr(novo, atributo), atributo
+            assert indice._motor_nomes.nomes == novo._motor_nomes.nomes
+            assert indice._motor_nomes.por_trigrama == novo._motor_nomes.por_trigrama
+            assert len(mapa.registros) == registros + registros_novos
+        assert [nota.nome for nota in mapa.notas()] == [
+            "CLIENTE 0 LTDA", "CLIENTE NOVO SA", "CLIENTE 2 LTDA", "CLIENTE LONGO LTDA", "CLIENTE CURTO ME"]
+
+    def test_vigia_renomeia_o_que_chega(self, ambiente, capsys):
+        """Teste: boletos com nota renomeados; o sem nota sai quando o XML chega"""
+        vigia = threading.Thread(target=renomeacao.vigiar_pastas, kwargs={
+            'intervalo': 0.02, 'espera': 0.05, 'backend': 'polling', 'ciclos': 150,
+        })
+        vigia.start()
+        try:
+            assert esperar(lambda: len(os.listdir(ambiente['destino'])) == 2)
+            assert os.listdir(ambiente['entrada']) == ["boleto_2.pdf"]
+
+            # Nota do boleto_2 chega depois do boleto
+            gerar_xml_cliente(ambiente['notas'], 2)
+            assert esperar(lambda: not os.listdir(ambiente['entrada']))
+
+            # Boleto e nota chegando juntos
+            dados = cliente(3)
+            gerar_xml_cliente(ambiente['notas'], 3)
+            gerar_pdf(str(ambiente['entrada'] / "boleto_novo.pdf"),
+                      [texto_boleto_capital(dados['numero'], dados['cnpj_fmt'], dados['nome'])])
+            assert esperar(lambda: not os.listdir(ambiente['entrada']))
+        finally:
+            vigia.join()
+
+        saida = capsys.readouterr().out
+        renomeados = sorted(os.listdir(ambiente['destino']))
+        assert [nome.split(" - ")[1] for nome in renomeados] == \
+            ["NF 310100", "NF 310101", "NF 310102", "NF 310103"]
+        assert "[VIGIA-XML] 3-0310102.xml -> NF 310102" in saida
+        assert "[VIGIA] Encerrado: 4 boletos renomeados, 0 aguardando nota, 4 notas em memoria" in saida
@@ -0,0 +1,471 @@
+"""
+================================================================================
+transporte_email.py - Transporte de E-mail (Outlook, SMTP ou arquivos .eml)
+================================================================================
+
+O envio abria o Outlook (win32.Dispatch) e percorria todas as contas a
+cada e-mail, e o EnvioBoleto importava o win32com no topo: no servidor
+Linux o envio nem chegava a ser importado.
+
+Aqui o envio passa por um TRANSPORTE, aberto uma vez por execução:
+
+- TransporteOutlook: o Outlook e a conta de cobrança são localizados UMA
+  vez (na primeira mensagem); o win32com só é importado nesse momento
+- TransporteSMTP: uma conexão (com login) reaproveitada por todas as
+  mensagens; se o servidor derrubar a conexão, reconecta e tenta de novo
+  a mesma mensagem uma vez. Opcionalmente renova a conexão a cada N
+  mensagens (servidores que limitam mensagens por sessão)
+- TransporteArquivoEML: não envia; grava cada mensagem como .eml na pasta
+  da execução, com os tempos de montagem e gravação (envio a seco no
+  Linux e benchmark do caminho de envio inteiro)
+
+As mensagens são montadas uma vez (MensagemEmail) e, no SMTP, viram um
+MIME multipart/related com a assinatura inline (cid:assinatura_jotajota)
+e os anexos (montar_mensagem_mime).
+
+Uso:
+    with criar_transporte() as transporte:      # TRANSPORTE_EMAIL do config
+        transporte.enviar(MensagemEmail(para=[...], cc=[...], assunto=..., corpo_html=...,
+                                        anexos=[...], imagem_inline=ASSINATURA_IMG))
+
+Autor: Sistema de Boletos v7.1
+Data: 2026-10-17
+================================================================================
+"""
+
+import os
+import re
+import csv
+import time
+import smtplib
+import threading
+import mimetypes
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from email.message import EmailMessage
+from email.policy import SMTP as POLITICA_SMTP
+from email.utils import formatdate, make_msgid
+from typing import List, Optional
+
+# Content-ID da assinatura usado no HTML (<img src="cid:assinatura_jotajota">)
+CID_ASSINATURA = "assinatura_jotajota"
+
+# Propriedade MAPI do Content-ID de um anexo (Outlook)
+PROPRIEDADE_CONTENT_ID = "http://schemas.microsoft.com/mapi/proptag/0x3712001F"
+
+TRANSPORTE_OUTLOOK = "outlook"
+TRANSPORTE_SMTP = "smtp"
+TRANSPORTE_ARQUIVO = "arquivo"
+
+
+class ErroTransporte(Exception):
+    """Falha do transporte que não é de uma mensagem específica (conta, conexão, login)."""
+
+
+@dataclass(slots=True)
+class MensagemEmail:
+    """E-mail pronto para envio (o mesmo para qualquer transporte)."""
+
+    para: List[str]
+    assunto: str
+    corpo_html: str
+    cc: List[str] = field(default_factory=list)
+    anexos: List[str] = field(default_factory=list)
+    imagem_inline: Optional[str] = None  # imagem referenciada como cid:CID_ASSINATURA
+    fidc: str = ""
+
+
+def separar_emails(emails: str) -> List[str]:
+    """'a@x.com; b@y.com' -> ['a@x.com', 'b@y.com']"""
+    return [email.strip() for email in emails.replace(',', ';').split(';') if email.strip()]
+
+
+def conferir_anexos(anexos: List[str]) -> None:
+    """FileNotFoundError no primeiro anexo que não existe (nada é enviado pela metade)."""
+    for anexo in anexos:
+        if not os.path.exists(anexo):
+            print(f"      [ERRO] Arquivo não encontrado: {anexo}")
+            raise FileNotFoundError(f"Arquivo não encontrado: {anexo}")
+
+
+def montar_mensagem_mime(mensagem: MensagemEmail, remetente: str) -> EmailMessage:
+    """
+    Mensagem RFC 5322: HTML + assinatura inline (Content-ID) + anexos.
+
+    Args:
+        mensagem: E-mail a montar
+        remetente: Endereço do From
+
+    Raises:
+        FileNotFoundError: anexo ou imagem inline inexistente
+    """
+    conferir_anexos(mensagem.anexos)
+
+    mime = EmailMessage()
+    mime['From'] = remetente
+    mime['To'] = ', '.join(mensagem.para)
+    if mensagem.cc:
+        mime['Cc'] = ', '.join(mensagem.cc)
+    mime['Subject'] = mensagem.assunto
+    mime['Date'] = formatdate(localtime=True)
+    mime['Message-ID'] = make_msgid(domain=remetente.rpartition('@')[2] or None)
+
+    mime.set_content("Este e-mail precisa de um leitor com suporte a HTML.")
+    mime.add_alternative(mensagem.corpo_html, subtype='html')
+
+    if mensagem.imagem_inline:
+        with open(mensagem.imagem_inline, 'rb') as arquivo:
+            imagem = arquivo.read()
+        tipo, subtipo = (mimetypes.guess_type(mensagem.imagem_inline)[0] or 'image/jpeg').split('/')
+        # Parte HTML fica multipart/related com a imagem referenciada pelo cid
+        html = mime.get_payload()[1]
+        html.add_related(imagem, maintype=tipo, subtype=subtipo, cid=f"<{CID_ASSINATURA}>",
+                         filename=os.path.basename(mensagem.imagem_inline), disposition='inline')
+
+    for anexo in mensagem.anexos:
+        tipo = mimetypes.guess_type(anexo)[0] or 'application/octet-stream'
+        maintype, subtype = tipo.split('/')
+        with open(anexo, 'rb') as arquivo:
+            mime.add_attachment(arquivo.read(), maintype=maintype, subtype=subtype,
+                                filename=os.path.basename(anexo))
+    return mime
+
+
+# ==================== TRANSPORTES ====================
+
+class TransporteEmail(ABC):
+    """
+    Interface dos transportes: abrir() uma vez, enviar() por mensagem,
+    fechar() no fim. enviar() abre sozinho se preciso; como gerenciador
+    de contexto, fecha ao sair.
+    """
+
+    nome = "base"
+    conexoes_simultaneas = True  # False = um envio por vez (caixa_saida.Despachante)
+
+    def __init__(self):
+        self.aberto = False
+        self.enviadas = 0
+
+    def abrir(self) -> None:
+        self.aberto = True
+
+    def enviar(self, mensagem: MensagemEmail) -> None:
+        if not self.aberto:
+            self.abrir()
+        self._enviar(mensagem)
+        self.enviadas += 1
+
+    @abstractmethod
+    def _enviar(self, mensagem: MensagemEmail) -> None:
+        """Entrega uma mensagem (o transporte já está aberto)."""
+        pass
+
+    def fechar(self) -> None:
+        self.aberto = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+    def __repr__(self):
+        return f"<{type(self).__name__} enviadas={self.enviadas}>"
+
+
+class TransporteOutlook(TransporteEmail):
+    """
+    Outlook via COM (Windows). A sessão e a conta de cobrança são
+    localizadas na primeira mensagem e reaproveitadas.
+
+    Args:
+        conta: SMTP da conta que envia (EMAIL_CONTA_COBRANCA)
+        preview: True = mail.Display() (abre para revisão, não envia)
+        pasta_log: Onde gravar log_falha_conta.txt se a conta não existir
+    """
+
+    nome = TRANSPORTE_OUTLOOK
+    conexoes_simultaneas = False  # COM: uma sessão, na thread que a abriu
+
+    def __init__(self, conta: str, preview: bool = False, pasta_log: Optional[str] = None):
+        super().__init__()
+        self.conta = conta
+        self.preview = preview
+        self.pasta_log = pasta_log
+        self._outlook = None
+        self._conta_cobranca = None
+        self._erro_abertura = None
+
+    def abrir(self) -> None:
+        if self._erro_abertura:
+            raise ErroTransporte(self._erro_abertura)
+
+        import win32com.client as win32  # só existe no Windows com pywin32
+
+        outlook = win32.Dispatch("Outlook.Application")
+
+        # Verificação de segurança — garante conta de cobrança
+        for acc in outlook.Session.Accounts:
+            if acc.SmtpAddress.lower() == self.conta.lower():
+                self._conta_cobranca = acc
+                break
+
+        if self._conta_cobranca is None:
+            self._erro_abertura = f"Conta {self.conta} não encontrada no Outlook — envio abortado"
+            print(f"[ERRO] ERRO: {self._erro_abertura}.")
+            if self.pasta_log:
+                with open(os.path.join(self.pasta_log, "log_falha_conta.txt"), "w", encoding="utf-8") as f:
+                    f.write(f"[{datetime.now()}] Conta cobrança não localizada. Envio abortado.\n")
+            raise ErroTransporte(self._erro_abertura)
+
+        self._outlook = outlook
+        super().abrir()
+
+    def _enviar(self, mensagem: MensagemEmail) -> None:
+        mail = self._outlook.CreateItem(0)
+        mail._oleobj_.Invoke(*(64209, 0, 8, 0, self._conta_cobranca))  # SendUsingAccount
+
+        mail.To = "; ".join(mensagem.para)
+        mail.CC = "; ".join(mensagem.cc)
+        mail.Subject = mensagem.assunto
+
+        # corpo + imagem inline
+        mail.HTMLBody = mensagem.corpo_html
+        if mensagem.imagem_inline:
+            attach = mail.Attachments.Add(mensagem.imagem_inline)
+            attach.PropertyAccessor.SetProperty(PROPRIEDADE_CONTENT_ID, CID_ASSINATURA)
+
+        # outros anexos
+        for anexo in mensagem.anexos:
+            try:
+                conferir_anexos([anexo])
+                mail.Attachments.Add(anexo)
+            except Exception as e:
+                print(f"      [ERRO] Falha ao anexar {os.path.basename(anexo)}: {e}")
+                raise
+
+        if self.preview:
+            mail.Display()  # Abre no Outlook para revisão (não envia)
+        else:
+            mail.Send()
+
+    def fechar(self) -> None:
+        self._outlook = None
+        self._conta_cobranca = None
+        super().fechar()
+
+
+class TransporteSMTP(TransporteEmail):
+    """
+    SMTP com uma conexão reaproveitada entre mensagens.
+
+    Args:
+        host / porta: Servidor SMTP
+        remetente: From das mensagens
+        usuario / senha: Login (None = servidor sem autenticação)
+        seguranca: "starttls", "ssl" ou "nenhuma"
+        timeout: Segundos por operação de rede
+        mensagens_por_conexao: Renova a conexão a cada N mensagens (0 = nunca)
+    """
+
+    nome = TRANSPORTE_SMTP
+
+    def __init__(self, host: str, porta: int, remetente: str, usuario: Optional[str] = None,
+                 senha: Optional[str] = None, seguranca: str = "starttls", timeout: float = 30.0,
+                 mensagens_por_conexao: int = 0):
+        super().__init__()
+        if seguranca not in ("starttls", "ssl", "nenhuma"):
+            raise ValueError(f"Segurança SMTP desconhecida: {seguranca}")
+        self.host = host
+        self.porta = porta
+        self.remetente = remetente
+        self.usuario = usuario
+        self.senha = senha
+        self.seguranca = seguranca
+        self.timeout = timeout
+        self.mensagens_por_conexao = mensagens_por_conexao
+        self.conexoes = 0
+        self._smtp = None
+        self._na_conexao = 0
+
+    def abrir(self) -> None:
+        try:
+            if self.seguranca == "ssl":
+                smtp = smtplib.SMTP_SSL(self.host, self.porta, timeout=self.timeout)
+            else:
+                smtp = smtplib.SMTP(self.host, self.porta, timeout=self.timeout)
+                if self.seguranca == "starttls":
+                    smtp.starttls()
+            if self.usuario:
+                smtp.login(self.usuario, self.senha or "")
+        except (OSError, smtplib.SMTPException) as e:
+            raise ErroTransporte(f"SMTP {self.host}:{self.porta}: {e}") from e
+
+        self._smtp = smtp
+        self._na_conexao = 0
+        self.conexoes += 1
+        super().abrir()
+
+    def _enviar(self, mensagem: MensagemEmail) -> None:
+        mime = montar_mensagem_mime(mensagem, self.remetente)
+        destinatarios = mensagem.para + mensagem.cc
+
+        if self.mensagens_por_conexao and self._na_conexao >= self.mensagens_por_conexao:
+            self._desconectar()
+            self.abrir()
+
+        try:
+            self._smtp.send_message(mime, self.remetente, destinatarios)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # Conexão ociosa derrubada pelo servidor: reconecta e tenta de novo uma vez
+            self._desconectar()
+            self.abrir()
+            self._smtp.send_message(mime, self.remetente, destinatarios)
+        self._na_conexao += 1
+
+    def _desconectar(self) -> None:
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (OSError, smtplib.SMTPException):
+                self._smtp.close()
+            self._smtp = None
+        self.aberto = False
+
+    def fechar(self) -> None:
+        self._desconectar()
+        super().fechar()
+
+    def __repr__(self):
+        return (f"<TransporteSMTP {self.host}:{self.porta} conexoes={self.conexoes} "
+                f"enviadas={self.enviadas}>")
+
+
+@dataclass(slots=True)
+class TempoEML:
+    """Uma mensagem gravada pelo TransporteArquivoEML."""
+
+    arquivo: str
+    assunto: str
+    anexos: int
+    tamanho: int          # bytes do .eml
+    renderizacao: float   # s montando e serializando o MIME
+    escrita: float        # s gravando no disco
+
+
+class TransporteArquivoEML(TransporteEmail):
+    """
+    Envio a seco: cada mensagem vira um .eml (RFC 5322, a mesma montagem
+    do SMTP - assinatura inline por Content-ID e anexos) na pasta da
+    execução, e uma linha em mensagens.csv com tamanho e tempos.
+
+    O MODO_PREVIEW depende do Outlook; este roda em qualquer sistema.
+    Vários transportes (um por worker) podem gravar na mesma pasta.
+
+    Args:
+        pasta: Pasta da execução (criada se preciso)
+        remetente: From das mensagens
+    """
+
+    nome = TRANSPORTE_ARQUIVO
+    ARQUIVO_TEMPOS = "mensagens.csv"
+
+    _trava = threading.Lock()
+    _numeracao = {}  # pasta -> último número de .eml usado
+
+    def __init__(self, pasta: str, remetente: str):
+        super().__init__()
+        self.pasta = pasta
+        self.remetente = remetente
+        self.tempos: List[TempoEML] = []
+
+    def abrir(self) -> None:
+        os.makedirs(self.pasta, exist_ok=True)
+        super().abrir()
+
+    def _enviar(self, mensagem: MensagemEmail) -> None:
+        inicio = time.perf_counter()
+        conteudo = montar_mensagem_mime(mensagem, self.remetente).as_bytes(policy=POLITICA_SMTP)  # CRLF
+        renderizado = time.perf_counter()
+
+        caminho = os.path.join(self.pasta, f"{self._proximo_numero():05d} - {_nome_arquivo(mensagem.assunto)}.eml")
+        with open(caminho, 'wb') as arquivo:
+            arquivo.write(conteudo)
+
+        tempo = TempoEML(os.path.basename(caminho), mensagem.assunto, len(mensagem.anexos), len(conteudo),
+                         renderizado - inicio, time.perf_counter() - renderizado)
+        self.tempos.append(tempo)
+        self._registrar(tempo)
+
+    def _proximo_numero(self) -> int:
+        with self._trava:
+            if self.pasta not in self._numeracao:
+                # Pasta reaproveitada: continua depois dos .eml que já estão lá
+                self._numeracao[self.pasta] = sum(1 for f in os.listdir(self.pasta) if f.endswith(".eml"))
+            self._numeracao[self.pasta] += 1
+            return self._numeracao[self.pasta]
+
+    def _registrar(self, tempo: TempoEML) -> None:
+        caminho = os.path.join(self.pasta, self.ARQUIVO_TEMPOS)
+        with self._trava:
+            novo = not os.path.exists(caminho)
+            with open(caminho, 'a', newline='', encoding='utf-8') as arquivo:
+                escritor = csv.writer(arquivo, delimiter=';')  # abre direto no Excel pt-BR
+                if novo:
+                    escritor.writerow(["arquivo", "assunto", "anexos", "bytes", "renderizacao_ms", "escrita_ms"])
+                escritor.writerow([tempo.arquivo, tempo.assunto, tempo.anexos, tempo.tamanho,
+                                   f"{tempo.renderizacao * 1000:.3f}", f"{tempo.escrita * 1000:.3f}"])
+
+    def __repr__(self):
+        return f"<TransporteArquivoEML {self.pasta} enviadas={self.enviadas}>"
+
+
+def _nome_arquivo(texto: str) -> str:
+    """Trecho seguro para nome de arquivo (assunto do e-mail)."""
+    return re.sub(r'[^\w\-(), ]+', '_', texto).strip()[:80] or "mensagem"
+
+
+def ler_tempos_eml(pasta: str) -> List[TempoEML]:
+    """Lê o mensagens.csv de uma pasta do TransporteArquivoEML."""
+    with open(os.path.join(pasta, TransporteArquivoEML.ARQUIVO_TEMPOS), newline='', encoding='utf-8') as arquivo:
+        return [TempoEML(linha['arquivo'], linha['assunto'], int(linha['anexos']), int(linha['bytes']),
+                         float(linha['renderizacao_ms']) / 1000, float(linha['escrita_ms']) / 1000)
+                for linha in csv.DictReader(arquivo, delimiter=';')]
+
+
+def criar_transporte(nome: Optional[str] = None, preview: Optional[bool] = None,
+                     pasta: Optional[str] = None) -> TransporteEmail:
+    """
+    Transporte configurado no config_server.py.
+
+    Args:
+        nome: "outlook", "smtp" ou "arquivo" (None = TRANSPORTE_EMAIL)
+        preview: Só Outlook: abrir sem enviar (None = MODO_PREVIEW)
+        pasta: Só arquivo: pasta da execução (None = PASTA_EML/<data_hora>)
+    """
+    import config_server as config
+
+    nome = nome or config.TRANSPORTE_EMAIL
+    if nome == TRANSPORTE_OUTLOOK:
+        return TransporteOutlook(
+            config.EMAIL_CONTA_COBRANCA,
+            preview=config.MODO_PREVIEW if preview is None else preview,
+            pasta_log=config.PASTA_AUDITORIA,
+        )
+    if nome == TRANSPORTE_SMTP:
+        return TransporteSMTP(
+            config.SMTP_HOST, config.SMTP_PORTA, config.EMAIL_CONTA_COBRANCA,
+            usuario=config.SMTP_USUARIO or None,
+            senha=os.environ.get("SMTP_SENHA", config.SMTP_SENHA),
+            seguranca=config.SMTP_SEGURANCA,
+            timeout=config.SMTP_TIMEOUT_SEGUNDOS,
+            mensagens_por_conexao=config.SMTP_MENSAGENS_POR_CONEXAO,
+        )
+    if nome == TRANSPORTE_ARQUIVO:
+        return TransporteArquivoEML(
+            pasta or os.path.join(config.PASTA_EML, datetime.now().strftime("%Y%m%d_%H%M%S")),
+            config.EMAIL_CONTA_COBRANCA,
+        )
+    raise ValueError(f"Transporte de e-mail desconhecido: {nome}")
@@ -0,0 +1,104 @@
+"""
+================================================================================
+validacao_notas.py - CNPJ e Valor das Notas Anexadas (XML primeiro)
+================================================================================
+
+Na validação das notas anexadas ao e-mail, cada PDF de nota era aberto
+duas vezes: uma para achar o CNPJ e outra para achar o valor total. Só
+que, quando o XML da nota está no mapa de XMLs, o CPF/CNPJ do
+destinatário e o vNF já vêm de lá (e são a fonte confiável). Aqui:
+
+- nota com XML válido no mapa -> CPF/CNPJ e valor total do XML (origem "XML")
+- sem XML -> UMA leitura do PDF para os dois campos (origem "PDF"),
+  memorizada pelo SHA-256 do arquivo (o mesmo PDF em outro grupo de
+  e-mail, ou com outro nome, não é lido de novo)
+
+A leitura do PDF em si (texto, IA, regex) continua no EnvioBoleto e é
+passada como função: ler_pdf(caminho) -> (cnpj, valor_cents).
+
+Uso:
+    validador = ValidadorNotas(mapa_xmls, ler_dados_nota_pdf)
+    dados = validador.dados_da_nota("310227", caminho_pdf)
+    dados.cnpj, dados.valor_cents, dados.origem
+
+Autor: Sistema de Boletos v7.1
+Data: 2026-10-17
+================================================================================
+"""
+
+from dataclasses import dataclass
+
+from cache_pdf import calcular_sha256
+from registro_nfe import para_centavos
+
+ORIGEM_XML = "XML"
+ORIGEM_PDF = "PDF"
+
+
+@dataclass(slots=True)
+class DadosNota:
+    """CPF/CNPJ e valor total de uma nota, com a fonte de onde vieram."""
+
+    cnpj: str | None
+    valor_cents: int | None
+    origem: str
+
+
+def dados_do_xml(dados_xml) -> DadosNota | None:
+    """
+    Dados da nota a partir do XML indexado (NFeRecord ou dicionário).
+
+    Returns:
+        DadosNota com origem XML, ou None se o XML for inválido ou não
+        tiver CPF/CNPJ (nesse caso vale o PDF)
+    """
+    if not dados_xml or not dados_xml.get('xml_valido'):
+        return None
+    cnpj = dados_xml.get('cpf_cnpj')
+    if not cnpj:
+        return None
+    return DadosNota(cnpj, para_centavos(dados_xml.get('valor_total')) or None, ORIGEM_XML)
+
+
+class ValidadorNotas:
+    """
+    Fonte dos dados das notas anexadas: XML do mapa, senão PDF (uma leitura).
+
+    Args:
+        mapa_xmls: Mapa {número da nota: dados do XML} (MapaNFe ou dict)
+        ler_pdf: Função caminho -> (cnpj, valor_cents) que lê o PDF da nota
+    """
+
+    def __init__(self, mapa_xmls, ler_pdf):
+        self.mapa_xmls = mapa_xmls if mapa_xmls is not None else {}
+        self.ler_pdf = ler_pdf
+        self._por_hash = {}         # SHA-256 do PDF -> DadosNota
+        self.consultas_xml = 0
+        self.leituras_pdf = 0
+
+    def dados_da_nota(self, numero_nota: str, caminho_pdf: str) -> DadosNota:
+        """CPF/CNPJ e valor da nota: do XML se houver, senão do PDF."""
+        dados = dados_do_xml(self.mapa_xmls.get(numero_nota))
+        if dados is not None:
+            self.consultas_xml += 1
+            return dados
+        return self._dados_do_pdf(caminho_pdf)
+
+    def _dados_do_pdf(self, caminho_pdf: str) -> DadosNota:
+        try:
+            chave = calcular_sha256(caminho_pdf)
+        except OSError:
+            chave = None
+
+        if chave is not None and chave in self._por_hash:
+            return self._por_hash[chave]
+
+        cnpj, valor_cents = self.ler_pdf(caminho_pdf)
+        self.leituras_pdf += 1
+        dados = DadosNota(cnpj, valor_cents, ORIGEM_PDF)
+        if chave is not None:
+            self._por_hash[chave] = dados
+        return dados
+
+    def __repr__(self):
+        return f"<ValidadorNotas xml={self.consultas_xml} pdf={self.leituras_pdf}>"
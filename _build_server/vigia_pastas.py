@@ -0,0 +1,368 @@
+"""
+================================================================================
+vigia_pastas.py - Vigia de Pastas (Entrada de Boletos e Notas)
+================================================================================
+
+A renomeação roda por clique: cada execução relê todos os XMLs e a pasta
+de entrada inteira. No modo vigia (RenomeaçãoBoletos.py --vigiar) o
+processo fica no ar, o mapa/índice de NFe continua em memória e cada
+arquivo novo é tratado segundos depois de chegar.
+
+Este módulo só descobre QUAIS arquivos estão prontos:
+
+- Fonte de eventos: inotify no Linux (ctypes, sem dependência externa);
+  nos outros sistemas, ou se o inotify falhar, polling com os.scandir
+  comparando tamanho e data de modificação a cada intervalo
+- Estabilizador (debounce): um arquivo só fica pronto depois de passar
+  `espera` segundos sem mudar de tamanho nem de data, de abrir para
+  leitura (no Windows a cópia em andamento trava o arquivo) e, para
+  PDF/XML, de terminar como um arquivo completo (%%EOF / '>'). Um
+  arquivo que nunca fica completo é liberado depois de `espera_maxima`
+  (o erro de leitura sai no log normal da renomeação)
+
+O que fazer com cada arquivo pronto fica com quem chama (ver
+RenomeaçãoBoletos.vigiar_pastas).
+
+Uso:
+    vigia = VigiaPastas([PASTA_ENTRADA, PASTA_NOTAS], espera=2.0, intervalo=1.0)
+    vigia.iniciar()                 # arquivos que já estavam nas pastas
+    while True:
+        for caminho in vigia.ciclo():
+            ...
+
+Autor: Sistema de Boletos v7.1
+Data: 2026-10-17
+================================================================================
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+from typing import Dict, Iterable, List, Optional, Set
+
+EXTENSOES_VIGIADAS = ('.pdf', '.xml')
+
+BACKEND_AUTO = "auto"
+BACKEND_INOTIFY = "inotify"
+BACKEND_POLLING = "polling"
+
+# Quanto do fim do arquivo é lido para saber se ele está completo
+TAMANHO_CAUDA = 1024
+
+
+def _vigiado(nome: str, extensoes: tuple) -> bool:
+    return nome.lower().endswith(extensoes)
+
+
+def listar_arquivos(pastas: Iterable[str], extensoes: tuple = EXTENSOES_VIGIADAS) -> Dict[str, tuple]:
+    """
+    Arquivos vigiados das pastas com (tamanho, mtime_ns).
+
+    Pastas que não existem são ignoradas.
+    """
+    arquivos = {}
+    for pasta in pastas:
+        try:
+            entradas = os.scandir(pasta)
+        except OSError:
+            continue
+        with entradas:
+            for entrada in entradas:
+                if not _vigiado(entrada.name, extensoes):
+                    continue
+                try:
+                    info = entrada.stat()
+                except OSError:
+                    continue  # removido entre o scandir e o stat
+                if entrada.is_file():
+                    arquivos[entrada.path] = (info.st_size, info.st_mtime_ns)
+    return arquivos
+
+
+# ==================== FONTES DE EVENTOS ====================
+
+class FontePolling:
+    """
+    Compara a listagem das pastas a cada chamada (funciona em qualquer
+    sistema, inclusive pastas de rede).
+
+    Args:
+        pastas: Pastas vigiadas (não recursivo)
+        extensoes: Extensões que interessam
+    """
+
+    nome = BACKEND_POLLING
+
+    def __init__(self, pastas: Iterable[str], extensoes: tuple = EXTENSOES_VIGIADAS):
+        self.pastas = list(pastas)
+        self.extensoes = extensoes
+        self._anterior = listar_arquivos(self.pastas, extensoes)
+
+    def aguardar(self, timeout: float) -> Set[str]:
+        """Espera `timeout` segundos e devolve os arquivos novos ou alterados."""
+        if timeout > 0:
+            time.sleep(timeout)
+        atual = listar_arquivos(self.pastas, self.extensoes)
+        alterados = {caminho for caminho, assinatura in atual.items()
+                     if self._anterior.get(caminho) != assinatura}
+        self._anterior = atual
+        return alterados
+
+    def fechar(self) -> None:
+        pass
+
+
+class FonteInotify:
+    """
+    Eventos do kernel (Linux) via inotify, chamado com ctypes.
+
+    Args:
+        pastas: Pastas vigiadas (não recursivo)
+        extensoes: Extensões que interessam
+
+    Raises:
+        OSError: inotify indisponível (outro sistema, limite de watches...)
+    """
+
+    nome = BACKEND_INOTIFY
+
+    # Valores de <sys/inotify.h>
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    MASCARA = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    _EVENTO = struct.Struct('iIII')  # wd, mask, cookie, len (+ nome)
+
+    def __init__(self, pastas: Iterable[str], extensoes: tuple = EXTENSOES_VIGIADAS):
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, "inotify só existe no Linux")
+
+        self.pastas = list(pastas)
+        self.extensoes = extensoes
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            numero = ctypes.get_errno()
+            raise OSError(numero, f"inotify_init1: {os.strerror(numero)}")
+
+        self._pasta_do_watch = {}  # wd -> pasta
+        try:
+            for pasta in self.pastas:
+                if not os.path.isdir(pasta):
+                    continue
+                wd = libc.inotify_add_watch(self._fd, os.fsencode(pasta), self.MASCARA)
+                if wd < 0:
+                    numero = ctypes.get_errno()
+                    raise OSError(numero, f"inotify_add_watch({pasta}): {os.strerror(numero)}")
+                self._pasta_do_watch[wd] = pasta
+        except OSError:
+            os.close(self._fd)
+            raise
+
+    def aguardar(self, timeout: float) -> Set[str]:
+        """Espera até `timeout` segundos por eventos e devolve os arquivos tocados."""
+        prontos, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not prontos:
+            return set()
+
+        tocados = set()
+        while True:
+            try:
+                dados = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            deslocamento = 0
+            while deslocamento < len(dados):
+                wd, mascara, _, tamanho = self._EVENTO.unpack_from(dados, deslocamento)
+                inicio_nome = deslocamento + self._EVENTO.size
+                nome = os.fsdecode(dados[inicio_nome:inicio_nome + tamanho].rstrip(b'\0'))
+                deslocamento = inicio_nome + tamanho
+
+                if mascara & self.IN_Q_OVERFLOW:
+                    # Fila do kernel estourou: relista tudo
+                    tocados.update(listar_arquivos(self.pastas, self.extensoes))
+                elif nome and wd in self._pasta_do_watch and _vigiado(nome, self.extensoes):
+                    tocados.add(os.path.join(self._pasta_do_watch[wd], nome))
+        return tocados
+
+    def fechar(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def criar_fonte(pastas: Iterable[str], backend: str = BACKEND_AUTO,
+                extensoes: tuple = EXTENSOES_VIGIADAS):
+    """
+    Fonte de eventos das pastas.
+
+    Args:
+        backend: "auto" (inotify no Linux, senão polling), "inotify" ou "polling"
+
+    Raises:
+        OSError: backend "inotify" pedido explicitamente e indisponível
+    """
+    pastas = list(pastas)
+    if backend == BACKEND_POLLING:
+        return FontePolling(pastas, extensoes)
+    if backend == BACKEND_INOTIFY:
+        return FonteInotify(pastas, extensoes)
+    if backend != BACKEND_AUTO:
+        raise ValueError(f"Backend de vigia desconhecido: {backend}")
+
+    try:
+        return FonteInotify(pastas, extensoes)
+    except (OSError, AttributeError) as e:
+        # AttributeError: libc sem inotify_init1
+        if sys.platform.startswith('linux'):
+            print(f"[VIGIA] inotify indisponível ({e}); usando polling")
+        return FontePolling(pastas, extensoes)
+
+
+# ==================== ESTABILIZADOR (DEBOUNCE) ====================
+
+def arquivo_completo(caminho: str) -> bool:
+    """
+    True se o arquivo abre para leitura e termina como um arquivo inteiro
+    (PDF com %%EOF no fim, XML fechando com '>'; outros tipos: só abrir).
+    """
+    try:
+        with open(caminho, 'rb') as arquivo:
+            arquivo.seek(0, os.SEEK_END)
+            tamanho = arquivo.tell()
+            arquivo.seek(max(0, tamanho - TAMANHO_CAUDA))
+            cauda = arquivo.read()
+    except OSError:
+        return False  # removido ou ainda travado pela cópia
+
+    nome = caminho.lower()
+    if nome.endswith('.pdf'):
+        return b'%%EOF' in cauda
+    if nome.endswith('.xml'):
+        return cauda.rstrip().endswith(b'>')
+    return True
+
+
+class Estabilizador:
+    """
+    Segura os arquivos até a cópia terminar.
+
+    Args:
+        espera: Segundos sem mudar de tamanho/data para o arquivo ficar pronto
+        espera_maxima: Segundos (desde que foi visto) para liberar um
+                       arquivo estável que não passou em arquivo_completo()
+    """
+
+    def __init__(self, espera: float, espera_maxima: Optional[float] = None):
+        self.espera = espera
+        self.espera_maxima = espera_maxima if espera_maxima is not None else max(30.0, espera * 10)
+        # caminho -> [assinatura (tamanho, mtime_ns), estável desde, visto em]
+        self.pendentes: Dict[str, list] = {}
+
+    def observar(self, caminhos: Iterable[str], agora: Optional[float] = None) -> None:
+        """Acrescenta arquivos novos/alterados (os já pendentes continuam na espera)."""
+        agora = time.monotonic() if agora is None else agora
+        for caminho in caminhos:
+            if caminho not in self.pendentes:
+                self.pendentes[caminho] = [None, agora, agora]
+
+    def prontos(self, agora: Optional[float] = None) -> List[str]:
+        """
+        Arquivos que ficaram estáveis (e saem da lista de pendentes).
+
+        Returns:
+            Caminhos prontos, em ordem alfabética
+        """
+        agora = time.monotonic() if agora is None else agora
+        prontos = []
+        for caminho, estado in list(self.pendentes.items()):
+            try:
+                info = os.stat(caminho)
+            except OSError:
+                del self.pendentes[caminho]  # removido/movido antes de ficar pronto
+                continue
+
+            assinatura = (info.st_size, info.st_mtime_ns)
+            if assinatura != estado[0]:
+                estado[0], estado[1] = assinatura, agora
+            if info.st_size == 0 or agora - estado[1] < self.espera:
+                continue
+            if arquivo_completo(caminho) or agora - estado[2] >= self.espera_maxima:
+                prontos.append(caminho)
+                del self.pendentes[caminho]
+        return sorted(prontos)
+
+    def __len__(self):
+        return len(self.pendentes)
+
+
+# ==================== VIGIA ====================
+
+class VigiaPastas:
+    """
+    Fonte de eventos + estabilizador: devolve, a cada ciclo, os arquivos
+    das pastas que terminaram de chegar.
+
+    Args:
+        pastas: Pastas vigiadas (não recursivo)
+        espera: Debounce em segundos (ver Estabilizador)
+        intervalo: Espera máxima por eventos em cada ciclo (e período do polling)
+        backend: "auto", "inotify" ou "polling"
+        extensoes: Extensões vigiadas
+    """
+
+    def __init__(self, pastas: Iterable[str], espera: float = 2.0, intervalo: float = 1.0,
+                 backend: str = BACKEND_AUTO, extensoes: tuple = EXTENSOES_VIGIADAS):
+        self.pastas = list(pastas)
+        self.intervalo = intervalo
+        self.extensoes = extensoes
+        self.estabilizador = Estabilizador(espera)
+        self.fonte = criar_fonte(self.pastas, backend, extensoes)
+
+    def iniciar(self) -> None:
+        """Coloca na espera os arquivos que já estavam nas pastas."""
+        self.estabilizador.observar(listar_arquivos(self.pastas, self.extensoes))
+
+    def reenfileirar(self, caminhos: Iterable[str]) -> None:
+        """Devolve arquivos à espera (ex: boleto sem nota, tentar de novo quando chegar XML)."""
+        self.estabilizador.observar(c for c in caminhos if os.path.exists(c))
+
+    def ciclo(self) -> List[str]:
+        """
+        Espera eventos por até `intervalo` segundos.
+
+        Com arquivos pendentes o ciclo não dorme mais que o necessário
+        para conferir se eles ficaram estáveis.
+
+        Returns:
+            Arquivos prontos, XMLs antes de PDFs (a nota entra no índice
+            antes do boleto que depende dela)
+        """
+        timeout = self.intervalo
+        if len(self.estabilizador):
+            timeout = min(timeout, max(self.estabilizador.espera / 4, 0.05))
+        self.estabilizador.observar(self.fonte.aguardar(timeout))
+        prontos = self.estabilizador.prontos()
+        return sorted(prontos, key=lambda caminho: not caminho.lower().endswith('.xml'))
+
+    def fechar(self) -> None:
+        self.fonte.fechar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+    def __repr__(self):
+        return (f"<VigiaPastas backend={self.fonte.nome} pastas={len(self.pastas)} "
+                f"pendentes={len(self.estabilizador)}>")
@@ -11,6 +11,10 @@ Funcionalidades:
 - Extração de CNPJ, nome, número da nota e valor
 - Validação de emails completos (sem truncamento)
 - Tratamento robusto de erros e XMLs malformados
+- Indexação incremental com índice persistente (cache_nfe.py)
+- Parsing paralelo opcional, com resumo agregado de erros e conflitos
+- Leitura em uma passada (iterparse) para XMLs grandes, com memória constante
+- Mapa compacto (registro_nfe.py): cada nota guardada uma vez, com apelidos
 
 Autor: Sistema de Boletos v6.0
 Data: 2025-10-30
@@ -20,7 +24,11 @@ Data: 2025-10-30
 import xml.etree.ElementTree as ET
 import re
 import os
+from concurrent.futures import ProcessPoolExecutor
 from decimal import Decimal, InvalidOperation
+from itertools import repeat
+
+from registro_nfe import MapaNFe, NFeRecord
 
 # ==================== CONFIGURAÇÕES ====================
 # Namespace padrão do NFe (obrigatório para parsing correto)
@@ -28,6 +36,10 @@ NFE_NAMESPACE = {
     'nfe': 'http://www.portalfiscal.inf.br/nfe'
 }
 
+# XMLs a partir deste tamanho (bytes) são lidos com iterparse (memória
+# constante). Abaixo disso a árvore completa é mais rápida.
+TAMANHO_MIN_STREAMING_XML = 1024 * 1024
+
 # Regex para validação de email completo
 EMAIL_REGEX = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
 
@@ -144,17 +156,24 @@ def valor_to_decimal(valor_str: str) -> Decimal:
 
 # ==================== FUNÇÃO PRINCIPAL ====================
 
-def extrair_dados_nfe(caminho_xml: str, max_emails: int = 2) -> dict:
+def extrair_dados_nfe(caminho_xml: str, max_emails: int = 2, streaming: bool | None = None) -> dict:
     """
     Extrai todos os dados relevantes de um XML NFe para envio de boletos.
 
-    Esta é a função principal do módulo. Ela faz o parsing completo do XML
+    Esta é a função principal do módulo. Ela faz o parsing do XML
     e retorna um dicionário com todos os dados necessários para validação
     e envio de emails.
 
+    XMLs grandes (acima de TAMANHO_MIN_STREAMING_XML) são lidos em uma
+    única passada com iterparse, liberando cada elemento assim que ele
+    termina, para que a memória não cresça com a quantidade de itens
+    <det>. Os demais são lidos com a árvore completa, que no CPython é
+    mais rápida. O resultado é o mesmo nos dois modos.
+
     Args:
         caminho_xml: Caminho completo para o arquivo XML
         max_emails: Número máximo de emails a retornar (padrão: 2)
+        streaming: True/False força o modo de leitura; None = pelo tamanho
 
     Returns:
         Dicionário com estrutura:
@@ -199,87 +218,58 @@ def extrair_dados_nfe(caminho_xml: str, max_emails: int = 2) -> dict:
         return resultado
 
     try:
-        # Parse do XML
-        tree = ET.parse(caminho_xml)
-        root = tree.getroot()
+        # ===== LEITURA DO XML =====
+        # Os dois leitores devolvem o texto bruto da PRIMEIRA ocorrência de
+        # cada campo; a interpretação abaixo é a mesma para ambos.
+        if streaming is None:
+            streaming = os.path.getsize(caminho_xml) >= TAMANHO_MIN_STREAMING_XML
+        if streaming:
+            campos = _ler_campos_nfe_streaming(caminho_xml)
+        else:
+            campos = _ler_campos_nfe_arvore(caminho_xml)
 
         # ===== EXTRAÇÃO DE DADOS =====
 
         # 1. Número da Nota (tag: <nNF>)
-        nNF_elem = root.find('.//nfe:nNF', NFE_NAMESPACE)
-        if nNF_elem is not None and nNF_elem.text:
-            resultado['numero_nota'] = nNF_elem.text.strip()
+        nNF_texto = campos['nNF']
+        if nNF_texto:
+            resultado['numero_nota'] = nNF_texto.strip()
 
         # 2. Valor Total da Nota (tag: <vNF>)
-        vNF_elem = root.find('.//nfe:vNF', NFE_NAMESPACE)
-        if vNF_elem is not None and vNF_elem.text:
-            resultado['valor_total'] = valor_to_decimal(vNF_elem.text)
+        vNF_texto = campos['vNF']
+        if vNF_texto:
+            resultado['valor_total'] = valor_to_decimal(vNF_texto)
 
         # 3. Dados do Destinatário (seção <dest>)
-        dest = root.find('.//nfe:dest', NFE_NAMESPACE)
+        dest = campos['dest']
 
         if dest is not None:
             # 3a. CNPJ do destinatário (14 dígitos)
-            cnpj_elem = dest.find('nfe:CNPJ', NFE_NAMESPACE)
-            if cnpj_elem is not None and cnpj_elem.text:
-                resultado['cnpj'] = normalizar_cnpj(cnpj_elem.text)
+            if dest.get('CNPJ'):
+                resultado['cnpj'] = normalizar_cnpj(dest['CNPJ'])
                 resultado['cpf_cnpj'] = resultado['cnpj']
 
             # 3b. CPF do destinatário (11 dígitos) - para pessoa física
             if not resultado['cpf_cnpj']:  # Só tentar CPF se não achou CNPJ
-                cpf_elem = dest.find('nfe:CPF', NFE_NAMESPACE)
-                if cpf_elem is not None and cpf_elem.text:
-                    resultado['cpf'] = normalizar_cpf(cpf_elem.text)
+                if dest.get('CPF'):
+                    resultado['cpf'] = normalizar_cpf(dest['CPF'])
                     resultado['cpf_cnpj'] = resultado['cpf']
 
             # 3c. Nome/Razão Social do destinatário
-            nome_elem = dest.find('nfe:xNome', NFE_NAMESPACE)
-            if nome_elem is not None and nome_elem.text:
-                resultado['nome'] = nome_elem.text.strip()
-
-            # 3c. Emails do destinatário (CAMPO MAIS IMPORTANTE!)
-            email_elem = dest.find('nfe:email', NFE_NAMESPACE)
-            if email_elem is not None and email_elem.text:
-                # Emails podem vir separados por ; ou ,
-                email_text = email_elem.text.strip()
-
-                # Separar por ; ou ,
-                separadores = [';', ',']
-                emails_raw = [email_text]
-
-                for sep in separadores:
-                    emails_temp = []
-                    for e in emails_raw:
-                        emails_temp.extend(e.split(sep))
-                    emails_raw = emails_temp
-
-                # Limpar e validar cada email
-                for email_raw in emails_raw:
-                    email = email_raw.strip()
-
-                    if not email:
-                        continue
-
-                    # Validar se email está completo
-                    if validar_email_completo(email):
-                        # Adicionar apenas se ainda não atingiu o limite
-                        if len(resultado['emails']) < max_emails:
-                            resultado['emails'].append(email)
-                    else:
-                        # Email inválido ou incompleto
-                        resultado['emails_invalidos'].append(email)
+            if dest.get('xNome'):
+                resultado['nome'] = dest['xNome'].strip()
 
-        # 4. Duplicatas (parcelas do boleto)
-        for dup_elem in root.findall('.//nfe:dup', NFE_NAMESPACE):
-            num_dup = dup_elem.find('nfe:nDup', NFE_NAMESPACE)
-            venc_dup = dup_elem.find('nfe:dVenc', NFE_NAMESPACE)
-            valor_dup = dup_elem.find('nfe:vDup', NFE_NAMESPACE)
+            # 3d. Emails do destinatário (CAMPO MAIS IMPORTANTE!)
+            if dest.get('email'):
+                _adicionar_emails(resultado, dest['email'], max_emails)
 
-            if num_dup is not None and venc_dup is not None and valor_dup is not None:
+        # 4. Duplicatas (parcelas do boleto)
+        for dup in campos['dups']:
+            if 'nDup' in dup and 'dVenc' in dup and 'vDup' in dup:
                 duplicata = {
-                    'numero': num_dup.text.strip(),
-                    'vencimento': venc_dup.text.strip(),  # Formato: YYYY-MM-DD
-                    'valor': valor_to_decimal(valor_dup.text)
+                    'numero': dup['nDup'].strip(),
+                    'vencimento': dup['dVenc'].strip(),  # Formato: YYYY-MM-DD
+                    'valor': valor_to_decimal(dup['vDup'])
                 }
                 resultado['duplicatas'].append(duplicata)
 
@@ -297,21 +287,155 @@ def extrair_dados_nfe(caminho_xml: str, max_emails: int = 2) -> dict:
     return resultado
 
 
+# Tags da NFe com namespace, no formato do ElementTree ("{ns}tag")
+_TAG = {nome: f"{{{NFE_NAMESPACE['nfe']}}}{nome}" for nome in (
+    'nNF', 'vNF', 'dest', 'CNPJ', 'CPF', 'xNome', 'email', 'dup', 'nDup', 'dVenc', 'vDup'
+)}
+_CAMPOS_DEST = ('CNPJ', 'CPF', 'xNome', 'email')
+_CAMPOS_DUP = ('nDup', 'dVenc', 'vDup')
+
+# Folhas que precisam continuar no pai até o <dest>/<dup> terminar
+_MANTER_ATE_O_PAI = {_TAG[n] for n in _CAMPOS_DEST + _CAMPOS_DUP}
+
+
+def _filhos_diretos(elem, nomes: tuple) -> dict:
+    """Texto do primeiro filho direto de cada tag presente (como .find())."""
+    filhos = {}
+    for nome in nomes:
+        filho = elem.find(_TAG[nome])
+        if filho is not None:
+            filhos[nome] = filho.text
+    return filhos
+
+
+def _ler_campos_nfe_arvore(caminho_xml: str) -> dict:
+    """
+    Lê o XML inteiro com ET.parse() e devolve o texto bruto dos campos usados.
+
+    Returns:
+        Mesmo formato de _ler_campos_nfe_streaming()
+    """
+    root = ET.parse(caminho_xml).getroot()
+
+    nNF = root.find('.//nfe:nNF', NFE_NAMESPACE)
+    vNF = root.find('.//nfe:vNF', NFE_NAMESPACE)
+    dest = root.find('.//nfe:dest', NFE_NAMESPACE)
+
+    return {
+        'nNF': nNF.text if nNF is not None else None,
+        'vNF': vNF.text if vNF is not None else None,
+        'dest': _filhos_diretos(dest, _CAMPOS_DEST) if dest is not None else None,
+        'dups': [_filhos_diretos(dup, _CAMPOS_DUP) for dup in root.findall('.//nfe:dup', NFE_NAMESPACE)],
+    }
+
+
+def _ler_campos_nfe_streaming(caminho_xml: str) -> dict:
+    """
+    Lê o XML com iterparse e devolve o texto bruto dos campos usados.
+
+    Só escuta o evento 'end': cada elemento é lido quando termina e
+    esvaziado logo em seguida (elem.clear()), então o conteúdo dos itens
+    <det>, que são a maior parte de uma nota grande, é descartado item a
+    item em vez de montar a árvore inteira.
+
+    Returns:
+        {
+            'nNF': str | None,     # texto do primeiro <nNF>
+            'vNF': str | None,     # texto do primeiro <vNF>
+            'dest': dict | None,   # filhos diretos do primeiro <dest>
+            'dups': [dict]         # filhos diretos de cada <dup>
+        }
+    """
+    campos = {'nNF': None, 'vNF': None, 'dest': None, 'dups': []}
+    tag_nnf, tag_vnf, tag_dest, tag_dup = _TAG['nNF'], _TAG['vNF'], _TAG['dest'], _TAG['dup']
+    achou_nnf = achou_vnf = False
+
+    for _, elem in ET.iterparse(caminho_xml):
+        tag = elem.tag
+
+        if tag in _MANTER_ATE_O_PAI:
+            continue
+        if tag == tag_nnf:
+            if not achou_nnf:
+                achou_nnf = True
+                campos['nNF'] = elem.text
+        elif tag == tag_vnf:
+            if not achou_vnf:
+                achou_vnf = True
+                campos['vNF'] = elem.text
+        elif tag == tag_dup:
+            campos['dups'].append(_filhos_diretos(elem, _CAMPOS_DUP))
+        elif tag == tag_dest and campos['dest'] is None:
+            campos['dest'] = _filhos_diretos(elem, _CAMPOS_DEST)
+
+        # Liberar o conteúdo do elemento (filhos, texto, atributos)
+        elem.clear()
+
+    return campos
+
+
+def _adicionar_emails(resultado: dict, email_text: str, max_emails: int) -> None:
+    """Separa os emails do <email> (por ; ou ,) e valida cada um."""
+    # Emails podem vir separados por ; ou ,
+    email_text = email_text.strip()
+
+    # Separar por ; ou ,
+    separadores = [';', ',']
+    emails_raw = [email_text]
+
+    for sep in separadores:
+        emails_temp = []
+        for e in emails_raw:
+            emails_temp.extend(e.split(sep))
+        emails_raw = emails_temp
+
+    # Limpar e validar cada email
+    for email_raw in emails_raw:
+        email = email_raw.strip()
+
+        if not email:
+            continue
+
+        # Validar se email está completo
+        if validar_email_completo(email):
+            # Adicionar apenas se ainda não atingiu o limite
+            if len(resultado['emails']) < max_emails:
+                resultado['emails'].append(email)
+        else:
+            # Email inválido ou incompleto
+            resultado['emails_invalidos'].append(email)
+
+
 # ==================== FUNÇÃO DE INDEXAÇÃO ====================
 
-def indexar_xmls_por_nota(pasta_notas: str, max_emails: int = 2) -> dict:
+# Abaixo disto (XMLs por processo) o custo de subir o pool não compensa
+MIN_XMLS_POR_WORKER = 50
+
+# Quantos nomes de arquivo mostrar por tipo de erro / conflito no resumo
+EXEMPLOS_NO_RESUMO = 3
+
+
+def indexar_xmls_por_nota(pasta_notas: str, max_emails: int = 2, usar_cache: bool = True,
+                          workers: int | None = None) -> dict:
     """
     Indexa todos os XMLs de uma pasta por número de nota.
 
     Cria um mapa de fácil acesso onde a chave é o número da nota
     (últimos 6 dígitos) e o valor são os dados extraídos do XML.
 
+    Com o índice persistente ligado (USAR_CACHE_NFE), só os XMLs novos
+    ou alterados desde a última execução passam pelo parsing.
+
     Args:
         pasta_notas: Caminho da pasta contendo os XMLs
         max_emails: Número máximo de emails por cliente
+        usar_cache: False ignora o índice persistente
+        workers: Processos para o parsing (None = WORKERS_INDEXACAO_XML,
+                 0 = todos os núcleos, 1 = sequencial)
 
     Returns:
-        Dicionário {numero_nota: dados_xml}
+        MapaNFe {numero_nota: NFeRecord}. Cada nota é guardada uma vez
+        (mapa.notas()) e aceita o acesso de dicionário (dados['emails'])
 
     Exemplo:
         >>> mapa = indexar_xmls_por_nota('Notas')
@@ -319,52 +443,210 @@ def indexar_xmls_por_nota(pasta_notas: str, max_emails: int = 2) -> dict:
         >>> if dados and dados['xml_valido']:
         >>>     print(f"Email: {dados['emails'][0]}")
     """
+    mapa, _ = indexar_xmls_com_resumo(pasta_notas, max_emails, usar_cache, workers)
+    return mapa
+
+
+def indexar_xmls_com_resumo(pasta_notas: str, max_emails: int = 2, usar_cache: bool = True,
+                            workers: int | None = None) -> tuple:
+    """
+    Igual a indexar_xmls_por_nota(), devolvendo também o resumo da indexação.
 
-    mapa = {}
-    xmls_processados = 0
-    xmls_validos = 0
-    xmls_invalidos = 0
+    Returns:
+        (mapa, resumo) onde resumo = {
+            'processados': int, 'validos': int, 'invalidos': int,
+            'erros': {tipo_erro: [arquivos]},
+            'conflitos': [(chave, arquivo_usado, arquivo_descartado)]
+        }
+    """
+    resumo = {'processados': 0, 'validos': 0, 'invalidos': 0, 'erros': {}, 'conflitos': []}
 
     if not os.path.exists(pasta_notas):
         print(f"[ERRO] Pasta de notas não encontrada: {pasta_notas}")
-        return mapa
+        return MapaNFe(), resumo
 
-    # Listar todos os XMLs
-    arquivos_xml = [f for f in os.listdir(pasta_notas) if f.lower().endswith('.xml')]
+    # Listar todos os XMLs (ordem fixa: o mapa não depende do sistema de arquivos)
+    arquivos_xml = sorted(f for f in os.listdir(pasta_notas) if f.lower().endswith('.xml'))
 
     print(f"[XML] Indexando XMLs da pasta: {pasta_notas}")
     print(f"[XML] Total de XMLs encontrados: {len(arquivos_xml)}")
 
-    for arquivo_xml in arquivos_xml:
-        caminho_completo = os.path.join(pasta_notas, arquivo_xml)
+    workers = resolver_workers_xml(workers, len(arquivos_xml))
+    lista_dados = _carregar_dados_xmls(pasta_notas, arquivos_xml, max_emails, usar_cache, workers)
 
-        # Extrair dados do XML
-        dados = extrair_dados_nfe(caminho_completo, max_emails)
-        xmls_processados += 1
+    mapa = mesclar_dados_xmls(arquivos_xml, lista_dados, resumo)
+    imprimir_resumo_indexacao(resumo)
 
-        if dados['xml_valido']:
-            # Usar número da nota como chave
-            numero_nota = dados['numero_nota']
+    return mapa, resumo
 
-            # Também criar entrada com últimos 6 dígitos (para compatibilidade)
-            if len(numero_nota) >= 6:
-                chave_curta = numero_nota[-6:]
-                mapa[chave_curta] = dados
 
-            # E a chave completa
-            mapa[numero_nota] = dados
-            xmls_validos += 1
-        else:
-            xmls_invalidos += 1
-            print(f"[AVISO] XML inválido: {arquivo_xml} - Erro: {dados.get('erro', 'Desconhecido')}")
+def mesclar_dados_xmls(arquivos_xml: list, lista_dados: list, resumo: dict) -> MapaNFe:
+    """
+    Monta o mapa {numero_nota: NFeRecord} na ordem de `arquivos_xml`.
 
+    Regras de sempre: cada XML válido entra com a chave completa e com os
+    últimos 6 dígitos; se dois XMLs disputam a mesma chave, vale o que vem
+    depois. Disputas entre notas DIFERENTES (não cópias do mesmo XML) são
+    registradas em resumo['conflitos'].
+
+    Args:
+        arquivos_xml: Nomes dos arquivos
+        lista_dados: Resultado de extrair_dados_nfe() de cada arquivo
+        resumo: Dicionário de contadores (atualizado aqui)
+    """
+    mapa = MapaNFe()
+    origem = {}  # chave -> arquivo que a ocupa
+
+    for arquivo_xml, dados in zip(arquivos_xml, lista_dados):
+        resumo['processados'] += 1
+
+        if not dados['xml_valido']:
+            resumo['invalidos'] += 1
+            # Tipo do erro sem o detalhe (caminho, linha/coluna...)
+            tipo = (dados.get('erro') or 'Desconhecido').split(':')[0]
+            resumo['erros'].setdefault(tipo, []).append(arquivo_xml)
+            continue
+
+        resumo['validos'] += 1
+        numero_nota = dados['numero_nota']
+
+        chaves = chaves_da_nota(numero_nota)
+        for chave in chaves:
+            anterior = mapa.get(chave)
+            if anterior is not None and not _mesma_nota(anterior, dados):
+                resumo['conflitos'].append((chave, arquivo_xml, origem[chave]))
+            origem[chave] = arquivo_xml
+
+        # Registro guardado uma vez; as duas chaves apontam para ele
+        mapa.adicionar(NFeRecord.de_dados(dados), chaves)
+
+    return mapa
+
+
+def chaves_da_nota(numero_nota: str) -> list:
+    """Chaves de uma nota no mapa: últimos 6 dígitos (compatibilidade) e a completa."""
+    chaves = [numero_nota[-6:], numero_nota] if len(numero_nota) >= 6 else [numero_nota]
+    return list(dict.fromkeys(chaves))
+
+
+def adicionar_xml_ao_mapa(mapa: MapaNFe, caminho_xml: str, max_emails: int = 2) -> tuple:
+    """
+    Lê UM XML e acrescenta a nota a um mapa já montado (modo vigia).
+
+    Mesma regra da indexação completa: o XML que chega depois fica com as
+    chaves que disputar. Um XML igual ao que já está no mapa não muda nada.
+
+    Args:
+        mapa: MapaNFe de indexar_xmls_por_nota
+        caminho_xml: Arquivo XML novo ou alterado
+        max_emails: Número máximo de emails por cliente
+
+    Returns:
+        (chaves, substituidas): chaves da nota ([] se o XML é inválido ou
+        não mudou nada) e as que já apontavam para outra nota (para
+        atualizar_indice_nfe reindexar só elas)
+    """
+    dados = extrair_dados_nfe(caminho_xml, max_emails)
+    if not dados['xml_valido']:
+        return [], []
+
+    registro = NFeRecord.de_dados(dados)
+    chaves = chaves_da_nota(dados['numero_nota'])
+    anteriores = [mapa.get(chave) for chave in chaves]
+    if all(anterior == registro for anterior in anteriores):
+        return [], []
+
+    mapa.adicionar(registro, chaves)
+    return chaves, [chave for chave, anterior in zip(chaves, anteriores) if anterior is not None]
+
+
+def _mesma_nota(a: dict, b: dict) -> bool:
+    """True se os dois XMLs descrevem a mesma nota (ex: cópia com outro nome)."""
+    return (a['numero_nota'], a['cpf_cnpj'], a['valor_total']) == \
+           (b['numero_nota'], b['cpf_cnpj'], b['valor_total'])
+
+
+def imprimir_resumo_indexacao(resumo: dict) -> None:
+    """Imprime contadores, erros agrupados por tipo e conflitos de chave."""
     print(f"[XML] Indexação concluída:")
-    print(f"      - XMLs processados: {xmls_processados}")
-    print(f"      - XMLs válidos: {xmls_validos}")
-    print(f"      - XMLs inválidos: {xmls_invalidos}")
+    print(f"      - XMLs processados: {resumo['processados']}")
+    print(f"      - XMLs válidos: {resumo['validos']}")
+    print(f"      - XMLs inválidos: {resumo['invalidos']}")
+
+    for tipo, arquivos in sorted(resumo['erros'].items()):
+        exemplos = ", ".join(arquivos[:EXEMPLOS_NO_RESUMO])
+        resto = f" e mais {len(arquivos) - EXEMPLOS_NO_RESUMO}" if len(arquivos) > EXEMPLOS_NO_RESUMO else ""
+        print(f"[AVISO] {tipo}: {len(arquivos)} XML(s) - {exemplos}{resto}")
+
+    if resumo['conflitos']:
+        print(f"[AVISO] {len(resumo['conflitos'])} chave(s) de nota disputada(s) por XMLs diferentes:")
+        for chave, usado, descartado in resumo['conflitos'][:EXEMPLOS_NO_RESUMO]:
+            print(f"      - {chave}: usando {usado} (descartado {descartado})")
+        if len(resumo['conflitos']) > EXEMPLOS_NO_RESUMO:
+            print(f"      - ... e mais {len(resumo['conflitos']) - EXEMPLOS_NO_RESUMO}")
     print()
 
-    return mapa
+
+def resolver_workers_xml(workers: int | None, total_xmls: int) -> int:
+    """
+    Define quantos processos usar no parsing.
+
+    None = valor do config (WORKERS_INDEXACAO_XML); 0 ou negativo = todos
+    os núcleos. Nunca usa mais processos que arquivos.
+    """
+    if workers is None:
+        try:
+            from config_server import WORKERS_INDEXACAO_XML
+            workers = WORKERS_INDEXACAO_XML
+        except ImportError:
+            workers = 1
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, total_xmls))
+
+
+def extrair_dados_em_lote(caminhos: list, max_emails: int = 2, workers: int = 1) -> list:
+    """
+    Roda extrair_dados_nfe() em vários XMLs, na ordem de `caminhos`.
+
+    workers > 1 usa ProcessPoolExecutor, limitado a um processo para cada
+    MIN_XMLS_POR_WORKER arquivos (lotes pequenos rodam aqui mesmo).
+    """
+    workers = min(workers, len(caminhos) // MIN_XMLS_POR_WORKER)
+    if workers <= 1:
+        return [extrair_dados_nfe(caminho, max_emails) for caminho in caminhos]
+
+    print(f"[XML] Parsing paralelo: {len(caminhos)} XMLs em {workers} processos")
+    chunksize = max(1, len(caminhos) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(extrair_dados_nfe, caminhos, repeat(max_emails), chunksize=chunksize))
+
+
+def _carregar_dados_xmls(pasta_notas: str, arquivos_xml: list, max_emails: int, usar_cache: bool,
+                         workers: int = 1) -> list:
+    """
+    Dados de cada XML, na ordem de `arquivos_xml`.
+
+    Usa o índice persistente quando disponível; qualquer problema com ele
+    (banco corrompido, travado, sem permissão) cai no parsing completo.
+    """
+    def extrair_lote(caminhos, limite_emails):
+        return extrair_dados_em_lote(caminhos, limite_emails, workers)
+
+    if usar_cache:
+        try:
+            # Import tardio: cache_nfe importa este módulo
+            from cache_nfe import obter_cache_nfe
+            cache = obter_cache_nfe()
+            if cache is not None:
+                lista_dados = cache.sincronizar(pasta_notas, arquivos_xml, max_emails, extrair_lote)
+                print(f"[XML] Cache: {cache.reaproveitados} reaproveitado(s), "
+                      f"{cache.lidos} lido(s), {cache.removidos} removido(s)")
+                return lista_dados
+        except Exception as e:
+            print(f"[AVISO] Índice de XMLs indisponível, lendo todos: {e}")
+
+    return extrair_lote([os.path.join(pasta_notas, arquivo) for arquivo in arquivos_xml], max_emails)
 
 
 # ==================== TESTES ====================